@@ -0,0 +1,211 @@
+import atexit
+import hashlib
+import os
+import pickle
+import threading
+from typing import Any, Optional
+
+import yaml
+
+from one_dragon.utils import os_utils
+from one_dragon.utils.log_utils import log
+
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+"""优先使用 libyaml 的C实现加载器 不可用时退回纯python实现"""
+
+_BUNDLE_VERSION: int = 2
+"""快照格式版本 格式变化时递增 旧快照会被丢弃重建"""
+
+
+def load_yaml_file(file_path: str) -> Any:
+    """
+    读取一个yml文件
+    :param file_path: 文件路径
+    :return: 解析后的数据
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return yaml.load(file, Loader=YAML_LOADER)
+
+
+def _file_sha256(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+class _BundleEntry:
+
+    def __init__(self, mtime: float, sha256: str, data_bytes: bytes, data: Any = None):
+        """
+        快照中的一个文件
+        快照保存的是刚解析完时的序列化结果 调用方修改返回的数据不会进入快照
+        :param mtime: 修改时间
+        :param sha256: 文件内容的sha256
+        :param data_bytes: 解析后数据的pickle
+        :param data: 反序列化后的数据 第一次使用时才反序列化
+        """
+        self.mtime: float = mtime
+        self.sha256: str = sha256
+        self.data_bytes: bytes = data_bytes
+        self.data: Any = data
+
+    def get_data(self) -> Any:
+        if self.data is None:
+            self.data = pickle.loads(self.data_bytes)
+        return self.data
+
+
+def _parse_entry(file_path: str, mtime: float, sha256: str) -> _BundleEntry:
+    """
+    解析一个yml文件 作为快照中的一项
+    """
+    log.debug(f"加载yaml: {file_path}")
+    data = load_yaml_file(file_path)
+    return _BundleEntry(mtime, sha256, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), data)
+
+
+class YamlBundle:
+
+    def __init__(self, source_dir: str, bundle_path: str):
+        """
+        只读yml的预解析快照
+        将一个目录下所有的yml解析后存为单个pickle文件 启动时一次读取即可
+        每个文件在清单中记录修改时间和sha256 修改时间变化时用sha256判断内容是否真的变化
+        :param source_dir: yml所在的根目录 例如 assets
+        :param bundle_path: 快照文件的路径
+        """
+        self.source_dir: str = os.path.abspath(source_dir)
+        self.bundle_path: str = bundle_path
+
+        self._entries: Optional[dict[str, _BundleEntry]] = None
+        """相对路径 -> 快照中的文件"""
+
+        self._dirty: bool = False
+        """内存中的快照有更新 还没有写入文件"""
+
+        self._lock = threading.Lock()
+
+    def contains(self, file_path: str) -> bool:
+        """
+        文件是否在快照管理的目录下
+        :param file_path: 文件路径
+        :return:
+        """
+        abs_path = os.path.abspath(file_path)
+        return abs_path.startswith(self.source_dir + os.sep) and abs_path.endswith('.yml')
+
+    def get(self, file_path: str) -> Any:
+        """
+        读取一个yml文件的数据 快照中的数据失效时重新解析并更新内存中的快照
+        快照文件不在这里写入 多个文件更新后由 save_if_dirty 一次写入
+        同一进程中多次读取返回同一个对象
+        :param file_path: 文件路径
+        :return: 解析后的数据
+        """
+        rel_path = os.path.relpath(os.path.abspath(file_path), self.source_dir)
+        mtime = os.path.getmtime(file_path)
+        with self._lock:
+            if self._entries is None:
+                self._load_or_build()
+
+            entry = self._entries.get(rel_path)
+            if entry is not None and entry.mtime == mtime:
+                return entry.get_data()
+
+            sha256 = _file_sha256(file_path)
+            if entry is not None and entry.sha256 == sha256:
+                # 内容没变 只是修改时间变了 例如git checkout后
+                entry.mtime = mtime
+            else:
+                entry = _parse_entry(file_path, mtime, sha256)
+                self._entries[rel_path] = entry
+            self._dirty = True
+            return entry.get_data()
+
+    def save_if_dirty(self) -> None:
+        """
+        内存中的快照有更新时 写入快照文件
+        :return:
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._save()
+
+    def _load_or_build(self) -> None:
+        """
+        读取快照文件 去掉已经被删除的文件
+        快照不存在或者版本不对时 重新扫描整个目录构建
+        :return:
+        """
+        if os.path.exists(self.bundle_path):
+            try:
+                with open(self.bundle_path, 'rb') as file:
+                    bundle = pickle.load(file)
+                if bundle.get('version') == _BUNDLE_VERSION and bundle.get('source_dir') == self.source_dir:
+                    self._entries = {
+                        rel_path: _BundleEntry(mtime, sha256, data_bytes)
+                        for rel_path, (mtime, sha256, data_bytes) in bundle['entries'].items()
+                    }
+                    removed = [i for i in self._entries if not os.path.exists(os.path.join(self.source_dir, i))]
+                    if len(removed) > 0:
+                        for rel_path in removed:
+                            self._entries.pop(rel_path)
+                        self._dirty = True
+                    return
+            except Exception:
+                log.error(f'yml快照读取失败 将重新构建 {self.bundle_path}', exc_info=True)
+
+        self._entries = {}
+        for root, _, files in os.walk(self.source_dir):
+            for file_name in files:
+                if not file_name.endswith('.yml'):
+                    continue
+                file_path = os.path.join(root, file_name)
+                rel_path = os.path.relpath(file_path, self.source_dir)
+                try:
+                    self._entries[rel_path] = _parse_entry(file_path, os.path.getmtime(file_path),
+                                                           _file_sha256(file_path))
+                except Exception:
+                    log.error(f'yml解析失败 跳过 {file_path}', exc_info=True)
+        self._save()
+
+    def _save(self) -> None:
+        """
+        写入快照文件 先写临时文件再替换 避免进程中断时留下损坏的快照
+        只写入解析时的序列化结果 不会把内存中被修改过的数据写进去
+        :return:
+        """
+        bundle = {
+            'version': _BUNDLE_VERSION,
+            'source_dir': self.source_dir,
+            'entries': {
+                rel_path: (entry.mtime, entry.sha256, entry.data_bytes)
+                for rel_path, entry in self._entries.items()
+            },
+        }
+        temp_path = self.bundle_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                pickle.dump(bundle, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.bundle_path)
+            self._dirty = False
+        except Exception:
+            log.error(f'yml快照保存失败 {self.bundle_path}', exc_info=True)
+
+
+_asset_bundle: Optional[YamlBundle] = None
+
+
+def get_asset_bundle() -> YamlBundle:
+    """
+    assets 目录下只读yml的快照
+    :return:
+    """
+    global _asset_bundle
+    if _asset_bundle is None:
+        _asset_bundle = YamlBundle(
+            source_dir=os_utils.get_path_under_work_dir('assets'),
+            bundle_path=os.path.join(os_utils.get_path_under_work_dir('.cache'), 'assets_yml.pickle'),
+        )
+        atexit.register(_asset_bundle.save_if_dirty)
+    return _asset_bundle
@@ -2,8 +2,8 @@ import os
 import sys
 from typing import Optional
 
-import yaml
-
+from one_dragon.base.config.yaml_bundle import get_asset_bundle, load_yaml_file
+from one_dragon.base.config.yaml_write_behind import yaml_write_behind, write_text_atomic
 from one_dragon.utils.log_utils import log
 
 cached_yaml_data: dict[str, tuple[float, dict]] = {}
@@ -21,16 +21,19 @@ def get_temp_config_path(file_path: str) -> str:
     return file_path
 
 def read_cache_or_load(file_path: str):
+    asset_bundle = get_asset_bundle()
+    if asset_bundle.contains(file_path):
+        return asset_bundle.get(file_path)
+
     cached = cached_yaml_data.get(file_path)
     last_modify = os.path.getmtime(file_path)
     if cached is not None and cached[0] == last_modify:
         return cached[1]
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        log.debug(f"加载yaml: {file_path}")
-        data = yaml.safe_load(file)
-        cached_yaml_data[file_path] = (last_modify, data)
-        return data
+    log.debug(f"加载yaml: {file_path}")
+    data = load_yaml_file(file_path)
+    cached_yaml_data[file_path] = (last_modify, data)
+    return data
 
 
 class YamlOperator:
@@ -56,6 +59,7 @@ class YamlOperator:
         """
         if self.file_path is None:
             return
+        yaml_write_behind.flush_file(self.file_path)  # 先写入未保存的修改
         if not os.path.exists(self.file_path):
             return
 
@@ -69,11 +73,28 @@ class YamlOperator:
             self.data = {}
 
     def save(self):
+        """
+        保存到文件 只标记为待写入 由后台线程合并后写入
+        :return:
+        """
         if self.file_path is None:
             return
 
-        with open(self.file_path, 'w', encoding='utf-8') as file:
-            yaml.dump(self.data, file, allow_unicode=True, sort_keys=False)
+        yaml_write_behind.mark_dirty(self.file_path, self._get_data_to_save)
+
+    def save_now(self):
+        """
+        立刻保存到文件
+        :return:
+        """
+        if self.file_path is None:
+            return
+
+        yaml_write_behind.mark_dirty(self.file_path, self._get_data_to_save)
+        yaml_write_behind.flush_file(self.file_path)
+
+    def _get_data_to_save(self) -> dict:
+        return self.data
 
     def save_diy(self, text: str):
         """
@@ -84,8 +105,8 @@ class YamlOperator:
         if self.file_path is None:
             return
 
-        with open(self.file_path, "w", encoding="utf-8") as file:
-            file.write(text)
+        with yaml_write_behind.cancel_and_lock(self.file_path):
+            write_text_atomic(self.file_path, text)
 
     def get(self, prop: str, value=None):
         return self.data.get(prop, value)
@@ -104,8 +125,9 @@ class YamlOperator:
         删除配置文件
         :return:
         """
-        if os.path.exists(self.file_path):
-            os.remove(self.file_path)
+        with yaml_write_behind.cancel_and_lock(self.file_path):
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
 
     def is_file_exists(self) -> bool:
         """
@@ -0,0 +1,231 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import yaml
+
+from one_dragon.utils.log_utils import log
+
+
+def write_text_atomic(file_path: str, text: str) -> None:
+    """
+    原子地写入文本文件 先写临时文件再替换
+    进程在写入过程中被杀掉时 原文件保持完整
+    :param file_path: 文件路径
+    :param text: 文本内容
+    :return:
+    """
+    temp_path = file_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+
+
+def dump_yaml_text(data: dict) -> str:
+    """
+    将数据转为yml文本
+    :param data: 数据
+    :return:
+    """
+    return yaml.dump(data, allow_unicode=True, sort_keys=False)
+
+
+class _PendingWrite:
+
+    def __init__(self, get_data: Callable[[], dict], due_time: float):
+        self.get_data: Callable[[], dict] = get_data
+        """写入时再获取最新的数据 这样多次修改只需要写一次"""
+
+        self.due_time: float = due_time
+        """最晚的写入时间"""
+
+
+class YamlWriteBehind:
+
+    MAX_DUMP_RETRY: int = 10
+    """数据正在被修改时 转换为yml文本的最大重试次数"""
+
+    def __init__(self, delay_seconds: float = 1):
+        """
+        yml配置的延迟写入
+        save时只标记为脏数据 由后台线程合并后写入 把磁盘IO移出运行中的指令循环
+        :param delay_seconds: 第一次标记后延迟多久写入 期间的多次保存会合并为一次
+        """
+        self.delay_seconds: float = delay_seconds
+        self._pending: dict[str, _PendingWrite] = {}
+        self._condition = threading.Condition()
+        self._file_locks: dict[str, threading.Lock] = {}
+        self._cancel_times: dict[str, int] = {}  # 文件被取消写入的次数 写入前与取出数据时的次数不同 说明已经被取消
+        self._thread: Optional[threading.Thread] = None
+        self._running: bool = True
+
+    def mark_dirty(self, file_path: str, get_data: Callable[[], dict]) -> None:
+        """
+        标记一个文件需要写入
+        :param file_path: 文件路径
+        :param get_data: 获取待写入数据的方法
+        :return:
+        """
+        if not self._running:  # 已经关闭 直接写入
+            self._write(file_path, get_data, self._get_cancel_times(file_path))
+            return
+        self._add_pending(file_path, get_data)
+
+    def _get_cancel_times(self, file_path: str) -> int:
+        with self._condition:
+            return self._cancel_times.get(file_path, 0)
+
+    def _add_pending(self, file_path: str, get_data: Callable[[], dict],
+                     cancel_times: Optional[int] = None) -> bool:
+        """
+        加入待写入 由后台线程写入
+        :param file_path: 文件路径
+        :param get_data: 获取待写入数据的方法
+        :param cancel_times: 取出数据时文件被取消写入的次数 重新加入时传入 期间被取消的话不再加入
+        :return: 是否加入成功 已经关闭时返回False
+        """
+        with self._condition:
+            if cancel_times is not None and self._cancel_times.get(file_path, 0) != cancel_times:
+                return True
+            if not self._running:
+                return False
+            pending = self._pending.get(file_path)
+            if pending is not None:
+                pending.get_data = get_data
+                return True
+            self._pending[file_path] = _PendingWrite(get_data, time.time() + self.delay_seconds)
+            self._ensure_thread()
+            self._condition.notify()
+            return True
+
+    @contextmanager
+    def cancel_and_lock(self, file_path: str):
+        """
+        取消一个文件的待写入 并持有文件锁 用于删除文件或写入自定义文本
+        正在进行的写入会先完成 已经取出但还没开始写入的数据会被放弃
+        :param file_path: 文件路径
+        :return:
+        """
+        with self._condition:
+            self._pending.pop(file_path, None)
+            self._cancel_times[file_path] = self._cancel_times.get(file_path, 0) + 1
+            file_lock = self._file_locks.setdefault(file_path, threading.Lock())
+        with file_lock:
+            yield
+
+    def flush_file(self, file_path: str) -> None:
+        """
+        立刻写入一个文件 用于读取文件前 保证读到的是最新的内容
+        :param file_path: 文件路径
+        :return:
+        """
+        with self._condition:
+            pending = self._pending.pop(file_path, None)
+            file_lock = self._file_locks.get(file_path)
+            cancel_times = self._cancel_times.get(file_path, 0)
+        if pending is not None:
+            self._write(file_path, pending.get_data, cancel_times)
+        elif file_lock is not None:
+            with file_lock:  # 等待后台线程正在进行的写入完成
+                pass
+
+    def flush_all(self) -> None:
+        """
+        立刻写入所有待写入的文件
+        :return:
+        """
+        with self._condition:
+            pending_list = [
+                (file_path, pending, self._cancel_times.get(file_path, 0))
+                for file_path, pending in self._pending.items()
+            ]
+            self._pending.clear()
+        for file_path, pending, cancel_times in pending_list:
+            self._write(file_path, pending.get_data, cancel_times)
+
+    def shutdown(self) -> None:
+        """
+        关闭后台线程 并写入所有待写入的文件
+        之后的保存都会直接写入
+        :return:
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.flush_all()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='yaml_write_behind', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                now = time.time()
+                due_list = [
+                    (file_path, pending, self._cancel_times.get(file_path, 0))
+                    for file_path, pending in self._pending.items()
+                    if pending.due_time <= now
+                ]
+                for file_path, _, _ in due_list:
+                    self._pending.pop(file_path)
+                if len(due_list) == 0:
+                    if len(self._pending) == 0:
+                        self._condition.wait()
+                    else:
+                        next_due = min(pending.due_time for pending in self._pending.values())
+                        self._condition.wait(max(next_due - now, 0))
+                    continue
+
+            for file_path, pending, cancel_times in due_list:
+                self._write(file_path, pending.get_data, cancel_times)
+
+    def _write(self, file_path: str, get_data: Callable[[], dict], cancel_times: int) -> None:
+        """
+        写入一个文件
+        :param file_path: 文件路径
+        :param get_data: 获取待写入数据的方法
+        :param cancel_times: 取出数据时文件被取消写入的次数 拿到文件锁后不同的话 说明已经被删除或改写 放弃写入
+        :return:
+        """
+        with self._condition:
+            file_lock = self._file_locks.setdefault(file_path, threading.Lock())
+        with file_lock:
+            if self._get_cancel_times(file_path) != cancel_times:
+                return
+            text = self._dump_with_retry(get_data)
+            if text is not None:
+                try:
+                    write_text_atomic(file_path, text)
+                except Exception:
+                    log.error(f'配置文件保存失败 {file_path}', exc_info=True)
+                return
+
+        # 多次重试仍失败 释放文件锁后交给后台线程稍后写入 不在这里同步重写
+        if not self._add_pending(file_path, get_data, cancel_times):
+            log.error(f'配置文件保存失败 数据一直在被修改 {file_path}')
+
+    def _dump_with_retry(self, get_data: Callable[[], dict]) -> Optional[str]:
+        """
+        将数据转为yml文本 其他线程正在修改数据时 dump 会抛出 RuntimeError 稍等后重试
+        :param get_data: 获取待写入数据的方法
+        :return: yml文本 多次重试仍失败时返回None
+        """
+        for _ in range(YamlWriteBehind.MAX_DUMP_RETRY):
+            try:
+                return dump_yaml_text(get_data())
+            except RuntimeError:
+                time.sleep(0.01)
+        return None
+
+yaml_write_behind = YamlWriteBehind()
+atexit.register(yaml_write_behind.shutdown)
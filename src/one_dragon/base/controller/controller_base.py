@@ -1,9 +1,11 @@
 import time
 
 from cv2.typing import MatLike
-from typing import List
+from typing import List, Optional
 
 from one_dragon.base.geometry.point import Point
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
+from one_dragon.thread.run_state_token import RunStateToken
 
 
 class ScreenshotWithTime:
@@ -24,6 +26,15 @@ class ControllerBase:
         self.screenshot_history: List[ScreenshotWithTime] = []
         self.screenshot_alive_seconds: float = screenshot_alive_seconds  # 截图在内存的存活时间
         self.max_screenshot_cnt: int = max_screenshot_cnt  # 内存中最多保持的截图数量
+        self.run_state_token: Optional[RunStateToken] = None  # 运行状态的令牌 按住按键时用于响应暂停和停止
+
+    def set_run_state_token(self, token: RunStateToken) -> None:
+        """
+        设置运行状态的令牌
+        :param token: 令牌
+        :return:
+        """
+        self.run_state_token = token
 
     def init_before_context_run(self) -> bool:
         """
@@ -32,6 +43,13 @@ class ControllerBase:
         """
         return False
 
+    def release_resources(self) -> None:
+        """
+        释放截图、窗口等资源 控制器被替换或程序关闭前调用 由子类实现
+        :return:
+        """
+        pass
+
     @property
     def is_game_window_ready(self) -> bool:
         """
@@ -50,6 +68,7 @@ class ControllerBase:
         """
         pass
 
+    @operation_profiler.profile(ProfileCategory.SCREENSHOT)
     def screenshot(self, independent: bool = False) -> MatLike:
         """
         截图并保存在内存中
@@ -39,7 +39,7 @@ class KeyboardMouseController(PcButtonController):
             self.keyboard.press(real_key)
 
         if press_time is not None:
-            time.sleep(press_time)
+            self.hold(press_time)
 
             if is_mouse:
                 self.mouse.release(real_key)
@@ -1,10 +1,25 @@
+import time
 from typing import Optional
 
+from one_dragon.thread.run_state_token import RunStateToken
+
 
 class PcButtonController:
 
     def __init__(self):
         self.key_press_time: float = 0.02
+        self.run_state_token: Optional[RunStateToken] = None  # 运行状态的令牌 按住按键时用于响应暂停和停止
+
+    def hold(self, seconds: float) -> bool:
+        """
+        按住按键时的等待 运行中暂停或停止时立刻返回
+        :param seconds: 等待秒数
+        :return: 是否完整等待了
+        """
+        if self.run_state_token is None:
+            time.sleep(seconds)
+            return True
+        return self.run_state_token.hold(seconds)
 
     def tap(self, key: str) -> None:
         """
@@ -1,5 +1,3 @@
-import time
-
 from enum import Enum
 from typing import Callable, List, Optional
 
@@ -103,7 +101,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.left_trigger(value=0)
         self.pad.update()
 
@@ -118,7 +116,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.right_trigger(value=0)
         self.pad.update()
 
@@ -139,7 +137,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.left_joystick_float(0, 0)
         self.pad.update()
 
@@ -154,7 +152,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.left_joystick_float(0, 0)
         self.pad.update()
 
@@ -169,7 +167,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.left_joystick_float(0, 0)
         self.pad.update()
 
@@ -184,7 +182,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.left_joystick_float(0, 0)
         self.pad.update()
 
@@ -211,7 +209,7 @@ class XboxButtonController(PcButtonController):
             if press_time is None:
                 press_time = self.key_press_time
 
-        time.sleep(max(self.key_press_time, press_time))
+        self.hold(max(self.key_press_time, press_time))
         self.pad.release_button(btn)
         self.pad.update()
 
@@ -19,6 +19,7 @@ from one_dragon.base.controller.pc_button.xbox_button_controller import XboxButt
 from one_dragon.base.controller.pc_game_window import PcGameWindow
 from one_dragon.base.geometry.point import Point
 from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.thread.run_state_token import RunStateToken
 from one_dragon.utils.log_utils import log
 
 
@@ -60,6 +61,26 @@ class PcControllerBase(ControllerBase):
 
         return True
 
+    def release_resources(self) -> None:
+        """
+        释放截图、窗口和虚拟手柄 控制器被替换或程序关闭前调用
+        :return:
+        """
+        if self.sct is not None:
+            try:
+                self.sct.close()
+            except Exception:
+                pass
+            self.sct = None
+        self.game_win.clear_win()
+        for pad in [self.xbox_controller, self.ds4_controller]:
+            if pad is not None:
+                pad.reset()  # 松开所有按键
+        self.xbox_controller = None
+        self.ds4_controller = None
+        self.btn_controller = self.keyboard_controller
+        self.screenshot_history.clear()
+
     def active_window(self) -> None:
         """
         前置窗口
@@ -67,10 +88,22 @@ class PcControllerBase(ControllerBase):
         self.game_win.init_win()
         self.game_win.active()
 
+    def set_run_state_token(self, token: RunStateToken) -> None:
+        """
+        设置运行状态的令牌 同时传给各个按键控制器
+        :param token: 令牌
+        :return:
+        """
+        ControllerBase.set_run_state_token(self, token)
+        for btn_controller in [self.keyboard_controller, self.xbox_controller, self.ds4_controller]:
+            if btn_controller is not None:
+                btn_controller.run_state_token = token
+
     def enable_xbox(self):
         if pc_button_utils.is_vgamepad_installed():
             if self.xbox_controller is None:
                 self.xbox_controller = XboxButtonController()
+                self.xbox_controller.run_state_token = self.run_state_token
             self.btn_controller = self.xbox_controller
             self.btn_controller.reset()
 
@@ -78,6 +111,7 @@ class PcControllerBase(ControllerBase):
         if pc_button_utils.is_vgamepad_installed():
             if self.ds4_controller is None:
                 self.ds4_controller = Ds4ButtonController()
+                self.ds4_controller.run_state_token = self.run_state_token
             self.btn_controller = self.ds4_controller
             self.btn_controller.reset()
 
@@ -112,7 +146,7 @@ class PcControllerBase(ControllerBase):
         if pc_alt:
             self.keyboard_controller.keyboard.press(keyboard.Key.alt)
             time.sleep(0.2)
-        win_click(click_pos, press_time=press_time)
+        win_click(click_pos, press_time=press_time, run_state_token=self.run_state_token)
         if pc_alt:
             self.keyboard_controller.keyboard.release(keyboard.Key.alt)
         return True
@@ -208,12 +242,14 @@ class PcControllerBase(ControllerBase):
             pyautogui.moveTo(win_pos.x, win_pos.y)
 
 
-def win_click(pos: Point = None, press_time: float = 0, primary: bool = True):
+def win_click(pos: Point = None, press_time: float = 0, primary: bool = True,
+              run_state_token: Optional[RunStateToken] = None):
     """
     点击鼠标
     :param pos: 屏幕坐标
     :param press_time: 按住时间
     :param primary: 是否点击鼠标主要按键（通常是左键）
+    :param run_state_token: 运行状态的令牌 按住期间暂停或停止时立刻松开
     :return:
     """
     btn = pyautogui.PRIMARY if primary else pyautogui.SECONDARY
@@ -222,7 +258,10 @@ def win_click(pos: Point = None, press_time: float = 0, primary: bool = True):
     if press_time > 0:
         pyautogui.moveTo(pos.x, pos.y)
         pyautogui.mouseDown(button=btn)
-        time.sleep(press_time)
+        if run_state_token is None:
+            time.sleep(press_time)
+        else:
+            run_state_token.hold(press_time)
         pyautogui.mouseUp(button=btn)
     else:
         pyautogui.click(pos.x, pos.y, button=btn)
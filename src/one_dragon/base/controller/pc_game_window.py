@@ -36,6 +36,14 @@ class PcGameWindow:
                     self._win = win
                     self._hWnd = win._hWnd
 
+    def clear_win(self) -> None:
+        """
+        解除绑定的窗口 下次使用时重新查找
+        :return:
+        """
+        self._win = None
+        self._hWnd = None
+
     def get_win(self) -> Optional[Win32Window]:
         if self._win is None:
             self.init_win()
@@ -9,6 +9,7 @@ from one_dragon.base.matcher.match_result import MatchResult, MatchResultList
 from one_dragon.base.matcher.ocr import ocr_utils
 from one_dragon.base.matcher.ocr.ocr_match_result import OcrMatchResult
 from one_dragon.base.matcher.ocr.ocr_matcher import OcrMatcher
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
 from one_dragon.base.web.common_downloader import CommonDownloaderParam
 from one_dragon.base.web.zip_downloader import ZipDownloader
 from one_dragon.utils import os_utils
@@ -137,6 +138,7 @@ class OnnxOcrMatcher(OcrMatcher, ZipDownloader):
         self._loading = False
         return True
 
+    @operation_profiler.profile(ProfileCategory.OCR)
     def run_ocr_single_line(self, image: MatLike, threshold: float = 0, strict_one_line: bool = True) -> str:
         """
         单行文本识别 手动合成一行 按匹配结果从左到右 从上到下
@@ -153,6 +155,7 @@ class OnnxOcrMatcher(OcrMatcher, ZipDownloader):
             tmp = ocr_utils.merge_ocr_result_to_single_line(ocr_map, join_space=False)
             return tmp
 
+    @operation_profiler.profile(ProfileCategory.OCR)
     def run_ocr(self, image: MatLike, threshold: float = 0,
                 merge_line_distance: float = -1) -> dict[str, MatchResultList]:
         """
@@ -254,6 +257,7 @@ class OnnxOcrMatcher(OcrMatcher, ZipDownloader):
 
         return {key: all_match_result[key] for key in match_key if key in all_match_result}
 
+    @operation_profiler.profile(ProfileCategory.OCR)
     def ocr(self, image: MatLike, threshold: float = 0,
             merge_line_distance: float = -1) -> list[OcrMatchResult]:
         """
@@ -7,6 +7,7 @@ from cv2.typing import MatLike
 from one_dragon.base.matcher.match_result import MatchResult, MatchResultList
 from one_dragon.base.matcher.ocr import ocr_utils
 from one_dragon.base.matcher.ocr.ocr_matcher import OcrMatcher
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
 from one_dragon.utils import os_utils
 from one_dragon.utils.log_utils import log
 
@@ -52,6 +53,7 @@ class PaddleOcrMatcher(OcrMatcher):
 
         return True
 
+    @operation_profiler.profile(ProfileCategory.OCR)
     def run_ocr_single_line(self, image: MatLike, threshold: float = None, strict_one_line: bool = True) -> str:
         """
         单行文本识别 手动合成一行 按匹配结果从左到右 从上到下
@@ -68,6 +70,7 @@ class PaddleOcrMatcher(OcrMatcher):
             tmp = ocr_utils.merge_ocr_result_to_single_line(ocr_map, join_space=False)
             return tmp
 
+    @operation_profiler.profile(ProfileCategory.OCR)
     def run_ocr(self, image: MatLike, threshold: float = None,
                 merge_line_distance: float = -1) -> dict[str, MatchResultList]:
         """
@@ -5,7 +5,6 @@ import hmac
 import json
 import re
 import smtplib
-import threading
 import time
 import urllib.parse
 
@@ -15,15 +14,16 @@ from email.header import Header
 from email.utils import formataddr
 from typing import Optional
 
+from one_dragon.base.notify import push_dispatcher
+from one_dragon.base.notify.push_dispatcher import PushSession
 from one_dragon.base.operation.one_dragon_context import OneDragonContext
 from one_dragon.utils.log_utils import log
 
-import requests
-
 class Push():
 
     def __init__(self, ctx: OneDragonContext):
         self.ctx: OneDragonContext = ctx
+        self.session: PushSession = push_dispatcher.get_push_session()  # 共用的会话 复用连接
 
 
     def bark(self, title: str, content: str, image: Optional[BytesIO]) -> None:
@@ -58,7 +58,7 @@ class Push():
         if self.get_config("BARK_URL"):
             data["url"] = self.get_config("BARK_URL")
         headers = {"Content-Type": "application/json;charset=utf-8"}
-        response = requests.post(
+        response = self.session.post(
             url=url, data=json.dumps(data), headers=headers, timeout=15
         ).json()
 
@@ -94,7 +94,7 @@ class Push():
         url = f'https://oapi.dingtalk.com/robot/send?access_token={self.get_config("DD_BOT_TOKEN")}&timestamp={timestamp}&sign={sign}'
         headers = {"Content-Type": "application/json;charset=utf-8"}
         data = {"msgtype": "text", "text": {"content": f"{title}\n{content}"}}
-        response = requests.post(
+        response = self.session.post(
             url=url, data=json.dumps(data), headers=headers, timeout=15
         ).json()
 
@@ -113,7 +113,7 @@ class Push():
 
         url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{self.get_config("FS_KEY")}'
         data = {"msg_type": "text", "content": {"text": f"{title}\n{content}"}}
-        response = requests.post(url, data=json.dumps(data)).json()
+        response = self.session.post(url, data=json.dumps(data)).json()
 
         if response.get("StatusCode") == 0 or response.get("code") == 0:
             self.log_info("飞书 推送成功！")
@@ -151,7 +151,7 @@ class Push():
         if user_id != "":
             data_private["message_type"] = "private"
             data_private["user_id"] = user_id
-            response_private = requests.post(url, data=json.dumps(data_private), headers=headers).json()
+            response_private = self.session.post(url, data=json.dumps(data_private), headers=headers).json()
 
             if response_private["status"] == "ok":
                 self.log_info("OneBot 私聊推送成功！")
@@ -161,7 +161,7 @@ class Push():
         if group_id != "":
             data_group["message_type"] = "group"
             data_group["group_id"] = group_id
-            response_group = requests.post(url, data=json.dumps(data_group), headers=headers).json()
+            response_group = self.session.post(url, data=json.dumps(data_group), headers=headers).json()
 
             if response_group["status"] == "ok":
                 self.log_info("OneBot 群聊推送成功！")
@@ -182,7 +182,7 @@ class Push():
             "message": content,
             "priority": self.get_config("GOTIFY_PRIORITY"),
         }
-        response = requests.post(url, data=data).json()
+        response = self.session.post(url, data=data).json()
 
         if response.get("id"):
             self.log_info("gotify 推送成功！")
@@ -200,7 +200,7 @@ class Push():
         url = f'https://push.hellyw.com/{self.get_config("IGOT_PUSH_KEY")}'
         data = {"title": title, "content": content}
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        response = requests.post(url, data=data, headers=headers).json()
+        response = self.session.post(url, data=data, headers=headers).json()
 
         if response["ret"] == 0:
             self.log_info("iGot 推送成功！")
@@ -224,7 +224,7 @@ class Push():
         else:
             url = f'https://sctapi.ftqq.com/{self.get_config("SERVERCHAN_PUSH_KEY")}.send'
 
-        response = requests.post(url, data=data).json()
+        response = self.session.post(url, data=data).json()
 
         if response.get("errno") == 0 or response.get("code") == 0:
             self.log_info("Server 酱 推送成功！")
@@ -248,7 +248,7 @@ class Push():
         if self.get_config("DEER_URL"):
             url = self.get_config("DEER_URL")
 
-        response = requests.post(url, data=data).json()
+        response = self.session.post(url, data=data).json()
 
         if len(response.get("content").get("result")) > 0:
             self.log_info("PushDeer 推送成功！")
@@ -264,7 +264,7 @@ class Push():
         self.log_info("chat 服务启动")
         data = "payload=" + json.dumps({"text": title + "\n" + content})
         url = self.get_config("CHAT_URL") + self.get_config("CHAT_TOKEN")
-        response = requests.post(url, data=data)
+        response = self.session.post(url, data=data)
 
         if response.status_code == 200:
             self.log_info("Chat 推送成功！")
@@ -293,7 +293,7 @@ class Push():
         }
         body = json.dumps(data).encode(encoding="utf-8")
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url=url, data=body, headers=headers).json()
+        response = self.session.post(url=url, data=body, headers=headers).json()
 
         code = response["code"]
         if code == 200:
@@ -307,7 +307,7 @@ class Push():
         else:
             url_old = "http://pushplus.hxtrip.com/send"
             headers["Accept"] = "application/json"
-            response = requests.post(url=url_old, data=body, headers=headers).json()
+            response = self.session.post(url=url_old, data=body, headers=headers).json()
 
             if response["code"] == 200:
                 self.log_info("PUSHPLUS(hxtrip) 推送成功！")
@@ -338,7 +338,7 @@ class Push():
         }
         body = json.dumps(data).encode(encoding="utf-8")
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url=url, data=body, headers=headers).json()
+        response = self.session.post(url=url, data=body, headers=headers).json()
 
         if response["code"] == 200:
             self.log_info("微加机器人 推送成功！")
@@ -355,7 +355,7 @@ class Push():
 
         url = f'https://qmsg.zendee.cn/{self.get_config("QMSG_TYPE")}/{self.get_config("QMSG_KEY")}'
         payload = {"msg": f'{title}\n{content.replace("----", "-")}'.encode("utf-8")}
-        response = requests.post(url=url, params=payload).json()
+        response = self.session.post(url=url, params=payload).json()
 
         if response["code"] == 0:
             self.log_info("qmsg 推送成功！")
@@ -385,7 +385,7 @@ class Push():
             origin = self.get_config("QYWX_ORIGIN")
         else:
             origin = "https://qyapi.weixin.qq.com"
-        wx = self.WeCom(corpid, corpsecret, agentid, origin)
+        wx = self.WeCom(corpid, corpsecret, agentid, origin, self.session)
         # 如果没有配置 media_id 默认就以 text 方式发送
         if not media_id:
             message = title + "\n\n" + content
@@ -400,7 +400,8 @@ class Push():
 
 
     class WeCom:
-        def __init__(self, corpid, corpsecret, agentid, origin):
+        def __init__(self, corpid, corpsecret, agentid, origin, session: PushSession):
+            self.session = session
             self.CORPID = corpid
             self.CORPSECRET = corpsecret
             self.AGENTID = agentid
@@ -412,7 +413,7 @@ class Push():
                 "corpid": self.CORPID,
                 "corpsecret": self.CORPSECRET,
             }
-            req = requests.post(url, params=values)
+            req = self.session.post(url, params=values)
             data = json.loads(req.text)
             return data["access_token"]
 
@@ -428,7 +429,7 @@ class Push():
                 "safe": "0",
             }
             send_msges = bytes(json.dumps(send_values), "utf-8")
-            respone = requests.post(send_url, send_msges)
+            respone = self.session.post(send_url, send_msges)
             respone = respone.json()
             return respone["errmsg"]
 
@@ -454,7 +455,7 @@ class Push():
                 },
             }
             send_msges = bytes(json.dumps(send_values), "utf-8")
-            respone = requests.post(send_url, send_msges)
+            respone = self.session.post(send_url, send_msges)
             respone = respone.json()
             return respone["errmsg"]
 
@@ -473,7 +474,7 @@ class Push():
         url = f"{origin}/cgi-bin/webhook/send?key={self.get_config('QYWX_KEY')}"
         headers = {"Content-Type": "application/json;charset=utf-8"}
         data = {"msgtype": "text", "text": {"content": f"{title}\n{content}"}}
-        response = requests.post(
+        response = self.session.post(
             url=url, data=json.dumps(data), headers=headers, timeout=15
         ).json()
 
@@ -500,7 +501,7 @@ class Push():
         dm_headers = headers.copy()
         dm_headers["Content-Type"] = "application/json"
         dm_payload = json.dumps({"recipient_id": self.get_config('DISCORD_USER_ID')})
-        response = requests.post(create_dm_url, headers=dm_headers, data=dm_payload, timeout=15)
+        response = self.session.post(create_dm_url, headers=dm_headers, data=dm_payload, timeout=15)
         response.raise_for_status()
         channel_id = response.json().get("id")
         if not channel_id or channel_id == "":
@@ -521,7 +522,7 @@ class Push():
             headers["Content-Type"] = "application/json"
             data = json.dumps(message_payload_dict)
 
-        response = requests.post(message_url, headers=headers, data=data, files=files, timeout=30)
+        response = self.session.post(message_url, headers=headers, data=data, files=files, timeout=30)
         response.raise_for_status()
         self.log_info("Discord Bot 推送成功！")
 
@@ -559,7 +560,7 @@ class Push():
                 self.get_config("TG_PROXY_HOST"), self.get_config("TG_PROXY_PORT")
             )
             proxies = {"http": proxyStr, "https": proxyStr}
-        response = requests.post(
+        response = self.session.post(
             url=url, headers=headers, params=payload, proxies=proxies
         ).json()
 
@@ -592,7 +593,7 @@ class Push():
             }
         body = json.dumps(data).encode(encoding="utf-8")
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url=url, data=body, headers=headers).json()
+        response = self.session.post(url=url, data=body, headers=headers).json()
         if response["code"] == 0:
             self.log_info("智能微秘书 推送成功！")
         else:
@@ -660,7 +661,7 @@ class Push():
             "date": self.get_config("date") if self.get_config("date") else "",
             "type": self.get_config("type") if self.get_config("type") else "",
         }
-        response = requests.post(url, data=data)
+        response = self.session.post(url, data=data)
 
         if response.status_code == 200 and response.text == "success":
             self.log_info("PushMe 推送成功！")
@@ -697,7 +698,7 @@ class Push():
                         }
                     ],
                 }
-                response = requests.post(url, headers=headers, data=json.dumps(data))
+                response = self.session.post(url, headers=headers, data=json.dumps(data))
                 if response.status_code == 200:
                     if chat_type == 1:
                         self.log_info(f"QQ个人消息:{ids}推送成功！")
@@ -735,7 +736,7 @@ class Push():
         headers = {"Title": encoded_title, "Priority": priority}  # 使用编码后的 title
 
         url = self.get_config("NTFY_URL") + "/" + self.get_config("NTFY_TOPIC")
-        response = requests.post(url, data=data, headers=headers)
+        response = self.session.post(url, data=data, headers=headers)
         if response.status_code == 200:  # 使用 response.status_code 进行检查
             self.log_info("Ntfy 推送成功！")
         else:
@@ -788,7 +789,7 @@ class Push():
         }
 
         headers = {"Content-Type": "application/json"}
-        response = requests.post(url=url, json=data, headers=headers).json()
+        response = self.session.post(url=url, json=data, headers=headers).json()
 
         if response.get("code") == 1000:
             self.log_info("wxpusher 推送成功！")
@@ -875,7 +876,7 @@ class Push():
         formatted_url = url.replace(
             "$title", urllib.parse.quote_plus(title)
         ).replace("$content", urllib.parse.quote_plus(content))
-        response = requests.request(
+        response = self.session.request(
             method=method, url=formatted_url, headers=headers, timeout=15, data=body
         )
 
@@ -972,15 +973,16 @@ class Push():
 
 
     def send(self, content: str, image: Optional[BytesIO] = None, test_method: Optional[str] = None) -> None:
+        """
+        发送通知 只放入后台的推送队列 不等待发送完成
+        """
         title = self.ctx.push_config.custom_push_title
 
         notify_function = self.add_notify_function()
-        ts = [
-            threading.Thread(target=mode, args=(title, content, image), name=mode.__name__)
-            for mode in notify_function
-        ]
-        [t.start() for t in ts]
-        [t.join() for t in ts]
+        push_dispatcher.get_push_dispatcher().submit(
+            title, content, image,
+            [(mode.__name__, mode) for mode in notify_function]
+        )
 
 
 def main():
@@ -0,0 +1,205 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from one_dragon.utils.log_utils import log
+
+PushChannel = Callable[[str, str, Optional[BytesIO]], None]
+"""一个推送渠道 (标题, 内容, 图片) -> None"""
+
+DEFAULT_TIMEOUT_SECONDS: float = 15
+"""渠道没有指定超时时间时使用的超时时间"""
+
+CHANNEL_TIMEOUT_SECONDS: dict[str, float] = {
+    'discord_bot': 30,  # 需要上传图片
+    'telegram_bot': 30,  # 通常需要代理
+}
+"""各推送渠道的超时时间"""
+
+
+class PushSession(requests.Session):
+
+    def __init__(self, pool_size: int = 8):
+        """
+        推送共用的会话 同一个地址复用连接
+        请求没有指定超时时间时 使用当前推送渠道的超时时间
+        :param pool_size: 每个地址的最大连接数
+        """
+        requests.Session.__init__(self)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        self._local = threading.local()
+
+    @property
+    def channel_timeout(self) -> float:
+        return getattr(self._local, 'timeout', DEFAULT_TIMEOUT_SECONDS)
+
+    @channel_timeout.setter
+    def channel_timeout(self, value: float) -> None:
+        self._local.timeout = value
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.channel_timeout
+        return requests.Session.request(self, method, url, *args, **kwargs)
+
+
+class _PushMessage:
+
+    def __init__(self, title: str, content: str, image_bytes: Optional[bytes],
+                 channel_list: List[Tuple[str, PushChannel]]):
+        self.title: str = title
+        self.content: str = content
+        self.image_bytes: Optional[bytes] = image_bytes
+        self.channel_list: List[Tuple[str, PushChannel]] = channel_list
+
+
+class PushDispatcher:
+
+    def __init__(self, session: PushSession,
+                 queue_size: int = 16,
+                 channel_workers: int = 4,
+                 max_retry: int = 2,
+                 retry_backoff: float = 1):
+        """
+        常驻的推送分发器
+        调用方只把消息放入队列 由后台线程发送 慢的推送渠道不会卡住调用方
+        同一条消息的各个渠道并行发送 网络错误时按退避时间重试
+        :param session: 共用的会话
+        :param queue_size: 等待发送的消息的最大数量 满了之后丢弃最旧的
+        :param channel_workers: 同时发送的渠道数量
+        :param max_retry: 网络错误时的最大重试次数
+        :param retry_backoff: 第一次重试前的等待秒数 之后每次翻倍
+        """
+        self.session: PushSession = session
+        self.max_retry: int = max_retry
+        self.retry_backoff: float = retry_backoff
+
+        self._queue: queue.Queue[_PushMessage] = queue.Queue(maxsize=queue_size)
+        self._channel_executor = ThreadPoolExecutor(thread_name_prefix='od_push_channel', max_workers=channel_workers)
+        self._pending: int = 0  # 已提交但未发送完成的消息数量
+        self._pending_condition = threading.Condition()
+
+        self._worker = threading.Thread(target=self._run, name='od_push_dispatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, title: str, content: str, image: Optional[BytesIO],
+               channel_list: List[Tuple[str, PushChannel]]) -> None:
+        """
+        提交一条消息 不阻塞
+        :param title: 标题
+        :param content: 内容
+        :param image: 图片 只在这里读取一次 各渠道共用
+        :param channel_list: 推送渠道 (名称, 方法)
+        :return:
+        """
+        if len(channel_list) == 0:
+            return
+        image_bytes = image.getvalue() if image is not None else None
+        message = _PushMessage(title, content, image_bytes, channel_list)
+
+        with self._pending_condition:
+            self._pending += 1
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    dropped = self._queue.get_nowait()
+                    log.error('推送队列已满 丢弃消息 %s', dropped.content)
+                    self._message_done()
+                except queue.Empty:
+                    pass
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的消息发送完成
+        :param timeout: 最多等待的秒数 为空时一直等待
+        :return: 是否全部发送完成
+        """
+        with self._pending_condition:
+            return self._pending_condition.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def _message_done(self) -> None:
+        with self._pending_condition:
+            self._pending -= 1
+            self._pending_condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            try:
+                future_list = [
+                    self._channel_executor.submit(self._send_channel, name, channel, message)
+                    for name, channel in message.channel_list
+                ]
+                wait(future_list)
+            except Exception:
+                log.error('推送消息失败', exc_info=True)
+            finally:
+                self._message_done()
+
+    def _send_channel(self, name: str, channel: PushChannel, message: _PushMessage) -> None:
+        """
+        使用一个渠道发送 网络错误时重试
+        :param name: 渠道名称
+        :param channel: 渠道方法
+        :param message: 消息
+        :return:
+        """
+        self.session.channel_timeout = CHANNEL_TIMEOUT_SECONDS.get(name, DEFAULT_TIMEOUT_SECONDS)
+        for retry_times in range(self.max_retry + 1):
+            # 每个渠道使用自己的图片流 避免并发读取时互相影响位置
+            image = BytesIO(message.image_bytes) if message.image_bytes is not None else None
+            try:
+                channel(message.title, message.content, image)
+                return
+            except (requests.ConnectionError, requests.Timeout):  # 只重试网络错误 其它错误重试也没有用
+                if retry_times >= self.max_retry:
+                    log.error('推送渠道 %s 发送失败', name, exc_info=True)
+                    return
+                backoff = self.retry_backoff * (2 ** retry_times)
+                log.info('推送渠道 %s 网络错误 %.1f秒后重试', name, backoff)
+                time.sleep(backoff)
+            except Exception:
+                log.error('推送渠道 %s 发送失败', name, exc_info=True)
+                return
+
+
+_session: Optional[PushSession] = None
+_dispatcher: Optional[PushDispatcher] = None
+_init_lock = threading.Lock()
+
+
+def get_push_session() -> PushSession:
+    """
+    推送共用的会话
+    """
+    global _session
+    with _init_lock:
+        if _session is None:
+            _session = PushSession()
+        return _session
+
+
+def get_push_dispatcher() -> PushDispatcher:
+    """
+    推送分发器 第一次使用时启动
+    退出程序时 最多等待30秒把未发送的消息发送完
+    """
+    global _dispatcher
+    session = get_push_session()
+    with _init_lock:
+        if _dispatcher is None:
+            _dispatcher = PushDispatcher(session)
+            atexit.register(_dispatcher.flush, 30)
+        return _dispatcher
@@ -9,10 +9,10 @@ from one_dragon.base.operation.application_run_record import AppRunRecord
 from one_dragon.base.operation.one_dragon_context import OneDragonContext
 from one_dragon.base.operation.operation import Operation
 from one_dragon.base.operation.operation_base import OperationResult
+from one_dragon.utils.operation_profiler import operation_profiler
 from one_dragon.utils.i18_utils import gt
 
 _app_preheat_executor = ThreadPoolExecutor(thread_name_prefix='od_app_preheat', max_workers=1)
-_notify_executor = ThreadPoolExecutor(thread_name_prefix='od_app_notify', max_workers=1)
 
 
 class ApplicationEventId(Enum):
@@ -65,6 +65,8 @@ class Application(Operation):
         self.notify_screenshot: Optional[BytesIO] = None  # 发送通知的截图
 
     def _init_before_execute(self) -> None:
+        if self.ctx.env_config.operation_profile:
+            operation_profiler.start_session(self.app_id)
         Operation._init_before_execute(self)
         if self.run_record is not None:
             self.run_record.update_status(AppRunRecord.STATUS_RUNNING)
@@ -88,6 +90,7 @@ class Application(Operation):
         :return:
         """
         Operation.after_operation_done(self, result)
+        operation_profiler.stop_session(self.app_id)
         self._update_record_after_stop(result)
         if self.stop_context_after_stop:
             self.ctx.stop_running()
@@ -141,7 +144,7 @@ class Application(Operation):
         message = f"{gt('任务「')}{app_name}{gt('」运行')}{status}\n"
 
         pusher = Push(self.ctx)
-        _notify_executor.submit(pusher.send, message, image)
+        pusher.send(message, image)  # 放入推送队列后返回 不等待发送
 
     @property
     def current_execution_desc(self) -> str:
@@ -1,7 +1,7 @@
 import time
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import ClassVar, Optional
 
 from one_dragon.base.config.yaml_config import YamlConfig
 from one_dragon.utils import os_utils
@@ -20,6 +20,9 @@ class AppRunRecord(YamlConfig):
     STATUS_FAIL = 2
     STATUS_RUNNING = 3
 
+    DEFAULT_ESTIMATED_SECONDS: ClassVar[float] = 300
+    """没有成功运行过时 预计的耗时"""
+
     def __init__(
             self, app_id: str,
             instance_idx: Optional[int] = None,
@@ -31,6 +34,7 @@ class AppRunRecord(YamlConfig):
         self.run_time: str = ''
         self.run_time_float: float = 0
         self.run_status: int = AppRunRecord.STATUS_WAIT  # 0=未运行 1=成功 2=失败 3=运行中
+        self.run_duration: float = 0  # 最近成功运行的平滑耗时 秒
         self.game_refresh_hour_offset: int = game_refresh_hour_offset  # 游戏内每天刷新的偏移小时数 以凌晨12点为界限
         self.record_period: AppRunRecordPeriod = record_period
         super().__init__(app_id, instance_idx=instance_idx, sub_dir=['app_run_record'], sample=False)
@@ -42,6 +46,7 @@ class AppRunRecord(YamlConfig):
         self.run_time = self.get('run_time', '-')
         self.run_time_float = self.get('run_time_float', 0)
         self.run_status = self.get('run_status', AppRunRecord.STATUS_WAIT)
+        self.run_duration = self.get('run_duration', 0)
 
     def check_and_update_status(self):
         """
@@ -58,6 +63,12 @@ class AppRunRecord(YamlConfig):
         :param only_status: 是否只更新状态
         :return:
         """
+        if (new_status == AppRunRecord.STATUS_SUCCESS and self.run_status == AppRunRecord.STATUS_RUNNING
+                and self.run_time_float > 0):  # 运行开始时记录了时间 成功时更新耗时
+            duration = time.time() - self.run_time_float
+            self.run_duration = duration if self.run_duration <= 0 else (self.run_duration + duration) / 2
+            self.update('run_duration', self.run_duration, False)
+
         self.run_status = new_status
         self.update('run_status', self.run_status, False)
         if not only_status:
@@ -77,6 +88,14 @@ class AppRunRecord(YamlConfig):
         """
         self.update_status(AppRunRecord.STATUS_WAIT, only_status=True)
 
+    @property
+    def estimated_seconds(self) -> float:
+        """
+        预计的运行耗时 用于安排多个实例的运行顺序
+        :return:
+        """
+        return self.run_duration if self.run_duration > 0 else AppRunRecord.DEFAULT_ESTIMATED_SECONDS
+
     @property
     def run_status_under_now(self):
         """
@@ -0,0 +1,87 @@
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from one_dragon.utils.startup_profiler import startup_profiler
+
+T = TypeVar('T')
+
+INSTANCE_LAZY_GROUP: str = 'instance'
+"""实例独有的配置和运行记录 切换实例时清除"""
+
+_LOCK_ATTR: str = '_context_lazy_attr_lock'
+"""实例上保存构造锁的属性名"""
+
+
+class ContextLazyAttr(Generic[T]):
+
+    def __init__(self, factory: Callable[[Any], T], group: Optional[str] = None):
+        """
+        上下文中第一次使用时才构造的属性 作为装饰器使用
+        构造后保存在实例的 __dict__ 中 之后的访问不再经过这里 与普通属性一样快
+        也可以直接赋值覆盖 例如调试时替换成其它实现
+        同一个实例中的构造共用一把可重入锁 多个线程同时使用时只构造一次 构造时可以使用其它懒加载属性
+        :param factory: 构造方法 参数为上下文
+        :param group: 分组 可以按分组清除 例如切换实例时清除实例独有的配置
+        """
+        self.factory: Callable[[Any], T] = factory
+        self.group: Optional[str] = group
+        self.name: str = factory.__name__
+        self.owner_name: str = ''
+        self.__doc__ = factory.__doc__
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+        self.owner_name = owner.__name__
+
+    def __get__(self, instance, owner=None) -> T:
+        if instance is None:
+            return self
+        lock = instance.__dict__.get(_LOCK_ATTR)
+        if lock is None:
+            lock = instance.__dict__.setdefault(_LOCK_ATTR, threading.RLock())
+        with lock:
+            if self.name in instance.__dict__:  # 其它线程已经构造好了
+                return instance.__dict__[self.name]
+            with startup_profiler.measure(f'{self.owner_name}.{self.name}'):
+                value = self.factory(instance)
+            instance.__dict__[self.name] = value
+        return value
+
+
+def context_lazy_attr(group: Optional[str] = None) -> Callable[[Callable[[Any], T]], ContextLazyAttr[T]]:
+    """
+    装饰器 把上下文的方法变成懒加载属性
+    :param group: 分组
+    :return:
+    """
+    def decorator(factory: Callable[[Any], T]) -> ContextLazyAttr[T]:
+        return ContextLazyAttr(factory, group=group)
+    return decorator
+
+
+def is_lazy_attr_created(instance, name: str) -> bool:
+    """
+    懒加载属性是否已经构造
+    :param instance: 上下文
+    :param name: 属性名
+    :return:
+    """
+    return name in instance.__dict__
+
+
+def reset_lazy_attr(instance, group: Optional[str] = None) -> None:
+    """
+    清除已经构造的懒加载属性 下次使用时重新构造
+    :param instance: 上下文
+    :param group: 只清除这个分组的 不传入时清除所有
+    :return:
+    """
+    lock = instance.__dict__.setdefault(_LOCK_ATTR, threading.RLock())
+    with lock:
+        for cls in type(instance).__mro__:
+            for name, attr in cls.__dict__.items():
+                if not isinstance(attr, ContextLazyAttr):
+                    continue
+                if group is not None and attr.group != group:
+                    continue
+                instance.__dict__.pop(name, None)
@@ -1,14 +1,19 @@
+import time
 from typing import List, Optional, ClassVar
 
 from one_dragon.base.config.one_dragon_config import OneDragonInstance, InstanceRun
 from one_dragon.base.operation.application_base import Application
 from one_dragon.base.operation.application_run_record import AppRunRecord
 from one_dragon.base.operation.one_dragon_context import OneDragonContext
+from one_dragon.base.operation.one_dragon_schedule import OneDragonScheduler, ScheduleApp, ScheduleInstance
 from one_dragon.base.operation.operation import Operation
 from one_dragon.base.operation.operation_base import OperationResult
 from one_dragon.base.operation.operation_edge import node_from
 from one_dragon.base.operation.operation_node import operation_node
 from one_dragon.base.operation.operation_round_result import OperationRoundResult
+from one_dragon.base.config.game_account_config import GameAccountConfig
+from one_dragon.base.config.one_dragon_app_config import OneDragonAppConfig
+from one_dragon.utils import os_utils
 from one_dragon.utils.i18_utils import gt
 from one_dragon.utils.log_utils import log
 
@@ -18,6 +23,7 @@ class OneDragonApp(Application):
     STATUS_ALL_DONE: ClassVar[str] = '全部结束'
     STATUS_NEXT: ClassVar[str] = '下一个'
     STATUS_NO_LOGIN: ClassVar[str] = '下一个'
+    STATUS_SWITCH_FIRST: ClassVar[str] = '切换到第一个实例'
 
     def __init__(self, ctx: OneDragonContext, app_id: str,
                  op_name: str = '一条龙',
@@ -38,6 +44,9 @@ class OneDragonApp(Application):
         self._op_to_switch_account: Operation = op_to_switch_account  # 切换账号的op
         self._fail_app_idx: List[int] = []  # 失败的app下标
         self._current_retry_app_idx: int = 0  # 当前重试的_fail_app_idx的下标
+        self._scheduler: Optional[OneDragonScheduler] = None  # 运行全部实例时的调度 记录进度和结果
+        self._switch_before_start: bool = False  # 当前实例不在一条龙中 开始前需要切换到第一个实例
+        self.schedule_report: Optional[str] = None  # 运行全部实例后的汇总
 
     def get_app_list(self) -> List[Application]:
         return []
@@ -63,19 +72,55 @@ class OneDragonApp(Application):
         注意初始化要全面 方便一个指令重复使用
         """
         current_instance = self.ctx.one_dragon_config.current_active_instance
+        self.schedule_report = None
         if self.ctx.one_dragon_config.instance_run == InstanceRun.ALL.value.value:
-            self._instance_list = []
-            for i in self.ctx.one_dragon_config.instance_list:
-                if not i.active_in_od:
-                    continue
-                self._instance_list.append(i)
-                if i.idx == current_instance.idx:
-                    self._instance_start_idx = len(self._instance_list) - 1
+            instance_list = self.ctx.one_dragon_config.instance_list_in_od
+            app_list = self.get_one_dragon_apps_in_order()
+            self._scheduler = OneDragonScheduler()
+            order = self._scheduler.plan(
+                [self.load_schedule_instance(i, app_list) for i in instance_list],
+                current_instance.idx,
+                os_utils.get_dt()
+            )
+            idx_2_instance = {i.idx: i for i in instance_list}
+            self._instance_list = [idx_2_instance[idx] for idx in order]
+            log.info('实例运行顺序 %s%s', [i.name for i in self._instance_list],
+                     ' 继续上一次的进度' if self._scheduler.resumed else '')
         else:
+            self._scheduler = None
             self._instance_list = [current_instance]
-            self._instance_start_idx = 0
 
+        # 当前实例在一条龙中时排在第一个 否则先切换到第一个实例 最后都会回到第一个实例
+        self._instance_start_idx = 0
         self._instance_idx = self._instance_start_idx
+        self._switch_before_start = (len(self._instance_list) > 0
+                                     and self._instance_list[0].idx != current_instance.idx)
+
+    @staticmethod
+    def load_schedule_instance(instance: OneDragonInstance, app_list: List[Application]) -> ScheduleInstance:
+        """
+        不切换实例 直接读取实例的配置和运行记录 用于安排运行顺序
+        运行记录只按日期判断是否需要运行 各应用自己的重置规则在实际运行时再判断
+        :param instance: 实例
+        :param app_list: 一条龙中的应用
+        :return:
+        """
+        app_config = OneDragonAppConfig(instance.idx)
+        game_refresh_hour_offset = GameAccountConfig(instance.idx).game_refresh_hour_offset
+        schedule_app_list: List[ScheduleApp] = []
+        for app in app_list:
+            if app.app_id not in app_config.app_run_list:
+                continue
+            if app.run_record is None:
+                schedule_app_list.append(ScheduleApp(app.app_id, True, AppRunRecord.DEFAULT_ESTIMATED_SECONDS))
+                continue
+            record = AppRunRecord(app.run_record.app_id, instance_idx=instance.idx,
+                                  game_refresh_hour_offset=game_refresh_hour_offset,
+                                  record_period=app.run_record.record_period)
+            schedule_app_list.append(ScheduleApp(app.app_id,
+                                                 record.run_status_under_now != AppRunRecord.STATUS_SUCCESS,
+                                                 record.estimated_seconds))
+        return ScheduleInstance(instance.idx, instance.name, schedule_app_list)
 
     def get_one_dragon_apps_in_order(self) -> List[Application]:
         """
@@ -111,6 +156,13 @@ class OneDragonApp(Application):
         找出需要运行的app
         :return:
         """
+        if len(self._instance_list) == 0:
+            return self.round_fail('没有需要运行的实例')
+        if self._switch_before_start:
+            self.ctx.switch_instance(self._instance_list[self._instance_idx].idx)
+            log.info('当前实例不在一条龙中 切换到 %s', self.ctx.one_dragon_config.current_active_instance.name)
+            return self.round_success(status=OneDragonApp.STATUS_SWITCH_FIRST)
+
         order_app_list = self.get_one_dragon_apps_in_order()
         self._fail_app_idx = []
 
@@ -144,7 +196,7 @@ class OneDragonApp(Application):
             return self.round_success(status=OneDragonApp.STATUS_ALL_DONE)
 
         app = self._to_run_app_list[self._current_app_idx]
-        app_result = app.execute()
+        app_result = self._execute_app(app)
         if not app_result.success:
             self._fail_app_idx.append(self._current_app_idx)
         self._current_app_idx += 1
@@ -160,15 +212,30 @@ class OneDragonApp(Application):
 
         app_idx = self._fail_app_idx[self._current_retry_app_idx]
         app = self._to_run_app_list[app_idx]
-        app.execute()
+        self._execute_app(app)
 
         self._current_retry_app_idx += 1
 
         return self.round_success(status=OneDragonApp.STATUS_NEXT)
 
+    def _execute_app(self, app: Application) -> OperationResult:
+        """
+        运行一个应用 并记录到调度的进度中
+        :param app: 应用
+        :return:
+        """
+        start_time = time.time()
+        app_result = app.execute()
+        if self._scheduler is not None:
+            self._scheduler.record_app(self.ctx.current_instance_idx, app.app_id,
+                                       app_result.success, time.time() - start_time)
+        return app_result
+
     @node_from(from_name='重试失败任务')
     @operation_node(name='切换实例配置')
     def switch_instance(self) -> OperationRoundResult:
+        if self._scheduler is not None:
+            self._scheduler.finish_instance(self.ctx.current_instance_idx)
         self._instance_idx += 1
         if self._instance_idx >= len(self._instance_list):
             self._instance_idx = 0
@@ -179,9 +246,10 @@ class OneDragonApp(Application):
         return self.round_success()
 
     @node_from(from_name='切换实例配置')
+    @node_from(from_name='检测任务状态', status=STATUS_SWITCH_FIRST, ignore_status=False)
     @operation_node(name='切换账号')
     def switch_account(self) -> OperationRoundResult:
-        if len(self._instance_list) == 1:
+        if len(self._instance_list) == 1 and not self._switch_before_start:
             return self.round_success('无需切换账号')
         if self._op_to_switch_account is None:
             return self.round_fail('未实现切换账号')
@@ -192,12 +260,21 @@ class OneDragonApp(Application):
     @node_from(from_name='切换账号')
     @operation_node(name='切换账号后处理')
     def after_switch_account(self) -> OperationRoundResult:
+        if self._switch_before_start:  # 切换到第一个实例后开始运行
+            self._switch_before_start = False
+            return self.round_success(OneDragonApp.STATUS_NEXT)
         if self._instance_idx == self._instance_start_idx:  # 已经完成一轮了
+            if self._scheduler is not None:
+                self._scheduler.finish_all()
             return self.round_success(OneDragonApp.STATUS_ALL_DONE)
         else:
             return self.round_success(OneDragonApp.STATUS_NEXT)
 
     def after_operation_done(self, result: OperationResult):
+        if self._scheduler is not None:
+            self.schedule_report = self._scheduler.build_report(
+                {i.idx: i.name for i in self.ctx.one_dragon_config.instance_list})
+            log.info('一条龙运行汇总\n%s', self.schedule_report)
         Application.after_operation_done(self, result)
         for app in self._to_run_app_list:   # 一条龙结束后 各app恢复
             app.init_context_before_start = True
@@ -8,21 +8,26 @@ from one_dragon.base.config.game_account_config import GameAccountConfig
 from one_dragon.base.config.one_dragon_app_config import OneDragonAppConfig
 from one_dragon.base.config.one_dragon_config import OneDragonConfig
 from one_dragon.base.config.push_config import PushConfig
+from one_dragon.base.config.yaml_bundle import get_asset_bundle
+from one_dragon.base.config.yaml_write_behind import yaml_write_behind
+from one_dragon.base.operation.context_lazy_attr import context_lazy_attr, reset_lazy_attr, INSTANCE_LAZY_GROUP
 from one_dragon.base.operation.context_lazy_signal import ContextLazySignal
 from one_dragon.base.controller.controller_base import ControllerBase
 from one_dragon.base.controller.pc_button.pc_button_listener import PcButtonListener
 from one_dragon.base.matcher.ocr.ocr_matcher import OcrMatcher
-from one_dragon.base.matcher.ocr.onnx_ocr_matcher import OnnxOcrMatcher
 from one_dragon.base.matcher.ocr.ocr_service import OcrService
 from one_dragon.base.matcher.template_matcher import TemplateMatcher
 from one_dragon.base.operation.context_event_bus import ContextEventBus
 from one_dragon.base.operation.one_dragon_env_context import OneDragonEnvContext, ONE_DRAGON_CONTEXT_EXECUTOR
 from one_dragon.base.screen.screen_loader import ScreenContext
 from one_dragon.base.screen.template_loader import TemplateLoader
+from one_dragon.thread.run_state_token import RunStateToken
 from one_dragon.utils import debug_utils, i18_utils, log_utils
 from one_dragon.utils import thread_utils
+from one_dragon.utils.debug_artifact_sink import get_debug_artifact_sink
 from one_dragon.utils.i18_utils import gt
 from one_dragon.utils.log_utils import log
+from one_dragon.utils.startup_profiler import startup_profiler
 
 
 class ContextRunStateEnum(Enum):
@@ -57,29 +62,46 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
 
     def __init__(self, controller: Optional[ControllerBase] = None):
         ContextEventBus.__init__(self)
-        OneDragonEnvContext.__init__(self)
+        with startup_profiler.measure('OneDragonEnvContext'):
+            OneDragonEnvContext.__init__(self)
 
-        self.one_dragon_config: OneDragonConfig = OneDragonConfig()
-        self.custom_config: CustomConfig = CustomConfig()
+        with startup_profiler.measure('OneDragonConfig'):
+            self.one_dragon_config: OneDragonConfig = OneDragonConfig()
+            self.custom_config: CustomConfig = CustomConfig()
         self.signal: ContextLazySignal = ContextLazySignal()
 
         if self.one_dragon_config.current_active_instance is None:
             self.one_dragon_config.create_new_instance(True)
         self.current_instance_idx = self.one_dragon_config.current_active_instance.idx
 
-        self.context_running_state: ContextRunStateEnum = ContextRunStateEnum.STOP
+        self.run_state_token: RunStateToken = RunStateToken()
+        """运行状态的令牌 用于等待时及时响应暂停和停止"""
 
-        self.screen_loader: ScreenContext = ScreenContext()
-        self.template_loader: TemplateLoader = TemplateLoader()
-        self.tm: TemplateMatcher = TemplateMatcher(self.template_loader)
-        self.ocr: OcrMatcher = OnnxOcrMatcher()
+        self._context_running_state: ContextRunStateEnum = ContextRunStateEnum.STOP
+
+        with startup_profiler.measure('ScreenContext'):
+            self.screen_loader: ScreenContext = ScreenContext()
+        with startup_profiler.measure('TemplateLoader'):
+            self.template_loader: TemplateLoader = TemplateLoader()
+            self.tm: TemplateMatcher = TemplateMatcher(self.template_loader)
         self.ocr_service: OcrService | None = None  # 延迟初始化
         self.controller: ControllerBase = controller
+        if self.controller is not None:
+            self.controller.set_run_state_token(self.run_state_token)
+
+        with startup_profiler.measure('PcButtonListener'):
+            self.keyboard_controller = keyboard.Controller()
+            self.mouse_controller = mouse.Controller()
+            self.btn_listener = PcButtonListener(on_button_tap=self._on_key_press, listen_keyboard=True, listen_mouse=True)
+            self.btn_listener.start()
 
-        self.keyboard_controller = keyboard.Controller()
-        self.mouse_controller = mouse.Controller()
-        self.btn_listener = PcButtonListener(on_button_tap=self._on_key_press, listen_keyboard=True, listen_mouse=True)
-        self.btn_listener.start()
+    @context_lazy_attr()
+    def ocr(self) -> OcrMatcher:
+        """
+        OCR 第一次使用时才创建 模型在 init_ocr 中加载
+        """
+        from one_dragon.base.matcher.ocr.onnx_ocr_matcher import OnnxOcrMatcher
+        return OnnxOcrMatcher()
 
     def init_by_config(self) -> None:
         """
@@ -92,6 +114,8 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
         else:
             i18_utils.update_default_lang(self.custom_config.ui_language)
         log_utils.set_log_level(logging.DEBUG if self.env_config.is_debug else logging.INFO)
+        get_debug_artifact_sink().configure(image_format=self.env_config.debug_image_format,
+                                            png_compression=self.env_config.debug_image_png_compression)
 
     def start_running(self) -> bool:
         """
@@ -103,6 +127,7 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
             return False
 
         self.context_running_state = ContextRunStateEnum.RUN
+        self.controller.set_run_state_token(self.run_state_token)
         self.controller.init_before_context_run()
         self.dispatch_event(ContextRunningStateEventEnum.START_RUNNING.value, self.context_running_state)
         return True
@@ -114,6 +139,15 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
         log.info('停止运行')
         self.dispatch_event(ContextRunningStateEventEnum.STOP_RUNNING.value, self.context_running_state)
 
+    @property
+    def context_running_state(self) -> ContextRunStateEnum:
+        return self._context_running_state
+
+    @context_running_state.setter
+    def context_running_state(self, new_state: ContextRunStateEnum) -> None:
+        self._context_running_state = new_state
+        self.run_state_token.set_state(new_state.value)
+
     @property
     def is_context_stop(self) -> bool:
         return self.context_running_state == ContextRunStateEnum.STOP
@@ -211,6 +245,7 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
 
     def load_instance_config(self):
         log.info('开始加载实例配置 %d' % self.current_instance_idx)
+        reset_lazy_attr(self, group=INSTANCE_LAZY_GROUP)
         self.one_dragon_app_config: OneDragonAppConfig = OneDragonAppConfig(self.current_instance_idx)
         self.game_account_config: GameAccountConfig = GameAccountConfig(self.current_instance_idx)
         self.push_config: PushConfig = PushConfig(self.current_instance_idx)
@@ -245,7 +280,11 @@ class OneDragonContext(ContextEventBus, OneDragonEnvContext):
         @return:
         """
         self.btn_listener.stop()
+        if self.controller is not None:
+            self.controller.release_resources()
         self.one_dragon_config.clear_temp_instance_indices()
         self.one_dragon_app_config.clear_temp_app_run_list()
+        yaml_write_behind.shutdown()
+        get_asset_bundle().save_if_dirty()
         ContextEventBus.after_app_shutdown(self)
         OneDragonEnvContext.after_app_shutdown(self)
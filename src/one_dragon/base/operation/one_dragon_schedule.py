@@ -0,0 +1,245 @@
+import time
+from typing import Dict, List, Optional
+
+from one_dragon.base.config.yaml_config import YamlConfig
+
+
+class ScheduleApp:
+
+    def __init__(self, app_id: str, pending: bool, estimated_seconds: float):
+        """
+        调度时 一个实例中的一个应用
+        :param app_id: 应用ID
+        :param pending: 按运行记录 今天是否还需要运行
+        :param estimated_seconds: 预计耗时
+        """
+        self.app_id: str = app_id
+        self.pending: bool = pending
+        self.estimated_seconds: float = estimated_seconds
+
+
+class ScheduleInstance:
+
+    def __init__(self, instance_idx: int, name: str, app_list: List[ScheduleApp]):
+        """
+        调度时 一个实例的信息
+        :param instance_idx: 实例下标
+        :param name: 实例名称
+        :param app_list: 一条龙中需要运行的应用
+        """
+        self.instance_idx: int = instance_idx
+        self.name: str = name
+        self.app_list: List[ScheduleApp] = app_list
+
+    @property
+    def pending_app_list(self) -> List[ScheduleApp]:
+        return [i for i in self.app_list if i.pending]
+
+    @property
+    def estimated_seconds(self) -> float:
+        """
+        还需要运行的应用的预计总耗时
+        """
+        return sum(i.estimated_seconds for i in self.pending_app_list)
+
+
+def plan_instance_order(instance_list: List[ScheduleInstance], current_instance_idx: int) -> List[int]:
+    """
+    安排实例的运行顺序
+    - 当前实例在列表中时最先运行 不需要切换账号 不在列表中(没有加入一条龙)时不运行
+    - 有待运行应用的实例 按预计耗时从短到长 中途停止时完成的实例最多
+    - 运行记录显示已完成的实例放到最后 仍然会进去检查一次 部分应用有自己的重置规则
+    耗时相同时保持原来的顺序
+    :param instance_list: 实例列表
+    :param current_instance_idx: 当前实例
+    :return: 实例下标的运行顺序
+    """
+    order: List[int] = []
+    if any(i.instance_idx == current_instance_idx for i in instance_list):
+        order.append(current_instance_idx)
+    others = [i for i in instance_list if i.instance_idx != current_instance_idx]
+    pending_list = sorted([i for i in others if len(i.pending_app_list) > 0], key=lambda i: i.estimated_seconds)
+    done_list = [i for i in others if len(i.pending_app_list) == 0]
+    for i in pending_list + done_list:
+        order.append(i.instance_idx)
+    return order
+
+
+class OneDragonScheduleCheckpoint(YamlConfig):
+
+    def __init__(self, is_mock: bool = False):
+        """
+        多实例一条龙的进度 每个应用结束、每次切换实例时保存
+        中途退出后 同一天再次运行时按原来的顺序 跳过已经完成的实例继续
+        """
+        YamlConfig.__init__(self, 'one_dragon_schedule', is_mock=is_mock)
+
+    @property
+    def dt(self) -> str:
+        return self.get('dt', '')
+
+    @property
+    def instance_order(self) -> List[int]:
+        return self.get('instance_order', [])
+
+    @property
+    def finished_instance(self) -> List[int]:
+        return self.get('finished_instance', [])
+
+    @property
+    def all_finished(self) -> bool:
+        return self.get('all_finished', False)
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return self.get('start_time', None)
+
+    @property
+    def app_result(self) -> Dict[int, Dict[str, dict]]:
+        """
+        实例下标 -> 应用ID -> {'success': 是否成功, 'seconds': 耗时, 'run_times': 运行次数}
+        """
+        return self.get('app_result', {})
+
+    def is_resumable(self, dt: str, instance_idx_list: List[int]) -> bool:
+        """
+        是否可以继续上一次的进度
+        :param dt: 当前日期
+        :param instance_idx_list: 这次需要运行的实例
+        :return:
+        """
+        if self.all_finished or self.dt != dt or len(self.instance_order) == 0:
+            return False
+        return set(self.instance_order) == set(instance_idx_list)
+
+    def start(self, dt: str, instance_order: List[int], start_time: float) -> None:
+        """
+        开始新的一轮
+        :param dt: 当前日期
+        :param instance_order: 实例的运行顺序
+        :param start_time: 开始时间
+        :return:
+        """
+        self.data = {
+            'dt': dt,
+            'instance_order': instance_order,
+            'finished_instance': [],
+            'all_finished': False,
+            'start_time': start_time,
+            'app_result': {},
+        }
+        self.save()
+
+    def record_app(self, instance_idx: int, app_id: str, success: bool, seconds: float) -> None:
+        """
+        记录一个应用的运行结果 重试时累计耗时 以最后一次的结果为准
+        :param instance_idx: 实例下标
+        :param app_id: 应用ID
+        :param success: 是否成功
+        :param seconds: 耗时
+        :return:
+        """
+        app_result = self.app_result
+        instance_result = app_result.setdefault(instance_idx, {})
+        last = instance_result.get(app_id, {'seconds': 0, 'run_times': 0})
+        instance_result[app_id] = {
+            'success': success,
+            'seconds': last['seconds'] + seconds,
+            'run_times': last['run_times'] + 1,
+        }
+        self.update('app_result', app_result)
+
+    def finish_instance(self, instance_idx: int) -> None:
+        finished = self.finished_instance
+        if instance_idx not in finished:
+            finished.append(instance_idx)
+        self.update('finished_instance', finished)
+
+    def finish_all(self) -> None:
+        self.update('all_finished', True)
+
+
+class OneDragonScheduler:
+
+    def __init__(self, checkpoint: Optional[OneDragonScheduleCheckpoint] = None):
+        """
+        多实例一条龙的调度 决定实例的运行顺序 记录进度 并汇总结果
+        不依赖上下文 实际的运行由 OneDragonApp 负责
+        :param checkpoint: 进度记录 不传入时使用配置文件
+        """
+        self.checkpoint: OneDragonScheduleCheckpoint = (
+            OneDragonScheduleCheckpoint() if checkpoint is None else checkpoint
+        )
+        self.resumed: bool = False  # 是否继续了上一次的进度
+
+    def plan(self, instance_list: List[ScheduleInstance], current_instance_idx: int, dt: str,
+             now: Optional[float] = None) -> List[int]:
+        """
+        得到这次的运行顺序 可以继续时沿用上一次的顺序 并跳过已完成的实例
+        :param instance_list: 需要运行的实例
+        :param current_instance_idx: 当前实例
+        :param dt: 当前日期
+        :param now: 当前时间
+        :return: 实例下标的运行顺序 当前实例在列表中时总是第一个
+        """
+        instance_idx_list = [i.instance_idx for i in instance_list]
+
+        self.resumed = self.checkpoint.is_resumable(dt, instance_idx_list)
+        if self.resumed:
+            finished = self.checkpoint.finished_instance
+            order = [current_instance_idx] if current_instance_idx in instance_idx_list else []
+            for instance_idx in self.checkpoint.instance_order:
+                if instance_idx != current_instance_idx and instance_idx not in finished:
+                    order.append(instance_idx)
+            if len(order) > 0:
+                return order
+            self.resumed = False  # 实例都已完成 只是没来得及记录全部结束 重新开始一轮
+
+        order = plan_instance_order(instance_list, current_instance_idx)
+        self.checkpoint.start(dt, order, time.time() if now is None else now)
+        return order
+
+    def record_app(self, instance_idx: int, app_id: str, success: bool, seconds: float) -> None:
+        self.checkpoint.record_app(instance_idx, app_id, success, seconds)
+
+    def finish_instance(self, instance_idx: int) -> None:
+        self.checkpoint.finish_instance(instance_idx)
+
+    def finish_all(self) -> None:
+        self.checkpoint.finish_all()
+
+    def build_report(self, instance_name: Dict[int, str], now: Optional[float] = None) -> str:
+        """
+        汇总所有实例的运行结果
+        :param instance_name: 实例下标 -> 实例名称
+        :param now: 当前时间
+        :return:
+        """
+        now = time.time() if now is None else now
+        app_result = self.checkpoint.app_result
+        finished = self.checkpoint.finished_instance
+        lines: List[str] = []
+        success_cnt, fail_cnt = 0, 0
+        for instance_idx in self.checkpoint.instance_order:
+            name = instance_name.get(instance_idx, '%02d' % instance_idx)
+            instance_result = app_result.get(instance_idx, {})
+            fail_list = [app_id for app_id, r in instance_result.items() if not r['success']]
+            seconds = sum(r['seconds'] for r in instance_result.values())
+            success_cnt += len(instance_result) - len(fail_list)
+            fail_cnt += len(fail_list)
+            if instance_idx not in finished and len(instance_result) == 0:
+                lines.append('%s 未运行' % name)
+                continue
+            line = '%s 运行 %d 个 成功 %d 个 耗时 %.0f分钟' % (
+                name, len(instance_result), len(instance_result) - len(fail_list), seconds / 60)
+            if len(fail_list) > 0:
+                line += ' 失败 %s' % ', '.join(fail_list)
+            if instance_idx not in finished:
+                line += ' 未完成'
+            lines.append(line)
+
+        start_time = self.checkpoint.start_time
+        lines.append('合计 实例 %d 个 应用成功 %d 个 失败 %d 个 总耗时 %.0f分钟' % (
+            len(self.checkpoint.instance_order), success_cnt, fail_cnt,
+            (now - start_time) / 60 if start_time is not None else 0))
+        return '\n'.join(lines)
@@ -14,6 +14,7 @@ from one_dragon.base.operation.one_dragon_context import OneDragonContext, Conte
 from one_dragon.base.operation.operation_base import OperationBase, OperationResult
 from one_dragon.base.operation.operation_edge import OperationEdge, OperationEdgeDesc
 from one_dragon.base.operation.operation_node import OperationNode
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
 from one_dragon.base.operation.operation_round_result import OperationRoundResultEnum, OperationRoundResult
 from one_dragon.base.screen import screen_utils
 from one_dragon.base.screen.screen_area import ScreenArea
@@ -22,6 +23,54 @@ from one_dragon.utils import debug_utils, cv2_utils, str_utils
 from one_dragon.utils.i18_utils import coalesce_gt, gt
 from one_dragon.utils.log_utils import log
 
+_annotation_graph_cache: dict[type, Tuple[Optional[OperationNode], List[OperationEdge]]] = {}
+"""按类缓存的 由标注生成的开始节点和边 标注在类的方法上 同一个类的所有实例都一样"""
+
+
+def _compile_annotation_graph(op_class: type) -> Tuple[Optional[OperationNode], List[OperationEdge]]:
+    """
+    读取类方法的标注 生成开始节点和边 每个类只需要生成一次
+    :param op_class: 指令类
+    :return: 开始节点, 边列表
+    """
+    cached = _annotation_graph_cache.get(op_class)
+    if cached is not None:
+        return cached
+
+    node_name_map: dict[str, OperationNode] = {}
+    edge_desc_list: List[OperationEdgeDesc] = []
+    start_node: Optional[OperationNode] = None
+
+    for name, method in inspect.getmembers(op_class, predicate=inspect.isfunction):
+        node: OperationNode = method.__annotations__.get('operation_node_annotation')
+        if node is not None:
+            node_name_map[node.cn] = node
+        else:  # 不是节点的话 一定没有边
+            continue
+        if node.is_start_node:
+            start_node = node
+        edges: List[OperationEdgeDesc] = method.__annotations__.get('operation_edge_annotation')
+        if edges is not None:
+            for edge in edges:
+                edge.node_to_name = node.cn
+                edge_desc_list.append(edge)
+
+    edge_list: List[OperationEdge] = []
+    for edge_desc in edge_desc_list:
+        node_from = node_name_map.get(edge_desc.node_from_name, None)
+        if node_from is None:
+            raise ValueError('找不到节点 %s' % edge_desc.node_from_name)
+        node_to = node_name_map.get(edge_desc.node_to_name, None)
+        if node_to is None:
+            raise ValueError('找不到节点 %s' % edge_desc.node_to_name)
+        edge_list.append(OperationEdge(node_from, node_to,
+                                       success=edge_desc.success,
+                                       status=edge_desc.status,
+                                       ignore_status=edge_desc.ignore_status))
+
+    _annotation_graph_cache[op_class] = (start_node, edge_list)
+    return start_node, edge_list
+
 
 class Operation(OperationBase):
     STATUS_TIMEOUT: ClassVar[str] = '执行超时'
@@ -118,36 +167,13 @@ class Operation(OperationBase):
     def _add_edges_and_nodes_by_annotation(self) -> None:
         """
         初始化前 读取类方法的标注 自动添加边和节点
+        标注生成的边按类缓存 节点使用的是类方法 不同实例可以共用
         :return:
         """
-        node_name_map: dict[str, OperationNode] = {}
-        edge_desc_list: List[OperationEdgeDesc] = []
-
-        for name, method in inspect.getmembers(self, predicate=inspect.ismethod):
-            node: OperationNode = method.__annotations__.get('operation_node_annotation')
-            if node is not None:
-                node_name_map[node.cn] = node
-            else:  # 不是节点的话 一定没有边
-                continue
-            if node.is_start_node:
-                self.param_start_node = node
-            edges: List[OperationEdgeDesc] = method.__annotations__.get('operation_edge_annotation')
-            if edges is not None:
-                for edge in edges:
-                    edge.node_to_name = node.cn
-                    edge_desc_list.append(edge)
-
-        for edge_desc in edge_desc_list:
-            node_from = node_name_map.get(edge_desc.node_from_name, None)
-            if node_from is None:
-                raise ValueError('找不到节点 %s' % edge_desc.node_from_name)
-            node_to = node_name_map.get(edge_desc.node_to_name, None)
-            if node_to is None:
-                raise ValueError('找不到节点 %s' % edge_desc.node_to_name)
-            self.add_edge(node_from, node_to,
-                          success=edge_desc.success,
-                          status=edge_desc.status,
-                          ignore_status=edge_desc.ignore_status)
+        start_node, edge_list = _compile_annotation_graph(self.__class__)
+        if start_node is not None:
+            self.param_start_node = start_node
+        self._add_edge_list.extend(edge_list)
 
     def _init_edge_list(self) -> None:
         """
@@ -241,6 +267,20 @@ class Operation(OperationBase):
 
             start_node = check_game_window
 
+        self._next_node_index: dict[Tuple[str, bool, Optional[str]], OperationNode] = {}
+        """(节点名称, 是否成功, 状态) -> 下一个节点 同一个key取第一条边"""
+
+        self._fallback_node_index: dict[Tuple[str, bool], OperationNode] = {}
+        """(节点名称, 是否成功) -> 忽略状态的兜底节点 取最后一条边"""
+
+        for from_id, edges in self._node_edges_map.items():
+            for edge in edges:
+                key = (from_id, edge.success, edge.status)
+                if key not in self._next_node_index:
+                    self._next_node_index[key] = edge.node_to
+                if edge.ignore_status:
+                    self._fallback_node_index[(from_id, edge.success)] = edge.node_to
+
         self._start_node: OperationNode = start_node
         """其实节点 初始化后才会有"""
 
@@ -294,11 +334,12 @@ class Operation(OperationBase):
                 op_result = self.op_fail('人工结束')
                 break
             elif self.ctx.is_context_pause:
-                time.sleep(1)
+                self.ctx.run_state_token.wait_until_not_paused()
                 continue
 
             try:
-                round_result: OperationRoundResult = self._execute_one_round()
+                with operation_profiler.node(self.display_name, 'none' if self._current_node is None else self._current_node.cn):
+                    round_result: OperationRoundResult = self._execute_one_round()
                 if (self._current_node is None
                         or (self._current_node is not None and not self._current_node.mute)
                 ):
@@ -388,32 +429,16 @@ class Operation(OperationBase):
         """
         if self._current_node is None:
             return None
-        edges = self._node_edges_map.get(self._current_node.cn)
-        if edges is None or len(edges) == 0:  # 没有下一个节点了
-            return None
-
-        next_node_id: Optional[str] = None
-        final_next_node_id: Optional[str] = None  # 兜底指令
-        for edge in edges:
-            if edge.success != (current_round_result.result == OperationRoundResultEnum.SUCCESS):
-                continue
-
-            if edge.ignore_status:
-                final_next_node_id = edge.node_to.cn
 
-            if edge.status is None and current_round_result.status is None:
-                next_node_id = edge.node_to.cn
-                break
-            elif edge.status is None or current_round_result.status is None:
-                continue
-            elif edge.status == current_round_result.status:
-                next_node_id = edge.node_to.cn
-                break
+        from_id = self._current_node.cn
+        success = current_round_result.result == OperationRoundResultEnum.SUCCESS
+        next_node = self._next_node_index.get((from_id, success, current_round_result.status))
+        if next_node is not None:
+            return self._node_map[next_node.cn]
 
-        if next_node_id is not None:
-            return self._node_map[next_node_id]
-        elif final_next_node_id is not None:
-            return self._node_map[final_next_node_id]
+        fallback_node = self._fallback_node_index.get((from_id, success))  # 兜底指令
+        if fallback_node is not None:
+            return self._node_map[fallback_node.cn]
         else:
             return None
 
@@ -589,11 +614,20 @@ class Operation(OperationBase):
         :return:
         """
         if wait is not None and wait > 0:
-            time.sleep(wait)
+            self.sleep(wait)
         elif wait_round_time is not None and wait_round_time > 0:
             to_wait = wait_round_time - (time.time() - self.round_start_time)
             if to_wait > 0:
-                time.sleep(to_wait)
+                self.sleep(to_wait)
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        等待 期间暂停时冻结剩余时间 恢复后继续 停止时立刻返回
+        :param seconds: 等待秒数
+        :return: 是否完整等待了
+        """
+        with operation_profiler.section(ProfileCategory.SLEEP):
+            return self.ctx.run_state_token.sleep(seconds)
 
     def round_by_op_result(self, op_result: OperationResult, retry_on_fail: bool = False,
                            wait: Optional[float] = None, wait_round_time: Optional[float] = None) -> OperationRoundResult:
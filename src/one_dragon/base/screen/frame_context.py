@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.yolo import onnx_utils
+
+
+class FrameContext:
+
+    def __init__(self, screen: MatLike, screenshot_time: Optional[float] = None):
+        """
+        一张截图的分析上下文 每张截图创建一个
+        同一帧中的各个识别 共用这里按需计算的中间结果 例如灰度图、HSV、模型的输入
+        每个结果只计算一次 可以在多个线程中使用
+        :param screen: 游戏画面 RGB
+        :param screenshot_time: 截图时间
+        """
+        self.screen: MatLike = screen
+        self.screenshot_time: float = time.time() if screenshot_time is None else screenshot_time
+
+        self.convert_cnt: dict[Hashable, int] = {}
+        """每个中间结果实际计算的次数 正常应该都是1"""
+
+        self._cache: dict[Hashable, Any] = {}
+        self._key_lock: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        获取一个中间结果 第一次使用时计算
+        同一个结果在多个线程中同时使用时 只有一个线程计算 其它线程等待
+        :param key: 结果的key
+        :param factory: 计算方法
+        :return:
+        """
+        if key in self._cache:
+            return self._cache[key]
+        with self._lock:
+            key_lock = self._key_lock.get(key)
+            if key_lock is None:
+                key_lock = threading.Lock()
+                self._key_lock[key] = key_lock
+        with key_lock:
+            if key in self._cache:
+                return self._cache[key]
+            value = factory()
+            self._cache[key] = value
+            self.convert_cnt[key] = self.convert_cnt.get(key, 0) + 1
+        return value
+
+    @property
+    def gray(self) -> MatLike:
+        """
+        整个画面的灰度图
+        """
+        return self.get_or_create('gray', lambda: cv2.cvtColor(self.screen, cv2.COLOR_RGB2GRAY))
+
+    @property
+    def hsv(self) -> MatLike:
+        """
+        整个画面的HSV
+        """
+        return self.get_or_create('hsv', lambda: cv2.cvtColor(self.screen, cv2.COLOR_RGB2HSV))
+
+    def yolo_input(self, onnx_input_width: int, onnx_input_height: int) -> Tuple[np.ndarray, int, int]:
+        """
+        整个画面缩放后的模型输入 同一尺寸的模型共用
+        :param onnx_input_width: 模型需要的图片宽度
+        :param onnx_input_height: 模型需要的图片高度
+        :return: 输入张量, 缩放后的高度, 缩放后的宽度
+        """
+        return self.get_or_create(
+            ('yolo_input', onnx_input_width, onnx_input_height),
+            lambda: onnx_utils.scale_input_image_u(self.screen, onnx_input_width, onnx_input_height)
+        )
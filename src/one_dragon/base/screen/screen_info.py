@@ -132,7 +132,7 @@ class ScreenInfo(YamlOperator):
 
         self.file_path = self.get_yml_file_path(old=False)  # screen_id 有修改 更新路径
         self.data = order_dict
-        YamlOperator.save(self)
+        YamlOperator.save_now(self)  # 开发工具中保存后会移动或删除文件 需要立刻写入
 
         # screen_id 有修改 删除旧的文件
         if self.old_screen_id is not None and len(self.old_screen_id) > 0 and self.old_screen_id != self.screen_id:
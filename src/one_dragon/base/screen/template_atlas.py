@@ -0,0 +1,263 @@
+import os
+import pickle
+import struct
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.base.screen.template_info import get_template_mask_path, get_template_raw_path, \
+    get_template_root_dir_path
+from one_dragon.utils import cv2_utils, os_utils
+from one_dragon.utils.log_utils import log
+
+_ATLAS_MAGIC: bytes = b'ODTATLAS'
+_ATLAS_VERSION: int = 1
+"""图集格式版本 格式变化时递增 旧图集会被丢弃重建"""
+
+_HEADER_STRUCT = struct.Struct('<8sIQ')
+"""文件头 魔数 版本 索引长度"""
+
+_PAGE_SIZE: int = 4096
+"""每个图层的起始位置按这个大小对齐"""
+
+
+def _align(offset: int) -> int:
+    return (offset + _PAGE_SIZE - 1) // _PAGE_SIZE * _PAGE_SIZE
+
+
+def _get_mtime(file_path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(file_path)
+    except OSError:
+        return None
+
+
+class TemplateAtlasPlanes:
+
+    def __init__(self, raw: Optional[MatLike], mask: Optional[MatLike], gray: Optional[MatLike]):
+        """
+        图集中一个模板的图层 都是只读的内存映射
+        :param raw: 原图 RGB
+        :param mask: 掩码
+        :param gray: 灰度图
+        """
+        self.raw: Optional[MatLike] = raw
+        self.mask: Optional[MatLike] = mask
+        self.gray: Optional[MatLike] = gray
+
+
+class TemplateAtlas:
+
+    def __init__(self, atlas_path: str):
+        """
+        所有模板打包成的单个图集文件
+        文件头后是二进制的索引 记录每个图层的偏移和形状 之后的数据区存放原图、掩码、灰度图 不压缩 按页对齐
+        使用时整个文件以内存映射打开 取模板只是切片 不需要解码
+        索引中记录了每个模板源文件的修改时间 源文件变化后该模板不再从图集读取
+        模板有变化时在后台重新构建到 .new 文件 下次启动时替换 避免替换正在映射的文件
+        :param atlas_path: 图集文件路径
+        """
+        self.atlas_path: str = atlas_path
+
+        self._lock = threading.Lock()
+        self._opened: bool = False
+        self._mmap: Optional[np.memmap] = None
+        self._data_start: int = 0  # 图层数据区在文件中的起始位置
+        self._entries: dict[str, dict] = {}
+        """模板key -> {'raw_mtime', 'mask_mtime', 'planes': {图层 -> (在数据区中的偏移, 形状)}}"""
+
+        self._rebuild_started: bool = False
+
+    def get_planes(self, sub_dir: str, template_id: str) -> Optional[TemplateAtlasPlanes]:
+        """
+        获取模板的图层 源文件修改过时返回空 由调用方从源文件读取
+        :param sub_dir: 模板分类
+        :param template_id: 模板id
+        :return:
+        """
+        with self._lock:
+            if not self._opened:
+                self._open()
+        if self._mmap is None:
+            return None
+
+        entry = self._entries.get(f'{sub_dir}/{template_id}')
+        if entry is None:
+            return None
+        if (entry['raw_mtime'] != _get_mtime(get_template_raw_path(sub_dir, template_id))
+                or entry['mask_mtime'] != _get_mtime(get_template_mask_path(sub_dir, template_id))):
+            return None
+
+        planes = entry['planes']
+        return TemplateAtlasPlanes(
+            raw=self._get_plane(planes.get('raw')),
+            mask=self._get_plane(planes.get('mask')),
+            gray=self._get_plane(planes.get('gray')),
+        )
+
+    def _get_plane(self, plane: Optional[tuple[int, tuple]]) -> Optional[MatLike]:
+        if plane is None:
+            return None
+        offset, shape = plane
+        offset += self._data_start
+        size = int(np.prod(shape))
+        return self._mmap[offset:offset + size].view(np.ndarray).reshape(shape)
+
+    def _open(self) -> None:
+        """
+        打开图集 上次后台构建的新图集先替换进来
+        之后在后台检查是否需要重新构建
+        调用前需要持有锁
+        :return:
+        """
+        self._opened = True
+        new_path = self.atlas_path + '.new'
+        if os.path.exists(new_path):
+            try:
+                os.replace(new_path, self.atlas_path)
+            except OSError:
+                log.error(f'模板图集替换失败 {self.atlas_path}', exc_info=True)
+
+        if os.path.exists(self.atlas_path):
+            try:
+                with open(self.atlas_path, 'rb') as file:
+                    magic, version, index_len = _HEADER_STRUCT.unpack(file.read(_HEADER_STRUCT.size))
+                    if magic == _ATLAS_MAGIC and version == _ATLAS_VERSION:
+                        index = pickle.loads(file.read(index_len))
+                        if index.get('source_dir') == get_template_root_dir_path():
+                            self._entries = index['entries']
+                            self._data_start = _align(_HEADER_STRUCT.size + index_len)
+                            self._mmap = np.memmap(self.atlas_path, dtype=np.uint8, mode='r')
+            except Exception:
+                log.error(f'模板图集读取失败 {self.atlas_path}', exc_info=True)
+                self._entries = {}
+                self._mmap = None
+
+        self._start_rebuild_if_outdated()
+
+    def _start_rebuild_if_outdated(self) -> None:
+        if self._rebuild_started:
+            return
+        self._rebuild_started = True
+        t = threading.Thread(target=self._rebuild_if_outdated, name='od_template_atlas', daemon=True)
+        t.start()
+
+    def _rebuild_if_outdated(self) -> None:
+        """
+        模板的源文件和图集不一致时 重新构建到 .new 文件
+        :return:
+        """
+        try:
+            source_dict = list_template_source()
+            outdated = len(source_dict) != len(self._entries)
+            for key, (raw_mtime, mask_mtime) in source_dict.items():
+                if outdated:
+                    break
+                entry = self._entries.get(key)
+                outdated = entry is None or entry['raw_mtime'] != raw_mtime or entry['mask_mtime'] != mask_mtime
+            if not outdated:
+                return
+            target_path = self.atlas_path if self._mmap is None else self.atlas_path + '.new'
+            build_template_atlas(target_path)
+        except Exception:
+            log.error('模板图集构建失败', exc_info=True)
+
+
+def list_template_source() -> dict[str, tuple[Optional[float], Optional[float]]]:
+    """
+    列出需要打包的模板 与 TemplateLoader 一样只看两级目录
+    :return: 模板key -> (原图修改时间, 掩码修改时间)
+    """
+    result: dict[str, tuple[Optional[float], Optional[float]]] = {}
+    template_dir = get_template_root_dir_path()
+    for sub_dir in os.listdir(template_dir):
+        sub_dir_path = os.path.join(template_dir, sub_dir)
+        if not os.path.isdir(sub_dir_path):
+            continue
+        for template_id in os.listdir(sub_dir_path):
+            if not os.path.isdir(os.path.join(sub_dir_path, template_id)):
+                continue
+            raw_mtime = _get_mtime(get_template_raw_path(sub_dir, template_id))
+            mask_mtime = _get_mtime(get_template_mask_path(sub_dir, template_id))
+            if raw_mtime is None and mask_mtime is None:
+                continue
+            result[f'{sub_dir}/{template_id}'] = (raw_mtime, mask_mtime)
+    return result
+
+
+def build_template_atlas(atlas_path: Optional[str] = None) -> int:
+    """
+    把所有模板打包成一个图集
+    先写临时文件再替换 避免中断时留下损坏的图集
+    :param atlas_path: 图集文件路径 默认为 .cache/template_atlas.bin
+    :return: 打包的模板数量
+    """
+    if atlas_path is None:
+        atlas_path = get_template_atlas_path()
+
+    entries: dict[str, dict] = {}
+    plane_list: list[tuple[int, MatLike]] = []
+    offset = 0
+    for key, (raw_mtime, mask_mtime) in list_template_source().items():
+        sub_dir, template_id = key.split('/')
+        raw = cv2_utils.read_image(get_template_raw_path(sub_dir, template_id)) if raw_mtime is not None else None
+        mask = cv2_utils.read_image(get_template_mask_path(sub_dir, template_id)) if mask_mtime is not None else None
+        gray = cv2.cvtColor(raw, cv2.COLOR_RGB2GRAY) if raw is not None else None
+
+        planes = {}
+        for name, image in [('raw', raw), ('mask', mask), ('gray', gray)]:
+            if image is None:
+                continue
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            planes[name] = (offset, image.shape)
+            plane_list.append((offset, image))
+            offset = _align(offset + image.nbytes)
+        entries[key] = {'raw_mtime': raw_mtime, 'mask_mtime': mask_mtime, 'planes': planes}
+
+    index = pickle.dumps({'source_dir': get_template_root_dir_path(), 'entries': entries},
+                         protocol=pickle.HIGHEST_PROTOCOL)
+    data_start = _align(_HEADER_STRUCT.size + len(index))
+
+    temp_path = atlas_path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(_HEADER_STRUCT.pack(_ATLAS_MAGIC, _ATLAS_VERSION, len(index)))
+        file.write(index)
+        for plane_offset, image in plane_list:
+            file.seek(data_start + plane_offset)
+            file.write(image.tobytes())
+        file.truncate(data_start + offset)
+    os.replace(temp_path, atlas_path)
+
+    log.info('模板图集构建完成 %d 个模板 %.1fMB', len(entries), (data_start + offset) / 1024 / 1024)
+    return len(entries)
+
+
+def get_template_atlas_path() -> str:
+    return os.path.join(os_utils.get_path_under_work_dir('.cache'), 'template_atlas.bin')
+
+
+_template_atlas: Optional[TemplateAtlas] = None
+_init_lock = threading.Lock()
+
+
+def get_template_atlas() -> TemplateAtlas:
+    """
+    模板图集 各个 TemplateLoader 共用同一份映射
+    :return:
+    """
+    global _template_atlas
+    with _init_lock:
+        if _template_atlas is None:
+            _template_atlas = TemplateAtlas(get_template_atlas_path())
+        return _template_atlas
+
+
+def __debug():
+    build_template_atlas()
+
+
+if __name__ == '__main__':
+    __debug()
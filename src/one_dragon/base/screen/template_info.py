@@ -30,7 +30,13 @@ class TemplateShapeEnum(Enum):
 
 class TemplateInfo(YamlOperator):
 
-    def __init__(self, sub_dir: str, template_id: str):
+    def __init__(self, sub_dir: str, template_id: str, planes=None):
+        """
+        一个模板
+        :param sub_dir: 模板分类
+        :param template_id: 模板id
+        :param planes: 模板图集中的图层 TemplateAtlasPlanes 传入时不再读取图片
+        """
         # 旧的模板ID 在开发工具中使用 方便更改后迁移文件
         self.old_sub_dir: str = sub_dir
         self.old_template_id: str = template_id
@@ -52,11 +58,15 @@ class TemplateInfo(YamlOperator):
         self.auto_mask: bool = self.get('auto_mask', True)
         self.point_updated: bool = False  # 点位是否更改过 开发工具中用
 
-        self.raw: MatLike = cv2_utils.read_image(get_template_raw_path(self.sub_dir, self.template_id))  # 原图
-        self.mask: MatLike = cv2_utils.read_image(get_template_mask_path(self.sub_dir, self.template_id))  # 掩码
+        if planes is not None:  # 图集中的是只读的内存映射
+            self.raw: MatLike = planes.raw  # 原图
+            self.mask: MatLike = planes.mask  # 掩码
+        else:
+            self.raw: MatLike = cv2_utils.read_image(get_template_raw_path(self.sub_dir, self.template_id))  # 原图
+            self.mask: MatLike = cv2_utils.read_image(get_template_mask_path(self.sub_dir, self.template_id))  # 掩码
 
         # 运算后保存在内存的
-        self._gray: MatLike = None  # 灰度图
+        self._gray: MatLike = None if planes is None else planes.gray  # 灰度图
         self._kps: List[cv2.KeyPoint] = None  # 关键点
         self._desc: MatLike = None  # 描述
 
@@ -181,7 +191,7 @@ class TemplateInfo(YamlOperator):
 
         self.file_path = self.get_yml_file_path()  # 更新路径
         self.data = data
-        YamlOperator.save(self)
+        YamlOperator.save_now(self)  # 开发工具中保存后会移动或删除文件 需要立刻写入
 
     def save_raw(self) -> None:
         """
@@ -2,14 +2,19 @@ import os
 from cv2.typing import MatLike
 from typing import List, Optional
 
+from one_dragon.base.screen.template_atlas import TemplateAtlas, get_template_atlas
 from one_dragon.base.screen.template_info import TemplateInfo, is_template_existed
 from one_dragon.utils import os_utils
 
 
 class TemplateLoader:
 
-    def __init__(self):
+    def __init__(self, use_atlas: bool = True):
+        """
+        :param use_atlas: 是否优先从模板图集读取图片
+        """
         self.template: dict[str, TemplateInfo] = {}
+        self.atlas: Optional[TemplateAtlas] = get_template_atlas() if use_atlas else None
 
     def get_all_template_info_from_disk(self, need_raw: bool = True, need_config: bool = False) -> List[TemplateInfo]:
         """
@@ -52,7 +57,8 @@ class TemplateLoader:
         """
         if not is_template_existed(sub_dir, template_id, need_raw=not only_mask):
             return None
-        template: TemplateInfo = TemplateInfo(sub_dir, template_id)
+        planes = self.atlas.get_planes(sub_dir, template_id) if self.atlas is not None else None
+        template: TemplateInfo = TemplateInfo(sub_dir, template_id, planes=planes)
 
         key = '%s:%s' % (sub_dir, template_id)
         self.template[key] = template
@@ -0,0 +1,360 @@
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from one_dragon.utils.i18_utils import gt
+from one_dragon.utils.log_utils import log
+
+_READ_SIZE: int = 64 * 1024
+"""每次从连接读取的字节数"""
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    计算文件的 SHA-256
+    :param file_path: 文件路径
+    :return: 小写的十六进制字符串
+    """
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while True:
+            data = file.read(1024 * 1024)
+            if not data:
+                break
+            sha.update(data)
+    return sha.hexdigest()
+
+
+def is_sha256_matched(file_path: str, sha256: Optional[str]) -> bool:
+    """
+    文件是否符合清单中的 SHA-256 清单中没有时认为符合
+    :param file_path: 文件路径
+    :param sha256: 期望的 SHA-256
+    :return:
+    """
+    if sha256 is None or sha256 == '':
+        return True
+    actual = file_sha256(file_path)
+    if actual != sha256.lower():
+        log.error('文件校验失败 %s 期望 %s 实际 %s', file_path, sha256, actual)
+        return False
+    return True
+
+
+class _RangeProbe:
+
+    def __init__(self, support_range: bool, total: int, validator: str):
+        """
+        下载前探测的服务器信息
+        :param support_range: 是否支持分段下载
+        :param total: 文件总大小 未知时为-1
+        :param validator: ETag 或 Last-Modified 用于判断断点续传时文件是否变化
+        """
+        self.support_range: bool = support_range
+        self.total: int = total
+        self.validator: str = validator
+
+
+class ChunkDownloader:
+
+    def __init__(self,
+                 chunk_size: int = 4 * 1024 * 1024,
+                 max_workers: int = 4,
+                 max_retry: int = 3,
+                 retry_backoff: float = 1,
+                 timeout: float = 30):
+        """
+        分段下载器
+        服务器支持 Range 时 把文件按固定大小分段 多个连接同时下载
+        已完成的分段记录在 .part.json 中 中断后再次下载只需要下载未完成的分段
+        服务器不支持 Range 时 退回到单个连接下载
+        下载完成后 按清单中的 SHA-256 校验 校验失败的文件会被删除
+        :param chunk_size: 分段大小
+        :param max_workers: 同时下载的分段数量
+        :param max_retry: 每个分段的最大重试次数
+        :param retry_backoff: 第一次重试前的等待秒数 之后每次翻倍
+        :param timeout: 连接的超时时间
+        """
+        self.chunk_size: int = chunk_size
+        self.max_workers: int = max_workers
+        self.max_retry: int = max_retry
+        self.retry_backoff: float = retry_backoff
+        self.timeout: float = timeout
+
+    def download(self, download_url: str, save_file_path: str,
+                 proxy: Optional[str] = None,
+                 sha256: Optional[str] = None,
+                 progress_callback: Optional[Callable[[float, str], None]] = None) -> bool:
+        """
+        下载文件
+        :param download_url: 下载的url
+        :param save_file_path: 保存的文件路径，包含文件名
+        :param proxy: 使用的代理地址
+        :param sha256: 清单中的 SHA-256 为空时不校验
+        :param progress_callback: 下载进度的回调，进度发生改变时，通过该方法通知调用方。
+        :return: 是否下载成功
+        """
+        opener = self._build_opener(proxy)
+        part_path = save_file_path + '.part'
+        progress_path = save_file_path + '.part.json'
+        reporter = _ProgressReporter(progress_callback)
+
+        try:
+            reporter.notify(0, f"{gt('开始下载')} {download_url}")
+            probe = self._probe(opener, download_url)
+            if probe.support_range and probe.total > 0:
+                ok = self._download_chunks(opener, download_url, probe, part_path, progress_path, reporter)
+            else:
+                log.info('服务器不支持分段下载 使用单个连接下载')
+                ok = self._download_stream(opener, download_url, part_path, reporter)
+            if not ok:
+                reporter.notify(0, f"{gt('下载失败')} {download_url}")
+                return False
+
+            if not is_sha256_matched(part_path, sha256):
+                self._remove(part_path, progress_path)
+                reporter.notify(0, f"{gt('下载失败')} {gt('文件校验失败')}")
+                return False
+
+            os.replace(part_path, save_file_path)
+            self._remove(progress_path)
+            reporter.notify(1, f"{gt('下载完成')} {save_file_path}")
+            return True
+        except Exception as e:
+            msg = f"{gt('下载失败')} {e}"
+            reporter.notify(0, msg, log_msg=False)
+            log.error(msg, exc_info=True)
+            return False
+
+    @staticmethod
+    def _build_opener(proxy: Optional[str]) -> urllib.request.OpenerDirector:
+        if proxy is None:
+            return urllib.request.build_opener()
+        return urllib.request.build_opener(urllib.request.ProxyHandler({'http': proxy, 'https': proxy}))
+
+    def _probe(self, opener: urllib.request.OpenerDirector, download_url: str) -> _RangeProbe:
+        """
+        请求第一个字节 判断服务器是否支持 Range 以及文件大小
+        :param opener: 连接
+        :param download_url: 下载的url
+        :return:
+        """
+        request = urllib.request.Request(download_url, headers={'Range': 'bytes=0-0'})
+        with opener.open(request, timeout=self.timeout) as response:
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified') or ''
+            if response.status == 206:
+                match = re.match(r'bytes\s+\d+-\d+/(\d+)', response.headers.get('Content-Range', ''))
+                if match is not None:
+                    return _RangeProbe(True, int(match.group(1)), validator)
+            total = int(response.headers.get('Content-Length', -1))
+            return _RangeProbe(False, total, validator)
+
+    def _download_stream(self, opener: urllib.request.OpenerDirector, download_url: str,
+                         part_path: str, reporter: '_ProgressReporter') -> bool:
+        """
+        单个连接下载 不支持断点续传
+        :return: 是否下载成功
+        """
+        with opener.open(download_url, timeout=self.timeout) as response:
+            total = int(response.headers.get('Content-Length', -1))
+            reporter.total = total
+            downloaded = 0
+            with open(part_path, 'wb') as file:
+                while True:
+                    data = response.read(_READ_SIZE)
+                    if not data:
+                        break
+                    file.write(data)
+                    downloaded += len(data)
+                    reporter.add(len(data))
+        if 0 < total != downloaded:
+            log.error('下载不完整 %d/%d', downloaded, total)
+            return False
+        return True
+
+    def _download_chunks(self, opener: urllib.request.OpenerDirector, download_url: str, probe: _RangeProbe,
+                         part_path: str, progress_path: str, reporter: '_ProgressReporter') -> bool:
+        """
+        分段并行下载 支持断点续传
+        :return: 是否全部分段都下载成功
+        """
+        chunk_cnt = (probe.total + self.chunk_size - 1) // self.chunk_size
+        done_set = self._load_progress(progress_path, part_path, probe)
+        if len(done_set) == 0:
+            with open(part_path, 'wb') as file:
+                file.truncate(probe.total)
+        else:
+            log.info('继续上次的下载 已完成 %d/%d 段', len(done_set), chunk_cnt)
+
+        reporter.total = probe.total
+        for i in done_set:
+            start, end = self._chunk_range(i, probe.total)
+            reporter.add(end - start + 1)
+
+        todo_list = [i for i in range(chunk_cnt) if i not in done_set]
+        all_ok = True
+        with ThreadPoolExecutor(thread_name_prefix='od_chunk_download', max_workers=self.max_workers) as executor:
+            future_map = {
+                executor.submit(self._download_chunk_with_retry, opener, download_url, part_path,
+                                *self._chunk_range(i, probe.total), reporter): i
+                for i in todo_list
+            }
+            for future in as_completed(future_map):
+                if not future.result():
+                    all_ok = False
+                    continue
+                done_set.add(future_map[future])
+                self._save_progress(progress_path, probe, done_set)
+        return all_ok
+
+    def _chunk_range(self, idx: int, total: int) -> tuple[int, int]:
+        """
+        一个分段的字节范围 包含两端
+        """
+        start = idx * self.chunk_size
+        return start, min(total, start + self.chunk_size) - 1
+
+    def _download_chunk_with_retry(self, opener: urllib.request.OpenerDirector, download_url: str,
+                                   part_path: str, start: int, end: int, reporter: '_ProgressReporter') -> bool:
+        """
+        下载一个分段 连接中断时从中断的位置继续请求
+        :return: 是否下载成功
+        """
+        pos = start
+        for retry_times in range(self.max_retry + 1):
+            try:
+                pos = self._download_chunk(opener, download_url, part_path, pos, end, reporter)
+                if pos > end:
+                    return True
+                e = _ChunkInterrupted(pos)  # 连接提前关闭
+            except _ChunkInterrupted as interrupted:
+                pos = interrupted.pos
+                e = interrupted
+            except (OSError, http.client.HTTPException) as error:
+                e = error
+            if retry_times >= self.max_retry:
+                log.error('分段下载失败 %d-%d %s', start, end, e)
+                return False
+            backoff = self.retry_backoff * (2 ** retry_times)
+            log.debug('分段下载中断 %d-%d 已下载到 %d %.1f秒后重试', start, end, pos, backoff)
+            time.sleep(backoff)
+        return False
+
+    def _download_chunk(self, opener: urllib.request.OpenerDirector, download_url: str,
+                        part_path: str, start: int, end: int, reporter: '_ProgressReporter') -> int:
+        """
+        请求一段数据并写入文件对应的位置
+        :return: 下一个需要下载的位置 读取中断时抛出 _ChunkInterrupted 带上已写入到的位置
+        """
+        request = urllib.request.Request(download_url, headers={'Range': f'bytes={start}-{end}'})
+        pos = start
+        with opener.open(request, timeout=self.timeout) as response:
+            if response.status != 206:
+                raise urllib.error.URLError(f'服务器没有返回分段 {response.status}')
+            with open(part_path, 'r+b') as file:
+                file.seek(pos)
+                try:
+                    while pos <= end:
+                        data = response.read(min(_READ_SIZE, end - pos + 1))
+                        if not data:
+                            break
+                        file.write(data)
+                        pos += len(data)
+                        reporter.add(len(data))
+                except (OSError, http.client.HTTPException):
+                    # 保留已写入的部分 重试时从中断的位置继续
+                    raise _ChunkInterrupted(pos)
+        return pos
+
+    def _load_progress(self, progress_path: str, part_path: str, probe: _RangeProbe) -> set[int]:
+        """
+        读取上次下载的进度 文件大小或版本变化时重新下载
+        :return: 已完成的分段
+        """
+        if not os.path.exists(progress_path) or not os.path.exists(part_path):
+            return set()
+        try:
+            with open(progress_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except Exception:
+            return set()
+        if (data.get('total') != probe.total
+                or data.get('validator', '') != probe.validator
+                or data.get('chunk_size') != self.chunk_size
+                or os.path.getsize(part_path) != probe.total):
+            log.info('文件已变化 重新下载')
+            return set()
+        return set(data.get('done', []))
+
+    def _save_progress(self, progress_path: str, probe: _RangeProbe, done_set: set[int]) -> None:
+        """
+        保存已完成的分段 先写临时文件再替换 避免中断时写坏
+        """
+        data = {
+            'total': probe.total,
+            'validator': probe.validator,
+            'chunk_size': self.chunk_size,
+            'done': sorted(done_set),
+        }
+        temp_path = progress_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(temp_path, progress_path)
+
+    @staticmethod
+    def _remove(*path_list: str) -> None:
+        for path in path_list:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class _ChunkInterrupted(OSError):
+
+    def __init__(self, pos: int):
+        """
+        分段下载过程中连接中断
+        :param pos: 中断时已经写入到的位置
+        """
+        OSError.__init__(self, f'连接中断 已下载到 {pos}')
+        self.pos: int = pos
+
+
+class _ProgressReporter:
+
+    def __init__(self, progress_callback: Optional[Callable[[float, str], None]]):
+        """
+        汇总各分段的进度 每秒最多通知一次
+        :param progress_callback: 下载进度的回调
+        """
+        self.progress_callback: Optional[Callable[[float, str], None]] = progress_callback
+        self.total: int = -1
+        self.downloaded: int = 0
+        self._lock = threading.Lock()
+        self._last_log_time: float = time.time()
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            self.downloaded += size
+            now = time.time()
+            if now - self._last_log_time < 1:
+                return
+            self._last_log_time = now
+            downloaded_mb = self.downloaded / 1024.0 / 1024.0
+            total_mb = self.total / 1024.0 / 1024.0
+            progress = self.downloaded / self.total if self.total > 0 else 0
+        msg = f"{gt('正在下载')} {downloaded_mb:.2f}/{total_mb:.2f} MB ({progress * 100:.2f}%)"
+        self.notify(progress, msg)
+
+    def notify(self, progress: float, msg: str, log_msg: bool = True) -> None:
+        if log_msg:
+            log.info(msg)
+        if self.progress_callback is not None:
+            self.progress_callback(progress, msg)
@@ -15,6 +15,7 @@ class CommonDownloaderParam:
             gitee_release_download_url: Optional[str] = None,
             mirror_chan_download_url: Optional[str] = None,
             check_existed_list: Optional[list[str]] = None,
+            sha256: Optional[str] = None,
     ):
         """
         一个通用下载器 可提供3个下载源 并检查文件是否存在 如果存在则不进行下载
@@ -26,6 +27,7 @@ class CommonDownloaderParam:
             gitee_release_download_url (Optional[str], optional): Gitee Release下载地址. Defaults to None.
             mirror_chan_download_url (Optional[str], optional): Mirror酱下载地址. Defaults to None.
             check_existed_list (Optional[list[str]], optional): 需要检查文件是否存在的列表 完整路径的列表. Defaults to None.
+            sha256 (Optional[str], optional): 清单中下载文件的SHA-256 为空时不校验. Defaults to None.
         """
         self.save_file_path: str = save_file_path
         self.save_file_name: str = save_file_name
@@ -33,6 +35,7 @@ class CommonDownloaderParam:
         self.gitee_release_download_url: Optional[str] = gitee_release_download_url
         self.mirror_chan_download_url: Optional[str] = mirror_chan_download_url
         self.check_existed_list: list[str] = [] if check_existed_list is None else check_existed_list
+        self.sha256: Optional[str] = sha256
 
 
 class CommonDownloader:
@@ -81,7 +84,8 @@ class CommonDownloader:
             download_url=download_url,
             save_file_path=os.path.join(self.param.save_file_path, self.param.save_file_name),
             proxy=proxy_url,
-            progress_callback=progress_callback)
+            progress_callback=progress_callback,
+            sha256=self.param.sha256)
 
     def is_file_existed(self) -> bool:
         """
@@ -3,6 +3,7 @@ from typing import Callable, Optional
 
 from one_dragon.utils import file_utils, http_utils
 from one_dragon.utils.log_utils import log
+from one_dragon.base.web import chunk_downloader
 from one_dragon.base.web.common_downloader import CommonDownloader, CommonDownloaderParam
 
 
@@ -71,6 +72,11 @@ class ZipDownloader(CommonDownloader):
         if not os.path.exists(zip_file_path):
             return False
 
+        # 解压前按清单校验 不完整的压缩包删除后重新下载
+        if not chunk_downloader.is_sha256_matched(zip_file_path, self.param.sha256):
+            os.remove(zip_file_path)
+            return False
+
         file_utils.unzip_file(zip_file_path=zip_file_path, unzip_dir_path=self.param.save_file_path)
         log.info(f"解压完成 {zip_file_path}")
 
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from one_dragon.base.web.chunk_downloader import ChunkDownloader
+
+_FILE_SIZE: int = 20 * 1024 * 1024
+"""测试文件大小"""
+
+_DROP_AFTER_BYTES: int = 1024 * 1024
+"""前几个请求发送这么多字节后断开连接"""
+
+_BYTES_PER_SECOND: int = 8 * 1024 * 1024
+"""每个连接的限速 模拟单个连接的带宽限制"""
+
+
+class _TestServer(ThreadingHTTPServer):
+
+    def __init__(self, data: bytes, support_range: bool, drop_request_cnt: int):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), _FlakyHandler)
+        self.data: bytes = data
+        self.support_range: bool = support_range
+        self.drop_request_cnt: int = drop_request_cnt  # 前几个请求会断开连接
+        self.drop_from: int = -1  # 大于0时 从这个位置之后开始的请求都会断开连接
+        self.request_cnt: int = 0
+        self.sent_bytes: int = 0
+        self.lock = threading.Lock()
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+
+    server: _TestServer
+
+    def do_GET(self):
+        data = self.server.data
+        with self.server.lock:
+            self.server.request_cnt += 1
+            drop = self.server.request_cnt <= self.server.drop_request_cnt
+
+        start, end = 0, len(data) - 1
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if self.server.support_range and match is not None:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', '"test"')
+        self.end_headers()
+
+        if 0 < self.server.drop_from <= start:
+            drop = True
+        body = data[start:end + 1]
+        if drop and len(body) > _DROP_AFTER_BYTES:
+            body = body[:_DROP_AFTER_BYTES]
+        pos = 0
+        try:
+            while pos < len(body):
+                part = body[pos:pos + 256 * 1024]
+                self.wfile.write(part)
+                pos += len(part)
+                time.sleep(len(part) / _BYTES_PER_SECOND)
+        except (ConnectionError, OSError):
+            pass
+        with self.server.lock:
+            self.server.sent_bytes += pos
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _run_case(name: str, data: bytes, support_range: bool, drop_request_cnt: int) -> None:
+    server = _TestServer(data, support_range, drop_request_cnt)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:%d/file.zip' % server.server_address[1]
+    save_dir = tempfile.mkdtemp()
+    save_path = os.path.join(save_dir, 'file.zip')
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    downloader = ChunkDownloader(chunk_size=2 * 1024 * 1024, retry_backoff=0.1)
+    start = time.perf_counter()
+    ok = downloader.download(url, save_path, sha256=sha256)
+    if not ok and not support_range:  # 单个连接下载时 中断只能重新下载
+        ok = downloader.download(url, save_path, sha256=sha256)
+    cost = time.perf_counter() - start
+
+    matched = ok and open(save_path, 'rb').read() == data
+    print('%s 成功 %s 内容一致 %s 耗时 %.2fs 请求 %d 次 传输 %.1fMB 残留文件 %s' % (
+        name, ok, matched, cost, server.request_cnt, server.sent_bytes / 1024 / 1024,
+        [i for i in os.listdir(save_dir) if i != 'file.zip']))
+
+    server.shutdown()
+    shutil.rmtree(save_dir)
+
+
+def _run_resume_case(data: bytes) -> None:
+    """
+    第一次下载时后半段的连接都会断开且不重试 模拟程序中途退出 第二次下载应只请求剩余的部分
+    """
+    server = _TestServer(data, True, 0)
+    server.drop_from = len(data) // 2
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:%d/file.zip' % server.server_address[1]
+    save_dir = tempfile.mkdtemp()
+    save_path = os.path.join(save_dir, 'file.zip')
+
+    first_ok = ChunkDownloader(chunk_size=2 * 1024 * 1024, max_retry=0).download(url, save_path)
+    time.sleep(0.5)  # 等服务器的处理线程统计完
+    first_sent = server.sent_bytes
+    server.drop_from = -1
+    second_ok = ChunkDownloader(chunk_size=2 * 1024 * 1024).download(
+        url, save_path, sha256=hashlib.sha256(data).hexdigest())
+    time.sleep(0.5)
+    resumed_sent = server.sent_bytes - first_sent
+
+    print('断点续传 第一次 %s 第二次 %s 第二次传输 %.1fMB/%.1fMB' % (
+        first_ok, second_ok, resumed_sent / 1024 / 1024, len(data) / 1024 / 1024))
+
+    server.shutdown()
+    shutil.rmtree(save_dir)
+
+
+def __debug():
+    data = os.urandom(_FILE_SIZE)
+    _run_case('分段下载 有断线', data, True, 6)
+    _run_case('不支持Range 有断线', data, False, 2)
+    _run_resume_case(data)
+
+
+if __name__ == '__main__':
+    __debug()
@@ -0,0 +1,72 @@
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener, TimedRotatingFileHandler
+from typing import List, Optional
+
+from one_dragon.utils import log_utils
+
+
+def _create_handlers(log_dir: str, name: str) -> List[logging.Handler]:
+    file_handler = TimedRotatingFileHandler(os.path.join(log_dir, f'{name}.txt'), when='midnight',
+                                            interval=1, backupCount=3, encoding='utf-8')
+    console_handler = logging.StreamHandler(open(os.devnull, 'w', encoding='utf-8'))
+    for handler in [file_handler, console_handler]:
+        handler.setLevel(logging.DEBUG)
+        handler.setFormatter(log_utils._FORMATTER)
+    return [file_handler, console_handler]
+
+
+def _simulate_loop(logger: logging.Logger, frame_cnt: int) -> float:
+    """
+    模拟定位循环中的日志调用 每帧若干条DEBUG 定期一条INFO
+    :return: 每次日志调用的平均耗时 微秒
+    """
+    call_cnt = 0
+    start = time.perf_counter()
+    for frame in range(frame_cnt):
+        logger.debug('准备计算人物坐标 使用上一个坐标为 %s 移动时间 %.2f 是否在移动 %s', (frame, frame, 10), 1.0, True)
+        logger.debug('上次记录时间 %.2f 停止移动时间 %.2f 当前时间 %.2f', 1.0, 0, frame / 10)
+        logger.debug('提交攻击检测 %s', frame % 2 == 0)
+        call_cnt += 3
+        if frame % 10 == 0:
+            logger.info('计算坐标 %d', frame)
+            call_cnt += 1
+    return (time.perf_counter() - start) * 1e6 / call_cnt
+
+
+def __debug(frame_cnt: int = 10000):
+    log_dir = tempfile.mkdtemp()
+
+    sync_logger = logging.getLogger('OneDragonBenchmarkSync')
+    sync_logger.propagate = False
+    sync_logger.setLevel(logging.DEBUG)
+    sync_handlers = _create_handlers(log_dir, 'sync')
+    for handler in sync_handlers:
+        sync_logger.addHandler(handler)
+    sync_us = _simulate_loop(sync_logger, frame_cnt)
+
+    queue_logger = logging.getLogger('OneDragonBenchmarkQueue')
+    queue_logger.propagate = False
+    queue_logger.setLevel(logging.DEBUG)
+    log_queue = queue.Queue(maxsize=log_utils._QUEUE_SIZE)
+    queue_handler = log_utils._DropDebugQueueHandler(log_queue)
+    queue_handler.setLevel(logging.DEBUG)
+    queue_logger.addHandler(queue_handler)
+    listener: Optional[QueueListener] = QueueListener(log_queue, *_create_handlers(log_dir, 'queue'),
+                                                      respect_handler_level=True)
+    listener.start()
+    queue_us = _simulate_loop(queue_logger, frame_cnt)
+    start = time.perf_counter()
+    listener.stop()
+    drain_ms = (time.perf_counter() - start) * 1000
+
+    print('帧数 %d' % frame_cnt)
+    print('同步写入 %.2fus/次' % sync_us)
+    print('队列写入 %.2fus/次 丢弃 %d 条 退出时写完剩余日志 %.1fms' % (queue_us, queue_handler.dropped_cnt, drain_ms))
+
+
+if __name__ == '__main__':
+    __debug()
@@ -0,0 +1,241 @@
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+from one_dragon.base.operation.one_dragon_schedule import OneDragonScheduleCheckpoint, OneDragonScheduler, \
+    ScheduleApp, ScheduleInstance
+
+_APP_ID_LIST: List[str] = ['assignments', 'trailblaze_power', 'world_patrol', 'sim_universe', 'email', 'daily_training']
+"""模拟的应用"""
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _FakeController:
+
+    def __init__(self, app_seconds: Dict[Tuple[int, str], float], fail_set: Set[Tuple[int, str]],
+                 switch_seconds: float = 60, stop_at: Optional[float] = None):
+        """
+        假的控制器 不操作游戏 按给定的耗时和结果运行应用 使用虚拟的时间
+        :param app_seconds: (实例, 应用) -> 耗时
+        :param fail_set: 会失败的 (实例, 应用) 重试时成功
+        :param switch_seconds: 切换账号的耗时
+        :param stop_at: 到这个时间后中断 模拟中途退出
+        """
+        self.app_seconds: Dict[Tuple[int, str], float] = app_seconds
+        self.fail_set: Set[Tuple[int, str]] = set(fail_set)
+        self.switch_seconds: float = switch_seconds
+        self.stop_at: Optional[float] = stop_at
+
+        self.now: float = 0
+        self.active_instance: int = -1
+        self.switch_cnt: int = 0
+        self.run_list: List[Tuple[int, str]] = []
+
+    def switch_account(self, instance_idx: int) -> None:
+        if instance_idx == self.active_instance:
+            return
+        self.now += self.switch_seconds
+        self.active_instance = instance_idx
+        self.switch_cnt += 1
+
+    def run_app(self, instance_idx: int, app_id: str) -> Tuple[bool, float]:
+        """
+        :return: 是否成功, 耗时
+        """
+        if self.stop_at is not None and self.now >= self.stop_at:
+            raise _Interrupted()
+        assert instance_idx == self.active_instance, '在错误的账号上运行'
+        seconds = self.app_seconds[(instance_idx, app_id)]
+        self.now += seconds
+        self.run_list.append((instance_idx, app_id))
+        key = (instance_idx, app_id)
+        if key in self.fail_set:
+            self.fail_set.remove(key)
+            return False, seconds
+        return True, seconds
+
+
+class _FakeRecord:
+
+    def __init__(self):
+        """
+        一个实例的运行记录 与 AppRunRecord 一样记录状态和平滑耗时 只保存在内存中
+        """
+        self.success: Set[str] = set()
+        self.run_duration: Dict[str, float] = {}
+
+    def to_schedule_app(self, app_id: str) -> ScheduleApp:
+        return ScheduleApp(app_id, app_id not in self.success, self.run_duration.get(app_id, 300))
+
+    def update(self, app_id: str, success: bool, seconds: float) -> None:
+        if not success:
+            return
+        self.success.add(app_id)
+        old = self.run_duration.get(app_id, 0)
+        self.run_duration[app_id] = seconds if old <= 0 else (old + seconds) / 2
+
+
+def simulate(record_dict: Dict[int, _FakeRecord], controller: _FakeController,
+             checkpoint: OneDragonScheduleCheckpoint, current_instance_idx: int,
+             dt: str = '20250101', use_plan: bool = True) -> Tuple[OneDragonScheduler, Dict[int, float]]:
+    """
+    按 OneDragonApp 的流程运行一次一条龙
+    检测任务状态 -> 运行任务 -> 重试失败任务 -> 切换实例 -> 切换账号 直到回到第一个实例
+    :param record_dict: 实例 -> 运行记录
+    :param controller: 假的控制器
+    :param checkpoint: 进度记录
+    :param current_instance_idx: 开始时的实例
+    :param dt: 日期
+    :param use_plan: 是否使用调度的顺序 否则按实例原来的顺序
+    :return: 调度, 实例 -> 完成时间
+    """
+    controller.active_instance = current_instance_idx
+    scheduler = OneDragonScheduler(checkpoint)
+    instance_list = [ScheduleInstance(idx, '%02d' % idx, [record.to_schedule_app(i) for i in _APP_ID_LIST])
+                     for idx, record in record_dict.items()]
+    order = scheduler.plan(instance_list, current_instance_idx, dt, now=controller.now)
+    if not use_plan:
+        order = [current_instance_idx] + [i for i in record_dict if i != current_instance_idx]
+
+    finish_time: Dict[int, float] = {}
+    try:
+        for instance_idx in order:
+            controller.switch_account(instance_idx)
+            record = record_dict[instance_idx]
+            to_run = [i for i in _APP_ID_LIST if i not in record.success]
+            fail_list = []
+            for app_id in to_run:
+                success, seconds = controller.run_app(instance_idx, app_id)
+                record.update(app_id, success, seconds)
+                scheduler.record_app(instance_idx, app_id, success, seconds)
+                if not success:
+                    fail_list.append(app_id)
+            for app_id in fail_list:
+                success, seconds = controller.run_app(instance_idx, app_id)
+                record.update(app_id, success, seconds)
+                scheduler.record_app(instance_idx, app_id, success, seconds)
+            scheduler.finish_instance(instance_idx)
+            finish_time[instance_idx] = controller.now
+        controller.switch_account(order[0])
+        scheduler.finish_all()
+    except _Interrupted:
+        pass
+    return scheduler, finish_time
+
+
+def _random_case(rng: random.Random, instance_cnt: int) -> Tuple[Dict[int, _FakeRecord], Dict[Tuple[int, str], float], Set]:
+    """
+    随机生成实例 部分实例今天已经运行过一部分 耗时记录来自上一次运行
+    """
+    record_dict: Dict[int, _FakeRecord] = {}
+    app_seconds: Dict[Tuple[int, str], float] = {}
+    fail_set = set()
+    for idx in range(1, instance_cnt + 1):
+        record = _FakeRecord()
+        for app_id in _APP_ID_LIST:
+            seconds = rng.choice([60, 120, 300, 900, 1800, 3600])
+            app_seconds[(idx, app_id)] = seconds
+            record.run_duration[app_id] = seconds * rng.uniform(0.8, 1.2)
+            if rng.random() < 0.4:
+                record.success.add(app_id)
+            elif rng.random() < 0.1:
+                fail_set.add((idx, app_id))
+        record_dict[idx] = record
+    return record_dict, app_seconds, fail_set
+
+
+def _copy_records(record_dict: Dict[int, _FakeRecord]) -> Dict[int, _FakeRecord]:
+    result = {}
+    for idx, record in record_dict.items():
+        new_record = _FakeRecord()
+        new_record.success = set(record.success)
+        new_record.run_duration = dict(record.run_duration)
+        result[idx] = new_record
+    return result
+
+
+def compare_order(case_cnt: int = 200, instance_cnt: int = 6, seed: int = 0) -> None:
+    """
+    比较按原顺序和按调度顺序运行时 每个实例的平均完成时间
+    """
+    rng = random.Random(seed)
+    plain_total, plan_total = 0.0, 0.0
+    for _ in range(case_cnt):
+        record_dict, app_seconds, fail_set = _random_case(rng, instance_cnt)
+        for use_plan in [False, True]:
+            controller = _FakeController(app_seconds, fail_set)
+            _, finish_time = simulate(_copy_records(record_dict), controller,
+                                      OneDragonScheduleCheckpoint(is_mock=True), 1, use_plan=use_plan)
+            avg = sum(finish_time.values()) / len(finish_time)
+            if use_plan:
+                plan_total += avg
+            else:
+                plain_total += avg
+    print('实例平均完成时间 原顺序 %.0f分钟 调度顺序 %.0f分钟' % (
+        plain_total / case_cnt / 60, plan_total / case_cnt / 60))
+
+
+def check_resume(seed: int = 1) -> bool:
+    """
+    中途退出后继续 已完成的实例不再切换进去 每个应用只成功运行一次
+    换了一天后 不沿用上一次的进度
+    """
+    rng = random.Random(seed)
+    record_dict, app_seconds, fail_set = _random_case(rng, 5)
+    checkpoint = OneDragonScheduleCheckpoint(is_mock=True)
+
+    first = _FakeController(app_seconds, fail_set, stop_at=3600 * 2)
+    scheduler, first_finish = simulate(record_dict, first, checkpoint, 1)
+    interrupted_at = first.active_instance
+
+    second = _FakeController(app_seconds, first.fail_set)
+    scheduler, second_finish = simulate(record_dict, second, checkpoint, interrupted_at)
+    print('第一次完成实例 %s 中断于 %02d 第二次完成实例 %s 继续进度 %s' % (
+        list(first_finish.keys()), interrupted_at, list(second_finish.keys()), scheduler.resumed))
+    print(scheduler.build_report({}, now=first.now + second.now))
+
+    run_list = first.run_list + second.run_list
+    success_twice = len(run_list) - len(set(run_list)) > len(fail_set)
+    revisited = [i for i in first_finish if i in second_finish and i != interrupted_at]
+    all_done = all(len(r.success) == len(_APP_ID_LIST) for r in record_dict.values())
+
+    next_day = OneDragonScheduler(checkpoint)
+    next_day.plan([], 1, '20250102')
+    return scheduler.resumed and not success_twice and len(revisited) == 0 and all_done and not next_day.resumed
+
+
+def check_excluded_current(seed: int = 2) -> bool:
+    """
+    当前实例没有加入一条龙时 不运行这个实例 从第一个安排的实例开始
+    中途退出后继续 也不会运行这个实例
+    """
+    rng = random.Random(seed)
+    record_dict, app_seconds, fail_set = _random_case(rng, 4)
+    excluded = 9
+    checkpoint = OneDragonScheduleCheckpoint(is_mock=True)
+
+    first = _FakeController(app_seconds, fail_set, stop_at=3600)
+    first.active_instance = excluded
+    _, first_finish = simulate(record_dict, first, checkpoint, excluded)
+
+    second = _FakeController(app_seconds, first.fail_set)
+    scheduler, second_finish = simulate(record_dict, second, checkpoint, excluded)
+    print('当前实例不在一条龙中 第一次完成实例 %s 第二次完成实例 %s 继续进度 %s' % (
+        list(first_finish.keys()), list(second_finish.keys()), scheduler.resumed))
+
+    run_list = first.run_list + second.run_list
+    ran_excluded = any(i[0] == excluded for i in run_list)
+    all_done = all(len(r.success) == len(_APP_ID_LIST) for r in record_dict.values())
+    return not ran_excluded and excluded not in checkpoint.instance_order and all_done
+
+
+def __debug():
+    compare_order()
+    print('断点继续符合预期 %s' % check_resume())
+    print('跳过未加入一条龙的当前实例 %s' % check_excluded_current())
+
+
+if __name__ == '__main__':
+    __debug()
@@ -0,0 +1,82 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import List, Optional
+
+from one_dragon.base.notify.push_dispatcher import PushDispatcher, PushSession
+
+_LATENCY_SECONDS: float = 2
+"""本地服务器模拟的响应延迟"""
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        time.sleep(_LATENCY_SECONDS)
+        body = b'{"code": 200}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _legacy_send(url: str, channel_cnt: int, image: Optional[BytesIO]) -> None:
+    """
+    旧的发送方式 每个渠道一个线程 不复用连接 调用方等待全部完成
+    """
+    import requests
+
+    def _post():
+        data = image.getvalue() if image is not None else b''
+        requests.post(url, data=data, timeout=15)
+
+    ts = [threading.Thread(target=_post) for _ in range(channel_cnt)]
+    [t.start() for t in ts]
+    [t.join() for t in ts]
+
+
+def __debug(channel_cnt: int = 4, message_cnt: int = 3):
+    server = _start_server()
+    url = 'http://127.0.0.1:%d/push' % server.server_address[1]
+    image = BytesIO(b'0' * 1024 * 1024)
+
+    start = time.perf_counter()
+    for _ in range(message_cnt):
+        _legacy_send(url, channel_cnt, image)
+    legacy_blocked = time.perf_counter() - start
+
+    session = PushSession()
+    dispatcher = PushDispatcher(session, channel_workers=channel_cnt)
+
+    def _channel(title: str, content: str, img: Optional[BytesIO]) -> None:
+        session.post(url, data=img.getvalue() if img is not None else b'')
+
+    channel_list: List = [('channel_%d' % i, _channel) for i in range(channel_cnt)]
+    start = time.perf_counter()
+    for i in range(message_cnt):
+        dispatcher.submit('benchmark', 'message %d' % i, image, channel_list)
+    blocked = time.perf_counter() - start
+    dispatcher.flush()
+    total = time.perf_counter() - start
+
+    print('渠道 %d 消息 %d 服务器延迟 %.1fs' % (channel_cnt, message_cnt, _LATENCY_SECONDS))
+    print('旧方式 调用方阻塞 %.3fs' % legacy_blocked)
+    print('分发器 调用方阻塞 %.3fs 全部发送完成 %.3fs' % (blocked, total))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    __debug()
@@ -0,0 +1,47 @@
+import time
+from typing import Optional
+
+from one_dragon.base.screen.template_atlas import TemplateAtlas, build_template_atlas, get_template_atlas_path, \
+    list_template_source
+from one_dragon.base.screen.template_loader import TemplateLoader
+
+
+def _load_all(atlas: Optional[TemplateAtlas]) -> float:
+    """
+    用一个新的 TemplateLoader 加载全部模板 并读取一遍像素 模拟第一次使用
+    :param atlas: 使用的图集 为空时从源文件读取
+    :return: 耗时 毫秒
+    """
+    loader = TemplateLoader(use_atlas=False)
+    loader.atlas = atlas
+    start = time.perf_counter()
+    for key in list_template_source():
+        sub_dir, template_id = key.split('/')
+        template = loader.get_template(sub_dir, template_id)
+        if template is None:
+            continue
+        for image in [template.raw, template.mask, template.gray]:
+            if image is not None:
+                image.max()
+    return (time.perf_counter() - start) * 1000
+
+
+def __debug():
+    atlas_path = get_template_atlas_path()
+    start = time.perf_counter()
+    template_cnt = build_template_atlas(atlas_path)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # 第一次是冷启动 之后文件已在系统缓存中
+    disk_cold = _load_all(None)
+    disk_warm = _load_all(None)
+    atlas_cold = _load_all(TemplateAtlas(atlas_path))
+    atlas_warm = _load_all(TemplateAtlas(atlas_path))
+
+    print('模板 %d 个 构建图集 %.0fms' % (template_cnt, build_ms))
+    print('源文件 冷 %.0fms 热 %.0fms' % (disk_cold, disk_warm))
+    print('图集 冷 %.0fms 热 %.0fms' % (atlas_cold, atlas_warm))
+
+
+if __name__ == '__main__':
+    __debug()
@@ -13,24 +13,29 @@ class DownloadService:
         self.env_config: EnvConfig = env_config
 
     def download_env_file(self, file_name: str, save_file_path: str,
-                          progress_callback: Optional[Callable[[float, str], None]] = None) -> bool:
+                          progress_callback: Optional[Callable[[float, str], None]] = None,
+                          sha256: Optional[str] = None) -> bool:
         """
         下载环境文件
         :param file_name: 要下载的文件名
         :param save_file_path: 保存路径，包含文件名
         :param progress_callback: 下载进度的回调，进度发生改变时，通过该方法通知调用方。
+        :param sha256: 清单中的 SHA-256 为空时不校验
         :return: 是否下载成功
         """
         download_url = f'{self.env_config.env_source}/{self.project_config.project_name}/{file_name}'
-        return self.download_file_from_url(download_url, save_file_path, progress_callback=progress_callback)
+        return self.download_file_from_url(download_url, save_file_path,
+                                           progress_callback=progress_callback, sha256=sha256)
 
     def download_file_from_url(self, download_url: str, save_file_path: str,
-                               progress_callback: Optional[Callable[[float, str], None]] = None) -> bool:
+                               progress_callback: Optional[Callable[[float, str], None]] = None,
+                               sha256: Optional[str] = None) -> bool:
         """
         从指定URL下载文件
         :param download_url: 下载URL
         :param save_file_path: 保存路径，包含文件名
         :param progress_callback: 下载进度的回调，进度发生改变时，通过该方法通知调用方。
+        :param sha256: 清单中的 SHA-256 为空时不校验
         :return: 是否下载成功
         """
         proxy = None
@@ -41,4 +46,4 @@ class DownloadService:
                 proxy = self.env_config.personal_proxy
 
         return http_utils.download_file(download_url, save_file_path,
-                                        proxy=proxy, progress_callback=progress_callback)
+                                        proxy=proxy, progress_callback=progress_callback, sha256=sha256)
@@ -398,6 +398,38 @@ class EnvConfig(YamlConfig):
         """
         self.update('copy_screenshot', new_value)
 
+    @property
+    def debug_image_format(self) -> str:
+        """
+        调试图片的保存格式 png 或 webp(无损)
+        :return:
+        """
+        return self.get('debug_image_format', 'png')
+
+    @debug_image_format.setter
+    def debug_image_format(self, new_value: str) -> None:
+        """
+        调试图片的保存格式
+        :return:
+        """
+        self.update('debug_image_format', new_value)
+
+    @property
+    def debug_image_png_compression(self) -> int:
+        """
+        调试图片保存成png时的压缩等级 0~9
+        :return:
+        """
+        return self.get('debug_image_png_compression', 3)
+
+    @debug_image_png_compression.setter
+    def debug_image_png_compression(self, new_value: int) -> None:
+        """
+        调试图片保存成png时的压缩等级
+        :return:
+        """
+        self.update('debug_image_png_compression', new_value)
+
     @property
     def key_start_running(self) -> str:
         """
@@ -493,4 +525,16 @@ class EnvConfig(YamlConfig):
 
     @ocr_cache.setter
     def ocr_cache(self, new_value: bool) -> None:
-        self.update('ocr_cache', new_value, save=True)
\ No newline at end of file
+        self.update('ocr_cache', new_value, save=True)
+
+    @property
+    def operation_profile(self) -> bool:
+        """
+        Returns:
+            是否记录指令的性能数据 记录保存在 .debug/profile
+        """
+        return self.get('operation_profile', False)
+
+    @operation_profile.setter
+    def operation_profile(self, new_value: bool) -> None:
+        self.update('operation_profile', new_value, save=True)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import threading
+import time
+from typing import Optional
+
+
+class RunStateToken:
+
+    STOP: int = 0
+    RUN: int = 1
+    PAUSE: int = 2
+
+    def __init__(self):
+        """
+        运行状态的令牌 状态变化时立刻唤醒所有在等待的线程
+        用于替代轮询 让暂停、恢复、停止在毫秒级生效
+        """
+        self._state: int = RunStateToken.STOP
+        self._condition = threading.Condition()
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    def set_state(self, state: int) -> None:
+        """
+        更新状态 并唤醒等待中的线程
+        :param state: 新状态
+        :return:
+        """
+        with self._condition:
+            self._state = state
+            self._condition.notify_all()
+
+    @property
+    def is_running(self) -> bool:
+        return self._state == RunStateToken.RUN
+
+    def wait_until_not_paused(self, timeout: Optional[float] = None) -> bool:
+        """
+        暂停中时阻塞 直到恢复运行或停止
+        :param timeout: 最多等待的秒数 不传入时一直等待
+        :return: 是否运行中
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._state != RunStateToken.PAUSE, timeout)
+            return self._state == RunStateToken.RUN
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        运行中的等待
+        期间暂停的话 剩余的等待时间会冻结 恢复后继续等待
+        期间停止的话 立刻返回
+        开始时不在运行中的话 等同于 time.sleep
+        :param seconds: 等待秒数
+        :return: 是否完整等待了 停止时返回False
+        """
+        if seconds <= 0:
+            return True
+        with self._condition:
+            if self._state != RunStateToken.RUN:
+                run_when_start = False
+            else:
+                run_when_start = True
+                remaining = seconds
+                while remaining > 0:
+                    start = time.monotonic()
+                    changed = self._condition.wait_for(lambda: self._state != RunStateToken.RUN, remaining)
+                    remaining -= time.monotonic() - start
+                    if not changed:
+                        break
+                    self._condition.wait_for(lambda: self._state != RunStateToken.PAUSE)
+                    if self._state == RunStateToken.STOP:
+                        return False
+        if not run_when_start:
+            time.sleep(seconds)
+        return True
+
+    def hold(self, seconds: float) -> bool:
+        """
+        按住按键时的等待 运行中暂停或停止时立刻返回 让调用方松开按键
+        开始时不在运行中的话 等同于 time.sleep
+        :param seconds: 等待秒数
+        :return: 是否完整等待了
+        """
+        if seconds <= 0:
+            return True
+        with self._condition:
+            if self._state == RunStateToken.RUN:
+                return not self._condition.wait_for(lambda: self._state != RunStateToken.RUN, seconds)
+        time.sleep(seconds)
+        return True
@@ -9,6 +9,7 @@ from cv2.typing import MatLike
 
 from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResultList, MatchResult
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
 
 feature_detector = cv2.SIFT_create()
 
@@ -169,6 +170,7 @@ def mark_area_as_color(image: MatLike, pos: List, color, new_image: bool = False
     return to_paint
 
 
+@operation_profiler.profile(ProfileCategory.TEMPLATE)
 def match_template(source: MatLike, template: MatLike, threshold,
                    mask: np.ndarray = None, only_best: bool = True,
                    ignore_inf: bool = False) -> MatchResultList:
@@ -348,6 +350,7 @@ def feature_keypoints_from_np(np_arr):
                                   response=kp[4], octave=int(kp[5]), class_id=int(kp[6])) for kp in np_arr])
 
 
+@operation_profiler.profile(ProfileCategory.TEMPLATE)
 def feature_match(source_kp, source_desc, template_kp, template_desc,
                   source_mask: Optional[MatLike] = None):
     if len(source_kp) == 0 or len(template_kp) == 0:
@@ -362,8 +365,22 @@ def feature_match(source_kp, source_desc, template_kp, template_desc,
         if m.distance < 0.75 * n.distance:
             good_matches.append(m)
 
+    offset_x, offset_y, template_scale = feature_match_ransac(good_matches, source_kp, template_kp, source_mask)
+    return good_matches, offset_x, offset_y, template_scale
+
+
+def feature_match_ransac(good_matches, source_kp, template_kp,
+                         source_mask: Optional[MatLike] = None):
+    """
+    对通过比值测试的匹配点 使用RANSAC找出内点 用最好的内点计算模板的位置和缩放
+    :param good_matches: 通过比值测试的匹配点 queryIdx 对应模板 trainIdx 对应原图
+    :param source_kp: 原图关键点
+    :param template_kp: 模板关键点
+    :param source_mask: 原图掩码
+    :return: 模板缩放后在原图上的偏移量x, y 以及缩放比例 找不到时都为None
+    """
     if len(good_matches) < 4:  # 不足4个优秀匹配点时 不能使用RANSAC
-        return good_matches, None, None, None
+        return None, None, None
 
     # 提取匹配点的坐标
     template_points = np.float32([template_kp[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)  # 模板的
@@ -371,10 +388,12 @@ def feature_match(source_kp, source_desc, template_kp, template_desc,
 
     # 使用RANSAC算法估计模板位置和尺度
     _, mask = cv2.findHomography(template_points, source_points, cv2.RANSAC, 5.0, mask=source_mask)
+    if mask is None:  # 匹配点共线等情况 无法估计
+        return None, None, None
     # 获取内点的索引 拿最高置信度的
     inlier_indices = np.where(mask.ravel() == 1)[0]
     if len(inlier_indices) == 0:  # mask 里没找到就算了 再用good_matches的结果也是很不准的
-        return good_matches, None, None, None
+        return None, None, None
 
     # 距离最短 置信度最高的结果
     best_match = None
@@ -394,7 +413,7 @@ def feature_match(source_kp, source_desc, template_kp, template_desc,
     offset_x = query_point[0] - train_point[0] * template_scale
     offset_y = query_point[1] - train_point[1] * template_scale
 
-    return good_matches, offset_x, offset_y, template_scale
+    return offset_x, offset_y, template_scale
 
 
 def feature_match_for_one(source_kp, source_desc, template_kp, template_desc,
@@ -0,0 +1,357 @@
+import atexit
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Optional
+
+import cv2
+from cv2.typing import MatLike
+
+from one_dragon.utils import os_utils
+from one_dragon.utils.log_utils import log
+
+IMAGE_FORMAT_PNG: str = 'png'
+IMAGE_FORMAT_WEBP: str = 'webp'
+
+IMAGE_SUFFIX_LIST: list[str] = ['.png', '.webp']
+"""调试图片可能的后缀 读取时按顺序查找"""
+
+DEFAULT_QUOTA: tuple[int, float] = (256 * 1024 * 1024, 7)
+"""没有单独配置的类别使用的配额 (最大字节数, 最大保留天数)"""
+
+CATEGORY_QUOTA: dict[str, tuple[int, float]] = {
+    'images': (512 * 1024 * 1024, 7),  # 截图
+    'gps': (1024 * 1024 * 1024, 30),  # 坐标样例 用于训练
+    'cal_pos_fail': (256 * 1024 * 1024, 30),  # 坐标计算失败的样例
+}
+"""各类别的配额 (最大字节数, 最大保留天数)"""
+
+
+def find_artifact_image(path_without_suffix: str) -> Optional[str]:
+    """
+    找到保存的调试图片 保存格式可能被修改过 因此按后缀依次查找
+    :param path_without_suffix: 不含后缀的路径
+    :return: 存在的图片路径
+    """
+    for suffix in IMAGE_SUFFIX_LIST:
+        path = path_without_suffix + suffix
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class _Artifact:
+
+    def __init__(self, category: str, rel_dir: str,
+                 image_dict: dict[str, MatLike], text_dict: dict[str, str]):
+        self.category: str = category
+        self.rel_dir: str = rel_dir
+        self.image_dict: dict[str, MatLike] = image_dict
+        self.text_dict: dict[str, str] = text_dict
+
+
+class _CategoryUsage:
+
+    def __init__(self):
+        """
+        一个类别的占用情况
+        淘汰单位是类别目录下的一个样例目录 直接保存在类别目录下的文件则以文件为单位
+        """
+        self.unit_dict: dict[str, list] = {}  # 淘汰单位的相对路径 -> [字节数, 最后修改时间]
+        self.total_bytes: int = 0
+
+    def add(self, unit: str, size: int, mtime: float) -> None:
+        usage = self.unit_dict.get(unit)
+        if usage is None:
+            usage = [0, mtime]
+            self.unit_dict[unit] = usage
+        usage[0] += size
+        usage[1] = max(usage[1], mtime)
+        self.total_bytes += size
+
+    def pop(self, unit: str) -> None:
+        usage = self.unit_dict.pop(unit, None)
+        if usage is not None:
+            self.total_bytes -= usage[0]
+
+
+class DebugArtifactSink:
+
+    def __init__(self, root_dir: str,
+                 queue_size: int = 32,
+                 image_format: str = IMAGE_FORMAT_PNG,
+                 png_compression: int = 3,
+                 quota_dict: Optional[dict[str, tuple[int, float]]] = None):
+        """
+        调试产物的统一写入
+        调用方只把图片放入队列 颜色转换、编码和写文件都在后台线程进行 不会卡住脚本
+        队列满时直接丢弃新的产物 调试数据少几张没有关系
+        每个类别按配额保留 超过最大保留天数的先删除 之后超过大小上限的从旧到新删除
+        :param root_dir: 根目录 每个类别是其中一个子目录
+        :param queue_size: 等待写入的产物的最大数量
+        :param image_format: 图片格式 png 或 webp(无损)
+        :param png_compression: png的压缩等级 0~9 越大文件越小 编码越慢
+        :param quota_dict: 各类别的配额 (最大字节数, 最大保留天数)
+        """
+        self.root_dir: str = root_dir
+        self.image_format: str = image_format
+        self.png_compression: int = png_compression
+        self.quota_dict: dict[str, tuple[int, float]] = dict(CATEGORY_QUOTA if quota_dict is None else quota_dict)
+
+        self.dropped_cnt: int = 0  # 因为队列满丢弃的数量
+        self.written_cnt: int = 0  # 已写入的数量
+
+        self._queue: queue.Queue[_Artifact] = queue.Queue(maxsize=queue_size)
+        self._usage_dict: dict[str, _CategoryUsage] = {}  # 只在后台线程中使用
+        self._pending: int = 0  # 已提交但未写入完成的数量
+        self._pending_condition = threading.Condition()
+
+        self._worker = threading.Thread(target=self._run, name='od_debug_artifact_sink', daemon=True)
+        self._worker.start()
+
+    def configure(self, image_format: Optional[str] = None, png_compression: Optional[int] = None) -> None:
+        """
+        修改图片格式 之后提交的产物生效
+        :param image_format: 图片格式 png 或 webp(无损)
+        :param png_compression: png的压缩等级 0~9
+        :return:
+        """
+        if image_format is not None:
+            if image_format not in [IMAGE_FORMAT_PNG, IMAGE_FORMAT_WEBP]:
+                log.error('不支持的调试图片格式 %s', image_format)
+            else:
+                self.image_format = image_format
+        if png_compression is not None:
+            self.png_compression = min(9, max(0, png_compression))
+
+    def set_quota(self, category: str, max_bytes: int, max_days: float) -> None:
+        """
+        设置一个类别的配额
+        :param category: 类别
+        :param max_bytes: 最大字节数
+        :param max_days: 最大保留天数
+        :return:
+        """
+        self.quota_dict[category] = (max_bytes, max_days)
+
+    @property
+    def image_suffix(self) -> str:
+        return '.' + self.image_format
+
+    def submit(self, category: str, rel_dir: str = '',
+               image_dict: Optional[dict[str, MatLike]] = None,
+               text_dict: Optional[dict[str, str]] = None) -> bool:
+        """
+        提交一个调试产物 不阻塞
+        提交后调用方不能再修改图片
+        :param category: 类别 也是根目录下的子目录名称
+        :param rel_dir: 在类别目录下的相对目录 为空时直接保存在类别目录下
+        :param image_dict: 图片 不含后缀的文件名 -> RGB图片
+        :param text_dict: 文本 含后缀的文件名 -> 内容
+        :return: 是否放入了队列 队列满时丢弃
+        """
+        artifact = _Artifact(category, rel_dir,
+                             {} if image_dict is None else image_dict,
+                             {} if text_dict is None else text_dict)
+        with self._pending_condition:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(artifact)
+            return True
+        except queue.Full:
+            self.dropped_cnt += 1
+            log.debug('调试产物队列已满 丢弃 %s %s', category, rel_dir)
+            self._artifact_done()
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的产物写入完成
+        :param timeout: 最多等待的秒数 为空时一直等待
+        :return: 是否全部写入完成
+        """
+        with self._pending_condition:
+            return self._pending_condition.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def _artifact_done(self) -> None:
+        with self._pending_condition:
+            self._pending -= 1
+            self._pending_condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            artifact = self._queue.get()
+            try:
+                self._write(artifact)
+                self._enforce_quota(artifact.category)
+            except Exception:
+                log.error('调试产物保存失败 %s %s', artifact.category, artifact.rel_dir, exc_info=True)
+            finally:
+                self._artifact_done()
+
+    def _write(self, artifact: _Artifact) -> None:
+        """
+        写入一个产物 并记录占用
+        :param artifact: 产物
+        :return:
+        """
+        usage = self._get_usage(artifact.category)
+        base_dir = os.path.join(self.root_dir, artifact.category, artifact.rel_dir)
+        os.makedirs(base_dir, exist_ok=True)
+
+        image_format = self.image_format
+        for name, image in artifact.image_dict.items():
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            if image_format == IMAGE_FORMAT_WEBP:
+                params = [cv2.IMWRITE_WEBP_QUALITY, 101]  # 超过100为无损
+            else:
+                params = [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+            ok, data = cv2.imencode('.' + image_format, image, params)
+            if not ok:
+                log.error('调试图片编码失败 %s', name)
+                continue
+            file_name = name + '.' + image_format
+            self._write_bytes(os.path.join(base_dir, file_name), data.tobytes())
+            usage.add(self._get_unit(artifact.rel_dir, file_name), data.nbytes, time.time())
+
+        for name, text in artifact.text_dict.items():
+            data = text.encode('utf-8')
+            self._write_bytes(os.path.join(base_dir, name), data)
+            usage.add(self._get_unit(artifact.rel_dir, name), len(data), time.time())
+
+        self.written_cnt += 1
+
+    def _write_bytes(self, file_path: str, data: bytes) -> None:
+        with open(file_path, 'wb') as file:
+            file.write(data)
+
+    @staticmethod
+    def _get_unit(rel_dir: str, file_name: str) -> str:
+        """
+        淘汰单位 有子目录时是整个子目录 否则是文件本身
+        """
+        return rel_dir if rel_dir != '' else file_name
+
+    def _get_usage(self, category: str) -> _CategoryUsage:
+        """
+        获取一个类别的占用 第一次使用时扫描已有的文件
+        :param category: 类别
+        :return:
+        """
+        usage = self._usage_dict.get(category)
+        if usage is not None:
+            return usage
+
+        usage = _CategoryUsage()
+        category_dir = os.path.join(self.root_dir, category)
+        for dir_path, _, file_name_list in os.walk(category_dir):
+            rel_dir = os.path.relpath(dir_path, category_dir)
+            if rel_dir == '.':
+                rel_dir = ''
+            for file_name in file_name_list:
+                try:
+                    stat = os.stat(os.path.join(dir_path, file_name))
+                except OSError:
+                    continue
+                usage.add(self._get_unit(rel_dir, file_name), stat.st_size, stat.st_mtime)
+        self._usage_dict[category] = usage
+        return usage
+
+    def _enforce_quota(self, category: str) -> None:
+        """
+        按配额删除旧的产物 最新的一个总会保留
+        :param category: 类别
+        :return:
+        """
+        usage = self._get_usage(category)
+        max_bytes, max_days = self.quota_dict.get(category, DEFAULT_QUOTA)
+        expire_time = time.time() - max_days * 24 * 3600
+
+        unit_list = sorted(usage.unit_dict.items(), key=lambda i: i[1][1])
+        for unit, (size, mtime) in unit_list[:-1]:
+            if mtime >= expire_time and usage.total_bytes <= max_bytes:
+                break
+            self._remove_unit(category, unit)
+            usage.pop(unit)
+
+    def _remove_unit(self, category: str, unit: str) -> None:
+        """
+        删除一个淘汰单位 并删除因此变空的上级目录
+        :param category: 类别
+        :param unit: 淘汰单位的相对路径
+        :return:
+        """
+        category_dir = os.path.join(self.root_dir, category)
+        path = os.path.join(category_dir, unit)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+            parent = os.path.dirname(path)
+            while os.path.normpath(parent) != os.path.normpath(category_dir) and len(os.listdir(parent)) == 0:
+                os.rmdir(parent)
+                parent = os.path.dirname(parent)
+        except OSError:
+            log.error('调试产物删除失败 %s', path, exc_info=True)
+
+
+_sink: Optional[DebugArtifactSink] = None
+_init_lock = threading.Lock()
+
+
+def get_debug_artifact_sink() -> DebugArtifactSink:
+    """
+    调试产物写入 第一次使用时启动
+    退出程序时 最多等待10秒把未写入的产物写完
+    """
+    global _sink
+    with _init_lock:
+        if _sink is None:
+            _sink = DebugArtifactSink(os_utils.get_path_under_work_dir('.debug'))
+            atexit.register(_sink.flush, 10)
+        return _sink
+
+
+def __debug():
+    import tempfile
+    import numpy as np
+
+    root_dir = tempfile.mkdtemp()
+    sink = DebugArtifactSink(root_dir, queue_size=8, quota_dict={'gps': (200 * 1024, 30)})
+
+    write_thread_id_set = set()
+    write_bytes = sink._write_bytes
+
+    def _record_write_bytes(file_path: str, data: bytes) -> None:
+        write_thread_id_set.add(threading.get_ident())
+        write_bytes(file_path, data)
+
+    sink._write_bytes = _record_write_bytes
+
+    # 占满队列 之后的应该被丢弃 且调用方不会被阻塞
+    image = np.random.randint(0, 255, (200, 200, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    accepted = 0
+    for i in range(100):
+        if sink.submit('gps', os.path.join('p', str(i)), {'mm': image}, {'pos.yml': 'x: %d\n' % i}):
+            accepted += 1
+    blocked_ms = (time.perf_counter() - start) * 1000
+    sink.flush()
+
+    usage_bytes = 0
+    for dir_path, _, file_name_list in os.walk(os.path.join(root_dir, 'gps')):
+        for file_name in file_name_list:
+            usage_bytes += os.path.getsize(os.path.join(dir_path, file_name))
+
+    print('提交 %d 接受 %d 丢弃 %d 调用方耗时 %.2fms' % (100, accepted, sink.dropped_cnt, blocked_ms))
+    print('配额 %d 实际占用 %d 配额生效 %s' % (200 * 1024, usage_bytes, usage_bytes <= 200 * 1024 or accepted <= 1))
+    print('调用方线程没有写入 %s' % (threading.get_ident() not in write_thread_id_set))
+    shutil.rmtree(root_dir)
+
+
+if __name__ == '__main__':
+    __debug()
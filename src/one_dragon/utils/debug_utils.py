@@ -4,13 +4,13 @@ import time
 from functools import lru_cache
 from typing import Optional
 
-import cv2
 import win32clipboard
 import win32con
 from cv2.typing import MatLike
 from PIL import Image
 
 from one_dragon.utils import cv2_utils, os_utils
+from one_dragon.utils.debug_artifact_sink import find_artifact_image, get_debug_artifact_sink
 from one_dragon.utils.log_utils import log
 
 
@@ -29,7 +29,10 @@ def get_debug_image_path(filename, suffix: str = '.png') -> str:
 
 
 def get_debug_image(filename, suffix: str = '.png') -> MatLike:
-    return cv2_utils.read_image(get_debug_image_path(filename, suffix))
+    path = get_debug_image_path(filename, suffix)
+    if not os.path.exists(path):  # 可能是用其它格式保存的
+        path = find_artifact_image(get_debug_image_path(filename, '')) or path
+    return cv2_utils.read_image(path)
 
 
 def copy_image_to_clipboard(image) -> bool:
@@ -54,14 +57,16 @@ def copy_image_to_clipboard(image) -> bool:
 
 
 def save_debug_image(image, file_name: Optional[str] = None, prefix: str = '', copy_screenshot: bool = False) -> str:
-    """保存调试图片到文件，可选择是否同时复制到剪贴板"""
+    """
+    保存调试图片到文件，可选择是否同时复制到剪贴板
+    图片由后台线程编码写入 返回时文件可能还没写完
+    """
     if file_name is None:
         file_name = '%s_%d' % (prefix, round(time.time() * 1000))
-    path = get_debug_image_path(file_name)
-    log.debug('临时图片保存 %s', path)
+    sink = get_debug_artifact_sink()
+    log.debug('临时图片保存 %s', get_debug_image_path(file_name, sink.image_suffix))
 
-    bgr_image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-    cv2.imwrite(path, bgr_image)
+    sink.submit('images', image_dict={file_name: image})
 
     if copy_screenshot:
         copy_image_to_clipboard(image)
@@ -1,31 +1,127 @@
+import atexit
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Optional
 
 from one_dragon.utils import os_utils
 
 
+class _DropDebugQueueHandler(QueueHandler):
+
+    def __init__(self, log_queue: queue.Queue, debug_watermark: float = 0.8, block_seconds: float = 1):
+        """
+        只把日志放入队列 由后台线程格式化和写入
+        队列快满时 优先丢弃DEBUG日志 更高等级的日志会短暂等待 仍然放不进才丢弃
+        :param log_queue: 有上限的队列
+        :param debug_watermark: 队列占用超过这个比例时 丢弃DEBUG日志
+        :param block_seconds: 非DEBUG日志在队列满时最多等待的秒数
+        """
+        QueueHandler.__init__(self, log_queue)
+        self.debug_limit: int = int(log_queue.maxsize * debug_watermark)
+        self.block_seconds: float = block_seconds
+        self.dropped_cnt: int = 0  # 丢弃的日志数量 下一次成功放入时提示
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        放入队列前 只合并消息参数和异常堆栈 避免参数对象后续被修改 格式化交给后台线程
+        合并后的结果对其它处理器也一样 因此直接修改 不复制记录
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno <= logging.DEBUG:
+            if self.queue.qsize() >= self.debug_limit:
+                self._add_dropped()
+                return
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._add_dropped()
+                return
+        else:
+            try:
+                self.queue.put(record, timeout=self.block_seconds)
+            except queue.Full:
+                self._add_dropped()
+                return
+
+        if self.dropped_cnt > 0:
+            with self._dropped_lock:
+                dropped_cnt, self.dropped_cnt = self.dropped_cnt, 0
+            if dropped_cnt > 0:
+                warning = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+                                            '日志过多 丢弃了 %d 条日志' % dropped_cnt, None, None)
+                try:
+                    self.queue.put_nowait(warning)
+                except queue.Full:
+                    pass
+
+    def _add_dropped(self) -> None:
+        with self._dropped_lock:
+            self.dropped_cnt += 1
+
+
+_FORMATTER = logging.Formatter('[%(asctime)s.%(msecs)03d] [%(filename)s %(lineno)d] [%(levelname)s]: %(message)s', '%H:%M:%S')
+_QUEUE_SIZE: int = 10000
+"""日志队列的上限"""
+
+_listener: Optional[QueueListener] = None
+
+
 def get_logger():
+    global _listener
     logger = logging.getLogger('OneDragon')
     logger.handlers.clear()
     logger.setLevel(logging.INFO)
 
-    formatter = logging.Formatter('[%(asctime)s.%(msecs)03d] [%(filename)s %(lineno)d] [%(levelname)s]: %(message)s', '%H:%M:%S')
+    if _listener is not None:
+        _listener.stop()
 
     log_file_path = os.path.join(os_utils.get_path_under_work_dir('.log'), 'log.txt')
     archive_handler = TimedRotatingFileHandler(log_file_path, when='midnight', interval=1, backupCount=3, encoding='utf-8')
     archive_handler.setLevel(logging.INFO)
-    archive_handler.setFormatter(formatter)
-    logger.addHandler(archive_handler)
+    archive_handler.setFormatter(_FORMATTER)
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(_FORMATTER)
+
+    # 调用方只放入队列 文件和控制台的写入都在后台线程
+    log_queue = queue.Queue(maxsize=_QUEUE_SIZE)
+    queue_handler = _DropDebugQueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, archive_handler, console_handler, respect_handler_level=True)
+    _listener.start()
 
     return logger
 
 
+def flush_log() -> None:
+    """
+    停止后台写入线程 写完队列中剩余的日志
+    程序退出时会自动调用
+    :return:
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(flush_log)
+
+
 def set_log_level(level: int) -> None:
     """
     显示日志等级
@@ -35,6 +131,9 @@ def set_log_level(level: int) -> None:
     log.setLevel(level)
     for handler in log.handlers:
         handler.setLevel(level)
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.setLevel(level)
 
 
 def mask_text(text: str) -> str:
@@ -0,0 +1,323 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, List, Optional, TextIO
+
+from one_dragon.utils import os_utils
+from one_dragon.utils.log_utils import log
+
+
+class ProfileCategory:
+
+    SCREENSHOT: str = 'screenshot'
+    OCR: str = 'ocr'
+    TEMPLATE: str = 'template'
+    YOLO: str = 'yolo'
+    SLEEP: str = 'sleep'
+
+
+class NodeProfileStat:
+
+    def __init__(self, op_name: str, node_name: str):
+        """
+        一个指令节点的耗时统计
+        """
+        self.op_name: str = op_name
+        self.node_name: str = node_name
+        self.round_cnt: int = 0
+        self.wall_time: float = 0
+        self.category_time: dict[str, float] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            'op_name': self.op_name,
+            'node_name': self.node_name,
+            'round_cnt': self.round_cnt,
+            'wall_time': round(self.wall_time, 4),
+            'category_time': {k: round(v, 4) for k, v in self.category_time.items()},
+        }
+
+
+class ProfileSession:
+
+    TRACE_FLUSH_EVENTS: int = 1000
+    """内存中最多缓存的trace事件数 达到后追加写入文件"""
+
+    MAX_TRACE_EVENTS: int = 500000
+    """trace文件最多记录的事件数 超过后只做统计 限制文件大小"""
+
+    def __init__(self, app_id: str, save_dir: Optional[str] = None):
+        """
+        一个应用运行期间的性能记录
+        trace事件边运行边追加写入文件 内存中只缓存少量 长时间运行也不会占用太多内存
+        :param app_id: 应用ID
+        :param save_dir: 保存的文件夹 为空时不保存trace
+        """
+        self.app_id: str = app_id
+        self.start_time: float = time.perf_counter()
+        self.start_timestamp: float = time.time()
+        self.node_stat_map: dict[tuple[str, str], NodeProfileStat] = {}
+        self.category_time: dict[str, float] = {}
+
+        self.save_dir: Optional[str] = save_dir
+        self.trace_event_cnt: int = 0  # 记录的trace事件数 包括已经写入文件的
+        self._trace_buffer: List[str] = []  # 还没有写入文件的trace事件
+        self._trace_written_cnt: int = 0  # 已经写入文件的trace事件数
+        self._trace_file: Optional[TextIO] = None
+
+    @property
+    def file_prefix(self) -> str:
+        return '%s_%s' % (self.app_id, time.strftime('%Y%m%d_%H%M%S', time.localtime(self.start_timestamp)))
+
+    @property
+    def trace_path(self) -> Optional[str]:
+        if self.save_dir is None:
+            return None
+        return os.path.join(self.save_dir, f'{self.file_prefix}_trace.json')
+
+    def add_event(self, name: str, category: str, start: float, end: float, args: Optional[dict] = None) -> None:
+        if self.save_dir is None or self.trace_event_cnt >= ProfileSession.MAX_TRACE_EVENTS:
+            return
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self.start_time) * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': 0,
+            'tid': threading.get_ident(),
+        }
+        if args is not None:
+            event['args'] = args
+        self._trace_buffer.append(json.dumps(event, ensure_ascii=False))
+        self.trace_event_cnt += 1
+        if len(self._trace_buffer) >= ProfileSession.TRACE_FLUSH_EVENTS:
+            self.flush_trace()
+
+    def flush_trace(self) -> None:
+        """
+        把缓存的trace事件追加写入文件 写入失败时不再记录trace
+        :return:
+        """
+        if self.save_dir is None:
+            return
+        try:
+            if self._trace_file is None:
+                self._trace_file = open(self.trace_path, 'w', encoding='utf-8')
+                self._trace_file.write('{"traceEvents": [\n')
+            if len(self._trace_buffer) > 0:
+                if self._trace_written_cnt > 0:
+                    self._trace_file.write(',\n')
+                self._trace_file.write(',\n'.join(self._trace_buffer))
+                self._trace_written_cnt += len(self._trace_buffer)
+                self._trace_file.flush()
+        except Exception:
+            log.error('性能记录trace写入失败', exc_info=True)
+            self.trace_event_cnt = ProfileSession.MAX_TRACE_EVENTS
+        self._trace_buffer.clear()
+
+    def close_trace(self) -> None:
+        """
+        写入剩余的trace事件 结束trace文件
+        结束后的文件可以用 chrome://tracing 打开
+        :return:
+        """
+        self.flush_trace()
+        if self._trace_file is None:
+            return
+        try:
+            self._trace_file.write('\n], "displayTimeUnit": "ms"}')
+        except Exception:
+            log.error('性能记录trace写入失败', exc_info=True)
+        finally:
+            self._trace_file.close()
+            self._trace_file = None
+
+    def get_node_stat(self, op_name: str, node_name: str) -> NodeProfileStat:
+        key = (op_name, node_name)
+        stat = self.node_stat_map.get(key)
+        if stat is None:
+            stat = NodeProfileStat(op_name, node_name)
+            self.node_stat_map[key] = stat
+        return stat
+
+    def to_report(self) -> dict:
+        """
+        汇总报告 节点按耗时倒序
+        :return:
+        """
+        node_list = sorted(self.node_stat_map.values(), key=lambda i: i.wall_time, reverse=True)
+        return {
+            'app_id': self.app_id,
+            'total_time': round(time.perf_counter() - self.start_time, 4),
+            'category_time': {k: round(v, 4) for k, v in self.category_time.items()},
+            'node_list': [i.to_dict() for i in node_list],
+        }
+
+
+class OperationProfiler:
+
+    def __init__(self):
+        """
+        指令的性能记录
+        记录每个指令节点的轮数和耗时 以及其中截图、OCR、模板匹配、YOLO、等待的耗时
+        未开启时 所有记录方法都直接返回
+        """
+        self.enabled: bool = False
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _get_node_stack(self) -> List[tuple[str, str]]:
+        stack = getattr(self._local, 'node_stack', None)
+        if stack is None:
+            stack = []
+            self._local.node_stack = stack
+        return stack
+
+    def start_session(self, app_id: str) -> None:
+        """
+        应用开始运行时调用 开始记录
+        :param app_id: 应用ID
+        :return:
+        """
+        save_dir = os_utils.get_path_under_work_dir('.debug', 'profile')
+        with self._lock:
+            self._sessions.append(ProfileSession(app_id, save_dir=save_dir))
+            self.enabled = True
+
+    def stop_session(self, app_id: str) -> Optional[dict]:
+        """
+        应用停止运行时调用 保存记录并返回汇总报告
+        :param app_id: 应用ID
+        :return: 汇总报告 没有对应的记录时返回None
+        """
+        with self._lock:
+            session: Optional[ProfileSession] = None
+            for i in range(len(self._sessions) - 1, -1, -1):
+                if self._sessions[i].app_id == app_id:
+                    session = self._sessions.pop(i)
+                    break
+            self.enabled = len(self._sessions) > 0
+
+        if session is None:
+            return None
+
+        report = session.to_report()
+        session.close_trace()
+        try:
+            self._save_report(session, report)
+        except Exception:
+            log.error('性能记录保存失败', exc_info=True)
+        self._log_report(report)
+        return report
+
+    @staticmethod
+    def _save_report(session: ProfileSession, report: dict) -> None:
+        """
+        保存汇总报告 与trace文件放在一起
+        :param session: 记录
+        :param report: 汇总报告
+        :return:
+        """
+        if session.save_dir is None:
+            return
+        with open(os.path.join(session.save_dir, f'{session.file_prefix}_report.json'), 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _log_report(report: dict, top_n: int = 10) -> None:
+        log.info('应用 %s 性能记录 总耗时 %.2fs 分类耗时 %s',
+                 report['app_id'], report['total_time'], report['category_time'])
+        for node in report['node_list'][:top_n]:
+            log.info('指令 %s 节点 %s 轮数 %d 耗时 %.2fs 分类耗时 %s',
+                     node['op_name'], node['node_name'], node['round_cnt'], node['wall_time'], node['category_time'])
+
+    def record_round(self, op_name: str, node_name: str, start: float, end: float) -> None:
+        """
+        记录指令节点的一轮运行
+        :param op_name: 指令名称
+        :param node_name: 节点名称
+        :param start: 开始时间 perf_counter
+        :param end: 结束时间 perf_counter
+        :return:
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for session in self._sessions:
+                stat = session.get_node_stat(op_name, node_name)
+                stat.round_cnt += 1
+                stat.wall_time += end - start
+                session.add_event(node_name, op_name, start, end)
+
+    @contextmanager
+    def node(self, op_name: str, node_name: str):
+        """
+        标记当前线程正在运行的指令节点 期间的分类耗时都记在这个节点上
+        同时记录这一轮的耗时
+        :param op_name: 指令名称
+        :param node_name: 节点名称
+        :return:
+        """
+        if not self.enabled:
+            yield
+            return
+        stack = self._get_node_stack()
+        stack.append((op_name, node_name))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            self.record_round(op_name, node_name, start, end)
+
+    @contextmanager
+    def section(self, category: str):
+        """
+        记录一段分类耗时 嵌套时只记录最外层
+        :param category: 分类 见 ProfileCategory
+        :return:
+        """
+        if not self.enabled or getattr(self._local, 'in_section', False):
+            yield
+            return
+        self._local.in_section = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._local.in_section = False
+            stack = self._get_node_stack()
+            op_name, node_name = stack[-1] if len(stack) > 0 else ('', '')
+            with self._lock:
+                for session in self._sessions:
+                    session.category_time[category] = session.category_time.get(category, 0) + end - start
+                    if len(stack) > 0:
+                        stat = session.get_node_stat(op_name, node_name)
+                        stat.category_time[category] = stat.category_time.get(category, 0) + end - start
+                    session.add_event(category, category, start, end)
+
+    def profile(self, category: str) -> Callable:
+        """
+        装饰器 记录方法的分类耗时
+        :param category: 分类 见 ProfileCategory
+        :return:
+        """
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.section(category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+operation_profiler = OperationProfiler()
@@ -0,0 +1,175 @@
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+
+class StartupRecord:
+
+    def __init__(self, name: str, start: float, seconds: float, depth: int):
+        """
+        一次构造的耗时
+        :param name: 名称
+        :param start: 开始时间 perf_counter
+        :param seconds: 耗时 包含内部嵌套的构造
+        :param depth: 嵌套层数 最外层为0
+        """
+        self.name: str = name
+        self.start: float = start
+        self.seconds: float = seconds
+        self.depth: int = depth
+
+
+class StartupProfiler:
+
+    MAX_RECORDS: int = 1000
+    """最多保留的构造记录数"""
+
+    def __init__(self):
+        """
+        启动耗时记录
+        - 导入耗时 替换 __import__ 后按顶层包统计 每个模块只算自身的耗时 不包含它导入的其它模块
+        - 构造耗时 用 measure 包住上下文中各个子系统的构造 懒加载的属性在第一次使用时记录
+        本模块只依赖标准库 需要在其它模块之前导入
+        """
+        self.start_time: float = time.perf_counter()
+        self.import_time: dict[str, float] = {}
+        """顶层包 -> 导入耗时"""
+
+        self.records: List[StartupRecord] = []
+        """构造记录 按完成的顺序 嵌套时内层在前"""
+
+        self._origin_import: Optional[Callable] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _get_stack(self, key: str) -> List[list]:
+        stack = getattr(self._local, key, None)
+        if stack is None:
+            stack = []
+            setattr(self._local, key, stack)
+        return stack
+
+    def install_import_hook(self) -> None:
+        """
+        开始记录导入耗时
+        :return:
+        """
+        if self._origin_import is not None:
+            return
+        self._origin_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall_import_hook(self) -> None:
+        """
+        停止记录导入耗时
+        :return:
+        """
+        if self._origin_import is None:
+            return
+        builtins.__import__ = self._origin_import
+        self._origin_import = None
+
+    def _timed_import(self, name: str, globals=None, locals=None, fromlist=(), level: int = 0):
+        origin = self._origin_import
+        if origin is None:  # 已经卸载 仍有其它线程持有这个方法
+            return builtins.__import__(name, globals, locals, fromlist, level)
+
+        abs_name = name
+        if level > 0:
+            try:
+                package = globals.get('__package__') if globals is not None else None
+                abs_name = importlib.util.resolve_name('.' * level + name, package)
+            except Exception:
+                return origin(name, globals, locals, fromlist, level)
+
+        loaded = abs_name in sys.modules
+        if loaded and fromlist:
+            loaded = all(i == '*' or f'{abs_name}.{i}' in sys.modules or hasattr(sys.modules[abs_name], i)
+                         for i in fromlist)
+        if loaded:
+            return origin(name, globals, locals, fromlist, level)
+
+        stack = self._get_stack('import_stack')
+        frame = [0.0]  # 内部导入的耗时
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return origin(name, globals, locals, fromlist, level)
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            if len(stack) > 0:
+                stack[-1][0] += seconds
+            package = abs_name.split('.')[0]
+            with self._lock:
+                self.import_time[package] = self.import_time.get(package, 0) + seconds - frame[0]
+
+    @contextmanager
+    def measure(self, name: str):
+        """
+        记录一段构造的耗时
+        :param name: 名称 例如 SrContext.map_data
+        :return:
+        """
+        stack = self._get_stack('measure_stack')
+        depth = len(stack)
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                if len(self.records) < StartupProfiler.MAX_RECORDS:
+                    self.records.append(StartupRecord(name, start, seconds, depth))
+
+    def get_construct_time(self, name: str) -> float:
+        """
+        某个构造的总耗时 多次构造时累加
+        :param name: 名称
+        :return:
+        """
+        with self._lock:
+            return sum(i.seconds for i in self.records if i.name == name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.start_time = time.perf_counter()
+            self.import_time.clear()
+            self.records.clear()
+
+    def build_report(self, top_n: int = 15) -> str:
+        """
+        汇总导入和构造的耗时
+        :param top_n: 导入耗时只显示最长的几个包
+        :return:
+        """
+        with self._lock:
+            import_list = sorted(self.import_time.items(), key=lambda i: i[1], reverse=True)
+            records = list(self.records)
+
+        lines: List[str] = ['启动耗时 %.2fs' % (time.perf_counter() - self.start_time)]
+        if len(import_list) > 0:
+            lines.append('导入耗时 合计 %.2fs' % sum(i[1] for i in import_list))
+            for package, seconds in import_list[:top_n]:
+                lines.append('  %s %.3fs' % (package, seconds))
+
+        if len(records) > 0:
+            lines.append('构造耗时')
+            ordered = sorted(records, key=lambda i: i.start)  # 按开始顺序 外层在内层之前
+            for record in ordered:
+                lines.append('%s%s %.3fs' % ('  ' * (record.depth + 1), record.name, record.seconds))
+        return '\n'.join(lines)
+
+    def log_report(self) -> None:
+        from one_dragon.utils.log_utils import log
+        for line in self.build_report().split('\n'):
+            log.info(line)
+
+
+startup_profiler = StartupProfiler()
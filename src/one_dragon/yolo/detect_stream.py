@@ -0,0 +1,238 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+from cv2.typing import MatLike
+
+from one_dragon.utils.log_utils import log
+from one_dragon.yolo.detect_utils import DetectFrameResult, DetectObjectResult
+
+DetectRunner = Callable[[MatLike, float, Optional[List[str]]], DetectFrameResult]
+"""运行一帧识别的方法 (图片, 截图时间, 分类列表) -> 识别结果"""
+
+
+class _DetectRequest:
+
+    def __init__(self, image: MatLike, run_time: float, category_list: Optional[List[str]]):
+        self.image: MatLike = image
+        self.run_time: float = run_time
+        self.category_list: Optional[List[str]] = category_list
+
+
+class _DetectSubscriber:
+
+    def __init__(self, callback: Callable[[DetectFrameResult], None], category_list: Optional[List[str]]):
+        self.callback: Callable[[DetectFrameResult], None] = callback
+        self.category_list: Optional[List[str]] = category_list
+
+
+def _filter_frame(frame: DetectFrameResult, category_list: Optional[List[str]]) -> DetectFrameResult:
+    """
+    只保留特定分类的识别结果
+    :param frame: 一帧的识别结果
+    :param category_list: 分类列表 为空时不过滤
+    :return:
+    """
+    if category_list is None:
+        return frame
+    return DetectFrameResult(
+        raw_image=frame.raw_image,
+        results=[i for i in frame.results if i.detect_class.class_category in category_list],
+        run_time=frame.run_time
+    )
+
+
+def _iou(a: DetectObjectResult, b: DetectObjectResult) -> float:
+    x1, y1 = max(a.x1, b.x1), max(a.y1, b.y1)
+    x2, y2 = min(a.x2, b.x2), min(a.y2, b.y2)
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a.width * a.height + b.width * b.height - inter
+    return inter / union if union > 0 else 0
+
+
+class YoloDetectStream:
+
+    def __init__(self, runner: DetectRunner,
+                 worker_cnt: int = 1,
+                 queue_size: int = 2,
+                 smooth_window: int = 3,
+                 smooth_min_hits: int = 2,
+                 smooth_iou: float = 0.3):
+        """
+        流式的目标识别
+        调用方只提交截图 不等待推理 需要时再取最新的结果
+        队列满时丢弃最旧的帧 保证识别的总是最新的画面
+        :param runner: 运行一帧识别的方法
+        :param worker_cnt: 推理线程数量
+        :param queue_size: 等待识别的帧的最大数量
+        :param smooth_window: 平滑时使用最近多少帧
+        :param smooth_min_hits: 平滑时 一个目标至少要在多少帧中出现
+        :param smooth_iou: 不同帧中的两个框 同类别且IOU超过这个值时认为是同一个目标
+        """
+        self.runner: DetectRunner = runner
+        self.worker_cnt: int = worker_cnt
+        self.queue_size: int = queue_size
+        self.smooth_window: int = smooth_window
+        self.smooth_min_hits: int = smooth_min_hits
+        self.smooth_iou: float = smooth_iou
+
+        self._condition = threading.Condition()
+        self._queue: Deque[_DetectRequest] = deque()
+        self._history: Deque[DetectFrameResult] = deque(maxlen=smooth_window)
+        self._subscribers: dict[int, _DetectSubscriber] = {}
+        self._next_subscriber_id: int = 0
+        self._workers: List[threading.Thread] = []
+        self._running: bool = False
+        self._generation: int = 0  # 每次启动递增 让上一次启动的线程退出
+
+    def start(self) -> None:
+        """
+        启动推理线程
+        :return:
+        """
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._generation += 1
+            self._workers = [
+                threading.Thread(target=self._run, args=(self._generation,),
+                                 name=f'yolo_detect_stream_{i}', daemon=True)
+                for i in range(self.worker_cnt)
+            ]
+            for worker in self._workers:
+                worker.start()
+
+    def stop(self) -> None:
+        """
+        停止推理线程 并清空未识别的帧和历史结果
+        :return:
+        """
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._history.clear()
+            self._condition.notify_all()
+        self._workers = []
+
+    def submit(self, image: MatLike, run_time: float, category_list: Optional[List[str]] = None) -> bool:
+        """
+        提交一帧画面 不阻塞
+        :param image: 游戏画面
+        :param run_time: 截图时间
+        :param category_list: 需要识别的分类
+        :return: 是否丢弃了更旧的帧
+        """
+        if not self._running:
+            self.start()
+        with self._condition:
+            dropped = False
+            while len(self._queue) >= self.queue_size:
+                self._queue.popleft()
+                dropped = True
+            self._queue.append(_DetectRequest(image, run_time, category_list))
+            self._condition.notify()
+        return dropped
+
+    def subscribe(self, callback: Callable[[DetectFrameResult], None],
+                  category_list: Optional[List[str]] = None) -> int:
+        """
+        订阅识别结果 在推理线程中回调 回调中不应该有耗时操作
+        :param callback: 回调 参数为只包含订阅分类的识别结果
+        :param category_list: 订阅的分类 为空时订阅全部
+        :return: 订阅ID 用于取消订阅
+        """
+        with self._condition:
+            subscriber_id = self._next_subscriber_id
+            self._next_subscriber_id += 1
+            self._subscribers[subscriber_id] = _DetectSubscriber(callback, category_list)
+            return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int) -> None:
+        """
+        取消订阅
+        :param subscriber_id: 订阅ID
+        :return:
+        """
+        with self._condition:
+            self._subscribers.pop(subscriber_id, None)
+
+    def get_latest(self, after_time: float = 0,
+                   category_list: Optional[List[str]] = None,
+                   smooth: bool = True) -> Optional[DetectFrameResult]:
+        """
+        获取最新的识别结果
+        :param after_time: 只使用这个时间之后截图的帧 例如转动视角后 之前的帧就不能用了
+        :param category_list: 只需要的分类 为空时返回全部
+        :param smooth: 是否使用最近几帧做平滑
+        :return: 没有符合的帧时返回None
+        """
+        with self._condition:
+            frame_list = [i for i in self._history if i.run_time >= after_time]
+        if len(frame_list) == 0:
+            return None
+
+        latest = frame_list[-1]
+        if smooth and self.smooth_window > 1:
+            latest = DetectFrameResult(raw_image=latest.raw_image,
+                                       results=self._smooth(frame_list),
+                                       run_time=latest.run_time)
+        return _filter_frame(latest, category_list)
+
+    def _smooth(self, frame_list: List[DetectFrameResult]) -> List[DetectObjectResult]:
+        """
+        时间平滑 一个目标在最近几帧中出现足够多次才保留 偶尔漏识别一帧时也会保留
+        同一个目标使用最新一帧中的框
+        :param frame_list: 按时间顺序的帧
+        :return:
+        """
+        min_hits = min(self.smooth_min_hits, len(frame_list))
+        group_list: List[List] = []  # [最新的框, 出现的帧数, 最后出现的帧下标]
+        for frame_idx in range(len(frame_list) - 1, -1, -1):  # 从最新的帧开始
+            for obj in frame_list[frame_idx].results:
+                matched = None
+                for group in group_list:
+                    if (group[0].detect_class.class_id == obj.detect_class.class_id
+                            and group[2] != frame_idx
+                            and _iou(group[0], obj) >= self.smooth_iou):
+                        matched = group
+                        break
+                if matched is None:
+                    group_list.append([obj, 1, frame_idx])
+                else:
+                    matched[1] += 1
+                    matched[2] = frame_idx
+        return [group[0] for group in group_list if group[1] >= min_hits]
+
+    def _is_current(self, generation: int) -> bool:
+        return self._running and self._generation == generation
+
+    def _run(self, generation: int) -> None:
+        while True:
+            with self._condition:
+                while self._is_current(generation) and len(self._queue) == 0:
+                    self._condition.wait()
+                if not self._is_current(generation):
+                    return
+                request = self._queue.popleft()
+
+            try:
+                frame = self.runner(request.image, request.run_time, request.category_list)
+            except Exception:
+                log.error('目标识别失败', exc_info=True)
+                continue
+
+            with self._condition:
+                if not self._is_current(generation):
+                    return
+                # 多个推理线程时 结果可能乱序 只保留比最新结果更新的帧
+                if len(self._history) > 0 and self._history[-1].run_time >= frame.run_time:
+                    continue
+                self._history.append(frame)
+                subscriber_list = list(self._subscribers.values())
+
+            for subscriber in subscriber_list:
+                try:
+                    subscriber.callback(_filter_frame(frame, subscriber.category_list))
+                except Exception:
+                    log.error('目标识别结果回调失败', exc_info=True)
@@ -4,6 +4,7 @@ import numpy as np
 from cv2.typing import MatLike
 from typing import Optional, List
 
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
 from one_dragon.yolo import onnx_utils
 from one_dragon.yolo.onnx_model_loader import OnnxModelLoader
 
@@ -82,6 +83,7 @@ class Yolov8Classifier(OnnxModelLoader):
         self.keep_result_seconds: float = keep_result_seconds  # 保留识别结果的秒数
         self.run_result_history: List[ClassificationResult] = []  # 历史识别结果
 
+    @operation_profiler.profile(ProfileCategory.YOLO)
     def run(self, image: MatLike, conf: float = 0.9, run_time: Optional[float] = None) -> ClassificationResult:
         """
         对图片进行识别
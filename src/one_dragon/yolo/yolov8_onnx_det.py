@@ -6,6 +6,8 @@ import os
 from cv2.typing import MatLike
 from typing import Optional, List
 
+from one_dragon.utils.operation_profiler import operation_profiler, ProfileCategory
+from one_dragon.base.screen.frame_context import FrameContext
 from one_dragon.yolo import onnx_utils
 from one_dragon.yolo.detect_utils import DetectFrameResult, DetectClass, DetectContext, DetectObjectResult, xywh2xyxy, \
     multiclass_nms
@@ -54,14 +56,17 @@ class Yolov8Detector(OnnxModelLoader):
         self.category_2_idx: dict[str, List[int]] = {}
         self._load_detect_classes(self.model_dir_path)
 
+    @operation_profiler.profile(ProfileCategory.YOLO)
     def run(self, image: MatLike, conf: float = 0.6, iou: float = 0.5, run_time: Optional[float] = None,
             label_list: Optional[List[str]] = None,
-            category_list: Optional[List[str]] = None) -> DetectFrameResult:
+            category_list: Optional[List[str]] = None,
+            frame: Optional[FrameContext] = None) -> DetectFrameResult:
         """
         对图片进行识别
         :param image: 使用 opencv 读取的图片 RGB通道
         :param conf: 置信度阈值
         :param iou: iou阈值
+        :param frame: 图片所属截图的分析上下文 传入时模型输入从中获取 同一帧只缩放一次
         :return: 识别结果
         """
         t1 = time.time()
@@ -71,7 +76,10 @@ class Yolov8Detector(OnnxModelLoader):
         context.label_list = label_list
         context.category_list = category_list
 
-        input_tensor = self.prepare_input(context)
+        if frame is not None:
+            input_tensor, context.scale_height, context.scale_width = frame.yolo_input(self.onnx_input_width, self.onnx_input_height)
+        else:
+            input_tensor = self.prepare_input(context)
         t2 = time.time()
 
         outputs = self.inference(input_tensor)
@@ -59,6 +59,11 @@ class SettingEnvInterface(VerticalScrollInterface):
         )
         basic_group.addSettingCard(self.ocr_cache_opt)
 
+        self.operation_profile_opt = SwitchSettingCard(
+            icon=FluentIcon.STOP_WATCH, title='性能记录', content='记录各指令节点的耗时 保存在.debug/profile'
+        )
+        basic_group.addSettingCard(self.operation_profile_opt)
+
         return basic_group
 
     def _init_code_group(self) -> SettingCardGroup:
@@ -182,6 +187,7 @@ class SettingEnvInterface(VerticalScrollInterface):
         self.debug_opt.init_with_adapter(self.ctx.env_config.get_prop_adapter('is_debug'))
         self.copy_screenshot_opt.init_with_adapter(self.ctx.env_config.get_prop_adapter('copy_screenshot'))
         self.ocr_cache_opt.init_with_adapter(self.ctx.env_config.get_prop_adapter('ocr_cache'))
+        self.operation_profile_opt.init_with_adapter(self.ctx.env_config.get_prop_adapter('operation_profile'))
 
         self.key_start_running_input.init_with_adapter(self.ctx.env_config.get_prop_adapter('key_start_running'))
         self.key_stop_running_input.init_with_adapter(self.ctx.env_config.get_prop_adapter('key_stop_running'))
@@ -1,7 +1,8 @@
 from collections import deque
 import logging
+import threading
 from PySide6.QtCore import Signal, QObject, QTimer, QEvent
-from PySide6.QtGui import QMouseEvent
+from PySide6.QtGui import QMouseEvent, QTextBlockFormat, QTextCharFormat, QTextCursor
 from qfluentwidgets import PlainTextEdit, isDarkTheme
 from one_dragon.utils.log_utils import log as od_log
 from one_dragon.yolo.log_utils import log as yolo_log
@@ -10,14 +11,22 @@ class LogSignal(QObject):
     new_log = Signal(str)
 
 class LogReceiver(logging.Handler):
-    def __init__(self):
+    def __init__(self, max_pending: int = 2048):
+        """
+        接收日志 等待界面定时取出显示
+        日志在写入线程中产生 界面线程取出 两边通过锁交换
+        :param max_pending: 等待显示的日志上限 超过时丢弃最旧的 并记录数量
+        """
         super().__init__()
         # 限制日志数量
-        self.log_list: deque[str] = deque(maxlen=64)  
+        self.log_list: deque[str] = deque(maxlen=64)
         # 新日志
-        self.new_logs: list[str] = []
+        self.new_logs: deque[str] = deque(maxlen=max_pending)
+        # 因为界面来不及显示而丢弃的日志数量
+        self.dropped_cnt: int = 0
         # 是否接收日志
-        self.update = False 
+        self.update = False
+        self._new_logs_lock = threading.Lock()
 
     def emit(self, record):
         """将新日志记录添加到日志队列"""
@@ -25,19 +34,33 @@ class LogReceiver(logging.Handler):
         if not self.update:
             return
         msg = self.format(record)
-        self.log_list.append(msg)
-        self.new_logs.append(msg)
+        with self._new_logs_lock:
+            self.log_list.append(msg)
+            if len(self.new_logs) == self.new_logs.maxlen:
+                self.dropped_cnt += 1
+            self.new_logs.append(msg)
 
     def get_new_logs(self) -> list[str]:
         """获取新的日志"""
-        new_logs = self.new_logs.copy()
-        self.new_logs.clear()
-        return new_logs
+        return self.get_new_logs_and_dropped()[0]
+
+    def get_new_logs_and_dropped(self) -> tuple[list[str], int]:
+        """
+        获取新的日志
+        :return: 新的日志, 上次获取后丢弃的日志数量
+        """
+        with self._new_logs_lock:
+            new_logs = list(self.new_logs)
+            self.new_logs.clear()
+            dropped_cnt, self.dropped_cnt = self.dropped_cnt, 0
+        return new_logs, dropped_cnt
 
     def clear_logs(self):
         """清空日志队列"""
-        self.log_list.clear()
-        self.new_logs.clear()
+        with self._new_logs_lock:
+            self.log_list.clear()
+            self.new_logs.clear()
+            self.dropped_cnt = 0
 
 
 class LogDisplayCard(PlainTextEdit):
@@ -82,8 +105,14 @@ class LogDisplayCard(PlainTextEdit):
         # 暂停标记
         self.is_pause = False
 
-        # 限制显示行数
-        self.setMaximumBlockCount(192)
+        # 限制显示行数 每行日志是一个块 超过后从最旧的开始移除
+        self.max_block_count: int = 192
+        self.setMaximumBlockCount(self.max_block_count)
+        # 只读的日志不需要撤销记录 避免文档内存一直增长
+        self.setUndoRedoEnabled(False)
+
+        # 累计丢弃的日志数量
+        self.total_dropped_cnt: int = 0
 
     def init_color(self):
         """根据主题设置颜色"""
@@ -131,11 +160,16 @@ class LogDisplayCard(PlainTextEdit):
 
     def update_logs(self) -> None:
         """更新日志显示区域"""
-        new_logs = self.receiver.get_new_logs()
+        new_logs, dropped_cnt = self.receiver.get_new_logs_and_dropped()
+        # 超过显示行数的部分插入后也会马上被移除 直接跳过
+        if len(new_logs) > self.max_block_count:
+            dropped_cnt += len(new_logs) - self.max_block_count
+            new_logs = new_logs[-self.max_block_count:]
+        if dropped_cnt > 0:
+            self.total_dropped_cnt += dropped_cnt
         # 格式化日志
-        if len(new_logs) != 0:
-            formatted_logs = self._format_logs(new_logs)  
-            self.appendHtml(formatted_logs)
+        if len(new_logs) != 0 or dropped_cnt > 0:
+            self._insert_logs(self._format_log_list(new_logs), dropped_cnt)
         if self.auto_scroll:
             self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())  # 滚动到最新位置
 
@@ -182,11 +216,30 @@ class LogDisplayCard(PlainTextEdit):
             self.userWheelScroll.emit()
         return super().eventFilter(obj, event)
 
-    def _format_logs(self, log_list: list[str]) -> str:
-        """格式化日志"""
+    def _insert_logs(self, formatted_logs: list[str], dropped_cnt: int) -> None:
+        """
+        一次编辑中插入本次的所有日志 每行日志一个块
+        :param formatted_logs: 格式化后的日志
+        :param dropped_cnt: 丢弃的日志数量 大于0时插入一行提示
+        :return:
+        """
+        lines = formatted_logs
+        if dropped_cnt > 0:
+            lines = [f'<span style="color: #D08000;">…… 日志过多 省略了 {dropped_cnt} 条</span>'] + lines
+
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for line in lines:
+            if not self.document().isEmpty():
+                # 新的块使用默认格式 避免沿用上一行的颜色
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertHtml(line)
+        cursor.endEditBlock()
+
+    def _format_log_list(self, log_list: list[str]) -> list[str]:
+        """格式化日志 每行一个"""
         formatted_logs = []
-        formatted_log = ""
-
         for log_item in log_list:
             # 给方括号内的内容着色
             if '[' in log_item and ']' in log_item:
@@ -195,13 +248,55 @@ class LogDisplayCard(PlainTextEdit):
                 before = log_item[:start]
                 colored = f'<span style="color: {self._color};">{log_item[start:end]}</span>'
                 after = log_item[end:]
-                formatted_log = before + colored + after
+                formatted_logs.append(before + colored + after)
             else:
-                formatted_log = log_item
-            formatted_logs.append(formatted_log)
-
-        # 检查是否有日志
-        if len(log_list) <= 1:
-            return formatted_log
-        else:
-            return '<br>'.join(formatted_logs)
+                formatted_logs.append(log_item)
+        return formatted_logs
+
+
+def __debug(record_cnt: int = 100000, records_per_tick: int = 500):
+    """
+    无界面环境下 模拟大量日志 检查每次刷新的耗时和内存
+    """
+    import os
+    import sys
+    import time
+    import tracemalloc
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    card = LogDisplayCard()
+    card.start(clear_log=True)
+    card.update_timer.stop()  # 手动触发刷新
+
+    logger = logging.getLogger('OneDragonLogDisplayDebug')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(card.receiver)
+    card.receiver.setFormatter(logging.Formatter('[%(asctime)s.%(msecs)03d] [%(levelname)s]: %(message)s', '%H:%M:%S'))
+
+    tracemalloc.start()
+    frame_cost_list: list[float] = []
+    for i in range(record_cnt):
+        logger.info('模拟日志 %d', i)
+        if (i + 1) % records_per_tick == 0:
+            start = time.perf_counter()
+            card.update_logs()
+            app.processEvents()
+            frame_cost_list.append((time.perf_counter() - start) * 1000)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    frame_cost_list.sort()
+    print('日志 %d 条 刷新 %d 次' % (record_cnt, len(frame_cost_list)))
+    print('刷新耗时 平均 %.2fms P99 %.2fms 最大 %.2fms' % (
+        sum(frame_cost_list) / len(frame_cost_list),
+        frame_cost_list[int(len(frame_cost_list) * 0.99)],
+        frame_cost_list[-1]))
+    print('文档块数 %d 上限 %d 丢弃 %d' % (card.document().blockCount(), card.max_block_count, card.total_dropped_cnt))
+    print('Python内存 当前 %.1fMB 峰值 %.1fMB' % (current / 1024 / 1024, peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    __debug()
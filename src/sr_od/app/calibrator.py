@@ -1,5 +1,3 @@
-import time
-
 import numpy as np
 
 from one_dragon.base.operation.operation_edge import node_from
@@ -68,7 +66,7 @@ class Calibrator(SrApplication):
         turn_angle = []
         for _ in range(10):
             self.ctx.controller.turn_by_distance(turn_distance)
-            time.sleep(1)
+            self.sleep(1)
             next_angle = self._get_current_angle()
             if angle is not None:
                 ta = (next_angle - angle) if next_angle >= angle else (next_angle - angle + 360)
@@ -88,7 +86,7 @@ class Calibrator(SrApplication):
 
     def _get_current_angle(self) -> float:
         self.ctx.controller.move('w')
-        time.sleep(1)
+        self.sleep(1)
         screen = self.screenshot()
         mm = mini_map_utils.cut_mini_map(screen, self.ctx.game_config.mini_map_pos)
         center_arrow_mask, arrow_mask, next_angle = mini_map_utils.analyse_arrow_and_angle(mm)
@@ -1,5 +1,3 @@
-import time
-
 from one_dragon.base.operation.operation_edge import node_from
 from one_dragon.base.operation.operation_node import operation_node
 from one_dragon.base.operation.operation_round_result import OperationRoundResult
@@ -82,7 +80,7 @@ class ChooseOeFile(SrOperation):
         # 点击存档 由于每个存档的名字都不一样 就不使用OCR识别了
         area = self.ctx.screen_loader.get_area('饰品提取', file_areas[self.num-1])
         self.ctx.controller.click(area.center)
-        time.sleep(0.25)
+        self.sleep(0.25)
 
         screen = self.screenshot()
         result = self.round_by_find_and_click_area(screen, '饰品提取', '按钮-切换存档确认')
@@ -1,5 +1,4 @@
 import os
-import time
 from typing import List, Optional
 
 import numpy as np
@@ -325,7 +324,7 @@ class LargeMapRecorder(SrApplication):
             last_map_part = map_part
 
             self.ctx.controller.drag_to(end=rt, start=center, duration=0.2)  # 先拉到左上角
-            time.sleep(1.5)
+            self.sleep(1.5)
 
         log.info('已经滑动到左上角 重置行列坐标')
         self.col = 1
@@ -341,7 +340,7 @@ class LargeMapRecorder(SrApplication):
             if not self.ctx.is_context_running:
                 break
             self.ctx.controller.drag_to(end=bottom, start=center, duration=1)  # 往上拉到尽头
-            time.sleep(1.5)
+            self.sleep(1.5)
         self.row = 1
 
     def back_to_left(self):
@@ -359,7 +358,7 @@ class LargeMapRecorder(SrApplication):
             if not self.ctx.is_context_running:
                 break
             self.ctx.controller.drag_to(end=right, start=center, duration=0.2)
-            time.sleep(0.5)
+            self.sleep(0.5)
 
         last_map_part: MatLike | None = None  # 上一次截图的地图部分
         empty_times: int = 0  # 空白次数
@@ -385,7 +384,7 @@ class LargeMapRecorder(SrApplication):
             last_map_part = map_part
 
             self.ctx.controller.drag_to(end=right, start=center, duration=0.2)  # 往左拉到尽头
-            time.sleep(1)
+            self.sleep(1)
 
         log.info('已经滑动到最左方 重置列坐标')
         self.col = 1
@@ -409,7 +408,7 @@ class LargeMapRecorder(SrApplication):
             start = DRAG_NEXT_START
             end = start + Point(0, (-self.drag_distance_to_next_row if go_down else self.drag_distance_to_next_row))
             self.ctx.controller.drag_to(start=start, end=end)
-            time.sleep(1)
+            self.sleep(1)
 
             screen = self.screenshot()
             map_part = large_map_utils.get_screen_map_part(screen, self.region)
@@ -441,7 +440,7 @@ class LargeMapRecorder(SrApplication):
             start = DRAG_NEXT_START
             end = start + Point(-self.drag_distance_to_next_col if go_right else self.drag_distance_to_next_col, 0)
             self.ctx.controller.drag_to(start=start, end=end)
-            time.sleep(1)
+            self.sleep(1)
 
             screen = self.screenshot()
             map_part = large_map_utils.get_screen_map_part(screen, self.region)
@@ -461,7 +460,7 @@ class LargeMapRecorder(SrApplication):
         center = Point(1350, 800)  # 大地图右方的空白区域 防止点击到地图的点 导致拖拽有问题
         top = center + Point(0, -self.drag_distance_to_next_row)
         self.special_drag_to(start=center, end=top)  # 往下拉一段
-        time.sleep(1)
+        self.sleep(1)
         self.row += 1
 
     def drag_to_next_col(self):
@@ -472,7 +471,7 @@ class LargeMapRecorder(SrApplication):
         # center = game_const.STANDARD_CENTER_POS
         end = start + Point(-self.drag_distance_to_next_col, 0)
         self.special_drag_to(start=start, end=end)  # 往右拉一段
-        time.sleep(1)
+        self.sleep(1)
         self.col += 1
 
     def fix_all_after_map_record(self, region: Region, dx: int, dy: int):
@@ -642,13 +641,13 @@ class LargeMapRecorder(SrApplication):
         end_pos = self.ctx.controller.game_win.game2win_pos(end)
 
         pyautogui.moveTo(start_pos.x, start_pos.y)
-        time.sleep(0.2)
+        self.sleep(0.2)
         pyautogui.mouseDown()
-        time.sleep(0.2)
+        self.sleep(0.2)
         pyautogui.dragTo(end_pos.x, end_pos.y, duration=1)
-        time.sleep(0.2)
+        self.sleep(0.2)
         pyautogui.mouseUp()
-        time.sleep(0.2)
+        self.sleep(0.2)
 
 def __debug(planet_name, region_name, run_mode: str = 'all'):
     ctx = SrContext()
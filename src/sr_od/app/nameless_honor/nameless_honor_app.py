@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from typing import ClassVar
 
@@ -71,9 +69,9 @@ class NamelessHonorApp(SrApplication):
         result = self.round_by_find_and_click_area(screen, '菜单', '无名勋礼-任务-一键领取')
 
         if result.is_success:
-            time.sleep(2)
+            self.sleep(2)
             self.round_by_click_area('菜单', '无名勋礼-点击空白处关闭')  # 可能会出现一个升级的画面 多点击一次
-            time.sleep(1)
+            self.sleep(1)
             return self.round_success()
         else:
             return self.round_retry(wait=1)
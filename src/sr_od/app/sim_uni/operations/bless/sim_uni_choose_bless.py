@@ -94,7 +94,7 @@ class SimUniChooseBless(SrOperation):
             return self.round_wait('重置祝福', wait=2)
         else:
             self.ctx.controller.click(target_bless_pos.rect.center)
-            time.sleep(0.25)
+            self.sleep(0.25)
 
             result = self.round_by_ocr_and_click(
                 screen=screen,
@@ -1,4 +1,3 @@
-import time
 from typing import ClassVar, List, Optional
 
 from one_dragon.base.operation.operation_edge import node_from
@@ -80,7 +79,7 @@ class SimUniDropBless(SrOperation):
         bless_list: list[SimUniBless] = [i.bless for i in bless_pos_list]
         target_idx: int = bless_utils.get_bless_by_priority(bless_list, self.config, can_reset=False, asc=False)
         self.ctx.controller.click(bless_pos_list[target_idx].rect.center)
-        time.sleep(0.25)
+        self.sleep(0.25)
         self.ctx.controller.click(SimUniChooseBless.CONFIRM_BTN.center)
         return self.round_success(wait=1)
 
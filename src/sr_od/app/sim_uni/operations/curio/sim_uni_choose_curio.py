@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from typing import Optional, ClassVar, List
 
@@ -90,7 +88,7 @@ class SimUniChooseCurio(SrOperation):
 
         target_curio_pos: Optional[MatchResult] = self._get_curio_to_choose(curio_pos_list)
         self.ctx.controller.click(target_curio_pos.center)
-        time.sleep(0.25)
+        self.sleep(0.25)
         self.ctx.controller.click(SimUniChooseCurio.CONFIRM_BTN.center)
         return self.round_success(wait=0.1)
 
@@ -278,7 +276,7 @@ class SimUniDropCurio(SrOperation):
 
         target_curio_pos: Optional[MatchResult] = self._get_curio_to_choose(curio_pos_list)
         self.ctx.controller.click(target_curio_pos.center)
-        time.sleep(0.25)
+        self.sleep(0.25)
         self.ctx.controller.click(SimUniChooseCurio.CONFIRM_BTN.center)
         return self.round_success(wait=1)
 
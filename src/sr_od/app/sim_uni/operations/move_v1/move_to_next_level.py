@@ -207,7 +207,7 @@ class MoveToNextLevel(SrOperation):
         """
         angle_to_turn = self._get_angle_to_turn(target)
         self.ctx.controller.turn_by_angle(angle_to_turn)
-        time.sleep(0.5)
+        self.sleep(0.5)
         self.ctx.controller.start_moving_forward()
         self.start_move_time = time.time()
         self.is_moving = True
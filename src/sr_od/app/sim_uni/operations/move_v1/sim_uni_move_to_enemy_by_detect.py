@@ -2,7 +2,7 @@ import time
 
 import random
 from cv2.typing import MatLike
-from typing import ClassVar, List
+from typing import ClassVar, List, Optional
 
 from one_dragon.base.operation.operation_base import OperationResult
 from one_dragon.base.operation.operation_node import operation_node
@@ -10,7 +10,7 @@ from one_dragon.base.operation.operation_round_result import OperationRoundResul
 from one_dragon.utils import cv2_utils
 from one_dragon.utils.i18_utils import gt
 from one_dragon.yolo import detect_utils
-from one_dragon.yolo.detect_utils import DetectObjectResult
+from one_dragon.yolo.detect_utils import DetectFrameResult, DetectObjectResult
 from sr_od.app.sim_uni.operations import sim_uni_move_utils
 from sr_od.app.sim_uni.operations.sim_uni_enter_fight import SimUniEnterFight
 from sr_od.context.sr_context import SrContext
@@ -41,6 +41,25 @@ class SimUniMoveToEnemyByDetect(SrOperation):
 
         self.last_debug_time: float = 0
 
+        self.last_turn_time: float = 0  # 上一次转动视角的时间 这之前截图的识别结果不再可用
+        self.last_handled_time: float = 0  # 上一次处理的识别结果的截图时间
+
+    def handle_init(self) -> Optional[OperationRoundResult]:
+        """
+        执行前的初始化 由子类实现
+        注意初始化要全面 方便一个指令重复使用
+        可以返回初始化后判断的结果
+        - 成功时跳过本指令
+        - 失败时立刻返回失败
+        - 不返回时正常运行本指令
+        """
+        self.no_enemy_times = 0
+        self.start_move_time = 0
+        # 之前指令留下的识别结果不使用
+        self.last_turn_time = time.time()
+        self.last_handled_time = 0
+        return None
+
     @operation_node(name='移动', timeout_seconds=20, is_start_node=True)  # 理论上移动目标都比较近 不可能20秒还没有到达
     def move(self) -> OperationRoundResult:
         now = time.time()
@@ -82,11 +101,25 @@ class SimUniMoveToEnemyByDetect(SrOperation):
     def detect_screen(self, screen: MatLike, screenshot_time: float) -> OperationRoundResult:
         """
         对画面进行识别 根据结果进行后续判断
+        画面提交给流式识别后不等待推理 使用已有的最新结果
         :param screen: 游戏画面
         :param screenshot_time: 截图时间
         :return:
         """
-        frame_result = self.ctx.yolo_detector.sim_uni_combat_detect(screen, screenshot_time)
+        self.ctx.yolo_detector.sim_uni_combat_detect_async(screen, screenshot_time)
+        frame_result = self.ctx.yolo_detector.sim_uni_combat_latest_result(after_time=self.last_turn_time)
+        if frame_result is None or frame_result.run_time <= self.last_handled_time:
+            # 还没有新的识别结果 继续截图 不阻塞等推理
+            return self.round_wait(wait=0.02)
+        self.last_handled_time = frame_result.run_time
+        return self.handle_frame_result(frame_result)
+
+    def handle_frame_result(self, frame_result: DetectFrameResult) -> OperationRoundResult:
+        """
+        根据识别结果进行后续判断
+        :param frame_result: 识别结果
+        :return:
+        """
         normal_enemy_result = []
         can_attack: bool = False
         for result in frame_result.results:
@@ -123,6 +156,7 @@ class SimUniMoveToEnemyByDetect(SrOperation):
             angle = -30 if self.no_enemy_times % 2 == 0 else 30
 
         self.ctx.controller.turn_by_angle(angle)
+        self.last_turn_time = time.time()
         return self.round_wait(SimUniMoveToEnemyByDetect.STATUS_NO_ENEMY, wait=0.5)
 
     def handle_enemy(self, enemy_pos_list: List[DetectObjectResult]) -> OperationRoundResult:
@@ -134,6 +168,7 @@ class SimUniMoveToEnemyByDetect(SrOperation):
         self.no_enemy_times = 0
         enemy = enemy_pos_list[0]  # 先固定找第一个
         sim_uni_move_utils.turn_to_detected_object(self.ctx, enemy)
+        self.last_turn_time = time.time()
         self.ctx.controller.start_moving_forward()
         self.start_move_time = time.time()
         return self.round_wait()
@@ -13,8 +13,9 @@ from sr_od.context.sr_context import SrContext
 from sr_od.operations.move.get_rid_of_stuck import GetRidOfStuck
 from sr_od.operations.sr_operation import SrOperation
 from sr_od.screen_state import common_screen_state, battle_screen_state
-from sr_od.sr_map import mini_map_utils
 from sr_od.sr_map.mini_map_info import MiniMapInfo
+from sr_od.sr_map.mini_map_threat_tracker import MiniMapThreatTracker
+from sr_od.sr_map.sr_frame_context import SrFrameContext
 
 
 class SimUniMoveToEnemyByMiniMap(SrOperation):
@@ -54,6 +55,9 @@ class SimUniMoveToEnemyByMiniMap(SrOperation):
         self.stop_after_arrival: bool = stop_after_arrival
         """到达后停止"""
 
+        self.threat_tracker: MiniMapThreatTracker = MiniMapThreatTracker()
+        """小地图上的敌人跟踪 决定什么时候需要画面识别"""
+
     @operation_node(name='移动', is_start_node=True, timeout_seconds=60)
     def _execute_one_round(self) -> OperationRoundResult:
         stuck = self.move_in_stuck()  # 先尝试脱困 再进行移动
@@ -66,14 +70,21 @@ class SimUniMoveToEnemyByMiniMap(SrOperation):
         if not common_screen_state.is_normal_in_world(self.ctx, screen):  # 不在大世界 可能被袭击了
             return self.enter_battle(False)
 
+        frame = SrFrameContext(screen, self.ctx.game_config.mini_map_pos, now)
+        mm_info: MiniMapInfo = frame.mm_info
+        threat = self.threat_tracker.update(frame)
+
         if not self.no_attack:
-            self.ctx.yolo_detector.detect_should_attack_in_world_async(screen, now)
+            if threat.under_attack:
+                return self.enter_battle(True)
+            if threat.need_detect:  # 小地图无法确定时 才识别画面
+                submit, _ = self.ctx.yolo_detector.detect_should_attack_in_world_async(screen, now, frame)
+                if submit:
+                    self.threat_tracker.mark_detected(now)
             if self.ctx.yolo_detector.should_attack_in_world_last_result(now):
                 return self.enter_battle(True)
 
-        mm = mini_map_utils.cut_mini_map(screen, self.ctx.game_config.mini_map_pos)
-        mm_info: MiniMapInfo = mini_map_utils.analyse_mini_map(mm)
-        enemy_pos_list = mini_map_utils.get_enemy_pos(mm_info)
+        enemy_pos_list = [i.pos for i in threat.track_list]
 
         if len(enemy_pos_list) == 0:  # 没有红点 可能太近被自身箭头覆盖了
             return self._arrive()
@@ -158,7 +158,7 @@ class MoveToNextLevelV3(SrOperation):
         current_angle = mini_map_utils.analyse_angle(mm)
         self.ctx.controller.turn_from_angle(current_angle, self.detect_entry_angle)
 
-        time.sleep(1)
+        self.sleep(1)
         # 先判断当前画面YOLO能否看到入口
         screen = self.screenshot()
         type_list = sim_uni_screen_state.match_next_level_entry(self.ctx, screen)
@@ -293,7 +293,7 @@ class MoveToNextLevelV3(SrOperation):
         """
         angle_to_turn = self.get_angle_to_turn(target)
         self.ctx.controller.turn_by_angle(angle_to_turn)
-        time.sleep(wait)
+        self.sleep(wait)
 
     def get_angle_to_turn(self, target: MatchResult) -> float:
         """
@@ -39,6 +39,7 @@ class SimUniRunCombatRouteV2(SimUniRunRouteBaseV2):
 
         self.last_state: str = ''  # 上一次的画面状态
         self.current_state: str = ''  # 这一次的画面状态
+        self.detect_start_time: float = 0  # 本次识别敌人开始的时间 这之前截图的识别结果不再可用
 
     @operation_node(name='区域开始前', is_start_node=True)
     def before_route(self) -> OperationRoundResult:
@@ -150,10 +151,20 @@ class SimUniRunCombatRouteV2(SimUniRunRouteBaseV2):
         """
         self.detect_entry = False
         self._view_down()
+        if self.detect_start_time < self._current_node_start_time:  # 刚进入本节点 之前截图的识别结果不再可用
+            self.detect_start_time = time.time()
         screenshot_time = time.time()
         screen: MatLike = self.screenshot()
 
-        frame_result = self.ctx.yolo_detector.sim_uni_combat_detect(screen, screenshot_time)
+        # 画面提交给流式识别后不等待推理 使用本节点开始后截图的最新结果
+        self.ctx.yolo_detector.sim_uni_combat_detect_async(screen, screenshot_time)
+        frame_result = self.ctx.yolo_detector.sim_uni_combat_latest_result(after_time=self.detect_start_time)
+        if frame_result is None:
+            if screenshot_time - self.detect_start_time < 2:
+                return self.round_wait(wait=0.02)
+            # 流式识别一直没有结果 改为同步识别兜底
+            frame_result = self.ctx.yolo_detector.sim_uni_combat_detect(screen, screenshot_time)
+        screen = frame_result.raw_image  # 角度需要与识别的画面对应
 
         enemy_angles: List[float] = []
         entry_angles: List[float] = []
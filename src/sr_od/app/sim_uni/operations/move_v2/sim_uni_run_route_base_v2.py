@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from typing import ClassVar, Optional
 
@@ -161,7 +159,7 @@ class SimUniRunRouteBaseV2(SrOperation):
         # 不要被360整除 否则转一圈之后还是被人物覆盖了看不到
         angle = 35 * self.turn_direction_when_nothing
         self.ctx.controller.turn_by_angle(angle)
-        time.sleep(0.5)
+        self.sleep(0.5)
 
         if self.nothing_times % 11 == 0:
             # 识别不到内容太多次 判断楼层类型是否有问题
@@ -184,7 +182,7 @@ class SimUniRunRouteBaseV2(SrOperation):
             return
         self.ctx.controller.turn_down(25)
         self.ctx.detect_info.view_down = True
-        time.sleep(0.2)
+        self.sleep(0.2)
 
     def _view_up(self):
         """
@@ -195,7 +193,7 @@ class SimUniRunRouteBaseV2(SrOperation):
             return
         self.ctx.controller.turn_down(-25)
         self.ctx.detect_info.view_down = False
-        time.sleep(0.2)
+        self.sleep(0.2)
 
     def after_detect_timeout(self) -> OperationRoundResult:
         """
@@ -181,7 +181,7 @@ class SimUniEnterFight(SrOperation):
 
         if self.disposable:
             result = self._attack(now_time)
-            time.sleep(0.5)  # 攻击可破坏时 多等一会 防止刮刮乐出奖
+            self.sleep(0.5)  # 攻击可破坏时 多等一会 防止刮刮乐出奖
             return result
         else:
             with_alert, attack_direction = self.ctx.yolo_detector.get_attack_direction(screen, self.last_attack_direction, now_time)
@@ -350,7 +350,7 @@ class SimUniEnterFight(SrOperation):
             for i in range(2):  # 多按几次 防止被后摇吞了
                 direction = 's' if direction is None else OPPOSITE_DIRECTION[direction]
                 self.ctx.controller.move(direction=direction)
-                time.sleep(0.5)
+                self.sleep(0.5)
             self.had_last_move = True
             return self.round_wait()
 
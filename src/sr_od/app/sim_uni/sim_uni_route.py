@@ -2,10 +2,10 @@ import cv2
 import numpy as np
 import os
 import shutil
-import yaml
 from cv2.typing import MatLike
 from typing import List, Optional, Tuple
 
+from one_dragon.base.config.yaml_bundle import load_yaml_file
 from one_dragon.base.geometry.point import Point
 from one_dragon.utils import cv2_utils, os_utils
 from one_dragon.utils.i18_utils import gt
@@ -31,8 +31,9 @@ class SimUniRoute:
         self.route_id: str = route_id
 
         self.idx: Optional[int] = None
-        self.mm: Optional[MatLike] = None
-        self.mm2: Optional[MatLike] = None  # 有极少数地图 重进后初始小地图不一样
+        self._mm: Optional[MatLike] = None
+        self._mm2: Optional[MatLike] = None  # 有极少数地图 重进后初始小地图不一样
+        self._mm_loaded: bool = True  # 小地图图片在第一次使用时才读取
         self.region: Optional[Region] = None
         self.start_pos: Optional[Point] = None
         self.op_list: List[WorldPatrolRouteOperation] = []
@@ -77,11 +78,41 @@ class SimUniRoute:
 
     def _read_route(self):
         dir_path = self.get_route_dir_path()
-        self.mm = cv2_utils.read_image(os.path.join(dir_path, 'mm.png'))
-        self.mm2 = cv2_utils.read_image(os.path.join(dir_path, 'mm2.png'))
-        with open(os.path.join(dir_path, 'route.yml'), 'r', encoding='utf-8') as file:
-            route = yaml.safe_load(file)
-            self.load_from_route_yml(route)
+        self._mm_loaded = False
+        route = load_yaml_file(os.path.join(dir_path, 'route.yml'))
+        self.load_from_route_yml(route)
+
+    def _load_mm(self) -> None:
+        """
+        读取开始点的小地图图片
+        :return:
+        """
+        if self._mm_loaded:
+            return
+        self._mm_loaded = True
+        dir_path = self.get_route_dir_path()
+        self._mm = cv2_utils.read_image(os.path.join(dir_path, 'mm.png'))
+        self._mm2 = cv2_utils.read_image(os.path.join(dir_path, 'mm2.png'))
+
+    @property
+    def mm(self) -> Optional[MatLike]:
+        self._load_mm()
+        return self._mm
+
+    @mm.setter
+    def mm(self, value: Optional[MatLike]) -> None:
+        self._load_mm()
+        self._mm = value
+
+    @property
+    def mm2(self) -> Optional[MatLike]:
+        self._load_mm()
+        return self._mm2
+
+    @mm2.setter
+    def mm2(self, value: Optional[MatLike]) -> None:
+        self._load_mm()
+        self._mm2 = value
 
     @property
     def uid(self) -> str:
@@ -1,21 +1,25 @@
 import os
 from cv2.typing import MatLike
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResult
 from one_dragon.utils import cv2_utils
 from one_dragon.utils.log_utils import log
 from sr_od.app.sim_uni.sim_uni_route import SimUniRoute
+from sr_od.app.sim_uni.sim_uni_route_index import START_MM_RECT, SimUniRouteIndex
 from sr_od.app.sim_uni.sim_uni_const import SimUniLevelType
 from sr_od.sr_map.sr_map_data import SrMapData
 
+SHORTLIST_ACCEPT_CONFIDENCE: float = 0.9
+"""候选路线的匹配置信度达到这个值时直接采用 否则与剩余的路线一起比较 取全部路线中最好的"""
+
 
 class SimUniRouteData:
 
     def __init__(self, map_data: SrMapData):
         self.map_data: SrMapData = map_data
         self.level_type_2_route_list: dict[str, List[SimUniRoute]] = {}
+        self.level_type_2_route_index: dict[str, SimUniRouteIndex] = {}
 
     def get_route_list(self, level_type: SimUniLevelType) -> List[SimUniRoute]:
         """
@@ -60,6 +64,21 @@ class SimUniRouteData:
 
     def clear_cache(self):
         self.level_type_2_route_list.clear()
+        self.level_type_2_route_index.clear()
+
+    def get_route_index(self, level_type: SimUniLevelType) -> SimUniRouteIndex:
+        """
+        获取楼层类型对应的路线指纹索引
+        :param level_type: 楼层类型
+        :return:
+        """
+        key = level_type.route_id
+        index = self.level_type_2_route_index.get(key)
+        if index is None:
+            index = SimUniRouteIndex(key)
+            index.update(self.get_route_list(level_type))
+            self.level_type_2_route_index[key] = index
+        return index
 
     def match_best_sim_uni_route(self, uni_num: int, level_type: SimUniLevelType, mm: MatLike) -> Optional[SimUniRoute]:
         """
@@ -70,20 +89,49 @@ class SimUniRouteData:
         :return:
         """
         route_list = self.get_route_list(level_type)
+        # 先用指纹选出候选路线 候选中没有明显匹配的 再检查剩余的路线
+        shortlist = self.get_route_index(level_type).get_shortlist(route_list, mm)
+        target_route, target_mr = self._match_route_in_list(uni_num, shortlist, mm)
+        if target_mr is None or target_mr.confidence < SHORTLIST_ACCEPT_CONFIDENCE:
+            shortlist_idx = set(route.idx for route in shortlist)
+            rest_list = [route for route in route_list if route.idx not in shortlist_idx]
+            rest_route, rest_mr = self._match_route_in_list(uni_num, rest_list, mm)
+            if rest_mr is not None and (target_mr is None or target_mr.confidence < rest_mr.confidence):
+                target_route = rest_route
+                target_mr = rest_mr
+
+        if target_route is not None and uni_num not in target_route.support_world:
+            target_route.add_support_world(uni_num)
+            target_route.save()
+
+        if target_mr is not None:
+            log.debug(f'当前匹配路线置信度 {target_mr.confidence:.2f}')
+
+        return target_route
+
+    @staticmethod
+    def _match_route_in_list(uni_num: int, route_list: List[SimUniRoute],
+                             mm: MatLike) -> Tuple[Optional[SimUniRoute], Optional[MatchResult]]:
+        """
+        在路线列表中 用模板匹配找到最合适的路线
+        :param uni_num: 第几宇宙
+        :param route_list: 路线列表
+        :param mm: 开始点的小地图截图
+        :return: 路线和匹配结果
+        """
         target_route: Optional[SimUniRoute] = None
         target_mr: Optional[MatchResult] = None
+        template = cv2_utils.crop_image_only(mm, START_MM_RECT)
 
         for same_world in [True, False]:  # 先匹配当前世界的 再匹配其他世界的
             for route in route_list:
                 if (uni_num in route.support_world) != same_world:
                     continue
                 source = route.mm
-                template = cv2_utils.crop_image_only(mm, Rect(30, 30, 160, 160))
                 mr = cv2_utils.match_template(source, template, threshold=0.6, only_best=True)
 
                 if mr.max is None and route.mm2 is not None:
                     source = route.mm2
-                    template, _ = cv2_utils.crop_image(mm, Rect(30, 30, 160, 160))
                     mr = cv2_utils.match_template(source, template, threshold=0.6, only_best=True)
 
                 if mr.max is None:
@@ -93,11 +141,4 @@ class SimUniRouteData:
                     target_route = route
                     target_mr = mr.max
 
-        if target_route is not None and uni_num not in target_route.support_world:
-            target_route.add_support_world(uni_num)
-            target_route.save()
-
-        if target_mr is not None:
-            log.debug(f'当前匹配路线置信度 {target_mr.confidence:.2f}')
-
-        return target_route
+        return target_route, target_mr
@@ -0,0 +1,134 @@
+import os
+import pickle
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.utils import cv2_utils, os_utils
+from one_dragon.utils.log_utils import log
+from sr_od.app.sim_uni.sim_uni_route import SimUniRoute
+
+_INDEX_VERSION: int = 1
+"""索引格式版本 格式变化时递增 旧索引会被丢弃重建"""
+
+FINGERPRINT_SCALE: int = 4
+"""指纹的缩小倍数"""
+
+START_MM_RECT: Rect = Rect(30, 30, 160, 160)
+"""开始点小地图中 用于识别路线的部分"""
+
+
+def get_fingerprint(image: Optional[MatLike]) -> Optional[np.ndarray]:
+    """
+    小地图的指纹 缩小后的灰度图
+    :param image: 小地图
+    :return:
+    """
+    if image is None:
+        return None
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    h, w = gray.shape[:2]
+    return cv2.resize(gray, (w // FINGERPRINT_SCALE, h // FINGERPRINT_SCALE), interpolation=cv2.INTER_AREA)
+
+
+def _get_mtime(file_path: str) -> float:
+    return os.path.getmtime(file_path) if os.path.exists(file_path) else 0
+
+
+class SimUniRouteIndex:
+
+    def __init__(self, route_id: str):
+        """
+        一个楼层类型下 所有路线开始点小地图的指纹索引
+        识别路线时 先用指纹在缩小的图上粗略匹配 选出少数候选 再用原图做完整的模板匹配
+        指纹按 mm.png 和 mm2.png 的修改时间缓存在磁盘上
+        :param route_id: 楼层类型的路线ID
+        """
+        self.route_id: str = route_id
+        self._entries: dict[int, tuple[float, float, Optional[np.ndarray], Optional[np.ndarray]]] = {}
+        """路线下标 -> (mm修改时间, mm2修改时间, mm指纹, mm2指纹)"""
+
+        self._load()
+
+    def get_index_file_path(self) -> str:
+        return os.path.join(os_utils.get_path_under_work_dir('.cache', 'sim_uni_route'), f'{self.route_id}.pickle')
+
+    def _load(self) -> None:
+        file_path = self.get_index_file_path()
+        if not os.path.exists(file_path):
+            return
+        try:
+            with open(file_path, 'rb') as file:
+                data = pickle.load(file)
+            if data.get('version') == _INDEX_VERSION:
+                self._entries = data['entries']
+        except Exception:
+            log.error(f'路线指纹读取失败 将重新构建 {file_path}', exc_info=True)
+
+    def _save(self) -> None:
+        file_path = self.get_index_file_path()
+        temp_path = file_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                pickle.dump({'version': _INDEX_VERSION, 'entries': self._entries}, file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, file_path)
+        except Exception:
+            log.error(f'路线指纹保存失败 {file_path}', exc_info=True)
+
+    def update(self, route_list: List[SimUniRoute]) -> None:
+        """
+        更新指纹 只重新计算图片有变化的路线
+        :param route_list: 当前的路线列表
+        :return:
+        """
+        changed = False
+        idx_set = set()
+        for route in route_list:
+            idx_set.add(route.idx)
+            route_dir = route.get_route_dir_path()
+            mm_mtime = _get_mtime(os.path.join(route_dir, 'mm.png'))
+            mm2_mtime = _get_mtime(os.path.join(route_dir, 'mm2.png'))
+            entry = self._entries.get(route.idx)
+            if entry is not None and entry[0] == mm_mtime and entry[1] == mm2_mtime:
+                continue
+            self._entries[route.idx] = (mm_mtime, mm2_mtime, get_fingerprint(route.mm), get_fingerprint(route.mm2))
+            changed = True
+
+        for idx in list(self._entries.keys()):
+            if idx not in idx_set:
+                self._entries.pop(idx)
+                changed = True
+
+        if changed:
+            self._save()
+
+    def get_shortlist(self, route_list: List[SimUniRoute], mm: MatLike, top_k: int = 5) -> List[SimUniRoute]:
+        """
+        用指纹粗略匹配 返回最可能的几条路线
+        :param route_list: 路线列表
+        :param mm: 开始点的小地图截图
+        :param top_k: 返回的路线数量
+        :return: 按粗略匹配的相似度倒序
+        """
+        template = get_fingerprint(cv2_utils.crop_image_only(mm, START_MM_RECT))
+        score_list: List[Tuple[float, int]] = []
+        for i, route in enumerate(route_list):
+            entry = self._entries.get(route.idx)
+            if entry is None:
+                continue
+            score = -1
+            for fingerprint in entry[2:]:
+                if fingerprint is None:
+                    continue
+                if fingerprint.shape[0] < template.shape[0] or fingerprint.shape[1] < template.shape[1]:
+                    continue
+                result = cv2.matchTemplate(fingerprint, template, cv2.TM_CCOEFF_NORMED)
+                score = max(score, float(np.max(result)))
+            score_list.append((score, i))
+
+        score_list.sort(key=lambda x: x[0], reverse=True)
+        return [route_list[i] for _, i in score_list[:top_k]]
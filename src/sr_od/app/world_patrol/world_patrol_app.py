@@ -59,6 +59,7 @@ class WorldPatrolApp(SrApplication):
             return self.round_success(WorldPatrolApp.STATUS_ALL_ROUTE_FINISHED)
         else:
             self.ctx.init_for_world_patrol()
+            self.ctx.preheat_context.preheat_for_world_patrol_route_async(self.route_list[0])
             return self.round_success()
 
     @node_from(from_name='加载路线')
@@ -95,6 +96,8 @@ class WorldPatrolApp(SrApplication):
         route = self.route_list[self.current_route_idx]
 
         self.current_route_start_time = time.time()
+        if self.current_route_idx + 1 < len(self.route_list):  # 当前路线运行时 预热下一条路线需要的数据
+            self.ctx.preheat_context.preheat_for_world_patrol_route_async(self.route_list[self.current_route_idx + 1])
         op = WorldPatrolRunRoute(self.ctx, route)
         route_result = op.execute().success
 
@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from typing import ClassVar
 
@@ -72,7 +70,7 @@ class ChooseChallengeTimes(SrOperation):
         for _ in range(click_times):
             if not self.ctx.controller.click(to_click):
                 return False
-            time.sleep(0.2)
+            self.sleep(0.2)
 
         return True
 
@@ -93,6 +91,6 @@ class ChooseChallengeTimes(SrOperation):
         for _ in range(click_times):
             if not self.ctx.controller.click(to_click):
                 return False
-            time.sleep(0.2)
+            self.sleep(0.2)
 
         return True
@@ -1,4 +1,8 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from one_dragon.utils.i18_utils import gt
+from one_dragon.utils.log_utils import log
 
 
 class SrPreheatContext:
@@ -24,6 +28,73 @@ class SrPreheatContext:
         from sr_od.sr_map import mini_map_utils
         mini_map_utils.preheat()
 
+    def preheat_for_world_patrol_route_async(self, route) -> Future:
+        """
+        锄大地路线预热-异步
+        在上一条路线运行时调用 让下一条路线开始时不需要再加载
+        :param route: 路线 WorldPatrolRoute
+        :return:
+        """
+        return self.executor.submit(self.preheat_for_world_patrol_route, route)
+
+    def preheat_for_world_patrol_route(self, route) -> None:
+        """
+        锄大地路线预热
+        - 路线经过的所有区域的大地图 包括灰度图、特征点和重定位索引
+        - 传送点和这些区域内特殊点的小地图图标
+        :param route: 路线 WorldPatrolRoute
+        :return:
+        """
+        from sr_od.app.world_patrol.world_patrol_route import WorldPatrolRoute
+        route: WorldPatrolRoute
+        try:
+            region_list = self.get_world_patrol_route_region_list(route)
+
+            # 大地图在地图数据的后台线程中加载 这边同时加载图标
+            future_list = [self.ctx.map_data.prefetch_large_map_info(region) for region in region_list]
+
+            template_id_set = {route.tp.template_id}
+            for region in region_list:
+                template_id_set.update(self.ctx.map_data.get_sp_type_in_rect(region, None).keys())
+            for template_id in template_id_set:
+                t = self.ctx.template_loader.get_template('mm_icon', template_id)
+                if t is None:
+                    continue
+                _ = t.gray
+                _ = t.features
+
+            mm_pos = self.ctx.game_config.mini_map_pos
+            for region, future in zip(region_list, future_list):
+                future.result()
+                self.ctx.map_data.get_relocalization_index(region, mm_pos.ry - mm_pos.ly)
+        except Exception:
+            log.error('锄大地路线预热失败 %s', route.display_name, exc_info=True)
+
+    def get_world_patrol_route_region_list(self, route) -> List:
+        """
+        按路线指令推算 路线会经过的所有区域
+        :param route: 路线 WorldPatrolRoute
+        :return: 不重复的区域列表 第一个为传送点所在区域
+        """
+        from sr_od.config import operation_const
+        current_region = route.tp.region
+        region_list = [current_region]
+        for route_item in route.route_list:
+            next_region = None
+            if route_item.op == operation_const.OP_ENTER_SUB:
+                next_region = self.ctx.map_data.get_sub_region_by_cn(current_region, route_item.data[0],
+                                                                     int(route_item.data[1]))
+            elif (route_item.op in [operation_const.OP_MOVE, operation_const.OP_SLOW_MOVE]
+                  and len(route_item.data) > 2):
+                next_region = self.ctx.map_data.best_match_region_by_name(
+                    gt(current_region.cn, 'game'), current_region.planet, target_floor=route_item.data[2])
+            if next_region is None:
+                continue
+            current_region = next_region
+            if current_region not in region_list:
+                region_list.append(current_region)
+        return region_list
+
     def preheat_mm_icon(self):
         """
         预热小地图图标
@@ -2,6 +2,7 @@ import time
 
 from typing import Optional, List
 
+from one_dragon.base.operation.context_lazy_attr import context_lazy_attr, INSTANCE_LAZY_GROUP
 from one_dragon.base.operation.one_dragon_context import OneDragonContext
 from one_dragon.utils import i18_utils
 from sr_od.app.assignments.assignments_run_record import AssignmentsRunRecord
@@ -11,6 +12,7 @@ from sr_od.app.daily_training.daily_training_run_record import DailyTrainingRunR
 from sr_od.app.echo_of_war.echo_of_war_config import EchoOfWarConfig
 from sr_od.app.echo_of_war.echo_of_war_run_record import EchoOfWarRunRecord
 from sr_od.app.nameless_honor.nameless_honor_run_record import NamelessHonorRunRecord
+from sr_od.app.notify.notify_run_record import NotifyRunRecord
 from sr_od.app.relic_salvage.relic_salvage_config import RelicSalvageConfig
 from sr_od.app.relic_salvage.relic_salvage_run_record import RelicSalvageRunRecord
 from sr_od.app.sim_uni.sim_uni_challenge_config import SimUniChallengeConfig, SimUniChallengeConfigData
@@ -26,6 +28,7 @@ from sr_od.app.memory_crystal_shard.memory_crystal_shard_run_record import Memor
 from sr_od.app.world_patrol.world_patrol_config import WorldPatrolConfig
 from sr_od.app.world_patrol.world_patrol_route_data import WorldPatrolRouteData
 from sr_od.app.world_patrol.world_patrol_run_record import WorldPatrolRunRecord
+from sr_od.config.notify_config import NotifyConfig
 from sr_od.config.character_const import Character, TECHNIQUE_ATTACK, TECHNIQUE_BUFF, TECHNIQUE_BUFF_ATTACK, FEIXIAO, \
     TECHNIQUE_BUFF_ATTACK_DISAPPEAR
 from sr_od.context.context_pos_info import ContextPosInfo
@@ -169,11 +172,6 @@ class SrContext(OneDragonContext):
         self.is_pc: bool = True
         self.record_coordinate: bool = True  # 记录坐标
 
-        self.map_data: SrMapData = SrMapData()
-        self.world_patrol_route_data: WorldPatrolRouteData = WorldPatrolRouteData(self.map_data)
-        self.sim_uni_route_data: SimUniRouteData = SimUniRouteData(self.map_data)
-        self.guide_data: SrGuideData = SrGuideData()
-
         self.pos_info: ContextPosInfo = ContextPosInfo()
         self.team_info: TeamInfo = TeamInfo()
         self.sim_uni_info = SimUniInfo()
@@ -187,15 +185,37 @@ class SrContext(OneDragonContext):
         # 共用配置
         from sr_od.config.model_config import ModelConfig
         self.model_config: ModelConfig = ModelConfig()
-        self.yolo_detector: YoloScreenDetector = YoloScreenDetector(
-            standard_resolution_h=self.project_config.screen_standard_height,
-            standard_resolution_w=self.project_config.screen_standard_width
-        )
         self.preheat_context = SrPreheatContext(self)
 
-        # 实例独有的配置
+        # 实例独有的配置 运行记录等在第一次使用时才创建
         self.load_instance_config()
 
+    @context_lazy_attr()
+    def map_data(self) -> SrMapData:
+        return SrMapData()
+
+    @context_lazy_attr()
+    def world_patrol_route_data(self) -> WorldPatrolRouteData:
+        return WorldPatrolRouteData(self.map_data)
+
+    @context_lazy_attr()
+    def sim_uni_route_data(self) -> SimUniRouteData:
+        return SimUniRouteData(self.map_data)
+
+    @context_lazy_attr()
+    def guide_data(self) -> SrGuideData:
+        return SrGuideData()
+
+    @context_lazy_attr()
+    def yolo_detector(self) -> YoloScreenDetector:
+        """
+        画面识别 模型在 init_for_world_patrol 和 init_for_sim_uni 中加载
+        """
+        return YoloScreenDetector(
+            standard_resolution_h=self.project_config.screen_standard_height,
+            standard_resolution_w=self.project_config.screen_standard_width
+        )
+
     def init_by_config(self) -> None:
         """
         根据配置进行初始化
@@ -204,12 +224,25 @@ class SrContext(OneDragonContext):
         OneDragonContext.init_by_config(self)
         i18_utils.update_default_lang(self.game_config.lang)
 
+        self.init_controller()
+
+    def init_controller(self) -> None:
+        """
+        按当前实例的游戏配置创建控制器 各实例的按键、窗口标题可能不同
+        运行中切换实例时 新的控制器需要马上完成运行前的初始化
+        :return:
+        """
+        if self.controller is not None:  # 先释放上一个实例的控制器
+            self.controller.release_resources()
         self.controller = SrPcController(
             game_config=self.game_config,
             win_title=self.game_config.win_title,
             standard_width=self.project_config.screen_standard_width,
             standard_height=self.project_config.screen_standard_height
         )
+        self.controller.set_run_state_token(self.run_state_token)
+        if not self.is_context_stop:
+            self.controller.init_before_context_run()
 
     def load_instance_config(self) -> None:
         OneDragonContext.load_instance_config(self)
@@ -219,6 +252,9 @@ class SrContext(OneDragonContext):
         self.team_info: TeamInfo = TeamInfo()
         self.sim_uni_info = SimUniInfo()
         self.detect_info: DetectInfo = DetectInfo()
+        self.technique_used = False
+        self.last_use_tech_time = 0
+        self.ban_technique = False
 
         from sr_od.config.game_config import GameConfig
         self.game_config: GameConfig = GameConfig(self.current_instance_idx)
@@ -232,39 +268,100 @@ class SrContext(OneDragonContext):
             default_password=self.game_config.get('game_account_password'),
         )
 
-        game_refresh_hour_offset = self.game_account_config.game_refresh_hour_offset
+        if self.controller is not None:  # 已经初始化过控制器 需要换成这个实例的
+            self.init_controller()
+
+    @property
+    def game_refresh_hour_offset(self) -> int:
+        return self.game_account_config.game_refresh_hour_offset
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def notify_config(self) -> NotifyConfig:
+        return NotifyConfig(self.current_instance_idx)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def notify_record(self) -> NotifyRunRecord:
+        return NotifyRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def world_patrol_config(self) -> WorldPatrolConfig:
+        return WorldPatrolConfig(self.current_instance_idx)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def world_patrol_record(self) -> WorldPatrolRunRecord:
+        return WorldPatrolRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def power_config(self) -> TrailblazePowerConfig:
+        return TrailblazePowerConfig(self.guide_data, self.current_instance_idx)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def power_record(self) -> TrailblazePowerRunRecord:
+        return TrailblazePowerRunRecord(self.power_config, self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def echo_of_war_config(self) -> EchoOfWarConfig:
+        return EchoOfWarConfig(self.guide_data, self.current_instance_idx)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def echo_of_war_run_record(self) -> EchoOfWarRunRecord:
+        return EchoOfWarRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def sim_uni_challenge_config_data(self) -> SimUniChallengeConfigData:
+        return SimUniChallengeConfigData()
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def sim_uni_config(self) -> SimUniConfig:
+        return SimUniConfig(self.current_instance_idx)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def sim_uni_record(self) -> SimUniRunRecord:
+        return SimUniRunRecord(self.sim_uni_config, self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def assignments_run_record(self) -> AssignmentsRunRecord:
+        return AssignmentsRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def nameless_honor_run_record(self) -> NamelessHonorRunRecord:
+        return NamelessHonorRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
+
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def daily_training_run_record(self) -> DailyTrainingRunRecord:
+        return DailyTrainingRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
-        from sr_od.config.notify_config import NotifyConfig
-        self.notify_config: NotifyConfig = NotifyConfig(self.current_instance_idx)
-        from sr_od.app.notify.notify_run_record import NotifyRunRecord
-        self.notify_record: NotifyRunRecord = NotifyRunRecord(self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def email_run_record(self) -> EmailRunRecord:
+        return EmailRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
-        self.world_patrol_config: WorldPatrolConfig = WorldPatrolConfig(self.current_instance_idx)
-        self.world_patrol_record: WorldPatrolRunRecord = WorldPatrolRunRecord(self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def buy_xz_parcel_run_record(self) -> BuyXianZhouParcelRunRecord:
+        return BuyXianZhouParcelRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
-        self.power_config: TrailblazePowerConfig = TrailblazePowerConfig(self.guide_data, self.current_instance_idx)
-        self.power_record: TrailblazePowerRunRecord = TrailblazePowerRunRecord(self.power_config, self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def memory_crystal_shard_run_record(self) -> MemoryCrystalShardRunRecord:
+        return MemoryCrystalShardRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
-        self.echo_of_war_config: EchoOfWarConfig = EchoOfWarConfig(self.guide_data, self.current_instance_idx)
-        self.echo_of_war_run_record: EchoOfWarRunRecord = EchoOfWarRunRecord(self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def support_character_run_record(self) -> SupportCharacterRunRecord:
+        return SupportCharacterRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
-        self.sim_uni_challenge_config_data: SimUniChallengeConfigData = SimUniChallengeConfigData()
-        self.sim_uni_config: SimUniConfig = SimUniConfig(self.current_instance_idx)
-        self.sim_uni_record: SimUniRunRecord = SimUniRunRecord(self.sim_uni_config, self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def relic_salvage_config(self) -> RelicSalvageConfig:
+        return RelicSalvageConfig(self.current_instance_idx)
 
-        self.assignments_run_record: AssignmentsRunRecord = AssignmentsRunRecord(self.current_instance_idx, game_refresh_hour_offset)
-        self.nameless_honor_run_record: NamelessHonorRunRecord = NamelessHonorRunRecord(self.current_instance_idx, game_refresh_hour_offset)
-        self.daily_training_run_record: DailyTrainingRunRecord = DailyTrainingRunRecord(self.current_instance_idx, game_refresh_hour_offset)
-        self.email_run_record: EmailRunRecord = EmailRunRecord(self.current_instance_idx, game_refresh_hour_offset)
-        self.buy_xz_parcel_run_record: BuyXianZhouParcelRunRecord = BuyXianZhouParcelRunRecord(self.current_instance_idx, game_refresh_hour_offset)
-        self.memory_crystal_shard_run_record: MemoryCrystalShardRunRecord = MemoryCrystalShardRunRecord(self.current_instance_idx, game_refresh_hour_offset)
-        self.support_character_run_record: SupportCharacterRunRecord = SupportCharacterRunRecord(self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def relic_salvage_run_record(self) -> RelicSalvageRunRecord:
+        return RelicSalvageRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
-        self.relic_salvage_config: RelicSalvageConfig = RelicSalvageConfig(self.current_instance_idx)
-        self.relic_salvage_run_record: RelicSalvageRunRecord = RelicSalvageRunRecord(self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def trick_snack_config(self) -> TrickSnackConfig:
+        return TrickSnackConfig(self.current_instance_idx)
 
-        self.trick_snack_config: TrickSnackConfig = TrickSnackConfig(self.current_instance_idx)
-        self.trick_snack_run_record: TrickSnackRunRecord = TrickSnackRunRecord(self.current_instance_idx, game_refresh_hour_offset)
+    @context_lazy_attr(INSTANCE_LAZY_GROUP)
+    def trick_snack_run_record(self) -> TrickSnackRunRecord:
+        return TrickSnackRunRecord(self.current_instance_idx, self.game_refresh_hour_offset)
 
     @property
     def sim_uni_challenge_config(self) -> Optional[SimUniChallengeConfig]:
@@ -67,7 +67,7 @@ class SrPcController(PcControllerBase):
             self.btn_controller.press(direction)
             self.is_moving = True
             self.enter_running(run)
-            time.sleep(press_time)
+            self.btn_controller.hold(press_time)
             self.btn_controller.release(direction)
             self.stop_moving_forward()
         else:
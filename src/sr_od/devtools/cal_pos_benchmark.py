@@ -0,0 +1,346 @@
+import json
+import os
+import re
+import shutil
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.base.config.yaml_operator import YamlOperator
+from one_dragon.base.geometry.point import Point
+from one_dragon.base.geometry.rectangle import Rect
+from one_dragon.base.matcher.match_result import MatchResult
+from one_dragon.utils import cal_utils, cv2_utils, os_utils
+from one_dragon.utils.debug_artifact_sink import find_artifact_image, get_debug_artifact_sink
+from one_dragon.utils.log_utils import log
+from sr_od.context.sr_context import SrContext
+from sr_od.operations.move import cal_pos_utils
+from sr_od.operations.move.cal_pos_utils import VerifyPosInfo
+from sr_od.sr_map import large_map_utils, mini_map_utils
+from sr_od.sr_map.large_map_info import LargeMapInfo
+from sr_od.sr_map.mini_map_info import MiniMapInfo
+from sr_od.sr_map.sr_map_def import Region
+
+
+class PosSample:
+
+    def __init__(self, prl_id: str, case_id: str, mm: MatLike,
+                 truth: Optional[MatchResult] = None,
+                 verify: Optional[VerifyPosInfo] = None):
+        """
+        一个定位样例
+        :param prl_id: 区域ID
+        :param case_id: 样例ID 即保存时的文件夹名称
+        :param mm: 小地图
+        :param truth: 真实坐标 来自 record_pos_utils.save_sample
+        :param verify: 校验信息 来自 cal_pos_utils.save_as_test_case 这类样例没有真实坐标
+        """
+        self.prl_id: str = prl_id
+        self.case_id: str = case_id
+        self.mm: MatLike = mm
+        self.truth: Optional[MatchResult] = truth
+        self.verify: Optional[VerifyPosInfo] = verify
+
+
+PosStrategy = Callable[[SrContext, LargeMapInfo, MiniMapInfo, Rect], Optional[MatchResult]]
+
+
+def _scale_list() -> List[float]:
+    return cal_pos_utils.get_mini_map_scale_list(running=False)
+
+
+WORLD_PATROL_STRATEGY: dict[str, PosStrategy] = {
+    'all': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.cal_character_pos(
+        ctx, lm_info, mm_info, lm_rect=lm_rect),
+    'road_mask': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.cal_character_pos_by_road_mask(
+        ctx, lm_info, mm_info, lm_rect=lm_rect, scale_list=_scale_list()),
+    'sp': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.cal_character_pos_by_sp_result(
+        ctx, lm_info, mm_info, lm_rect=lm_rect),
+    'gray': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.cal_character_pos_by_gray(
+        ctx, lm_info, mm_info, lm_rect=lm_rect, scale_list=_scale_list()),
+    'raw': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.cal_character_pos_by_raw(
+        ctx, lm_info, mm_info, lm_rect=lm_rect, scale_list=_scale_list()),
+    'relocalization': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.cal_character_pos_by_relocalization(
+        ctx, lm_info, mm_info),
+}
+"""大世界的定位策略 all 为实际使用的组合 relocalization 不使用圈定的范围"""
+
+SIM_UNI_STRATEGY: dict[str, PosStrategy] = {
+    'all': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.sim_uni_cal_pos(
+        ctx, lm_info, mm_info, lm_rect=lm_rect),
+    'gray': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.sim_uni_cal_pos_by_gray(
+        ctx, lm_info, mm_info, lm_rect=lm_rect, scale_list=_scale_list()),
+    'raw': lambda ctx, lm_info, mm_info, lm_rect: cal_pos_utils.sim_uni_cal_pos_by_raw(
+        ctx, lm_info, mm_info, lm_rect=lm_rect, scale_list=_scale_list()),
+}
+"""模拟宇宙的定位策略 all 为实际使用的组合"""
+
+
+def _parse_point(value) -> Optional[Point]:
+    """
+    解析 VerifyPosInfo.yml_str 中保存的点 格式为 (x, y)
+    """
+    if value is None:
+        return None
+    nums = re.findall(r'-?\d+', str(value))
+    if len(nums) < 2:
+        return None
+    return Point(int(nums[0]), int(nums[1]))
+
+
+def load_gps_samples(base_dir: Optional[str] = None) -> List[PosSample]:
+    """
+    读取 record_pos_utils.save_sample 保存的样例 .debug/gps/<prl_id>/<时间>
+    :param base_dir: 样例根目录
+    :return:
+    """
+    if base_dir is None:
+        base_dir = os_utils.get_path_under_work_dir('.debug', 'gps')
+    sample_list: List[PosSample] = []
+    for prl_id, case_id, case_dir in _list_case_dir(base_dir):
+        mm = _read_mm(case_dir)
+        yml = YamlOperator(os.path.join(case_dir, 'pos.yml'))
+        if mm is None or yml.get('x') is None:
+            continue
+        truth = MatchResult(1, yml.get('x'), yml.get('y'), yml.get('w'), yml.get('h'),
+                            template_scale=yml.get('template_scale', 1))
+        sample_list.append(PosSample(prl_id, case_id, mm, truth=truth))
+    return sample_list
+
+
+def load_fail_samples(base_dir: Optional[str] = None) -> List[PosSample]:
+    """
+    读取 cal_pos_utils.save_as_test_case 保存的失败样例 .debug/cal_pos_fail/<prl_id>/<时间>
+    :param base_dir: 样例根目录
+    :return:
+    """
+    if base_dir is None:
+        base_dir = os_utils.get_path_under_work_dir('.debug', 'cal_pos_fail')
+    sample_list: List[PosSample] = []
+    for prl_id, case_id, case_dir in _list_case_dir(base_dir):
+        mm = _read_mm(case_dir)
+        yml = YamlOperator(os.path.join(case_dir, 'verify.yml'))
+        last_pos = _parse_point(yml.get('last_pos'))
+        if mm is None or last_pos is None:
+            continue
+        verify = VerifyPosInfo(last_pos=last_pos,
+                               max_distance=yml.get('max_distance', 20),
+                               line_p1=_parse_point(yml.get('line_p1')),
+                               line_p2=_parse_point(yml.get('line_p2')))
+        sample_list.append(PosSample(prl_id, case_id, mm, verify=verify))
+    return sample_list
+
+
+def check_fail_sample_saving(region: Region) -> bool:
+    """
+    cal_pos_utils.save_as_test_case 保存的失败样例 可以被 load_fail_samples 读取
+    检查后删除这次保存的样例
+    :param region: 样例所属的区域
+    :return: 是否符合预期
+    """
+    base_dir = os_utils.get_path_under_work_dir('.debug', 'cal_pos_fail')
+    existed = set(i[2] for i in _list_case_dir(base_dir))
+
+    mm = np.random.randint(0, 256, (200, 200, 3), dtype=np.uint8)
+    verify = VerifyPosInfo(last_pos=Point(100, 200), max_distance=20, line_p1=Point(50, 60), line_p2=Point(150, 260))
+    cal_pos_utils.save_as_test_case(mm, region, verify)
+    if not get_debug_artifact_sink().flush(10):
+        log.error('保存样例超时')
+        return False
+
+    saved = [i for i in load_fail_samples(base_dir)
+             if os.path.join(base_dir, i.prl_id, i.case_id) not in existed]
+    for sample in saved:
+        shutil.rmtree(os.path.join(base_dir, sample.prl_id, sample.case_id), ignore_errors=True)
+
+    if len(saved) != 1:
+        log.error('保存后读取到的样例数量 %d', len(saved))
+        return False
+    sample = saved[0]
+    def _same_point(p1: Optional[Point], p2: Optional[Point]) -> bool:
+        return p1 is not None and p2 is not None and p1.x == p2.x and p1.y == p2.y
+
+    return (sample.prl_id == region.prl_id
+            and np.array_equal(sample.mm, mm)
+            and _same_point(sample.verify.last_pos, verify.last_pos)
+            and sample.verify.max_distance == verify.max_distance
+            and _same_point(sample.verify.line_p1, verify.line_p1)
+            and _same_point(sample.verify.line_p2, verify.line_p2))
+
+
+def _read_mm(case_dir: str) -> Optional[MatLike]:
+    """
+    读取样例的小地图 保存格式可能是 png 或 webp
+    """
+    mm_path = find_artifact_image(os.path.join(case_dir, 'mm'))
+    return None if mm_path is None else cv2_utils.read_image(mm_path)
+
+
+def _list_case_dir(base_dir: str):
+    if not os.path.exists(base_dir):
+        return
+    for prl_id in sorted(os.listdir(base_dir)):
+        prl_dir = os.path.join(base_dir, prl_id)
+        if not os.path.isdir(prl_dir):
+            continue
+        for case_id in sorted(os.listdir(prl_dir)):
+            case_dir = os.path.join(prl_dir, case_id)
+            if os.path.isdir(case_dir):
+                yield prl_id, case_id, case_dir
+
+
+class StrategyStat:
+
+    def __init__(self):
+        """
+        一个区域下一个策略的统计
+        """
+        self.total: int = 0
+        self.hit: int = 0  # 有返回结果的次数
+        self.correct: int = 0  # 结果正确的次数 有真实坐标时比较距离 否则用校验信息判断
+        self.cost_list: List[float] = []
+
+    def to_dict(self) -> dict:
+        cost = np.array(self.cost_list) * 1000 if len(self.cost_list) > 0 else np.zeros(1)
+        return {
+            'total': self.total,
+            'hit_rate': round(self.hit / self.total, 4) if self.total > 0 else 0,
+            'accuracy': round(self.correct / self.total, 4) if self.total > 0 else 0,
+            'p50_ms': round(float(np.percentile(cost, 50)), 2),
+            'p95_ms': round(float(np.percentile(cost, 95)), 2),
+        }
+
+
+def run_benchmark(ctx: SrContext, sample_list: List[PosSample],
+                  sim_uni: bool = False,
+                  strategy_list: Optional[List[str]] = None,
+                  move_distance: float = 20,
+                  tolerance: float = 5) -> dict:
+    """
+    对样例逐个运行定位策略 按区域和策略统计准确率、命中率和耗时
+    :param ctx: 上下文
+    :param sample_list: 样例
+    :param sim_uni: 是否使用模拟宇宙的定位方法
+    :param strategy_list: 需要运行的策略 不传入时运行全部
+    :param move_distance: 有真实坐标时 模拟移动距离来圈定大地图范围
+    :param tolerance: 与真实坐标的中心点距离在这个范围内算正确
+    :return: {prl_id: {strategy: stat}}
+    """
+    strategy_map = SIM_UNI_STRATEGY if sim_uni else WORLD_PATROL_STRATEGY
+    if strategy_list is not None:
+        strategy_map = {k: v for k, v in strategy_map.items() if k in strategy_list}
+
+    region_map: dict[str, Region] = {i.prl_id: i for i in ctx.map_data.region_list}
+    stat_map: dict[str, dict[str, StrategyStat]] = {}
+
+    for sample in sample_list:
+        region = region_map.get(sample.prl_id)
+        if region is None:
+            log.info('找不到区域 跳过样例 %s %s', sample.prl_id, sample.case_id)
+            continue
+        lm_info = ctx.map_data.get_large_map_info(region)
+
+        if sample.truth is not None:
+            center = sample.truth.center
+            possible_pos = (center.x, center.y, move_distance)
+        else:
+            possible_pos = (sample.verify.last_pos.x, sample.verify.last_pos.y, sample.verify.max_distance)
+        lm_rect = large_map_utils.get_large_map_rect_by_pos(lm_info.gray.shape, sample.mm.shape[:2], possible_pos)
+
+        region_stat = stat_map.setdefault(sample.prl_id, {})
+        for strategy_name, strategy in strategy_map.items():
+            mm_info = mini_map_utils.analyse_mini_map(sample.mm)  # 每个策略重新分析 避免复用上一个策略的中间结果
+            start = time.perf_counter()
+            try:
+                result = strategy(ctx, lm_info, mm_info, lm_rect)
+            except Exception:
+                log.error('定位出错 %s %s %s', sample.prl_id, sample.case_id, strategy_name, exc_info=True)
+                result = None
+            cost = time.perf_counter() - start
+
+            stat = region_stat.setdefault(strategy_name, StrategyStat())
+            stat.total += 1
+            stat.cost_list.append(cost)
+            if result is None:
+                continue
+            stat.hit += 1
+            if sample.truth is not None:
+                correct = cal_utils.distance_between(result.center, sample.truth.center) <= tolerance
+            else:
+                correct = cal_pos_utils.is_valid_result(result, sample.verify)
+            if correct:
+                stat.correct += 1
+
+    return {
+        prl_id: {strategy_name: stat.to_dict() for strategy_name, stat in region_stat.items()}
+        for prl_id, region_stat in stat_map.items()
+    }
+
+
+def get_baseline_path(sim_uni: bool = False) -> str:
+    return os.path.join(os_utils.get_path_under_work_dir('.debug', 'cal_pos_benchmark'),
+                        'baseline_sim_uni.json' if sim_uni else 'baseline.json')
+
+
+def save_baseline(report: dict, sim_uni: bool = False) -> None:
+    with open(get_baseline_path(sim_uni), 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def load_baseline(sim_uni: bool = False) -> Optional[dict]:
+    path = get_baseline_path(sim_uni)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def diff_with_baseline(report: dict, baseline: dict) -> List[str]:
+    """
+    与基准对比 列出准确率和耗时的变化
+    :param report: 本次结果
+    :param baseline: 基准结果
+    :return: 每行一个区域和策略的对比
+    """
+    lines: List[str] = []
+    for prl_id, region_stat in report.items():
+        for strategy_name, stat in region_stat.items():
+            base = baseline.get(prl_id, {}).get(strategy_name)
+            if base is None:
+                lines.append(f'{prl_id} {strategy_name} 新增 准确率 {stat["accuracy"]:.2%} p50 {stat["p50_ms"]}ms')
+                continue
+            accuracy_delta = stat['accuracy'] - base['accuracy']
+            lines.append(
+                f'{prl_id} {strategy_name}'
+                f' 准确率 {base["accuracy"]:.2%} -> {stat["accuracy"]:.2%} ({accuracy_delta:+.2%})'
+                f' 命中率 {base["hit_rate"]:.2%} -> {stat["hit_rate"]:.2%}'
+                f' p50 {base["p50_ms"]}ms -> {stat["p50_ms"]}ms'
+                f' p95 {base["p95_ms"]}ms -> {stat["p95_ms"]}ms'
+                + (' 准确率下降' if accuracy_delta < 0 else '')
+            )
+    return lines
+
+
+def __debug(sim_uni: bool = False, update_baseline: bool = False):
+    ctx = SrContext()
+    ctx.init_by_config()
+
+    log.info('失败样例保存和读取一致 %s', check_fail_sample_saving(ctx.map_data.region_list[0]))
+
+    sample_list = load_gps_samples() + load_fail_samples()
+    log.info('共加载样例 %d 个', len(sample_list))
+    report = run_benchmark(ctx, sample_list, sim_uni=sim_uni)
+
+    baseline = load_baseline(sim_uni)
+    if baseline is None or update_baseline:
+        save_baseline(report, sim_uni)
+        log.info('已保存基准 %s', get_baseline_path(sim_uni))
+    else:
+        for line in diff_with_baseline(report, baseline):
+            log.info(line)
+
+
+if __name__ == '__main__':
+    __debug()
@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+import cv2
+from cv2.typing import MatLike
+
+from one_dragon.utils import cv2_utils, debug_utils
+from one_dragon.yolo import onnx_utils
+from sr_od.config.game_config import MiniMapPos
+from sr_od.sr_map import mini_map_utils
+from sr_od.sr_map.mini_map_threat_tracker import MiniMapThreatTracker
+from sr_od.sr_map.sr_frame_context import SrFrameContext
+
+_MINI_MAP_POS: MiniMapPos = MiniMapPos(139, 149, 93)
+"""默认的小地图位置 与游戏配置一致"""
+
+_YOLO_INPUT_SIZE: int = 640
+"""模拟的模型输入尺寸"""
+
+_COUNT_FUNC_LIST: List[str] = ['cvtColor', 'inRange', 'resize', 'bitwise_and', 'HoughCircles',
+                               'connectedComponentsWithStats']
+"""统计调用次数的 cv2 方法"""
+
+
+class _Cv2CallCounter:
+
+    def __init__(self):
+        """
+        临时替换 cv2 的方法 统计每帧的转换次数
+        """
+        self.cnt: dict[str, int] = {}
+        self._origin: dict[str, Callable] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        for name in _COUNT_FUNC_LIST:
+            origin = getattr(cv2, name)
+            self._origin[name] = origin
+            setattr(cv2, name, self._wrap(name, origin))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for name, origin in self._origin.items():
+            setattr(cv2, name, origin)
+
+    def _wrap(self, name: str, origin: Callable) -> Callable:
+        def _counted(*args, **kwargs):
+            with self._lock:
+                self.cnt[name] = self.cnt.get(name, 0) + 1
+            return origin(*args, **kwargs)
+        return _counted
+
+
+def _legacy_round(screen: MatLike) -> None:
+    """
+    各个识别各自处理截图的方式 用于对照
+    与移动中的一轮一致 威胁判断、画面识别、附近敌人判断、两张大地图的灰度图匹配
+    """
+    mm = mini_map_utils.cut_mini_map(screen, _MINI_MAP_POS)
+    mm_info = mini_map_utils.analyse_mini_map(mm)
+    mini_map_utils.is_under_attack(mm_info.raw)
+    mini_map_utils.get_enemy_pos(mm_info)
+    onnx_utils.scale_input_image_u(screen, _YOLO_INPUT_SIZE, _YOLO_INPUT_SIZE)
+    mini_map_utils.with_enemy_nearby_new(mm_info)
+    mini_map_utils.init_road_mask_for_world_patrol(mm_info)
+    for _ in range(2):
+        cv2.cvtColor(mm_info.raw_del_radio, cv2.COLOR_BGR2GRAY)
+
+
+def _frame_round(screen: MatLike, tracker: MiniMapThreatTracker) -> SrFrameContext:
+    """
+    使用 SrFrameContext 的一轮 识别内容与 _legacy_round 一致
+    画面识别放在另一个线程 与移动中的异步识别一致
+    """
+    frame = SrFrameContext(screen, _MINI_MAP_POS)
+    tracker.update(frame)
+    t = threading.Thread(target=frame.yolo_input, args=(_YOLO_INPUT_SIZE, _YOLO_INPUT_SIZE))
+    t.start()
+    frame.with_enemy_nearby
+    frame.road_mask()
+    for _ in range(2):
+        frame.mm_gray
+    t.join()
+    return frame
+
+
+def _use_all(frame: SrFrameContext, repeat: int) -> None:
+    """
+    在多个线程中 重复使用同一帧的所有中间结果
+    """
+    t_list = []
+    for _ in range(repeat):
+        for func in [lambda: frame.yolo_input(_YOLO_INPUT_SIZE, _YOLO_INPUT_SIZE),
+                     lambda: frame.mm_gray, lambda: frame.mm_circle, lambda: frame.is_under_attack(),
+                     lambda: frame.with_enemy_nearby, lambda: frame.road_mask(),
+                     lambda: frame.gray, lambda: frame.hsv]:
+            t = threading.Thread(target=func)
+            t.start()
+            t_list.append(t)
+    for t in t_list:
+        t.join()
+
+
+def check_convert_cnt(screen: MatLike) -> bool:
+    """
+    同一帧的中间结果被多个识别、多个线程使用时 只计算一次
+    cv2 的调用次数应与每个结果只用一次时相同
+    :param screen: 游戏画面
+    :return: 是否符合预期
+    """
+    mini_map_utils.preheat()
+    with _Cv2CallCounter() as once_counter:
+        _use_all(SrFrameContext(screen, _MINI_MAP_POS), 1)
+
+    frame = SrFrameContext(screen, _MINI_MAP_POS)
+    with _Cv2CallCounter() as repeat_counter:
+        _use_all(frame, 4)
+
+    repeated = {k: v for k, v in frame.convert_cnt.items() if v != 1}
+    print('中间结果计算次数', frame.convert_cnt)
+    print('cv2 调用次数 使用1次 %s 使用4次 %s' % (once_counter.cnt, repeat_counter.cnt))
+    return len(repeated) == 0 and once_counter.cnt == repeat_counter.cnt
+
+
+def load_recorded_frames(dir_path: Optional[str] = None, max_cnt: int = 100) -> List[MatLike]:
+    """
+    读取保存下来的游戏截图 只使用标准分辨率的
+    :param dir_path: 截图所在文件夹 默认为调试图片的文件夹
+    :param max_cnt: 最多读取的数量
+    :return:
+    """
+    if dir_path is None:
+        dir_path = debug_utils.get_debug_image_dir_path()
+    frame_list: List[MatLike] = []
+    for file_name in sorted(os.listdir(dir_path)):
+        if len(frame_list) >= max_cnt:
+            break
+        if not file_name.endswith('.png') and not file_name.endswith('.webp'):
+            continue
+        image = cv2_utils.read_image(os.path.join(dir_path, file_name))
+        if image is not None and image.shape[:2] == (1080, 1920):
+            frame_list.append(image)
+    return frame_list
+
+
+def replay(frame_list: List[MatLike]) -> None:
+    """
+    把截图逐帧按移动中的一轮识别处理 比较耗时和 cv2 调用次数
+    :param frame_list: 截图
+    :return:
+    """
+    mini_map_utils.preheat()
+
+    with _Cv2CallCounter() as legacy_counter:
+        start = time.perf_counter()
+        for screen in frame_list:
+            _legacy_round(screen)
+        legacy_ms = (time.perf_counter() - start) * 1000 / len(frame_list)
+
+    tracker = MiniMapThreatTracker()
+    with _Cv2CallCounter() as frame_counter:
+        start = time.perf_counter()
+        for screen in frame_list:
+            _frame_round(screen, tracker)
+        frame_ms = (time.perf_counter() - start) * 1000 / len(frame_list)
+
+    print('回放 %d 帧' % len(frame_list))
+    print('各自处理 %.2fms/帧 cv2 调用 %s' % (legacy_ms, {k: v / len(frame_list) for k, v in legacy_counter.cnt.items()}))
+    print('共用上下文 %.2fms/帧 cv2 调用 %s' % (frame_ms, {k: v / len(frame_list) for k, v in frame_counter.cnt.items()}))
+
+
+def __debug():
+    frame_list = load_recorded_frames()
+    if len(frame_list) == 0:
+        print('没有可回放的截图 请先在调试模式下保存截图')
+        return
+    print('转换次数符合预期 %s' % check_convert_cnt(frame_list[0]))
+    replay(frame_list)
+
+
+if __name__ == '__main__':
+    __debug()
@@ -0,0 +1,217 @@
+import time
+from typing import Callable, List
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.utils import cv2_utils
+from one_dragon.utils.log_utils import log
+from sr_od.devtools import cal_pos_benchmark
+from sr_od.sr_map import mini_map_angle_alas, mini_map_utils
+from sr_od.sr_map.mini_map_info import MiniMapInfo
+
+
+def _legacy_remove_radio(mm: MatLike, radio_to_del: MatLike) -> MatLike:
+    """
+    旧的去除雷达 用于对照
+    """
+    raw = mm.copy()
+    if radio_to_del is not None:
+        radius = radio_to_del.shape[0] // 2
+        d = radio_to_del.shape[0]
+
+        x1 = raw.shape[1] // 2 - radius
+        x2 = x1 + d
+        y1 = raw.shape[1] // 2 - radius
+        y2 = y1 + d
+
+        overlap = np.zeros_like(radio_to_del, dtype=np.uint16)
+        overlap[:, :] = raw[y1:y2, x1:x2]
+        overlap[:, :] -= radio_to_del
+        overlap[np.where(raw[y1:y2, x1:x2] < radio_to_del)] = 0
+        raw[y1:y2, x1:x2] = overlap.astype(dtype=np.uint8)
+    return raw
+
+
+def _legacy_road_mask(mm_info: MiniMapInfo, another_floor: bool) -> None:
+    """
+    旧的道路掩码计算 用于对照
+    """
+    mm_del_radio = mm_info.raw_del_radio
+    r, g, b = cv2.split(mm_del_radio)
+
+    lower_color = np.array([45, 45, 45], dtype=np.uint8)
+    upper_color = np.array([70, 70, 70], dtype=np.uint8)
+    road_mask_1 = cv2.inRange(mm_del_radio, lower_color, upper_color)
+
+    max_rgb = np.max(mm_del_radio, axis=2)
+    min_rgb = np.min(mm_del_radio, axis=2)
+    road_mask_cf = np.zeros(road_mask_1.shape, dtype=np.uint8)
+    road_mask_cf[(max_rgb - min_rgb) <= 1] = 255
+    b_g = None
+    if another_floor:
+        b_g = b - g
+        g_r = g - r
+        road_mask_af = np.zeros(road_mask_1.shape, dtype=np.uint8)
+        road_mask_af[(b_g >= 0) & (b_g <= 2) & (g_r >= 0) & (g_r <= 2)] = 255
+        road_mask_floor = cv2.bitwise_or(road_mask_cf, road_mask_af)
+    else:
+        road_mask_floor = road_mask_cf
+
+    road_mask_2 = cv2.bitwise_and(road_mask_1, road_mask_floor)
+
+    if b_g is None:
+        b_g = b - g
+    lower_color = np.array([80, 45, 45], dtype=np.uint8)
+    upper_color = np.array([255, 70, 70], dtype=np.uint8)
+    enemy_mask_1 = cv2.inRange(mm_del_radio, lower_color, upper_color)
+    enemy_mask_2 = np.zeros(road_mask_1.shape, dtype=np.uint8)
+    enemy_mask_2[(b_g <= 2) | (b_g >= -2)] = 255
+    enemy_mask = cv2.bitwise_and(enemy_mask_1, enemy_mask_2)
+
+    mm_info.road_mask = cv2.bitwise_or(road_mask_2, enemy_mask)
+    mm_info.road_mask = cv2.bitwise_and(mm_info.road_mask, mm_info.circle_mask)
+
+    lower_color = np.array([160, 160, 160], dtype=np.uint8)
+    upper_color = np.array([210, 210, 210], dtype=np.uint8)
+    edge_mask_rough = cv2.inRange(mm_del_radio, lower_color, upper_color)
+    edge_mask = cv2.bitwise_and(edge_mask_rough, road_mask_cf)
+    mm_info.road_mask_with_edge = cv2.bitwise_or(mm_info.road_mask, edge_mask)
+
+
+def legacy_angle(minimap: MatLike, scale: int = 1) -> float:
+    """
+    旧的使用 scipy 找峰的朝向计算 用于对照
+    """
+    from scipy import signal
+
+    d = minimap.shape[0]
+    _, _, v = cv2.split(cv2.cvtColor(minimap, cv2.COLOR_RGB2YUV))
+    image = cv2.subtract(128, v)
+    image = cv2.GaussianBlur(image, (3, 3), 0)
+    m1, m2 = mini_map_angle_alas.RotationRemapData(d)
+    remap = cv2.remap(image, m1, m2, cv2.INTER_LINEAR)[d * 1 // 10:d * 6 // 10].astype(np.float32)
+    remap = cv2.resize(remap, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    gradx = cv2.Scharr(remap, cv2.CV_32F, 1, 0)
+
+    para = {
+        'height': 35,
+        'wlen': d * scale,
+    }
+    l = np.bincount(signal.find_peaks(gradx.ravel(), **para)[0] % (d * scale), minlength=d * scale)
+    r = np.bincount(signal.find_peaks(-gradx.ravel(), **para)[0] % (d * scale), minlength=d * scale)
+    l, r = np.maximum(l - r, 0), np.maximum(r - l, 0)
+
+    def peak_confidence(arr):
+        length = len(arr)
+        peaks, properties = signal.find_peaks(np.concatenate((arr, arr, arr)), height=0, prominence=10)
+        peaks = [h for p, h in zip(peaks, properties['peak_heights']) if length <= p < length * 2]
+        peaks = sorted(peaks, reverse=True)
+        if len(peaks) > 1:
+            highest, second = peaks[0], peaks[1]
+        else:
+            highest, second = 1, 0
+        return (highest - second) / highest
+
+    def convolve(arr, ker):
+        return sum(np.roll(arr, i) * (ker - abs(i)) // ker for i in range(-ker + 1, ker))
+
+    conv0 = []
+    kernel = 2 * scale
+    for offset in range(-kernel + 1, kernel):
+        conv0 += [l * np.roll(convolve(r, 3 * kernel), -d * scale // 4 + offset)]
+
+    conv0 = np.maximum(conv0, 1)
+    maximum = np.max(conv0, axis=0)
+    if round(peak_confidence(maximum), 3) > 0.3:
+        result = maximum
+    else:
+        average = np.mean(conv0, axis=0)
+        minimum = np.min(conv0, axis=0)
+        result = convolve(maximum * average * minimum, 2 * scale)
+
+    degree = np.argmax(result) / (d * scale) * 360 + 135
+    degree = degree - 1.875
+    while degree > 360:
+        degree -= 360
+    degree -= 90
+    if degree < 0:
+        degree += 360
+    return degree
+
+
+def legacy_analyse(mm: MatLike, another_floor: bool) -> MiniMapInfo:
+    """
+    旧的小地图预处理流程 用于对照
+    """
+    info = MiniMapInfo()
+    info.raw = mm
+    info.center_arrow_mask, info.arrow_mask = mini_map_utils.get_arrow_mask(mm)
+    info.angle = legacy_angle(mm)
+    radio = mini_map_utils.get_radio_to_del()
+    radio_to_del = cv2_utils.image_rotate(radio, 360 - info.angle)
+    info.raw_del_radio = _legacy_remove_radio(mm, radio_to_del)
+    h, w = info.arrow_mask.shape[:2]
+    info.circle_mask = np.zeros_like(info.arrow_mask)
+    cv2.circle(info.circle_mask, (w // 2, h // 2), h // 2 - 5, 255, -1)
+    _legacy_road_mask(info, another_floor)
+    return info
+
+
+def current_analyse(mm: MatLike, another_floor: bool) -> MiniMapInfo:
+    """
+    当前的小地图预处理流程
+    """
+    info = mini_map_utils.analyse_mini_map(mm)
+    mini_map_utils.init_road_mask_for_world_patrol(info, another_floor=another_floor)
+    return info
+
+
+def _cost_ms(func: Callable[[MatLike, bool], MiniMapInfo], mm_list: List[MatLike],
+             another_floor: bool, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for mm in mm_list:
+            func(mm, another_floor)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(mm_list))
+
+
+def check_same(mm_list: List[MatLike], another_floor: bool) -> int:
+    """
+    检查新旧流程的结果是否一致
+    :return: 不一致的样例数量
+    """
+    diff_cnt = 0
+    for mm in mm_list:
+        old = legacy_analyse(mm, another_floor)
+        new = current_analyse(mm, another_floor)
+        if old.angle != new.angle:
+            log.info('朝向不一致 %.3f %.3f', old.angle, new.angle)
+            diff_cnt += 1
+            continue
+        for field in ['raw_del_radio', 'circle_mask', 'arrow_mask', 'road_mask', 'road_mask_with_edge']:
+            if not np.array_equal(getattr(old, field), getattr(new, field)):
+                log.info('结果不一致 %s', field)
+                diff_cnt += 1
+                break
+    return diff_cnt
+
+
+def __debug(repeat: int = 20):
+    mm_list = [i.mm for i in cal_pos_benchmark.load_gps_samples() + cal_pos_benchmark.load_fail_samples()]
+    if len(mm_list) == 0:
+        log.info('没有小地图样例')
+        return
+    mini_map_utils.preheat()
+
+    for another_floor in [False, True]:
+        diff_cnt = check_same(mm_list, another_floor)
+        old_ms = _cost_ms(legacy_analyse, mm_list, another_floor, repeat)
+        new_ms = _cost_ms(current_analyse, mm_list, another_floor, repeat)
+        log.info('多层 %s 样例 %d 不一致 %d 旧流程 %.3fms/帧 新流程 %.3fms/帧',
+                 another_floor, len(mm_list), diff_cnt, old_ms, new_ms)
+
+
+if __name__ == '__main__':
+    __debug()
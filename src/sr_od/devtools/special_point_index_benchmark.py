@@ -0,0 +1,129 @@
+import math
+import random
+import time
+from typing import List, Optional
+
+from one_dragon.base.geometry.point import Point
+from one_dragon.base.geometry.rectangle import Rect
+from sr_od.sr_map.special_point_index import SpecialPointIndex
+from sr_od.sr_map.sr_map_def import Planet, Region, SpecialPoint
+
+
+def _linear_rect(sp_list: List[SpecialPoint], rect: Rect) -> List[SpecialPoint]:
+    return [sp for sp in sp_list if rect.x1 <= sp.lm_pos.x <= rect.x2 and rect.y1 <= sp.lm_pos.y <= rect.y2]
+
+
+def _linear_radius(sp_list: List[SpecialPoint], center: Point, radius: float) -> List[SpecialPoint]:
+    return [sp for sp in sp_list if math.hypot(sp.lm_pos.x - center.x, sp.lm_pos.y - center.y) <= radius]
+
+
+def _linear_nearest(sp_list: List[SpecialPoint], pos: Point, prefix: Optional[str] = None) -> Optional[SpecialPoint]:
+    best = None
+    best_dis = 0
+    for sp in sp_list:
+        if prefix is not None and not sp.template_id.startswith(prefix):
+            continue
+        dis = math.hypot(sp.lm_pos.x - pos.x, sp.lm_pos.y - pos.y)
+        if best is None or dis < best_dis:
+            best = sp
+            best_dis = dis
+    return best
+
+
+def _random_rect(rng: random.Random, size: int) -> Rect:
+    x1, x2 = sorted([rng.randint(-100, size + 100), rng.randint(-100, size + 100)])
+    y1, y2 = sorted([rng.randint(-100, size + 100), rng.randint(-100, size + 100)])
+    return Rect(x1, y1, x2, y2)
+
+
+def check_against_linear(case_cnt: int = 300, seed: int = 0) -> int:
+    """
+    随机生成特殊点和查询范围 与逐个遍历的结果比较
+    :param case_cnt: 随机的点集数量
+    :param seed: 随机种子
+    :return: 不一致的数量
+    """
+    rng = random.Random(seed)
+    region = Region(0, 'test', 'test', Planet(0, 'test', 'test'))
+    template_id_list = ['mm_tp_03', 'mm_tp_09', 'mm_sp_01', 'mm_boss_01']
+    fail_cnt = 0
+    for _ in range(case_cnt):
+        size = rng.choice([200, 1000, 3000])
+        sp_cnt = rng.randint(0, 120)
+        sp_list = []
+        for i in range(sp_cnt):
+            if i > 0 and rng.random() < 0.1:  # 重复的坐标 检查距离相同时的顺序
+                pos = sp_list[rng.randrange(len(sp_list))].lm_pos
+                pos = (pos.x, pos.y)
+            else:
+                pos = (rng.randint(0, size), rng.randint(0, size))
+            sp_list.append(SpecialPoint(str(i), str(i), region, rng.choice(template_id_list), pos))
+        sp_index = SpecialPointIndex(sp_list, cell_size=rng.choice([32, 100, 256]),
+                                     linear_threshold=rng.choice([0, 64]))
+
+        for _ in range(20):
+            rect = _random_rect(rng, size)
+            if sp_index.query_rect(rect) != _linear_rect(sp_list, rect):
+                fail_cnt += 1
+                print('矩形查询不一致', rect)
+
+            center = Point(rng.randint(-200, size + 200), rng.randint(-200, size + 200))
+            radius = rng.choice([0, 10, 100, 500, 5000])
+            if sp_index.query_radius(center, radius) != _linear_radius(sp_list, center, radius):
+                fail_cnt += 1
+                print('半径查询不一致', center, radius)
+
+            prefix = rng.choice([None, 'mm_tp', 'mm_boss', 'none'])
+            sp_filter = None if prefix is None else (lambda sp, p=prefix: sp.template_id.startswith(p))
+            if sp_index.nearest(center, sp_filter) is not _linear_nearest(sp_list, center, prefix):
+                fail_cnt += 1
+                print('最近查询不一致', center, prefix)
+    return fail_cnt
+
+
+def benchmark_all_regions(query_cnt: int = 2000) -> None:
+    """
+    加载所有区域的特殊点 比较矩形查询的耗时 网格一列是强制建网格时的耗时
+    """
+    from sr_od.sr_map.sr_map_data import SrMapData
+    map_data = SrMapData()
+    rng = random.Random(0)
+
+    query_list = []
+    for _ in range(query_cnt):
+        pr_id = rng.choice(list(map_data.region_2_sp.keys()))
+        sp_list = map_data.region_2_sp[pr_id]
+        sp = rng.choice(sp_list)
+        # 与定位时一样 以一个坐标为中心 圈定附近的范围
+        rect = Rect(sp.lm_pos.x - 150, sp.lm_pos.y - 150, sp.lm_pos.x + 150, sp.lm_pos.y + 150)
+        query_list.append((pr_id, rect))
+
+    start = time.perf_counter()
+    for pr_id, rect in query_list:
+        _linear_rect(map_data.region_2_sp[pr_id], rect)
+    linear_us = (time.perf_counter() - start) * 1e6 / query_cnt
+
+    start = time.perf_counter()
+    for pr_id, rect in query_list:
+        map_data.region_2_sp_index[pr_id].query_rect(rect)
+    index_us = (time.perf_counter() - start) * 1e6 / query_cnt
+
+    grid_index = {pr_id: SpecialPointIndex(sp_list, linear_threshold=0)
+                  for pr_id, sp_list in map_data.region_2_sp.items()}
+    start = time.perf_counter()
+    for pr_id, rect in query_list:
+        grid_index[pr_id].query_rect(rect)
+    grid_us = (time.perf_counter() - start) * 1e6 / query_cnt
+
+    max_cnt = max(len(i) for i in map_data.region_2_sp.values())
+    print('区域 %d 个 特殊点 %d 个 单个区域最多 %d 个' % (len(map_data.region_2_sp), len(map_data.sp_list), max_cnt))
+    print('矩形查询 遍历 %.2fus/次 索引 %.2fus/次 网格 %.2fus/次' % (linear_us, index_us, grid_us))
+
+
+def __debug():
+    print('与遍历结果不一致 %d 次' % check_against_linear())
+    benchmark_all_regions()
+
+
+if __name__ == '__main__':
+    __debug()
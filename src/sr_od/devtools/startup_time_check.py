@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from one_dragon.utils.startup_profiler import startup_profiler
+
+IMPORT_SECONDS_LIMIT: float = 4.0
+"""导入 SrContext 的耗时上限"""
+
+CONSTRUCT_SECONDS_LIMIT: float = 1.5
+"""构造 SrContext 的耗时上限 不包含 init_by_config"""
+
+LAZY_ATTR_LIST: List[str] = [
+    'ocr', 'yolo_detector', 'map_data', 'world_patrol_route_data', 'sim_uni_route_data', 'guide_data',
+    'power_config', 'power_record', 'world_patrol_record', 'sim_uni_record', 'echo_of_war_run_record',
+    'assignments_run_record', 'daily_training_run_record', 'trick_snack_run_record',
+]
+"""构造后不应该已经创建的属性"""
+
+_RESULT_PREFIX: str = 'startup_time_check_result='
+"""子进程输出结果的前缀 与日志区分"""
+
+
+def measure_in_current_process() -> dict:
+    """
+    在当前进程中导入并构造 SrContext 不初始化控制器 不加载模型
+    需要在没有导入过 sr_od 的进程中调用 否则导入耗时不准确
+    :return: 耗时和构造后已经创建的懒加载属性
+    """
+    from one_dragon.base.operation.context_lazy_attr import is_lazy_attr_created
+
+    startup_profiler.clear()
+    startup_profiler.install_import_hook()
+    start = time.perf_counter()
+    from sr_od.context.sr_context import SrContext
+    import_seconds = time.perf_counter() - start
+    startup_profiler.uninstall_import_hook()
+
+    start = time.perf_counter()
+    with startup_profiler.measure('SrContext'):
+        ctx = SrContext()
+    construct_seconds = time.perf_counter() - start
+
+    created = [i for i in LAZY_ATTR_LIST if is_lazy_attr_created(ctx, i)]
+    ctx.after_app_shutdown()
+    return {
+        'import_seconds': import_seconds,
+        'construct_seconds': construct_seconds,
+        'created': created,
+        'report': startup_profiler.build_report(),
+    }
+
+
+def measure_in_new_process() -> Optional[dict]:
+    """
+    在新的进程中测量 每次都是冷启动的导入
+    :return: 测量结果 子进程失败时返回None
+    """
+    src_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    process = subprocess.run([sys.executable, '-m', 'sr_od.devtools.startup_time_check', '--child'],
+                             cwd=src_dir, capture_output=True, text=True, encoding='utf-8')
+    for line in process.stdout.splitlines():
+        if line.startswith(_RESULT_PREFIX):
+            return json.loads(line[len(_RESULT_PREFIX):])
+    print(process.stderr)
+    return None
+
+
+def check(repeat: int = 3) -> bool:
+    """
+    无界面构造 SrContext 的耗时不超过上限 并且较重的子系统都没有提前创建
+    重复多次取最快的一次 减少磁盘缓存等的影响
+    :param repeat: 重复次数
+    :return: 是否符合预期
+    """
+    result_list = [measure_in_new_process() for _ in range(repeat)]
+    result_list = [i for i in result_list if i is not None]
+    if len(result_list) == 0:
+        print('子进程运行失败')
+        return False
+
+    best = min(result_list, key=lambda i: i['import_seconds'] + i['construct_seconds'])
+    print(best['report'])
+    print('导入 %.2fs 上限 %.2fs 构造 %.2fs 上限 %.2fs 提前创建的属性 %s' % (
+        best['import_seconds'], IMPORT_SECONDS_LIMIT,
+        best['construct_seconds'], CONSTRUCT_SECONDS_LIMIT,
+        best['created']))
+    return (best['import_seconds'] <= IMPORT_SECONDS_LIMIT
+            and best['construct_seconds'] <= CONSTRUCT_SECONDS_LIMIT
+            and len(best['created']) == 0)
+
+
+def _child() -> None:
+    result = measure_in_current_process()
+    print(_RESULT_PREFIX + json.dumps(result, ensure_ascii=False))
+
+
+def __debug():
+    print('启动耗时符合预期 %s' % check())
+
+
+if __name__ == '__main__':
+    if '--child' in sys.argv:
+        _child()
+    else:
+        __debug()
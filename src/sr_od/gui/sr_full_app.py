@@ -1,4 +1,7 @@
 try:
+    from one_dragon.utils.startup_profiler import startup_profiler
+    startup_profiler.install_import_hook()  # 在其它导入之前 记录各个包的导入耗时
+
     import sys
     from typing import Tuple
     from PySide6.QtCore import QThread, Signal
@@ -185,5 +188,9 @@ if __name__ == '__main__':
     w.show()
     w.activateWindow()
 
+    # 主窗口出现后 输出启动耗时
+    startup_profiler.uninstall_import_hook()
+    startup_profiler.log_report()
+
     # 启动应用程序事件循环
     app.exec()
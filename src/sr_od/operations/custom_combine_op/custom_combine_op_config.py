@@ -1,7 +1,7 @@
 import os
-import yaml
 from typing import List
 
+from one_dragon.base.config.yaml_bundle import load_yaml_file
 from one_dragon.utils import os_utils
 
 
@@ -37,9 +37,8 @@ class CustomCombineOpConfig:
         file_path = self.yml_file_path
         self.existed = os.path.exists(file_path)
         if self.existed:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                yaml_data = yaml.safe_load(file)
-                self.init_from_yaml_data(yaml_data)
+            yaml_data = load_yaml_file(file_path)
+            self.init_from_yaml_data(yaml_data)
 
     def init_from_yaml_data(self, yaml_data: dict):
         self.config_name = yaml_data.get('name', '')
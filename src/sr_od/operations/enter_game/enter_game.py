@@ -1,4 +1,3 @@
-import time
 from typing import Optional
 
 from cv2.typing import MatLike
@@ -118,20 +117,20 @@ class EnterGame(SrOperation):
 
         screen = self.screenshot()
         self.round_by_click_area('进入游戏', '国服-账号输入区域')
-        time.sleep(0.5)
+        self.sleep(0.5)
         if self.use_clipboard:
             PcClipboard.copy_and_paste(self.ctx.game_account_config.account)
         else:
             self.ctx.controller.keyboard_controller.keyboard.type(self.ctx.game_account_config.account)
-        time.sleep(1.5)
+        self.sleep(1.5)
 
         self.round_by_click_area('进入游戏', '国服-密码输入区域')
-        time.sleep(0.5)
+        self.sleep(0.5)
         if self.use_clipboard:
             PcClipboard.copy_and_paste(self.ctx.game_account_config.password)
         else:
             self.ctx.controller.keyboard_controller.keyboard.type(self.ctx.game_account_config.password)
-        time.sleep(1.5)
+        self.sleep(1.5)
 
         result = self.round_by_find_area(screen, '进入游戏', '文本-同意-旧')
         if result.is_success:
@@ -140,7 +139,7 @@ class EnterGame(SrOperation):
         result = self.round_by_find_area(screen, '进入游戏', '文本-同意-新')
         if result.is_success:
             self.round_by_click_area('进入游戏', '国服-同意按钮')
-        time.sleep(0.5)
+        self.sleep(0.5)
 
         screen = self.screenshot()
         self.already_login = True
@@ -194,7 +193,7 @@ class EnterGame(SrOperation):
         if match_word is not None and match_word_mrl is not None and match_word_mrl.max is not None:
             for mr in match_word_mrl:
                 self.ctx.controller.click(mr.center)
-                time.sleep(1)
+                self.sleep(1)
             return self.round_wait(status=match_word)
 
         return None
@@ -1,5 +1,3 @@
-import time
-
 from one_dragon.base.operation.operation_edge import node_from
 from one_dragon.base.operation.operation_node import operation_node
 from one_dragon.base.operation.operation_round_result import OperationRoundResult
@@ -36,7 +34,7 @@ class SwitchAccount(SrOperation):
         if not click.is_success:
             return self.round_retry('点击返回登陆按钮失败', wait=1)
 
-        time.sleep(2)
+        self.sleep(2)
 
         screen = self.screenshot()
         return self.round_by_find_and_click_area(screen, '菜单', '按键-返回登录确认',
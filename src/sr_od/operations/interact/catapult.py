@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from typing import List
 
@@ -60,7 +58,7 @@ class Catapult(SrOperation):
         在屏幕上找到交互内容进行交互
         :return: 操作结果
         """
-        time.sleep(3)  # 稍微等待一下 可能路径连线还没完成
+        self.sleep(3)  # 稍微等待一下 可能路径连线还没完成
         screen = self.screenshot()
         word_pos = check_line_green(self.ctx, screen, lcs_percent=self.lcs_percent)
         if word_pos:
@@ -72,5 +70,5 @@ class Catapult(SrOperation):
 
     def leave_trillion(self):
         self.round_by_click_area('弹珠机', '离开按钮')
-        time.sleep(1)
+        self.sleep(1)
         self.round_by_click_area('弹珠机', '退出对话框-确认')
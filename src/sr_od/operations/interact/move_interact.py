@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from typing import ClassVar
 
@@ -54,7 +52,7 @@ class MoveInteract(SrOperation):
         在屏幕上找到交互内容进行交互
         :return: 操作结果
         """
-        time.sleep(0.5)  # 稍微等待一下 可能交互按钮还没有出来
+        self.sleep(0.5)  # 稍微等待一下 可能交互按钮还没有出来
 
         screen = self.screenshot()
         word_pos = interact_utils.check_move_interact(self.ctx, screen, self.cn,
@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 
 from one_dragon.base.geometry.point import Point
@@ -39,7 +37,7 @@ class ClickPhoneMenuItem(SrOperation):
         else:
             log.info('菜单中找到 %s 尝试点击', self.item.cn)
             r = self.ctx.controller.click(result.center)
-            time.sleep(0.5)
+            self.sleep(0.5)
             if r:
                 return self.round_success()
             else:
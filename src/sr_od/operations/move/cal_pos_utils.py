@@ -12,9 +12,10 @@ from one_dragon.base.geometry.point import Point
 from one_dragon.base.geometry.rectangle import Rect
 from one_dragon.base.matcher.match_result import MatchResult, MatchResultList
 from one_dragon.utils import cal_utils, cv2_utils, os_utils, thread_utils
+from one_dragon.utils.debug_artifact_sink import get_debug_artifact_sink
 from one_dragon.utils.log_utils import log
 from sr_od.context.sr_context import SrContext
-from sr_od.sr_map import mini_map_utils
+from sr_od.sr_map import large_map_utils, mini_map_utils
 from sr_od.sr_map.large_map_info import LargeMapInfo
 from sr_od.sr_map.mini_map_info import MiniMapInfo
 from sr_od.sr_map.sr_map_def import Region
@@ -201,7 +202,11 @@ def cal_character_pos(ctx: SrContext,
         result = similar_result([r1, r2, r3, r4])
 
     if result is None:
-        if lm_rect is not None and retry_without_rect:  # 整张大地图试试
+        if lm_rect is not None and retry_without_rect:
+            # 先用重定位索引找候选位置 都不对时再整张大地图试试
+            result = cal_character_pos_by_relocalization(ctx, lm_info, mm_info)
+            if result is not None:
+                return result
             return cal_character_pos(ctx, lm_info, mm_info, running=False, show=show)
         else:
             return None
@@ -218,6 +223,52 @@ def cal_character_pos(ctx: SrContext,
     return result
 
 
+def cal_character_pos_by_relocalization(ctx: SrContext,
+                                        lm_info: LargeMapInfo, mm_info: MiniMapInfo,
+                                        top_k: int = 5,
+                                        wait_index: bool = True) -> Optional[MatchResult]:
+    """
+    丢失坐标时使用 不依赖上一次的坐标
+    先在重定位索引中找出最相似的几个候选位置 再在候选位置附近用道路掩码模板匹配校验
+    :param ctx: 上下文
+    :param lm_info: 大地图信息
+    :param mm_info: 小地图信息
+    :param top_k: 校验的候选位置数量
+    :param wait_index: 索引还没有准备好时是否等待构建 不等待时在后台构建 本次返回None
+    :return:
+    """
+    mini_map_utils.init_road_mask_for_world_patrol(mm_info, another_floor=lm_info.region.another_floor)
+    mm_road_mask = cv2.bitwise_or(mm_info.road_mask, mm_info.arrow_mask)
+    if wait_index:
+        index = ctx.map_data.get_relocalization_index(lm_info.region, mm_road_mask.shape[0])
+    else:
+        index = ctx.map_data.get_relocalization_index_if_ready(lm_info.region, mm_road_mask.shape[0])
+        if index is None:
+            return None
+
+    scale_list = get_mini_map_scale_list(False, is_debug=ctx.env_config.is_debug)
+    # 查询时只需要几个有代表性的缩放比例
+    candidate_list = index.query(mm_road_mask, mm_info.circle_mask, scale_list[::4], top_k=top_k)
+
+    target: Optional[MatchResult] = None
+    for pos, score in candidate_list:
+        # 网格间距内的偏差 都可以由局部匹配修正
+        search_distance = index.cell * 2
+        lm_rect = large_map_utils.get_large_map_rect_by_pos(lm_info.mask.shape, mm_road_mask.shape,
+                                                            (pos.x, pos.y, search_distance))
+        result = cal_character_pos_by_road_mask(ctx, lm_info, mm_info, lm_rect=lm_rect, scale_list=scale_list)
+        verify = VerifyPosInfo(last_pos=pos, max_distance=search_distance)
+        if not is_valid_result(result, verify):
+            continue
+        log.debug('重定位候选 %s 相似度 %.2f 匹配置信度 %.2f', pos, score, result.confidence)
+        if target is None or result.confidence > target.confidence:
+            target = result
+
+    if target is not None:
+        log.info('重定位得到坐标 %s', target.center)
+    return target
+
+
 def cal_character_pos_by_gray(ctx: SrContext,
                               lm_info: LargeMapInfo, mm_info: MiniMapInfo,
                               lm_rect: Rect = None,
@@ -238,7 +289,7 @@ def cal_character_pos_by_gray(ctx: SrContext,
     source = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
     # 使用道路掩码
     mm_del_radio = mm_info.raw_del_radio
-    template = cv2.cvtColor(mm_del_radio, cv2.COLOR_BGR2GRAY)
+    template = mm_info.gray_del_radio
 
     mini_map_utils.init_road_mask_for_world_patrol(mm_info, another_floor=lm_info.region.another_floor)
     template_mask = mm_info.road_mask_with_edge
@@ -591,7 +642,7 @@ def sim_uni_cal_pos_by_gray(ctx: SrContext,
     source, lm_rect = cv2_utils.crop_image(lm_info.raw, lm_rect)
     source = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY)
     # 使用道路掩码
-    template = cv2.cvtColor(mm_info.raw_del_radio, cv2.COLOR_BGR2GRAY)
+    template = mm_info.gray_del_radio
     mini_map_utils.init_road_mask_for_sim_uni(mm_info)
     template_mask = mm_info.road_mask_with_edge  # 把白色边缘包括进来
 
@@ -734,7 +785,10 @@ def is_valid_result(result: MatchResult, verify: VerifyPosInfo) -> bool:
 
 
 def save_as_test_case_async(mm: MatLike, region: Region, verify: VerifyPosInfo):
-    cal_pos_executor.submit(save_as_test_case, mm, region, verify)
+    """
+    保存成测试样例 写入本来就在后台线程进行 保留这个方法兼容旧的调用
+    """
+    save_as_test_case(mm, region, verify)
 
 
 def save_as_test_case(mm: MatLike, region: Region, verify: VerifyPosInfo):
@@ -747,11 +801,7 @@ def save_as_test_case(mm: MatLike, region: Region, verify: VerifyPosInfo):
     """
     now = os_utils.now_timestamp_str()
     log.info('保存样例 %s %s', region.prl_id, now)
-    base = os_utils.get_path_under_work_dir('.debug', 'cal_pos_fail',
-                                            region.prl_id, now)
-
-    cv2_utils.save_image(mm, os.path.join(base, 'mm.png'))
-
-    with open(os.path.join(base, 'verify.yml'), 'w', encoding='utf-8') as file:
-        file.write(verify.yml_str)
+    get_debug_artifact_sink().submit('cal_pos_fail', os.path.join(region.prl_id, now),
+                                     image_dict={'mm': mm},
+                                     text_dict={'verify.yml': verify.yml_str})
 
@@ -1,5 +1,3 @@
-import time
-
 from one_dragon.base.operation.operation_node import operation_node
 from one_dragon.base.operation.operation_round_result import OperationRoundResult
 from one_dragon.utils.i18_utils import gt
@@ -38,13 +36,13 @@ class GetRidOfStuck(SrOperation):
             walk_sec = try_move_unit * move_unit_sec
             self.ctx.controller.move('a', walk_sec)
             self.ctx.controller.start_moving_forward()  # 多往前走1秒再判断是否被困
-            time.sleep(1)
+            self.sleep(1)
             total_time = walk_sec + 1
         elif try_method == 2:  # 右 前
             walk_sec = try_move_unit * move_unit_sec
             self.ctx.controller.move('d', walk_sec)
             self.ctx.controller.start_moving_forward()
-            time.sleep(1)
+            self.sleep(1)
             total_time = walk_sec + 1
         elif try_method == 4:  # 后左 前  # 注意这里左右顺序要跟1, 2相反 可以防止一左一右还卡在原处
             walk_sec = try_move_unit * move_unit_sec
@@ -52,7 +50,7 @@ class GetRidOfStuck(SrOperation):
             self.ctx.controller.move('a', walk_sec)
             self.ctx.controller.move('w', walk_sec)
             self.ctx.controller.start_moving_forward()
-            time.sleep(1)
+            self.sleep(1)
             total_time = walk_sec * 3 + 1
         elif try_method == 3:  # 后右 前
             walk_sec = try_move_unit * move_unit_sec
@@ -60,7 +58,7 @@ class GetRidOfStuck(SrOperation):
             self.ctx.controller.move('d', walk_sec)
             self.ctx.controller.move('w', walk_sec)
             self.ctx.controller.start_moving_forward()
-            time.sleep(1)
+            self.sleep(1)
             total_time = walk_sec * 3 + 1
         elif try_method == 5:  # 左后右 前
             walk_sec = try_move_unit * move_unit_sec
@@ -68,7 +66,7 @@ class GetRidOfStuck(SrOperation):
             self.ctx.controller.move('s', walk_sec)
             self.ctx.controller.move('d', walk_sec + move_unit_sec)
             self.ctx.controller.start_moving_forward()
-            time.sleep(1)
+            self.sleep(1)
             total_time = walk_sec * 3 + move_unit_sec + 1
         elif try_method == 6:  # 右后左 前
             walk_sec = try_move_unit * move_unit_sec
@@ -76,7 +74,7 @@ class GetRidOfStuck(SrOperation):
             self.ctx.controller.move('s', walk_sec)
             self.ctx.controller.move('a', walk_sec + move_unit_sec)
             self.ctx.controller.start_moving_forward()
-            time.sleep(1)
+            self.sleep(1)
             total_time = walk_sec * 3 + move_unit_sec + 1
         else:
             total_time = 0
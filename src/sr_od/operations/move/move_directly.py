@@ -24,6 +24,8 @@ from sr_od.screen_state import common_screen_state, battle_screen_state
 from sr_od.sr_map import mini_map_utils, large_map_utils
 from sr_od.sr_map.large_map_info import LargeMapInfo
 from sr_od.sr_map.mini_map_info import MiniMapInfo
+from sr_od.sr_map.mini_map_threat_tracker import MiniMapThreat, MiniMapThreatTracker
+from sr_od.sr_map.sr_frame_context import SrFrameContext
 from sr_od.sr_map.sr_map_def import Region
 
 
@@ -33,6 +35,7 @@ class MoveDirectly(SrOperation):
     rec_pos_interval: float = 0.5  # 间隔多少秒记录一次坐标
     stuck_distance: float = 20  # 移动距离多少以内认为是被困
     arrival_distance: float = 10  # 多少距离内认为是到达目的地
+    relocalization_interval: float = 1  # 丢失坐标时 间隔多少秒使用一次重定位
     fail_after_no_battle: float = 120  # 多少秒无战斗后退出 通常不会有路线这么久都遇不到怪 只能是卡死了 然后脱困算法又让角色产生些位移
 
     STATUS_NO_POS: ClassVar[str] = '无法识别坐标'
@@ -68,6 +71,7 @@ class MoveDirectly(SrOperation):
         self.last_rec_time = 0  # 上一次记录坐标的时间
         self.no_pos_times = 0  # 累计算不到坐标的次数
         self.stop_afterwards = stop_afterwards  # 最后是否停止前进
+        self.last_relocalization_time: float = 0  # 上一次使用重定位的时间
         self.last_no_pos_time = 0  # 上一次算不到坐标的时间 目前算坐标太快了 可能地图还在缩放中途就已经失败 所以稍微隔点时间再记录算不到坐标
         self.stop_move_time: Optional[float] = None  # 停止移动的时间
         self.last_move_stuck_time: float = 0  # 上一次脱困结束的时间
@@ -76,6 +80,7 @@ class MoveDirectly(SrOperation):
         self.no_battle: bool = no_battle  # 本次移动是否保证没有战斗
         self.technique_fight: bool = technique_fight  # 是否使用秘技进入战斗
         self.technique_only: bool = technique_only  # 是否只使用秘技进入战斗
+        self.threat_tracker: MiniMapThreatTracker = MiniMapThreatTracker()  # 小地图上的敌人跟踪 决定什么时候需要画面识别
 
     def handle_init(self):
         """
@@ -94,6 +99,7 @@ class MoveDirectly(SrOperation):
         if self.ctx.controller.is_moving:  # 连续移动的时候 使用开始点作为一个起始点
             self.pos.append(self.start_pos)
         self.stop_move_time = None
+        self.threat_tracker.reset()
 
         return None
 
@@ -156,16 +162,24 @@ class MoveDirectly(SrOperation):
             op.execute()
             return self.round_wait('飞霄使用秘技')
 
-        # 先异步识别是否需要攻击
+        # 这一帧的各个识别共用同一个上下文 小地图只裁剪和分析一次
+        frame = SrFrameContext(screen, self.ctx.game_config.mini_map_pos, now_time)
+        mm = frame.mm
+        mm_info = frame.mm_info
+
+        # 先用小地图判断威胁 小地图无法确定时 再异步识别画面是否需要攻击
+        threat: Optional[MiniMapThreat] = None
         if (not self.no_battle  # 如果外层调用保证没有战斗 跳过识别
             and not self.last_battle_exit_with_alert  # 如果上一次的战斗指令是有告警地退出，说明人物卡住了，先移动，不识别攻击
         ):
-            submit, attack_future = self.ctx.yolo_detector.detect_should_attack_in_world_async(screen, now_time)
-            log.debug('提交攻击检测 %s', submit)
-
-        mm = mini_map_utils.cut_mini_map(screen, self.ctx.game_config.mini_map_pos)
+            threat = self.threat_tracker.update(frame)
+            if threat.need_detect:
+                submit, attack_future = self.ctx.yolo_detector.detect_should_attack_in_world_async(screen, now_time, frame)
+                log.debug('提交攻击检测 %s', submit)
+                if submit:
+                    self.threat_tracker.mark_detected(now_time)
 
-        next_pos, mm_info = self.cal_pos(mm, now_time)  # 计算当前坐标
+        next_pos, mm_info = self.cal_pos(mm, now_time, mm_info)  # 计算当前坐标
 
         check_no_pos = self.check_no_pos(next_pos, now_time)  # 坐标计算失败处理
         if check_no_pos is None:
@@ -176,7 +190,7 @@ class MoveDirectly(SrOperation):
 
         # 被敌人锁定的时候 小地图会被染红 坐标匹配能力大减
         # 因此 就算识别不到坐标 也要判断是否被怪锁定 以免一直识别坐标失败站在原地被袭
-        check_enemy = self.check_enemy_and_attack(screen, mm_info.raw_del_radio, now_time)
+        check_enemy = self.check_enemy_and_attack(screen, mm_info.raw_del_radio, now_time, threat)
         if check_enemy is not None:
             return check_enemy
 
@@ -216,19 +230,22 @@ class MoveDirectly(SrOperation):
 
         return None
 
-    def check_enemy_and_attack(self, screen: MatLike, mm: MatLike, now_time: float) -> Optional[OperationRoundResult]:
+    def check_enemy_and_attack(self, screen: MatLike, mm: MatLike, now_time: float,
+                               threat: Optional[MiniMapThreat] = None) -> Optional[OperationRoundResult]:
         """
         从小地图检测敌人 如果有的话 进入索敌
         :param screen: 游戏画面
         :param mm: 小地图部分
         :param now_time: 当前时间
+        :param threat: 小地图的威胁判断结果
         :return: 是否有敌人
         """
         if self.no_battle:  # 外层调用保证没有战斗 跳过后续检测
             return None
         if self.ctx.is_fx_world_patrol_tech:  # 飞霄情况下 只会在特定条件下攻击 跳过这个检测
             return None
-        if not self.ctx.yolo_detector.should_attack_in_world_last_result(now_time):
+        if ((threat is None or not threat.under_attack)
+                and not self.ctx.yolo_detector.should_attack_in_world_last_result(now_time)):
             return None
 
         return self.do_attack(True)
@@ -251,6 +268,7 @@ class MoveDirectly(SrOperation):
             self.last_battle_exit_with_alert = op_result.status == WorldPatrolEnterFight.STATUS_EXIT_WITH_ALERT
 
         fight_end_time = time.time()
+        self.threat_tracker.reset()  # 战斗后小地图的红点已经变了
 
         self.last_battle_time = fight_end_time
         self.last_rec_time += fight_end_time - fight_start_time  # 战斗可能很久 更改记录时间
@@ -258,11 +276,13 @@ class MoveDirectly(SrOperation):
 
         return self.round_wait()
 
-    def cal_pos(self, mm: MatLike, now_time: float) -> Tuple[Optional[Point], MiniMapInfo]:
+    def cal_pos(self, mm: MatLike, now_time: float,
+                mm_info: Optional[MiniMapInfo] = None) -> Tuple[Optional[Point], MiniMapInfo]:
         """
         根据上一次的坐标和行进距离 计算当前位置坐标
         :param mm: 小地图截图
         :param now_time: 当前时间
+        :param mm_info: 已经分析过的小地图信息 不传入时重新分析
         :return:
         """
         # 根据上一次的坐标和行进距离 计算当前位置
@@ -290,7 +310,8 @@ class MoveDirectly(SrOperation):
                   move_time, self.ctx.controller.is_moving)
         lm_rect = large_map_utils.get_large_map_rect_by_pos(self.lm_info.gray.shape, mm.shape[:2], possible_pos)
 
-        mm_info = mini_map_utils.analyse_mini_map(mm)
+        if mm_info is None:
+            mm_info = mini_map_utils.analyse_mini_map(mm)
 
         if len(self.pos) == 0:  # 第一个可以直接使用开始点 不进行计算
             return self.start_pos, mm_info
@@ -344,12 +365,37 @@ class MoveDirectly(SrOperation):
                     running=self.ctx.controller.is_moving,
                     real_move_time=real_move_time,
                     verify=verify)
+            if next_pos is None and self.no_pos_times >= 2:
+                next_pos = self.cal_pos_by_relocalization(mm_info, verify)
         except Exception:
             next_pos = None
             log.error('识别坐标失败', exc_info=True)
 
         return next_pos
 
+    def cal_pos_by_relocalization(self, mm_info: MiniMapInfo, verify: VerifyPosInfo) -> Optional[MatchResult]:
+        """
+        连续算不到坐标时使用 可能是战斗、脱困后位置变化较大 用重定位索引在整张地图上找回
+        - 结果仍需在上一个坐标附近 距离放宽到允许偏离直线的距离 避免跳到地图上相似的其它位置
+        - 匹配较慢 隔一段时间才使用一次
+        - 索引还没有准备好时 在后台构建 本次不等待
+        :param mm_info: 当前的小地图信息
+        :param verify: 用于验证坐标的信息
+        :return:
+        """
+        now = time.time()
+        if now - self.last_relocalization_time < MoveDirectly.relocalization_interval:
+            return None
+        self.last_relocalization_time = now
+
+        result = cal_pos_utils.cal_character_pos_by_relocalization(self.ctx, self.lm_info, mm_info,
+                                                                   wait_index=False)
+        relocalization_verify = VerifyPosInfo(last_pos=verify.last_pos,
+                                              max_distance=verify.max_distance + verify.max_line_distance)
+        if not cal_pos_utils.is_valid_result(result, relocalization_verify):
+            return None
+        return result
+
     def check_no_pos(self, next_pos: Point, now_time: float) -> Optional[OperationRoundResult]:
         """
         并判断是否识别不到坐标
@@ -5,10 +5,12 @@ from typing import Optional
 
 from cv2.typing import MatLike
 import random
+import yaml
 
 from one_dragon.base.config.yaml_operator import YamlOperator
 from one_dragon.base.matcher.match_result import MatchResult
 from one_dragon.utils import os_utils, cv2_utils
+from one_dragon.utils.debug_artifact_sink import find_artifact_image, get_debug_artifact_sink
 from sr_od.sr_map.sr_map_data import SrMapData
 from sr_od.sr_map.sr_map_def import Region
 
@@ -20,18 +22,16 @@ def save_sample(region: Region, mm: MatLike, pos: MatchResult) -> None:
     if pos is None:
         return
     now = int(time.time() * 1000)
-    base_dir = os_utils.get_path_under_work_dir('.debug', 'gps', region.prl_id, str(now))
-
-    cv2_utils.save_image(mm, os.path.join(base_dir, 'mm.png'))
-    yml = YamlOperator(os.path.join(base_dir, 'pos.yml'))
-    yml.data = {
+    data = {
         'x': pos.x,
         'y': pos.y,
         'w': pos.w,
         'h': pos.h,
         'template_scale': pos.template_scale
     }
-    yml.save()
+    get_debug_artifact_sink().submit('gps', os.path.join(region.prl_id, str(now)),
+                                     image_dict={'mm': mm},
+                                     text_dict={'pos.yml': yaml.dump(data, allow_unicode=True, sort_keys=False)})
 
 
 def random_check(base_dir: Optional[str]) -> None:
@@ -50,7 +50,10 @@ def random_check(base_dir: Optional[str]) -> None:
         case_id = random.choice(case_list)
         case_dir = os.path.join(prl_dir, case_id)
 
-        mm = cv2_utils.read_image(os.path.join(case_dir, 'mm.png'))
+        mm_path = find_artifact_image(os.path.join(case_dir, 'mm'))
+        if mm_path is None:
+            continue
+        mm = cv2_utils.read_image(mm_path)
         yml = YamlOperator(os.path.join(case_dir, 'pos.yml'))
 
         region = [i for i in map_data.region_list if i.prl_id == prl_id][0]
@@ -1,5 +1,3 @@
-import time
-
 import cv2
 from cv2.typing import MatLike
 from typing import ClassVar, Optional
@@ -67,7 +65,7 @@ class ChooseTeam(SrOperation):
         else:
             to_click: Point = num_pos[self.team_num]
             if self.ctx.controller.click(to_click):
-                time.sleep(0.5)
+                self.sleep(0.5)
                 if not self.on:
                     return self.round_success()
                 if self.ctx.controller.click(ChooseTeam.TURN_ON_RECT.center):
@@ -351,7 +351,7 @@ class FastRecover(SrOperation):
                         return op.round_retry(result.status, wait=1)
                 else:
                     op_result.consumable_chosen = True
-                    time.sleep(0.5)
+                    op.sleep(0.5)
 
             result = op.round_by_find_and_click_area(screen, '快速恢复对话框', '确认')
             if result.is_success:
@@ -1,5 +1,3 @@
-import time
-
 from cv2.typing import MatLike
 from enum import Enum
 from typing import List
@@ -103,6 +101,6 @@ def claim_express_supply(ctx: SrContext):
     """
     area = ctx.screen_loader.get_area('列车补给', '点击领取今日补贴')
     ctx.controller.click(area.center)
-    time.sleep(3)  # 暂停一段时间再操作
+    ctx.run_state_token.sleep(3)  # 暂停一段时间再操作
     ctx.controller.click(area.center)  # 领取需要分两个阶段 点击两次
-    time.sleep(1)  # 暂停一段时间再操作
+    ctx.run_state_token.sleep(1)  # 暂停一段时间再操作
@@ -5,7 +5,9 @@ from cv2.typing import MatLike
 from typing import Optional, Tuple, List
 
 from one_dragon.base.config.yaml_operator import YamlOperator
+from one_dragon.base.screen.frame_context import FrameContext
 from one_dragon.utils import yolo_config_utils, os_utils
+from one_dragon.yolo.detect_stream import YoloDetectStream
 from one_dragon.yolo.detect_utils import DetectFrameResult
 from one_dragon.yolo.yolo_utils import SR_MODEL_DOWNLOAD_URL
 from one_dragon.yolo.yolov8_onnx_det import Yolov8Detector
@@ -13,6 +15,10 @@ from sr_od.config.game_const import OPPOSITE_DIRECTION
 
 _EXECUTOR = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='sr_yolo_detector', max_workers=1)
 
+SIM_UNI_COMBAT_CATEGORY_LIST: List[str] = ['普通怪', '界面提示被锁定', '界面提示可攻击',
+                                           '模拟宇宙下层入口', '模拟宇宙下层入口未激活']
+"""模拟宇宙战斗楼层需要识别的分类"""
+
 
 class SrDetectClass:
 
@@ -29,7 +35,8 @@ class YoloScreenDetector:
                  sim_uni_model_name: Optional[str] = None,
                  world_patrol_model_name: Optional[str] = None,
                  standard_resolution_w: int = 1920,
-                 standard_resolution_h: int = 1080
+                 standard_resolution_h: int = 1080,
+                 stream_worker_cnt: int = 1
                  ):
         self.standard_resolution_w: int = standard_resolution_w
         self.standard_resolution_h: int = standard_resolution_h
@@ -55,6 +62,11 @@ class YoloScreenDetector:
         self.last_async_future: Optional[concurrent.futures.Future] = None  # 上一次异步回调
         self.last_detect_result: Optional[DetectFrameResult] = None  # 上一次识别结果
 
+        self.stream_worker_cnt: int = stream_worker_cnt  # 流式识别的推理线程数量
+        self.sim_uni_combat_stream: YoloDetectStream = YoloDetectStream(self._run_sim_uni_combat,
+                                                                        worker_cnt=stream_worker_cnt)
+        """模拟宇宙战斗楼层的流式识别"""
+
         self.detect_info_list: List[SrDetectClass] = []  # 所有可识别的信息
         self.label_2_class: dict[str, SrDetectClass] = {}
         self.world_patrol_label_list: List[str] = []  # 锄大地时需要识别的标签
@@ -89,13 +101,15 @@ class YoloScreenDetector:
             gpu=gpu
         )
 
-    def detect_should_attack_in_world(self, screen: MatLike, detect_time: float) -> DetectFrameResult:
+    def detect_should_attack_in_world(self, screen: MatLike, detect_time: float,
+                                      frame: Optional[FrameContext] = None) -> DetectFrameResult:
         """
         大世界画面下使用 识别当前的可攻击状态
         - 有被怪物锁定的标志
         - 有可攻击的标志
         :param screen: 游戏画面
         :param detect_time: 识别时间
+        :param frame: 当前截图的分析上下文 模型输入与同一帧的其它识别共用
         :return:
         """
         yolo = None
@@ -106,7 +120,8 @@ class YoloScreenDetector:
 
         if yolo is not None:
             self.last_detect_result = yolo.run(screen, conf=0.85, run_time=detect_time,
-                                               category_list=['界面提示被锁定', '界面提示可攻击'])
+                                               category_list=['界面提示被锁定', '界面提示可攻击'],
+                                               frame=frame)
         else:
             self.last_detect_result = DetectFrameResult(raw_image=screen, run_time=detect_time, results=[])
 
@@ -123,7 +138,8 @@ class YoloScreenDetector:
         frame_result = self.detect_should_attack_in_world(screen, detect_time)
         return len(frame_result.results) > 0
 
-    def detect_should_attack_in_world_async(self, screen: MatLike, detect_time: float) -> Tuple[bool, Optional[concurrent.futures.Future]]:
+    def detect_should_attack_in_world_async(self, screen: MatLike, detect_time: float,
+                                            frame: Optional[FrameContext] = None) -> Tuple[bool, Optional[concurrent.futures.Future]]:
         """
         异步进行运算，如果上一次还没有结束，则放弃本次运算。
         大世界画面下使用 识别当前的可攻击状态。
@@ -131,11 +147,12 @@ class YoloScreenDetector:
         - 有可攻击的标志
         :param screen: 游戏画面
         :param detect_time: 识别时间
+        :param frame: 当前截图的分析上下文
         :return: 是否提交成功, 提交后的回调
         """
         if self.last_async_future is not None and not self.last_async_future.done():
             return False, None
-        self.last_async_future = _EXECUTOR.submit(self.detect_should_attack_in_world, screen, detect_time)
+        self.last_async_future = _EXECUTOR.submit(self.detect_should_attack_in_world, screen, detect_time, frame)
         return True, self.last_async_future
 
     def should_attack_in_world_last_result(self, detect_time: float, timeout_seconds: float = 0.5) -> bool:
@@ -226,8 +243,33 @@ class YoloScreenDetector:
         :return:
         """
         return self.sim_uni_yolo.run(screen, run_time=screenshot_time,
-                                     category_list=['普通怪', '界面提示被锁定', '界面提示可攻击',
-                                                    '模拟宇宙下层入口', '模拟宇宙下层入口未激活'])
+                                     category_list=SIM_UNI_COMBAT_CATEGORY_LIST)
+
+    def _run_sim_uni_combat(self, screen: MatLike, screenshot_time: float,
+                            category_list: Optional[List[str]] = None) -> DetectFrameResult:
+        """
+        流式识别中运行的一帧识别
+        结果只保存在流式识别中 不能写入 last_detect_result 那是大世界攻击判断使用的结果
+        """
+        return self.sim_uni_combat_detect(screen, screenshot_time)
+
+    def sim_uni_combat_detect_async(self, screen: MatLike, screenshot_time: float) -> None:
+        """
+        模拟宇宙中战斗楼层使用的识别 只提交画面 不等待结果
+        结果使用 sim_uni_combat_latest_result 获取
+        :param screen: 游戏画面
+        :param screenshot_time: 截图时间
+        :return:
+        """
+        self.sim_uni_combat_stream.submit(screen, screenshot_time)
+
+    def sim_uni_combat_latest_result(self, after_time: float = 0) -> Optional[DetectFrameResult]:
+        """
+        模拟宇宙中战斗楼层 最新的平滑后的识别结果
+        :param after_time: 只使用这个时间之后截图的帧
+        :return:
+        """
+        return self.sim_uni_combat_stream.get_latest(after_time=after_time)
 
 def __debug():
     from sr_od.context.sr_context import SrContext
@@ -0,0 +1,144 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.utils import cv2_utils, os_utils
+from one_dragon.utils.log_utils import log
+from sr_od.sr_map.large_map_info import LargeMapInfo
+
+
+def read_image_mmap(file_path: str, cache_name: str) -> Optional[MatLike]:
+    """
+    以内存映射的方式读取图片
+    第一次读取时解码后保存成 npy 之后直接映射 不占用进程私有内存 也不需要再解码
+    原图修改后会重新生成
+    :param file_path: 图片路径
+    :param cache_name: 缓存文件名 不含后缀
+    :return: 只读的数组
+    """
+    if not os.path.exists(file_path):
+        return None
+    npy_path = os.path.join(os_utils.get_path_under_work_dir('.cache', 'large_map'), f'{cache_name}.npy')
+    if not os.path.exists(npy_path) or os.path.getmtime(npy_path) < os.path.getmtime(file_path):
+        image = cv2_utils.read_image(file_path)
+        if image is None:
+            return None
+        temp_path = npy_path + '.tmp.npy'
+        try:
+            np.save(temp_path, image)
+            os.replace(temp_path, npy_path)
+        except Exception:
+            log.error(f'大地图映射文件保存失败 {npy_path}', exc_info=True)
+            return image
+    return np.load(npy_path, mmap_mode='r')
+
+
+class LargeMapCache:
+
+    def __init__(self, max_bytes: int = 1024 * 1024 * 1024, use_mmap: bool = False):
+        """
+        按内存占用淘汰的大地图缓存
+        超过上限时 淘汰最久没使用的大地图 最近使用的一张总会保留
+        正在使用中的大地图由调用方持有引用 淘汰只是从缓存中移除 不影响正在进行的计算
+        同一张大地图同时只会加载一次 预加载和正常获取可以同时进行
+        :param max_bytes: 内存上限
+        :param use_mmap: 原图和掩码是否使用内存映射
+        """
+        self.max_bytes: int = max_bytes
+        self.use_mmap: bool = use_mmap
+
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, LargeMapInfo] = OrderedDict()
+        self._loading: dict[str, threading.Event] = {}
+
+    def get(self, prl_id: str) -> Optional[LargeMapInfo]:
+        """
+        获取已经缓存的大地图 不会触发加载
+        :param prl_id: 区域ID
+        :return:
+        """
+        with self._lock:
+            info = self._cache.get(prl_id)
+            if info is not None:
+                self._cache.move_to_end(prl_id)
+                self._evict()
+            return info
+
+    def put(self, prl_id: str, info: LargeMapInfo) -> None:
+        """
+        放入缓存 并按内存上限淘汰
+        :param prl_id: 区域ID
+        :param info: 大地图
+        :return:
+        """
+        with self._lock:
+            self._cache[prl_id] = info
+            self._cache.move_to_end(prl_id)
+            self._evict()
+
+    def get_or_load(self, prl_id: str, loader: Callable[[], LargeMapInfo]) -> LargeMapInfo:
+        """
+        获取大地图 不在缓存时加载
+        其它线程正在加载同一张时 等待其加载完成
+        :param prl_id: 区域ID
+        :param loader: 加载方法
+        :return:
+        """
+        while True:
+            with self._lock:
+                info = self._cache.get(prl_id)
+                if info is not None:
+                    self._cache.move_to_end(prl_id)
+                    self._evict()
+                    return info
+                event = self._loading.get(prl_id)
+                if event is None:
+                    event = threading.Event()
+                    self._loading[prl_id] = event
+                    break
+            event.wait()
+            # 加载线程完成后 再取一次 加载失败时由本线程重新加载
+
+        try:
+            info = loader()
+            self.put(prl_id, info)
+            return info
+        finally:
+            with self._lock:
+                self._loading.pop(prl_id, None)
+            event.set()
+
+    def remove(self, prl_id: str) -> None:
+        """
+        从缓存中移除 例如大地图的图片有更新
+        :param prl_id: 区域ID
+        :return:
+        """
+        with self._lock:
+            self._cache.pop(prl_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(i.nbytes for i in self._cache.values())
+
+    def _evict(self) -> None:
+        """
+        超过内存上限时 淘汰最久没使用的
+        灰度图和特征点是用到时才计算的 因此每次都重新统计占用
+        调用前需要持有锁
+        :return:
+        """
+        total = sum(i.nbytes for i in self._cache.values())
+        while total > self.max_bytes and len(self._cache) > 1:
+            prl_id, info = self._cache.popitem(last=False)
+            total -= info.nbytes
+            log.debug('大地图缓存淘汰 %s 当前占用 %.1fMB', prl_id, total / 1024 / 1024)
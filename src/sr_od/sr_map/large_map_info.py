@@ -1,11 +1,15 @@
 from typing import Optional, Tuple, List
 
 import cv2
+import numpy as np
 from cv2.typing import MatLike
 
 from one_dragon.utils import cv2_utils
 from sr_od.sr_map.sr_map_def import Region
 
+_KEYPOINT_BYTES: int = 96
+"""一个 cv2.KeyPoint 对象大约占用的内存"""
+
 
 class LargeMapInfo:
 
@@ -33,3 +37,17 @@ class LargeMapInfo:
         if self.raw is not None:
             self._kps, self._desc = cv2_utils.feature_detect_and_compute(self.raw, self.mask)
         return self._kps, self._desc
+
+    @property
+    def nbytes(self) -> int:
+        """
+        估算占用的内存 内存映射的数组不计算在内
+        :return:
+        """
+        total = 0
+        for arr in [self.raw, self._gray, self.mask, self._desc]:
+            if arr is not None and not isinstance(arr, np.memmap):
+                total += arr.nbytes
+        if self._kps is not None:
+            total += len(self._kps) * _KEYPOINT_BYTES
+        return total
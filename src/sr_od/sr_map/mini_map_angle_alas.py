@@ -3,27 +3,69 @@ from functools import lru_cache
 import cv2
 import numpy as np
 from cv2.typing import MatLike
-from scipy import signal
 
 
 @lru_cache
 def RotationRemapData(d: int):
-    mx = np.zeros((d, d), dtype=np.float32)
-    my = np.zeros((d, d), dtype=np.float32)
-    for i in range(d):
-        for j in range(d):
-            mx[i, j] = d / 2 + i / 2 * np.cos(2 * np.pi * j / d)
-            my[i, j] = d / 2 + i / 2 * np.sin(2 * np.pi * j / d)
+    i = np.arange(d, dtype=np.float64).reshape(-1, 1)
+    j = np.arange(d, dtype=np.float64).reshape(1, -1)
+    mx = (d / 2 + i / 2 * np.cos(2 * np.pi * j / d)).astype(np.float32)
+    my = (d / 2 + i / 2 * np.sin(2 * np.pi * j / d)).astype(np.float32)
     return mx, my
 
 
+def find_peaks(x: np.ndarray, height: float) -> np.ndarray:
+    """
+    找出局部最大值 与 scipy.signal.find_peaks(x, height=height) 的结果一致
+    平顶的峰取中间的下标 首尾的点不算峰
+    :param x: 一维数组
+    :param height: 峰的最小高度
+    :return: 峰的下标
+    """
+    n = len(x)
+    if n < 3:
+        return np.empty(0, dtype=np.int64)
+    # 把连续相等的值合并成一段 在段上找比左右两段都高的
+    change = np.flatnonzero(x[1:] != x[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [n])) - 1
+    values = x[starts]
+    is_peak = np.zeros(len(starts), dtype=bool)
+    is_peak[1:-1] = (values[1:-1] > values[:-2]) & (values[1:-1] > values[2:]) & (values[1:-1] >= height)
+    return (starts[is_peak] + ends[is_peak]) // 2
+
+
+def peak_prominences(x: np.ndarray, peaks: np.ndarray) -> np.ndarray:
+    """
+    计算峰的突出程度 与 scipy.signal.peak_prominences 的结果一致
+    向两侧找到第一个比峰更高的点 两侧区间内的最小值中较高的一个作为基准
+    :param x: 一维数组
+    :param peaks: 峰的下标
+    :return: 每个峰的突出程度
+    """
+    prominences = np.empty(len(peaks), dtype=np.float64)
+    for idx, peak in enumerate(peaks):
+        peak_value = x[peak]
+
+        left = x[:peak + 1][::-1]
+        higher = np.flatnonzero(left > peak_value)
+        left_min = np.min(left[:higher[0]] if len(higher) > 0 else left)
+
+        right = x[peak:]
+        higher = np.flatnonzero(right > peak_value)
+        right_min = np.min(right[:higher[0]] if len(higher) > 0 else right)
+
+        prominences[idx] = peak_value - max(left_min, right_min)
+    return prominences
+
+
 def peak_confidence(arr, **kwargs):
     """
     Evaluate the prominence of the highest peak
 
     Args:
         arr (np.ndarray): Shape (N,)
-        **kwargs: Additional kwargs for signal.find_peaks
+        **kwargs: height, prominence
 
     Returns:
         float: 0-1
@@ -34,9 +76,12 @@ def peak_confidence(arr, **kwargs):
     }
     para.update(kwargs)
     length = len(arr)
-    peaks, properties = signal.find_peaks(np.concatenate((arr, arr, arr)), **para)
-    peaks = [h for p, h in zip(peaks, properties['peak_heights']) if length <= p < length * 2]
-    peaks = sorted(peaks, reverse=True)
+    expanded = np.concatenate((arr, arr, arr))
+    peaks = find_peaks(expanded, para['height'])
+    # 只需要中间那份的峰 突出程度仍然在拼接后的数组上计算
+    peaks = peaks[(peaks >= length) & (peaks < length * 2)]
+    peaks = peaks[peak_prominences(expanded, peaks) >= para['prominence']]
+    peaks = sorted(expanded[peaks], reverse=True)
 
     count = len(peaks)
     if count > 1:
@@ -49,6 +94,19 @@ def peak_confidence(arr, **kwargs):
     return confidence
 
 
+@lru_cache
+def _roll_index(length: int, shift_list: tuple) -> np.ndarray:
+    """
+    环形平移的下标 第k行等于 np.roll(arr, shift_list[k]) 使用的下标
+    :param length: 数组长度
+    :param shift_list: 每一行的平移量
+    :return: 形状为 (len(shift_list), length) 的下标
+    """
+    j = np.arange(length).reshape(1, -1)
+    shift = np.array(shift_list).reshape(-1, 1)
+    return (j - shift) % length
+
+
 def convolve(arr, kernel=3):
     """
     Args:
@@ -58,7 +116,13 @@ def convolve(arr, kernel=3):
     Returns:
         np.ndarray:
     """
-    return sum(np.roll(arr, i) * (kernel - abs(i)) // kernel for i in range(-kernel + 1, kernel))
+    shift_list = tuple(range(-kernel + 1, kernel))
+    rolled = arr[_roll_index(len(arr), shift_list)]
+    # 逐项累加 保持与原来逐项求和相同的取整和舍入
+    result = 0
+    for k, i in enumerate(shift_list):
+        result = result + rolled[k] * (kernel - abs(i)) // kernel
+    return result
 
 
 def calculate(minimap: MatLike, scale: int = 1):
@@ -73,7 +137,7 @@ def calculate(minimap: MatLike, scale: int = 1):
     d = minimap.shape[0]
 
     # Extract
-    _, _, v = cv2.split(cv2.cvtColor(minimap, cv2.COLOR_RGB2YUV))
+    v = cv2.extractChannel(cv2.cvtColor(minimap, cv2.COLOR_RGB2YUV), 2)
 
     image = cv2.subtract(128, v)
 
@@ -85,30 +149,19 @@ def calculate(minimap: MatLike, scale: int = 1):
     # Find derivative
     gradx = cv2.Scharr(remap, cv2.CV_32F, 1, 0)
 
-    # Magic parameters for scipy.find_peaks
-    para = {
-        'height': 35,
-        'wlen': d * scale,
-    }
-    l = np.bincount(signal.find_peaks(gradx.ravel(), **para)[0] % (d * scale), minlength=d * scale)
-    r = np.bincount(signal.find_peaks(-gradx.ravel(), **para)[0] % (d * scale), minlength=d * scale)
+    # 与 alas 中 scipy.find_peaks 的参数一致 没有要求突出程度时 wlen 不影响结果
+    length = d * scale
+    grad = gradx.ravel()
+    l = np.bincount(find_peaks(grad, 35) % length, minlength=length)
+    r = np.bincount(find_peaks(-grad, 35) % length, minlength=length)
     l, r = np.maximum(l - r, 0), np.maximum(r - l, 0)
 
-    conv0 = []
     kernel = 2 * scale
-    r_expanded = np.concatenate([r, r, r])
-    r_length = len(r)
-
-    # Faster than nested calling np.roll()
-    def roll_r(shift):
-        return r_expanded[r_length - shift:r_length * 2 - shift]
-
-    def convolve_r(ker, shift):
-        return sum(roll_r(shift + i) * (ker - abs(i)) // ker for i in range(-ker + 1, ker))
-
-    for offset in range(-kernel + 1, kernel):
-        result = l * convolve_r(ker=3 * kernel, shift=-d * scale // 4 + offset)
-        conv0 += [result]
+    # 先对 r 做一次环形卷积 不同偏移的结果只是再平移一次
+    conv_r = convolve(r, 3 * kernel)
+    shift = -d * scale // 4
+    offset_list = tuple(shift + offset for offset in range(-kernel + 1, kernel))
+    conv0 = l * conv_r[_roll_index(length, offset_list)]
 
     conv0 = np.maximum(conv0, 1)
     maximum = np.max(conv0, axis=0)
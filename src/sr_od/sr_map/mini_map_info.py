@@ -1,3 +1,4 @@
+import cv2
 from cv2.typing import MatLike
 from typing import Optional
 
@@ -7,6 +8,7 @@ class MiniMapInfo:
     def __init__(self):
         self.raw: Optional[MatLike] = None  # 原图
         self.raw_del_radio: Optional[MatLike] = None  # 原图减掉雷达
+        self._gray_del_radio: Optional[MatLike] = None  # 原图减掉雷达后的灰度图
         self.center_arrow_mask: Optional[MatLike] = None  # 小地图中心小箭头的掩码 用于判断方向
         self.arrow_mask: Optional[MatLike] = None  # 整张小地图的小箭头掩码 用于合成道路掩码
         self.angle: Optional[float] = None  # 箭头方向
@@ -15,3 +17,15 @@ class MiniMapInfo:
         self.sp_result: Optional[dict] = None  # 匹配到的特殊点结果
         self.road_mask: Optional[MatLike] = None  # 道路掩码 不包含中间的小箭头 以及特殊点
         self.road_mask_with_edge: Optional[MatLike] = None  # 有边缘道路掩码 不包含中间的小箭头 以及特殊点 适用于灰度图和原图匹配
+
+    @property
+    def gray_del_radio(self) -> Optional[MatLike]:
+        """
+        原图减掉雷达后的灰度图 灰度图匹配时作为模板 同一个小地图匹配多张大地图时只转换一次
+        """
+        if self._gray_del_radio is not None:
+            return self._gray_del_radio
+        if self.raw_del_radio is None:
+            return None
+        self._gray_del_radio = cv2.cvtColor(self.raw_del_radio, cv2.COLOR_BGR2GRAY)
+        return self._gray_del_radio
@@ -0,0 +1,225 @@
+import math
+from typing import List, Optional
+
+from one_dragon.base.geometry.point import Point
+from sr_od.sr_map.sr_frame_context import SrFrameContext
+
+
+class EnemyTrack:
+
+    def __init__(self, track_id: int, x: float, y: float, now: float):
+        """
+        小地图上一个被跟踪的敌人红点
+        坐标以小地图中心为 (0,0)
+        :param track_id: 跟踪ID
+        :param x: 横坐标
+        :param y: 纵坐标
+        :param now: 识别时间
+        """
+        self.track_id: int = track_id
+        self.x: float = x
+        self.y: float = y
+        self.vx: float = 0  # 每秒的横向位移
+        self.vy: float = 0  # 每秒的纵向位移
+        self.hits: int = 1  # 累计匹配上的帧数
+        self.misses: int = 0  # 连续丢失的帧数
+        self.last_time: float = now  # 上一次匹配上的时间
+
+    @property
+    def confirmed(self) -> bool:
+        """
+        连续出现过多帧 认为是真实的红点
+        """
+        return self.hits >= 2
+
+    @property
+    def pos(self) -> Point:
+        return Point(self.x, self.y)
+
+    def predict(self, now: float) -> tuple[float, float]:
+        """
+        按速度推算某个时间的位置
+        :param now: 时间
+        :return:
+        """
+        dt = now - self.last_time
+        return self.x + self.vx * dt, self.y + self.vy * dt
+
+    def distance(self, now: Optional[float] = None) -> float:
+        """
+        与小地图中心的距离
+        :param now: 传入时使用推算的位置
+        :return:
+        """
+        x, y = (self.x, self.y) if now is None else self.predict(now)
+        return math.hypot(x, y)
+
+    def closing_speed(self) -> float:
+        """
+        靠近小地图中心的速度 正数为靠近
+        """
+        dis = math.hypot(self.x, self.y)
+        if dis == 0:
+            return 0
+        return -(self.x * self.vx + self.y * self.vy) / dis
+
+    def update(self, x: float, y: float, now: float, alpha: float) -> None:
+        """
+        用新一帧的位置更新
+        :param x: 横坐标
+        :param y: 纵坐标
+        :param now: 识别时间
+        :param alpha: 速度平滑系数 越大越相信新的速度
+        :return:
+        """
+        dt = now - self.last_time
+        if dt > 0:
+            self.vx = alpha * (x - self.x) / dt + (1 - alpha) * self.vx
+            self.vy = alpha * (y - self.y) / dt + (1 - alpha) * self.vy
+        self.x = x
+        self.y = y
+        self.hits += 1
+        self.misses = 0
+        self.last_time = now
+
+
+class MiniMapThreat:
+
+    def __init__(self, under_attack: bool, track_list: List[EnemyTrack], need_detect: bool):
+        """
+        一帧小地图的威胁判断结果
+        :param under_attack: 小地图边缘变色 已被怪锁定
+        :param track_list: 当前跟踪中的红点
+        :param need_detect: 小地图无法确定 需要用画面的目标识别确认
+        """
+        self.under_attack: bool = under_attack
+        self.track_list: List[EnemyTrack] = track_list
+        self.need_detect: bool = need_detect
+
+    @property
+    def closest_track(self) -> Optional[EnemyTrack]:
+        if len(self.track_list) == 0:
+            return None
+        return min(self.track_list, key=lambda i: i.distance())
+
+
+class MiniMapThreatTracker:
+
+    def __init__(self,
+                 match_distance: float = 20,
+                 max_misses: int = 3,
+                 velocity_alpha: float = 0.5,
+                 alert_ratio: float = 0.5,
+                 approach_seconds: float = 1,
+                 max_idle_seconds: float = 2):
+        """
+        小地图上的敌人跟踪
+        每帧用小地图上的红点和边缘颜色做廉价的判断 只有小地图无法确定时 才需要整个画面的目标识别
+        - 被锁定 小地图边缘变色 直接可以攻击
+        - 附近没有红点 也没有正在靠近的红点 不需要识别
+        - 红点在附近 或者正在快速靠近 或者刚在中心附近消失(被自身箭头盖住) 需要识别确认
+        - 太久没识别过 也识别一次兜底
+        :param match_distance: 相邻两帧的红点距离在这个范围内 认为是同一个
+        :param max_misses: 连续丢失多少帧后放弃跟踪
+        :param velocity_alpha: 速度平滑系数
+        :param alert_ratio: 红点距离小于 小地图半径*这个比例 时认为在附近
+        :param approach_seconds: 按当前速度 多少秒内会进入附近的红点 也认为在附近
+        :param max_idle_seconds: 距离上一次识别超过这个时间 就识别一次
+        """
+        self.match_distance: float = match_distance
+        self.max_misses: int = max_misses
+        self.velocity_alpha: float = velocity_alpha
+        self.alert_ratio: float = alert_ratio
+        self.approach_seconds: float = approach_seconds
+        self.max_idle_seconds: float = max_idle_seconds
+
+        self.track_list: List[EnemyTrack] = []
+        self.next_track_id: int = 0
+        self.last_detect_time: float = 0  # 上一次提交画面识别的时间
+
+    def reset(self) -> None:
+        """
+        清空跟踪状态 例如战斗后小地图的红点都变了
+        :return:
+        """
+        self.track_list = []
+        self.last_detect_time = 0
+
+    def mark_detected(self, now: float) -> None:
+        """
+        记录已经提交了画面识别
+        :param now: 提交时间
+        :return:
+        """
+        self.last_detect_time = now
+
+    def update(self, frame: SrFrameContext) -> MiniMapThreat:
+        """
+        用新一帧的小地图更新跟踪 并判断威胁
+        :param frame: 当前截图的分析上下文 小地图分析结果与其它识别共用
+        :return:
+        """
+        now = frame.screenshot_time
+        mm_info = frame.mm_info
+        under_attack = frame.is_under_attack()
+        pos_list = frame.enemy_pos_list
+        self._associate(pos_list, now)
+
+        if under_attack:
+            need_detect = False
+        else:
+            alert_distance = mm_info.raw.shape[0] // 2 * self.alert_ratio
+            need_detect = now - self.last_detect_time >= self.max_idle_seconds
+            for track in self.track_list:
+                if need_detect:
+                    break
+                if track.misses > 0:  # 丢失的红点 可能是走到跟前被箭头盖住了
+                    need_detect = track.distance(now) < alert_distance
+                elif track.distance() < alert_distance:
+                    need_detect = True
+                elif track.confirmed and track.closing_speed() > 0:
+                    need_detect = track.distance() - track.closing_speed() * self.approach_seconds < alert_distance
+
+        return MiniMapThreat(under_attack, [i for i in self.track_list if i.misses == 0], need_detect)
+
+    def _associate(self, pos_list: List[Point], now: float) -> None:
+        """
+        把这一帧的红点分配给已有的跟踪 按推算位置的距离从近到远贪心匹配
+        :param pos_list: 这一帧的红点
+        :param now: 截图时间
+        :return:
+        """
+        pair_list = []
+        for track_idx, track in enumerate(self.track_list):
+            px, py = track.predict(now)
+            for pos_idx, pos in enumerate(pos_list):
+                dis = math.hypot(pos.x - px, pos.y - py)
+                if dis <= self.match_distance:
+                    pair_list.append((dis, track_idx, pos_idx))
+        pair_list.sort(key=lambda i: i[0])
+
+        matched_track = set()
+        matched_pos = set()
+        for _, track_idx, pos_idx in pair_list:
+            if track_idx in matched_track or pos_idx in matched_pos:
+                continue
+            matched_track.add(track_idx)
+            matched_pos.add(pos_idx)
+            pos = pos_list[pos_idx]
+            self.track_list[track_idx].update(pos.x, pos.y, now, self.velocity_alpha)
+
+        new_track_list = []
+        for track_idx, track in enumerate(self.track_list):
+            if track_idx not in matched_track:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            new_track_list.append(track)
+
+        for pos_idx, pos in enumerate(pos_list):
+            if pos_idx in matched_pos:
+                continue
+            new_track_list.append(EnemyTrack(self.next_track_id, pos.x, pos.y, now))
+            self.next_track_id += 1
+
+        self.track_list = new_track_list
@@ -1,12 +1,14 @@
 import cv2
 import numpy as np
 import os
+import threading
 from cv2.typing import MatLike
 from functools import lru_cache
 from typing import Set, Optional, List, Tuple
 
 from one_dragon.base.geometry.point import Point
 from one_dragon.base.matcher.match_result import MatchResultList, MatchResult
+from one_dragon.utils.operation_profiler import ProfileCategory, operation_profiler
 from one_dragon.base.screen.template_info import TemplateInfo
 from one_dragon.utils import cv2_utils, os_utils, cal_utils
 from one_dragon.utils.log_utils import log
@@ -69,8 +71,7 @@ def preheat():
     for i in range(93, 100):  # 不同时期截图大小可能不一致
         mini_map_angle_alas.RotationRemapData(i * 2)
 
-    for i in range(int(360 // 1.875)):
-        get_radio_to_del(i * 1.875)
+    _get_radio_bank()
 
 
 def extract_arrow(mini_map: MatLike):
@@ -97,12 +98,11 @@ def get_arrow_mask(mm: MatLike):
     _, mask = cv2.threshold(arrow, 180, 255, cv2.THRESH_BINARY)
     # 做一个连通性检测 小于50个连通的认为是噪点
     num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
-    large_components = []
-    for label in range(1, num_labels):
-        if stats[label, cv2.CC_STAT_AREA] < 50:
-            large_components.append(label)
-    for label in large_components:
-        mask[labels == label] = 0
+    if num_labels > 1:
+        # 按连通块查表 一次去掉所有噪点
+        keep = stats[:, cv2.CC_STAT_AREA] >= 50
+        keep[0] = True
+        mask[~keep[labels]] = 0
 
     whole_mask = np.zeros((h,w), dtype=np.uint8)
     whole_mask[cy-r:cy+r, cx-r:cx+r] = mask
@@ -129,12 +129,124 @@ def analyse_angle(mini_map: MatLike) -> float:
     return mini_map_angle_alas.calculate(mini_map)
 
 
+class MiniMapIconBank:
+
+    def __init__(self, ctx: SrContext):
+        """
+        小地图上所有特殊点图标的特征描述子 合并成一个数组 每一行记录属于哪个模板
+        每帧只需要一次特征匹配 再按模板分组做RANSAC
+        :param ctx: 上下文
+        """
+        self.template_id_list: List[str] = []
+        self.template_list: List[TemplateInfo] = []
+        self.kps: List[cv2.KeyPoint] = []
+        desc_list: List[np.ndarray] = []
+        label_list: List[np.ndarray] = []
+
+        for prefix in ['mm_tp', 'mm_sp', 'mm_boss', 'mm_sub']:
+            for i in range(100):
+                if i == 0:
+                    continue
+
+                template_id = '%s_%02d' % (prefix, i)
+                t: TemplateInfo = ctx.template_loader.get_template('mm_icon', template_id)
+                if t is None:
+                    break
+                template_kps, template_desc = t.features
+                if template_kps is None or len(template_kps) == 0:
+                    continue
+
+                label_list.append(np.full(len(template_kps), len(self.template_id_list), dtype=np.int32))
+                self.template_id_list.append(template_id)
+                self.template_list.append(t)
+                self.kps.extend(template_kps)
+                desc_list.append(template_desc)
+
+        self.desc: np.ndarray = np.concatenate(desc_list) if len(desc_list) > 0 else np.empty((0, 128), dtype=np.float32)
+        self.labels: np.ndarray = np.concatenate(label_list) if len(label_list) > 0 else np.empty(0, dtype=np.int32)
+        self._rows_cache: dict[frozenset, np.ndarray] = {}
+
+    def get_rows(self, sp_types: Set[str]) -> np.ndarray:
+        """
+        限定种类的特殊点 在合并数组中对应的行
+        :param sp_types: 限定种类的特殊点
+        :return:
+        """
+        key = frozenset(sp_types)
+        rows = self._rows_cache.get(key)
+        if rows is None:
+            label_set = [idx for idx, template_id in enumerate(self.template_id_list) if template_id in key]
+            rows = np.flatnonzero(np.isin(self.labels, label_set))
+            self._rows_cache[key] = rows
+        return rows
+
+    @operation_profiler.profile(ProfileCategory.TEMPLATE)
+    def match(self, source_kps, source_desc, sp_types: Set[str],
+              source_mask: Optional[MatLike] = None) -> dict[str, MatchResult]:
+        """
+        在小地图上找出特殊点 每个模板最多只能找到一个
+        :param source_kps: 小地图的关键点
+        :param source_desc: 小地图的描述子
+        :param sp_types: 限定种类的特殊点
+        :param source_mask: 小地图掩码
+        :return: 模板ID -> 匹配结果
+        """
+        result_map: dict[str, MatchResult] = {}
+        rows = self.get_rows(sp_types)
+        if len(rows) == 0 or source_kps is None or len(source_kps) < 2:
+            return result_map
+
+        matches = cv2.BFMatcher().knnMatch(self.desc[rows], source_desc, k=2)
+        # 应用比值测试 并按模板分组 queryIdx 换回合并数组中的行
+        label_matches: dict[int, List[cv2.DMatch]] = {}
+        for t in matches:
+            if len(t) < 2:
+                continue
+            m, n = t
+            if m.distance < 0.75 * n.distance:
+                row = int(rows[m.queryIdx])
+                m.queryIdx = row
+                label_matches.setdefault(int(self.labels[row]), []).append(m)
+
+        for label in sorted(label_matches.keys()):
+            good_matches = label_matches[label]
+            if len(good_matches) < 4:  # 票数不够的模板 不需要RANSAC
+                continue
+            offset_x, offset_y, scale = cv2_utils.feature_match_ransac(good_matches, source_kps, self.kps,
+                                                                       source_mask=source_mask)
+            if offset_x is None:
+                continue
+            template = self.template_list[label].raw
+            result_map[self.template_id_list[label]] = MatchResult(1, offset_x, offset_y,
+                                                                   template.shape[1], template.shape[0],
+                                                                   template_scale=scale)
+        return result_map
+
+
+_mm_icon_bank: Optional[MiniMapIconBank] = None
+_mm_icon_bank_lock = threading.Lock()
+
+
+def get_mm_icon_bank(ctx: SrContext) -> MiniMapIconBank:
+    """
+    小地图特殊点图标的描述子 第一次使用时构建
+    :param ctx: 上下文
+    :return:
+    """
+    global _mm_icon_bank
+    if _mm_icon_bank is None:
+        with _mm_icon_bank_lock:
+            if _mm_icon_bank is None:
+                _mm_icon_bank = MiniMapIconBank(ctx)
+    return _mm_icon_bank
+
+
 def init_sp_mask_by_feature_match(ctx: SrContext, mm_info: MiniMapInfo,
                                   sp_types: Set = None,
                                   show: bool = False):
     """
     在小地图上找到特殊点 使用特征匹配 每个模板最多只能找到一个
-    特征点提取匹配、画掩码耗时都很少 主要花费在读模板 真实运行有缓存就没问题
+    所有模板的描述子合并后只匹配一次 再对票数足够的模板做RANSAC
     :param ctx: 上下文
     :param mm_info: 小地图信息
     :param sp_types: 限定种类的特殊点
@@ -155,70 +267,54 @@ def init_sp_mask_by_feature_match(ctx: SrContext, mm_info: MiniMapInfo,
     source = mm_info.raw_del_radio
     source_mask = mm_info.circle_mask
     source_kps, source_desc = cv2_utils.feature_detect_and_compute(source, mask=source_mask)
-    for prefix in ['mm_tp', 'mm_sp', 'mm_boss', 'mm_sub']:
-        for i in range(100):
-            if i == 0:
-                continue
 
-            template_id = '%s_%02d' % (prefix, i)
-            t: TemplateInfo = ctx.template_loader.get_template('mm_icon', template_id)
-            if t is None:
-                break
-            if sp_types is not None and template_id not in sp_types:
-                continue
+    result_map = get_mm_icon_bank(ctx).match(source_kps, source_desc, sp_types, source_mask=source_mask)
+    for template_id, mr in result_map.items():
+        match_result_list = MatchResultList()
+        match_result_list.append(mr, auto_merge=False)
+        sp_match_result[template_id] = match_result_list
+
+        # 缩放后的宽度和高度
+        sw = int(mr.w * mr.template_scale)
+        sh = int(mr.h * mr.template_scale)
+        one_sp_mask = np.zeros((sh, sw))
 
-            match_result_list = MatchResultList()
-            template = t.raw
-            template_mask = t.mask
-
-            template_kps, template_desc = t.features
-
-            good_matches, offset_x, offset_y, scale = cv2_utils.feature_match(
-                source_kps, source_desc,
-                template_kps, template_desc,
-                source_mask=source_mask)
-
-            if offset_x is not None:
-                mr = MatchResult(1, offset_x, offset_y, template.shape[1], template.shape[0], template_scale=scale)  #
-                match_result_list.append(mr, auto_merge=False)
-                sp_match_result[template_id] = match_result_list
-
-                # 缩放后的宽度和高度
-                sw = int(template.shape[1] * scale)
-                sh = int(template.shape[0] * scale)
-                # one_sp_mask = cv2.resize(template_mask, (sh, sw))
-                one_sp_mask = np.zeros((sh, sw))
-
-                rect1, rect2 = cv2_utils.get_overlap_rect(sp_mask, one_sp_mask, mr.x, mr.y)
-                sx_start, sy_start, sx_end, sy_end = rect1
-                tx_start, ty_start, tx_end, ty_end = rect2
-                # sp_mask[sy_start:sy_end, sx_start:sx_end] = cv2.bitwise_or(
-                #     sp_mask[sy_start:sy_end, sx_start:sx_end],
-                #     one_sp_mask[ty_start:ty_end, tx_start:tx_end]
-                # )
-                sp_mask[sy_start:sy_end, sx_start:sx_end] = 255
-
-            if show:
-                cv2_utils.show_image(source, win_name='source')
-                cv2_utils.show_image(source_mask, win_name='source_mask')
-                source_with_keypoints = cv2.drawKeypoints(source, source_kps, None)
-                cv2_utils.show_image(source_with_keypoints, win_name='source_with_keypoints_%s' % template_id)
-                template_with_keypoints = cv2.drawKeypoints(template, template_kps, None)
-                cv2_utils.show_image(
-                    cv2.bitwise_and(template_with_keypoints, template_with_keypoints, mask=template_mask),
-                    win_name='template_with_keypoints_%s' % template_id)
-                all_result = cv2.drawMatches(template, template_kps, source, source_kps, good_matches, None, flags=2)
-                cv2_utils.show_image(all_result, win_name='all_match_%s' % template_id)
-
-                if offset_x is not None:
-                    cv2_utils.show_overlap(source, template, offset_x, offset_y, template_scale=scale, win_name='overlap_%s' % template_id)
-                cv2.waitKey(0)
-                cv2.destroyAllWindows()
+        rect1, rect2 = cv2_utils.get_overlap_rect(sp_mask, one_sp_mask, mr.x, mr.y)
+        sx_start, sy_start, sx_end, sy_end = rect1
+        sp_mask[sy_start:sy_end, sx_start:sx_end] = 255
+
+    if show:
+        cv2_utils.show_image(source, win_name='source')
+        cv2_utils.show_image(source_mask, win_name='source_mask')
+        source_with_keypoints = cv2.drawKeypoints(source, source_kps, None)
+        cv2_utils.show_image(source_with_keypoints, win_name='source_with_keypoints')
+        for template_id, mr in result_map.items():
+            template = ctx.template_loader.get_template('mm_icon', template_id).raw
+            cv2_utils.show_overlap(source, template, mr.x, mr.y, template_scale=mr.template_scale,
+                                   win_name='overlap_%s' % template_id)
+        cv2.waitKey(0)
+        cv2.destroyAllWindows()
 
     mm_info.sp_mask = sp_mask
     mm_info.sp_result = sp_match_result
 
 
+@lru_cache
+def _get_attack_ring_mask(h: int, w: int) -> MatLike:
+    """
+    判断是否被锁定时 只看小地图边缘的一圈 同一尺寸只画一次
+    :param h: 小地图高度
+    :param w: 小地图宽度
+    :return:
+    """
+    cx, cy = w // 2, h // 2
+    r = (cx + cy) // 2
+    ring_mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.circle(ring_mask, (cx, cy), r, 255, 3)
+    ring_mask.setflags(write=False)
+    return ring_mask
+
+
 def is_under_attack(mm: MatLike,
                     strict: bool = False,
                     show: bool = False) -> bool:
@@ -232,11 +328,9 @@ def is_under_attack(mm: MatLike,
     :return: 是否被锁定
     """
     w, h = mm.shape[1], mm.shape[0]
-    cx, cy = w // 2, h // 2
-    r = (cx + cy) // 2
+    r = (w // 2 + h // 2) // 2
 
-    circle_mask = np.zeros(mm.shape[:2], dtype=np.uint8)
-    cv2.circle(circle_mask, (cx, cy), r, 255, 3)
+    circle_mask = _get_attack_ring_mask(h, w)
 
     circle_part = cv2.bitwise_and(mm, mm, mask=circle_mask)
 
@@ -279,20 +373,50 @@ def is_under_attack(mm: MatLike,
 
 mini_map_radio_to_del: Optional[MatLike] = None
 
+RADIO_ANGLE_STEP: float = 1.875
+"""朝向计算结果的最小单位 雷达按这个间隔预先旋转"""
+
+RADIO_ANGLE_BIN_CNT: int = int(360 // RADIO_ANGLE_STEP)
+"""预先旋转的雷达数量"""
+
+_radio_bank: Optional[np.ndarray] = None
+"""所有朝向的雷达 形状为 (RADIO_ANGLE_BIN_CNT, h, w, c) 的连续数组 按角度下标读取"""
+
+_radio_bank_lock = threading.Lock()
+
+
+def _get_radio_bank() -> np.ndarray:
+    """
+    第一次使用时 把雷达按每个朝向旋转好 放在一个连续的数组中
+    :return:
+    """
+    global mini_map_radio_to_del, _radio_bank
+    if _radio_bank is not None:
+        return _radio_bank
+    with _radio_bank_lock:
+        if _radio_bank is not None:
+            return _radio_bank
+        if mini_map_radio_to_del is None:
+            path = os.path.join(os_utils.get_path_under_work_dir('assets', 'template', 'mini_map', 'mini_map_radio'), 'raw.png')
+            mini_map_radio_to_del = cv2_utils.read_image(path)
+        bank = np.empty((RADIO_ANGLE_BIN_CNT,) + mini_map_radio_to_del.shape, dtype=mini_map_radio_to_del.dtype)
+        for i in range(RADIO_ANGLE_BIN_CNT):
+            bank[i] = cv2_utils.image_rotate(mini_map_radio_to_del, 360 - i * RADIO_ANGLE_STEP)
+        bank.setflags(write=False)
+        _radio_bank = bank
+    return _radio_bank
+
 
-@lru_cache
 def get_radio_to_del(angle: Optional[float] = None):
     """
     根据人物朝向 获取对应的雷达区域颜色
+    朝向会取最接近的 RADIO_ANGLE_STEP 的倍数
     :param angle: 人物朝向
     :return:
     """
-    global mini_map_radio_to_del
-    if mini_map_radio_to_del is None:
-        path = os.path.join(os_utils.get_path_under_work_dir('assets', 'template', 'mini_map', 'mini_map_radio'), 'raw.png')
-        mini_map_radio_to_del = cv2_utils.read_image(path)
+    bank = _get_radio_bank()
     if angle is not None:
-        return cv2_utils.image_rotate(mini_map_radio_to_del, 360 - angle)
+        return bank[int(round(angle / RADIO_ANGLE_STEP)) % RADIO_ANGLE_BIN_CNT]
     else:
         return mini_map_radio_to_del
 
@@ -312,12 +436,25 @@ def analyse_mini_map(raw: MatLike) -> MiniMapInfo:
     return info
 
 
-def init_circle_mask(mm_info: MiniMapInfo):
-    h, w = mm_info.arrow_mask.shape[1], mm_info.arrow_mask.shape[0]
+@lru_cache
+def get_circle_mask(h: int, w: int) -> MatLike:
+    """
+    小地图的圆形掩码 同一尺寸只画一次
+    返回的是只读的共享数组 需要修改时请先复制
+    :param h: 小地图高度
+    :param w: 小地图宽度
+    :return:
+    """
     cx, cy = w // 2, h // 2
+    circle_mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.circle(circle_mask, (cx, cy), h // 2 - 5, 255, -1)  # 忽略一点圆的边缘
+    circle_mask.setflags(write=False)
+    return circle_mask
+
 
-    mm_info.circle_mask = np.zeros_like(mm_info.arrow_mask)
-    cv2.circle(mm_info.circle_mask, (cx, cy), h // 2 - 5, 255, -1)  # 忽略一点圆的边缘
+def init_circle_mask(mm_info: MiniMapInfo):
+    h, w = mm_info.arrow_mask.shape[1], mm_info.arrow_mask.shape[0]
+    mm_info.circle_mask = get_circle_mask(h, w)
 
 
 def remove_radio(mm: MatLike, radio_to_del: MatLike) -> MatLike:
@@ -331,16 +468,36 @@ def remove_radio(mm: MatLike, radio_to_del: MatLike) -> MatLike:
         y1 = raw.shape[1] // 2 - radius
         y2 = y1 + d
 
-        overlap = np.zeros_like(radio_to_del, dtype=np.uint16)
-        overlap[:, :] = raw[y1:y2, x1:x2]
-        overlap[:, :] -= radio_to_del
-        overlap[np.where(raw[y1:y2, x1:x2] < radio_to_del)] = 0
-        raw[y1:y2, x1:x2] = overlap.astype(dtype=np.uint8)
+        # 饱和减法 小于0的部分直接为0
+        raw[y1:y2, x1:x2] = cv2.subtract(raw[y1:y2, x1:x2], radio_to_del)
 
     # cv2_utils.show_image(raw, win_name='raw')
     return raw
 
 
+class _RoadMaskBuffer(threading.local):
+
+    def __init__(self):
+        """
+        计算道路掩码时使用的中间结果 每个线程按小地图尺寸预先分配 避免每帧重新申请内存
+        """
+        self.shape: Optional[tuple] = None
+        self.tmp: Optional[MatLike] = None
+        self.tmp2: Optional[MatLike] = None
+        self.road_mask_cf: Optional[MatLike] = None
+
+    def ensure(self, shape: tuple) -> None:
+        if self.shape == shape:
+            return
+        self.shape = shape
+        self.tmp = np.empty(shape, dtype=np.uint8)
+        self.tmp2 = np.empty(shape, dtype=np.uint8)
+        self.road_mask_cf = np.empty(shape, dtype=np.uint8)
+
+
+_road_mask_buffer = _RoadMaskBuffer()
+
+
 def init_road_mask_for_world_patrol(mm_info: MiniMapInfo, another_floor: bool = False):
     """
     获取道路掩码 用于原图的模板匹配
@@ -353,54 +510,60 @@ def init_road_mask_for_world_patrol(mm_info: MiniMapInfo, another_floor: bool =
         return
 
     mm_del_radio = mm_info.raw_del_radio
+    buffer = _road_mask_buffer
+    buffer.ensure(mm_del_radio.shape[:2])
     r, g, b = cv2.split(mm_del_radio)
 
     l = 45
     u = 70  # 背景色 正常是55~60附近 太亮的时候会到达这个值 或者其它楼层也会达到这个值
     lower_color = np.array([l, l, l], dtype=np.uint8)
     upper_color = np.array([u, u, u], dtype=np.uint8)
-    road_mask_1 = cv2.inRange(mm_del_radio, lower_color, upper_color)  # 这是粗略的道路掩码
-    # cv2_utils.show_image(road_mask_1, win_name='road_mask_1')
-
-    max_rgb = np.max(mm_del_radio, axis=2)
-    min_rgb = np.min(mm_del_radio, axis=2)
-    road_mask_cf = np.zeros(road_mask_1.shape, dtype=np.uint8)
-    road_mask_cf[(max_rgb - min_rgb) <= 1] = 255  # rgb颜色差不超过1 当前层的道路就是这个颜色
+    road_mask = cv2.inRange(mm_del_radio, lower_color, upper_color)  # 这是粗略的道路掩码
+    # cv2_utils.show_image(road_mask, win_name='road_mask_1')
+
+    # rgb颜色差不超过1 当前层的道路就是这个颜色
+    max_rgb, min_rgb = buffer.tmp, buffer.tmp2
+    cv2.max(r, g, dst=max_rgb)
+    cv2.max(max_rgb, b, dst=max_rgb)
+    cv2.min(r, g, dst=min_rgb)
+    cv2.min(min_rgb, b, dst=min_rgb)
+    cv2.subtract(max_rgb, min_rgb, dst=max_rgb)
+    road_mask_cf = buffer.road_mask_cf
+    cv2.compare(max_rgb, 1, cv2.CMP_LE, dst=road_mask_cf)
     # cv2_utils.show_image(road_mask_cf, win_name='road_mask_cf')
-    b_g = None
-    if another_floor:  # 多层地图时 另一层的颜色是递进的 R<=G<=B 且差值在2以内
-        b_g = b - g
-        g_r = g - r
-        road_mask_af = np.zeros(road_mask_1.shape, dtype=np.uint8)
-        road_mask_af[(b_g >= 0) & (b_g <= 2) & (g_r >= 0) & (g_r <= 2)] = 255
-        # cv2_utils.show_image(road_mask_af, win_name='road_mask_af')
 
-        road_mask_floor = cv2.bitwise_or(road_mask_cf, road_mask_af)
+    if another_floor:  # 多层地图时 另一层的颜色是递进的 R<=G<=B 且差值在2以内
+        b_g, g_r = buffer.tmp, buffer.tmp2
+        np.subtract(b, g, out=b_g)  # 无符号回绕 b<g 时会变成很大的数
+        np.subtract(g, r, out=g_r)
+        cv2.inRange(b_g, 0, 2, dst=b_g)
+        cv2.inRange(g_r, 0, 2, dst=g_r)
+        cv2.bitwise_and(b_g, g_r, dst=b_g)
+        # cv2_utils.show_image(b_g, win_name='road_mask_af')
+        cv2.bitwise_or(road_mask_cf, b_g, dst=b_g)
+        road_mask_floor = b_g
     else:
         road_mask_floor = road_mask_cf
 
-    road_mask_2 = cv2.bitwise_and(road_mask_1, road_mask_floor)  # 不同楼层的地图
-    # cv2_utils.show_image(road_mask_2, win_name='road_mask_2')
+    cv2.bitwise_and(road_mask, road_mask_floor, dst=road_mask)  # 不同楼层的地图
+    # cv2_utils.show_image(road_mask, win_name='road_mask_2')
 
-    if b_g is None:
-        b_g = b - g
-    # 算敌人的掩码图
+    # 算敌人的掩码图 敌人的雷达图 g 约等于 b
+    # 原来 b-g 在无符号下的判断 (b_g <= 2) | (b_g >= -2) 恒为真 因此只用颜色范围
     lower_color = np.array([80, 45, 45], dtype=np.uint8)
     upper_color = np.array([255, 70, 70], dtype=np.uint8)
-    enemy_mask_1 = cv2.inRange(mm_del_radio, lower_color, upper_color)  # 这是粗略的敌人图
-    enemy_mask_2 = np.zeros(road_mask_1.shape, dtype=np.uint8)
-    enemy_mask_2[(b_g <= 2) | (b_g >= -2)] = 255  # 敌人的雷达图 g 约等于 b
-    enemy_mask = cv2.bitwise_and(enemy_mask_1, enemy_mask_2)
+    enemy_mask = cv2.inRange(mm_del_radio, lower_color, upper_color, dst=buffer.tmp)  # 这是粗略的敌人图
     # cv2_utils.show_image(enemy_mask, win_name='enemy_mask')
 
-    mm_info.road_mask = cv2.bitwise_or(road_mask_2, enemy_mask)
-    mm_info.road_mask = cv2.bitwise_and(mm_info.road_mask, mm_info.circle_mask)  # 只考虑圆形内部分
+    cv2.bitwise_or(road_mask, enemy_mask, dst=road_mask)
+    cv2.bitwise_and(road_mask, mm_info.circle_mask, dst=road_mask)  # 只考虑圆形内部分
+    mm_info.road_mask = road_mask
 
     lower_color = np.array([160, 160, 160], dtype=np.uint8)
     upper_color = np.array([210, 210, 210], dtype=np.uint8)
-    edge_mask_rough = cv2.inRange(mm_del_radio, lower_color, upper_color)  # 这是粗略的边缘掩码
-    edge_mask = cv2.bitwise_and(edge_mask_rough, road_mask_cf)  # 三色差不超过1
-    mm_info.road_mask_with_edge = cv2.bitwise_or(mm_info.road_mask, edge_mask)
+    edge_mask = cv2.inRange(mm_del_radio, lower_color, upper_color, dst=buffer.tmp)  # 这是粗略的边缘掩码
+    cv2.bitwise_and(edge_mask, road_mask_cf, dst=edge_mask)  # 三色差不超过1
+    mm_info.road_mask_with_edge = cv2.bitwise_or(road_mask, edge_mask)
 
 
 def init_road_mask_for_sim_uni(mm_info: MiniMapInfo):
@@ -635,27 +798,25 @@ def get_enemy_mask(mm_info: MiniMapInfo, with_radio: bool = False) -> MatLike:
     """
     mm_del_radio = mm_info.raw_del_radio
     # cv2_utils.show_image(mm_del_radio, win_name='get_enemy_mask')
-    r, g, b = cv2.split(mm_del_radio)
-    b_g = b - g
     lower_color = np.array([80, 45, 45], dtype=np.uint8)
     if not with_radio:  # 不包含雷达的话 只取最红色的部分
         lower_color[0] = 170
     upper_color = np.array([255, 70, 70], dtype=np.uint8)
-    enemy_mask_1 = cv2.inRange(mm_del_radio, lower_color, upper_color)  # 这是粗略的敌人图
-    enemy_mask_2 = np.zeros(mm_del_radio.shape[:2], dtype=np.uint8)
-    enemy_mask_2[(b_g <= 2) | (b_g >= -2)] = 255  # 敌人的雷达图 g 约等于 b
-    enemy_mask = cv2.bitwise_and(enemy_mask_1, enemy_mask_2)
+    # 敌人的雷达图 g 约等于 b 原来 b-g 在无符号下的判断恒为真 因此只用颜色范围
+    enemy_mask = cv2.inRange(mm_del_radio, lower_color, upper_color)
 
-    return cv2.bitwise_and(enemy_mask, mm_info.circle_mask)
+    return cv2.bitwise_and(enemy_mask, mm_info.circle_mask, dst=enemy_mask)
 
 
-def with_enemy_nearby_new(mm_info: MiniMapInfo):
+def with_enemy_nearby_new(mm_info: MiniMapInfo, enemy_pos: Optional[List[Point]] = None):
     """
     判断附近是否有敌人
     :param mm_info: 小地图信息
+    :param enemy_pos: 已经识别好的敌人位置 不传入时重新识别
     :return:
     """
-    enemy_pos = get_enemy_pos(mm_info)
+    if enemy_pos is None:
+        enemy_pos = get_enemy_pos(mm_info)
 
     closest_dis = 999
     for pos in enemy_pos:
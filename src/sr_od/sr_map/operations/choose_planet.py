@@ -1,5 +1,3 @@
-import time
-
 import cv2
 from cv2.typing import MatLike
 from typing import Optional, List
@@ -108,5 +106,5 @@ class ChoosePlanet(SrOperation):
         drag_from = pos.center
         drag_to = drag_from + Point(0, -100)
         self.ctx.controller.drag_to(drag_to, drag_from)  # 这里比较奇怪 需要聚焦一段时间才能点击到星球
-        time.sleep(0.1)
+        self.sleep(0.1)
         self.ctx.controller.click(drag_to, press_time=1)
\ No newline at end of file
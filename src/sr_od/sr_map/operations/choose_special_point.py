@@ -1,5 +1,3 @@
-import time
-
 import cv2
 import numpy as np
 from cv2.typing import MatLike
@@ -38,7 +36,7 @@ class ChooseSpecialPoint(SrOperation):
 
         # 判断地图中间是否有目标点中文可选
         if self.check_and_click_sp_cn(screen):
-            time.sleep(1)
+            self.sleep(1)
             return self.round_wait(wait=1)
 
         # 先判断右边是不是出现传送了
@@ -48,7 +46,7 @@ class ChooseSpecialPoint(SrOperation):
 
         # 目标点中文 不是传送 或者不是目标传送点 点击一下地图空白位置
         self.ctx.controller.click(large_map_utils.EMPTY_MAP_POS)
-        time.sleep(0.5)
+        self.sleep(0.5)
         self.click_sp_in_last_round = False
 
         screen_part, offset = large_map_utils.match_screen_in_large_map(self.ctx, screen, self.tp.region)
@@ -65,16 +63,16 @@ class ChooseSpecialPoint(SrOperation):
             if target is None:  # 没找到的话 按计算坐标点击
                 to_click = self.tp.lm_pos - offset.left_top + screen_map_rect.left_top
                 self.ctx.controller.click(to_click)
-                time.sleep(0.5)
+                self.sleep(0.5)
             else:
                 to_click = target.center + screen_map_rect.left_top
                 self.ctx.controller.click(to_click)
-                time.sleep(0.5)
+                self.sleep(0.5)
             self.click_sp_in_last_round = True
 
         if dx != 0 or dy != 0:
             large_map_utils.drag_in_large_map(self.ctx, dx, dy)
-            time.sleep(0.5)
+            self.sleep(0.5)
 
         return self.round_retry()
 
@@ -0,0 +1,229 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from one_dragon.base.geometry.point import Point
+from one_dragon.utils import os_utils
+from one_dragon.utils.log_utils import log
+
+_INDEX_VERSION: int = 1
+"""索引格式版本 格式变化时递增 旧索引会被丢弃重建"""
+
+DESC_SIZE: int = 16
+"""描述子的边长 每个块缩放到 DESC_SIZE x DESC_SIZE"""
+
+MIN_ROAD_RATIO: float = 0.05
+"""块中道路占比低于这个值时不建立索引 纯背景的块没有区分度"""
+
+
+def _get_circle_mask(size: int) -> np.ndarray:
+    """
+    描述子使用的圆形掩码 与小地图的形状一致
+    :param size: 边长
+    :return: 0/1 的 float32 数组
+    """
+    circle = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(circle, (size // 2, size // 2), size // 2, 1, -1)
+    return circle.astype(np.float32)
+
+
+def _normalize_desc(desc: np.ndarray, circle: np.ndarray) -> np.ndarray:
+    """
+    圆形内去均值后归一化 之后点积即为相关系数
+    :param desc: 形状为 (n, DESC_SIZE * DESC_SIZE) 的原始描述
+    :param circle: 展开后的圆形掩码
+    :return:
+    """
+    circle_cnt = np.sum(circle)
+    mean = np.sum(desc * circle, axis=1, keepdims=True) / circle_cnt
+    desc = (desc - mean) * circle
+    norm = np.linalg.norm(desc, axis=1, keepdims=True)
+    norm[norm == 0] = 1
+    return desc / norm
+
+
+class RelocalizationIndex:
+
+    def __init__(self, patch_size: int, cell: int,
+                 points: np.ndarray, desc: np.ndarray):
+        """
+        大地图的全局重定位索引
+        在大地图道路掩码上按网格采样 每个采样点取一个小地图大小的块 压缩成很小的描述子
+        丢失坐标时 用小地图的描述子在索引中找最相似的几个位置 再用局部模板匹配校验
+        :param patch_size: 块的边长 与小地图的边长一致
+        :param cell: 网格间距
+        :param points: 每个块的中心点 形状为 (n, 2)
+        :param desc: 每个块的描述子 形状为 (n, DESC_SIZE * DESC_SIZE)
+        """
+        self.patch_size: int = patch_size
+        self.cell: int = cell
+        self.points: np.ndarray = points
+        self.desc: np.ndarray = desc
+        self.circle: np.ndarray = _get_circle_mask(DESC_SIZE).reshape(-1)
+
+    @staticmethod
+    def build(lm_mask: MatLike, patch_size: int) -> 'RelocalizationIndex':
+        """
+        根据大地图的道路掩码构建索引
+        先把整张掩码缩小到 网格间距=1像素 再用滑动窗口一次取出所有块
+        :param lm_mask: 大地图道路掩码
+        :param patch_size: 块的边长 与小地图的边长一致
+        :return:
+        """
+        if lm_mask.ndim == 3:
+            lm_mask = lm_mask[:, :, 0]
+        cell = max(patch_size // DESC_SIZE, 1)
+        lm_h, lm_w = lm_mask.shape[:2]
+        small_w, small_h = lm_w // cell, lm_h // cell
+        small = cv2.resize(lm_mask, (small_w, small_h), interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+
+        # 四周补边 让靠近边缘的位置也有块
+        half = DESC_SIZE // 2
+        small = np.pad(small, ((half, half), (half, half)))
+        windows = np.lib.stride_tricks.sliding_window_view(small, (DESC_SIZE, DESC_SIZE))
+        desc = windows.reshape(-1, DESC_SIZE * DESC_SIZE)
+
+        circle = _get_circle_mask(DESC_SIZE).reshape(-1)
+        road_ratio = np.sum(desc * circle, axis=1) / np.sum(circle)
+        valid = road_ratio >= MIN_ROAD_RATIO
+
+        ys, xs = np.mgrid[0:windows.shape[0], 0:windows.shape[1]]
+        points = np.stack([xs.reshape(-1), ys.reshape(-1)], axis=1) * cell + cell // 2
+
+        desc = _normalize_desc(desc[valid], circle).astype(np.float16)
+        points = points[valid].astype(np.int32)
+        return RelocalizationIndex(patch_size, cell, points, desc)
+
+    def mini_map_desc(self, mm_road_mask: MatLike, mm_circle_mask: MatLike, scale: float) -> np.ndarray:
+        """
+        计算小地图的描述子
+        小地图放大 scale 倍后与大地图对应 因此取中心 patch_size / scale 的部分
+        :param mm_road_mask: 小地图道路掩码
+        :param mm_circle_mask: 小地图圆形掩码
+        :param scale: 小地图的缩放比例
+        :return:
+        """
+        mm = cv2.bitwise_and(mm_road_mask, mm_circle_mask)
+        h, w = mm.shape[:2]
+        crop = min(int(round(self.patch_size / scale)), h, w)
+        sx, sy = (w - crop) // 2, (h - crop) // 2
+        mm = mm[sy:sy + crop, sx:sx + crop]
+        small = cv2.resize(mm, (DESC_SIZE, DESC_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+        return _normalize_desc(small.reshape(1, -1), self.circle)[0]
+
+    def query(self, mm_road_mask: MatLike, mm_circle_mask: MatLike,
+              scale_list: List[float], top_k: int = 5) -> List[Tuple[Point, float]]:
+        """
+        查询小地图最可能在的位置
+        :param mm_road_mask: 小地图道路掩码
+        :param mm_circle_mask: 小地图圆形掩码
+        :param scale_list: 尝试的小地图缩放比例
+        :param top_k: 最多返回的候选位置数量
+        :return: 候选位置和相似度 按相似度倒序
+        """
+        if len(self.points) == 0:
+            return []
+        score = None
+        for scale in scale_list:
+            q = self.mini_map_desc(mm_road_mask, mm_circle_mask, scale).astype(np.float16)
+            scale_score = self.desc @ q
+            score = scale_score if score is None else np.maximum(score, scale_score)
+        score = score.astype(np.float32)
+
+        # 先取出较多的候选 再做非极大值抑制 避免返回的都是相邻的网格
+        candidate_cnt = min(len(score), top_k * 20)
+        candidate_idx = np.argpartition(-score, candidate_cnt - 1)[:candidate_cnt]
+        candidate_idx = candidate_idx[np.argsort(-score[candidate_idx])]
+
+        min_distance = self.patch_size // 2
+        result_list: List[Tuple[Point, float]] = []
+        for idx in candidate_idx:
+            x, y = int(self.points[idx][0]), int(self.points[idx][1])
+            too_close = False
+            for p, _ in result_list:
+                if abs(p.x - x) < min_distance and abs(p.y - y) < min_distance:
+                    too_close = True
+                    break
+            if too_close:
+                continue
+            result_list.append((Point(x, y), float(score[idx])))
+            if len(result_list) >= top_k:
+                break
+        return result_list
+
+    def save(self, file_path: str, mask_mtime: float) -> None:
+        """
+        保存到磁盘 先写临时文件再替换
+        :param file_path: 文件路径
+        :param mask_mtime: 构建时道路掩码的修改时间
+        :return:
+        """
+        temp_path = file_path + '.tmp.npz'
+        np.savez(temp_path,
+                 version=_INDEX_VERSION, mask_mtime=mask_mtime,
+                 patch_size=self.patch_size, cell=self.cell,
+                 points=self.points, desc=self.desc)
+        os.replace(temp_path, file_path)
+
+    @staticmethod
+    def load(file_path: str, patch_size: int, mask_mtime: float) -> Optional['RelocalizationIndex']:
+        """
+        从磁盘读取 版本、块大小或道路掩码有变化时返回None
+        :param file_path: 文件路径
+        :param patch_size: 需要的块边长
+        :param mask_mtime: 当前道路掩码的修改时间
+        :return:
+        """
+        if not os.path.exists(file_path):
+            return None
+        with np.load(file_path) as data:
+            if (int(data['version']) != _INDEX_VERSION
+                    or int(data['patch_size']) != patch_size
+                    or float(data['mask_mtime']) != mask_mtime):
+                return None
+            return RelocalizationIndex(int(data['patch_size']), int(data['cell']),
+                                       data['points'], data['desc'])
+
+
+_build_lock = threading.Lock()
+
+
+def get_index_file_path(prl_id: str) -> str:
+    """
+    索引文件的路径
+    :param prl_id: 区域ID
+    :return:
+    """
+    return os.path.join(os_utils.get_path_under_work_dir('.cache', 'relocalization'), f'{prl_id}.npz')
+
+
+def load_or_build(prl_id: str, lm_mask: MatLike, mask_path: str, patch_size: int) -> RelocalizationIndex:
+    """
+    读取磁盘上的索引 不存在或已失效时重新构建并保存
+    :param prl_id: 区域ID
+    :param lm_mask: 大地图道路掩码
+    :param mask_path: 道路掩码文件路径 用修改时间判断索引是否失效
+    :param patch_size: 块的边长 与小地图的边长一致
+    :return:
+    """
+    file_path = get_index_file_path(prl_id)
+    mask_mtime = os.path.getmtime(mask_path) if os.path.exists(mask_path) else 0
+    with _build_lock:
+        try:
+            index = RelocalizationIndex.load(file_path, patch_size, mask_mtime)
+            if index is not None:
+                return index
+        except Exception:
+            log.error(f'重定位索引读取失败 将重新构建 {file_path}', exc_info=True)
+
+        log.info(f'构建重定位索引 {prl_id}')
+        index = RelocalizationIndex.build(lm_mask, patch_size)
+        try:
+            index.save(file_path, mask_mtime)
+        except Exception:
+            log.error(f'重定位索引保存失败 {file_path}', exc_info=True)
+        return index
@@ -0,0 +1,157 @@
+import math
+from typing import Callable, List, Optional
+
+from one_dragon.base.geometry.point import Point
+from one_dragon.base.geometry.rectangle import Rect
+from sr_od.sr_map.sr_map_def import SpecialPoint
+
+
+class SpecialPointIndex:
+
+    def __init__(self, sp_list: List[SpecialPoint], cell_size: int = 256, linear_threshold: int = 64):
+        """
+        一个区域的特殊点的均匀网格索引 按大地图坐标分桶
+        查询只检查与范围相交的格子 结果保持原列表中的顺序 与逐个遍历的结果一致
+        特殊点很少时 遍历比查格子更快 不建网格
+        :param sp_list: 特殊点列表
+        :param cell_size: 格子边长
+        :param linear_threshold: 特殊点数量不超过这个值时 直接遍历
+        """
+        self.sp_list: List[SpecialPoint] = sp_list
+        self.cell_size: int = cell_size
+        self.linear: bool = len(sp_list) <= linear_threshold
+
+        self._grid: dict[tuple[int, int], List[int]] = {}  # 格子 -> 特殊点在原列表中的下标
+        for idx, sp in enumerate([] if self.linear else sp_list):
+            cell = self._cell_of(sp.lm_pos.x, sp.lm_pos.y)
+            if cell not in self._grid:
+                self._grid[cell] = []
+            self._grid[cell].append(idx)
+
+        if len(self._grid) > 0:
+            self._min_cx = min(i[0] for i in self._grid)
+            self._max_cx = max(i[0] for i in self._grid)
+            self._min_cy = min(i[1] for i in self._grid)
+            self._max_cy = max(i[1] for i in self._grid)
+
+    def _cell_of(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _collect(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """
+        与矩形相交的格子中的全部下标 未排序 未精确过滤
+        """
+        result: List[int] = []
+        if len(self._grid) == 0:
+            return result
+        cx1, cy1 = self._cell_of(x1, y1)
+        cx2, cy2 = self._cell_of(x2, y2)
+        cx1, cy1 = max(cx1, self._min_cx), max(cy1, self._min_cy)
+        cx2, cy2 = min(cx2, self._max_cx), min(cy2, self._max_cy)
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self._grid):  # 范围很大时 直接遍历有点的格子
+            for (cx, cy), idx_list in self._grid.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    result.extend(idx_list)
+            return result
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                idx_list = self._grid.get((cx, cy))
+                if idx_list is not None:
+                    result.extend(idx_list)
+        return result
+
+    def query_rect(self, rect: Rect) -> List[SpecialPoint]:
+        """
+        矩形内的特殊点 包含边界
+        :param rect: 矩形
+        :return:
+        """
+        if self.linear:
+            return [sp for sp in self.sp_list
+                    if rect.x1 <= sp.lm_pos.x <= rect.x2 and rect.y1 <= sp.lm_pos.y <= rect.y2]
+        idx_list = [
+            idx for idx in self._collect(rect.x1, rect.y1, rect.x2, rect.y2)
+            if rect.x1 <= self.sp_list[idx].lm_pos.x <= rect.x2 and rect.y1 <= self.sp_list[idx].lm_pos.y <= rect.y2
+        ]
+        idx_list.sort()
+        return [self.sp_list[idx] for idx in idx_list]
+
+    def query_radius(self, center: Point, radius: float) -> List[SpecialPoint]:
+        """
+        与中心距离不超过半径的特殊点
+        :param center: 中心
+        :param radius: 半径
+        :return:
+        """
+        if self.linear:
+            return [sp for sp in self.sp_list
+                    if math.hypot(sp.lm_pos.x - center.x, sp.lm_pos.y - center.y) <= radius]
+        idx_list = [
+            idx for idx in self._collect(center.x - radius, center.y - radius, center.x + radius, center.y + radius)
+            if math.hypot(self.sp_list[idx].lm_pos.x - center.x, self.sp_list[idx].lm_pos.y - center.y) <= radius
+        ]
+        idx_list.sort()
+        return [self.sp_list[idx] for idx in idx_list]
+
+    def nearest(self, pos: Point,
+                sp_filter: Optional[Callable[[SpecialPoint], bool]] = None) -> Optional[SpecialPoint]:
+        """
+        最近的特殊点 从所在格子开始一圈圈往外找
+        距离相同时 返回原列表中靠前的
+        :param pos: 坐标
+        :param sp_filter: 只考虑符合条件的特殊点
+        :return:
+        """
+        if self.linear:
+            return self._nearest_linear(pos, sp_filter)
+        if len(self._grid) == 0:
+            return None
+        cx, cy = self._cell_of(pos.x, pos.y)
+        max_ring = max(abs(cx - self._min_cx), abs(cx - self._max_cx), abs(cy - self._min_cy), abs(cy - self._max_cy))
+
+        best_idx: int = -1
+        best_dis: float = 0
+        for ring in range(max_ring + 1):
+            # 第 ring 圈的格子到 pos 的距离至少是 (ring-1)*cell_size 已经找到的更近时可以停止
+            if best_idx >= 0 and best_dis < (ring - 1) * self.cell_size:
+                break
+            for cell in self._ring_cells(cx, cy, ring):
+                for idx in self._grid.get(cell, []):
+                    sp = self.sp_list[idx]
+                    if sp_filter is not None and not sp_filter(sp):
+                        continue
+                    dis = math.hypot(sp.lm_pos.x - pos.x, sp.lm_pos.y - pos.y)
+                    if best_idx < 0 or dis < best_dis or (dis == best_dis and idx < best_idx):
+                        best_idx = idx
+                        best_dis = dis
+
+        return self.sp_list[best_idx] if best_idx >= 0 else None
+
+    def _nearest_linear(self, pos: Point,
+                        sp_filter: Optional[Callable[[SpecialPoint], bool]] = None) -> Optional[SpecialPoint]:
+        best: Optional[SpecialPoint] = None
+        best_dis: float = 0
+        for sp in self.sp_list:
+            if sp_filter is not None and not sp_filter(sp):
+                continue
+            dis = math.hypot(sp.lm_pos.x - pos.x, sp.lm_pos.y - pos.y)
+            if best is None or dis < best_dis:
+                best = sp
+                best_dis = dis
+        return best
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int) -> List[tuple[int, int]]:
+        """
+        以 (cx, cy) 为中心 第 ring 圈的格子
+        """
+        if ring == 0:
+            return [(cx, cy)]
+        cells = []
+        for x in range(cx - ring, cx + ring + 1):
+            cells.append((x, cy - ring))
+            cells.append((x, cy + ring))
+        for y in range(cy - ring + 1, cy + ring):
+            cells.append((cx - ring, y))
+            cells.append((cx + ring, y))
+        return cells
@@ -0,0 +1,97 @@
+from typing import List, Optional
+
+import cv2
+from cv2.typing import MatLike
+
+from one_dragon.base.geometry.point import Point
+from one_dragon.base.screen.frame_context import FrameContext
+from sr_od.config.game_config import MiniMapPos
+from sr_od.sr_map import mini_map_utils
+from sr_od.sr_map.mini_map_info import MiniMapInfo
+
+
+class SrFrameContext(FrameContext):
+
+    def __init__(self, screen: MatLike, mm_pos: MiniMapPos, screenshot_time: Optional[float] = None):
+        """
+        大世界一张截图的分析上下文
+        在 FrameContext 的基础上 增加小地图相关的中间结果
+        移动、威胁判断、画面识别拿到的是同一个对象 小地图只裁剪和分析一次
+        :param screen: 游戏画面
+        :param mm_pos: 小地图位置
+        :param screenshot_time: 截图时间
+        """
+        FrameContext.__init__(self, screen, screenshot_time)
+        self.mm_pos: MiniMapPos = mm_pos
+
+    @property
+    def mm(self) -> MatLike:
+        """
+        小地图的截图
+        """
+        return self.get_or_create('mm', lambda: mini_map_utils.cut_mini_map(self.screen, self.mm_pos))
+
+    @property
+    def mm_info(self) -> MiniMapInfo:
+        """
+        小地图分析结果 包含小箭头掩码、朝向、去除雷达的小地图、圆形掩码
+        """
+        return self.get_or_create('mm_info', lambda: mini_map_utils.analyse_mini_map(self.mm))
+
+    @property
+    def mm_arrow_mask(self) -> MatLike:
+        """
+        整张小地图的小箭头掩码
+        """
+        return self.mm_info.arrow_mask
+
+    @property
+    def mm_circle(self) -> MatLike:
+        """
+        只保留圆形内部分的去除雷达的小地图
+        """
+        def _circle() -> MatLike:
+            mm_info = self.mm_info
+            return cv2.bitwise_and(mm_info.raw_del_radio, mm_info.raw_del_radio, mask=mm_info.circle_mask)
+        return self.get_or_create('mm_circle', _circle)
+
+    @property
+    def mm_gray(self) -> MatLike:
+        """
+        去除雷达的小地图的灰度图
+        """
+        return self.mm_info.gray_del_radio
+
+    def road_mask(self, another_floor: bool = False) -> MatLike:
+        """
+        小地图的道路掩码 第一次计算时的楼层参数生效
+        :param another_floor: 可能有另一层的地图
+        :return:
+        """
+        def _road_mask() -> MatLike:
+            mini_map_utils.init_road_mask_for_world_patrol(self.mm_info, another_floor=another_floor)
+            return self.mm_info.road_mask
+        return self.get_or_create('road_mask', _road_mask)
+
+    def is_under_attack(self, strict: bool = False) -> bool:
+        """
+        根据小地图边缘 判断是否被锁定
+        :param strict: 是否严格判断 只有红色的框认为是被锁定
+        :return:
+        """
+        return self.get_or_create(('under_attack', strict),
+                                  lambda: mini_map_utils.is_under_attack(self.mm, strict=strict))
+
+    @property
+    def enemy_pos_list(self) -> List[Point]:
+        """
+        小地图上敌人的位置 以小地图中心为 (0,0)
+        """
+        return self.get_or_create('enemy_pos_list', lambda: mini_map_utils.get_enemy_pos(self.mm_info))
+
+    @property
+    def with_enemy_nearby(self) -> bool:
+        """
+        半个小地图内是否有敌人
+        """
+        return mini_map_utils.with_enemy_nearby_new(self.mm_info, enemy_pos=self.enemy_pos_list)
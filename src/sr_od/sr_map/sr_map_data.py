@@ -1,5 +1,6 @@
 import os
 import shutil
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Optional
 
 from cv2.typing import MatLike
@@ -7,11 +8,15 @@ from cv2.typing import MatLike
 from one_dragon.base.config.yaml_operator import YamlOperator
 from one_dragon.base.geometry.point import Point
 from one_dragon.base.geometry.rectangle import Rect
-from one_dragon.utils import os_utils, str_utils, cv2_utils, cal_utils
+from one_dragon.utils import os_utils, str_utils, cv2_utils
 from one_dragon.utils.i18_utils import gt
 from one_dragon.utils.log_utils import log
 from sr_od.app.world_patrol import world_patrol_route_utils
+from sr_od.sr_map import relocalization_index
+from sr_od.sr_map.large_map_cache import LargeMapCache, read_image_mmap
 from sr_od.sr_map.large_map_info import LargeMapInfo
+from sr_od.sr_map.relocalization_index import RelocalizationIndex
+from sr_od.sr_map.special_point_index import SpecialPointIndex
 from sr_od.sr_map.sr_map_def import Planet, Region, RegionSet, SpecialPoint
 
 
@@ -27,10 +32,14 @@ class SrMapData:
 
         self.sp_list: List[SpecialPoint] = []
         self.region_2_sp: dict[str, List[SpecialPoint]] = {}
+        self.region_2_sp_index: dict[str, SpecialPointIndex] = {}
 
         self.load_map_data()
 
-        self.large_map_info_map: dict[str, LargeMapInfo] = {}
+        self.large_map_cache: LargeMapCache = LargeMapCache()
+        self._prefetch_executor = ThreadPoolExecutor(thread_name_prefix='sr_od_large_map_prefetch', max_workers=1)
+        self.relocalization_index_map: dict[str, RelocalizationIndex] = {}
+        self._relocalization_future_map: dict[str, Future] = {}  # 正在后台构建的重定位索引
 
     def load_map_data(self) -> None:
         """
@@ -335,6 +344,8 @@ class SrMapData:
 
                 self.region_2_sp[real_region.pr_id].append(sp)
 
+        self.region_2_sp_index = {pr_id: SpecialPointIndex(sp_list) for pr_id, sp_list in self.region_2_sp.items()}
+
     def save_special_point_data(
             self,
             region: Region,
@@ -566,18 +577,48 @@ class SrMapData:
         :param rect: 矩形 为空时返回全部
         :return: 特殊点
         """
-        sp_list = self.region_2_sp.get(region.pr_id)
         sp_map = {}
+        if rect is None:
+            sp_list = self.region_2_sp.get(region.pr_id)
+        else:
+            sp_index = self.region_2_sp_index.get(region.pr_id)
+            sp_list = sp_index.query_rect(rect) if sp_index is not None else None
         if sp_list is None or len(sp_list) == 0:
             return sp_map
         for sp in sp_list:
-            if rect is None or cal_utils.in_rect(sp.lm_pos, rect):
-                if sp.template_id not in sp_map:
-                    sp_map[sp.template_id] = []
-                sp_map[sp.template_id].append(sp)
+            if sp.template_id not in sp_map:
+                sp_map[sp.template_id] = []
+            sp_map[sp.template_id].append(sp)
 
         return sp_map
 
+    def get_sp_in_radius(self, region: Region, center: Point, radius: float) -> List[SpecialPoint]:
+        """
+        获取区域内与中心距离不超过半径的特殊点
+        :param region: 区域
+        :param center: 中心 大地图坐标
+        :param radius: 半径
+        :return: 特殊点
+        """
+        sp_index = self.region_2_sp_index.get(region.pr_id)
+        return sp_index.query_radius(center, radius) if sp_index is not None else []
+
+    def get_nearest_sp(self, region: Region, pos: Point,
+                       template_id_prefix: Optional[str] = None) -> Optional[SpecialPoint]:
+        """
+        获取区域内离坐标最近的特殊点 用于路线规划
+        :param region: 区域
+        :param pos: 大地图坐标
+        :param template_id_prefix: 只考虑模板ID以此开头的特殊点 例如 mm_tp
+        :return: 特殊点
+        """
+        sp_index = self.region_2_sp_index.get(region.pr_id)
+        if sp_index is None:
+            return None
+        if template_id_prefix is None:
+            return sp_index.nearest(pos)
+        return sp_index.nearest(pos, lambda sp: sp.template_id.startswith(template_id_prefix))
+
     def get_region_list_by_planet(self, planet: Planet) -> List[Region]:
         """
         获取星球下的所有区域
@@ -592,12 +633,26 @@ class SrMapData:
         :param region: 对应区域
         :return: 地图图片
         """
+        self.large_map_cache.remove(region.prl_id)
+        return self.get_large_map_info(region)
+
+    def _read_large_map_info(self, region: Region) -> LargeMapInfo:
+        """
+        从磁盘读取大地图
+        :param region: 对应区域
+        :return:
+        """
         dir_path = SrMapData.get_large_map_dir_path(region)
+        raw_path = os.path.join(dir_path, 'raw.webp')
+        mask_path = os.path.join(dir_path, 'mask.png')
         info = LargeMapInfo()
         info.region = region
-        info.raw = cv2_utils.read_image(os.path.join(dir_path, 'raw.webp'))
-        info.mask = cv2_utils.read_image(os.path.join(dir_path, 'mask.png'))
-        self.large_map_info_map[region.prl_id] = info
+        if self.large_map_cache.use_mmap:
+            info.raw = read_image_mmap(raw_path, f'{region.prl_id}_raw')
+            info.mask = read_image_mmap(mask_path, f'{region.prl_id}_mask')
+        else:
+            info.raw = cv2_utils.read_image(raw_path)
+            info.mask = cv2_utils.read_image(mask_path)
         return info
 
     def get_large_map_info(self, region: Region) -> LargeMapInfo:
@@ -606,11 +661,66 @@ class SrMapData:
         :param region: 区域
         :return: 地图图片
         """
-        if region.prl_id not in self.large_map_info_map:
-            # 尝试加载一次
-            return self.load_large_map_info(region)
-        else:
-            return self.large_map_info_map[region.prl_id]
+        return self.large_map_cache.get_or_load(region.prl_id, lambda: self._read_large_map_info(region))
+
+    def prefetch_large_map_info(self, region: Optional[Region], with_features: bool = True) -> Optional[Future]:
+        """
+        在后台线程中预加载大地图 例如在当前路线运行时 加载下一条路线的区域
+        :param region: 区域
+        :param with_features: 是否同时计算灰度图和特征点
+        :return:
+        """
+        if region is None:
+            return None
+        return self._prefetch_executor.submit(self._prefetch_large_map_info, region, with_features)
+
+    def _prefetch_large_map_info(self, region: Region, with_features: bool) -> None:
+        try:
+            info = self.get_large_map_info(region)
+            if with_features:
+                _ = info.gray
+                _ = info.features
+        except Exception:
+            log.error(f'预加载大地图失败 {region.prl_id}', exc_info=True)
+
+    def get_relocalization_index(self, region: Region, patch_size: int) -> RelocalizationIndex:
+        """
+        获取某张大地图的重定位索引 第一次使用时从磁盘读取或构建
+        :param region: 区域
+        :param patch_size: 块的边长 与小地图的边长一致
+        :return:
+        """
+        index = self.relocalization_index_map.get(region.prl_id)
+        if index is not None and index.patch_size == patch_size:
+            return index
+        lm_info = self.get_large_map_info(region)
+        index = relocalization_index.load_or_build(region.prl_id, lm_info.mask,
+                                                   SrMapData.get_map_path(region, 'mask'), patch_size)
+        self.relocalization_index_map[region.prl_id] = index
+        return index
+
+    def get_relocalization_index_if_ready(self, region: Region, patch_size: int) -> Optional[RelocalizationIndex]:
+        """
+        获取某张大地图的重定位索引 还没有时在后台线程中读取或构建 不阻塞调用方
+        用于移动中 不能在指令循环里等待构建
+        :param region: 区域
+        :param patch_size: 块的边长 与小地图的边长一致
+        :return: 还没有准备好时返回None
+        """
+        index = self.relocalization_index_map.get(region.prl_id)
+        if index is not None and index.patch_size == patch_size:
+            return index
+        future = self._relocalization_future_map.get(region.prl_id)
+        if future is None or future.done():
+            self._relocalization_future_map[region.prl_id] = self._prefetch_executor.submit(
+                self._prefetch_relocalization_index, region, patch_size)
+        return None
+
+    def _prefetch_relocalization_index(self, region: Region, patch_size: int) -> None:
+        try:
+            self.get_relocalization_index(region, patch_size)
+        except Exception:
+            log.error(f'预加载重定位索引失败 {region.prl_id}', exc_info=True)
 
     @staticmethod
     def get_large_map_dir_path(region: Region):